@@ -44,17 +44,24 @@ logger = logging.getLogger("AiShortsMain")
 # --------------------------------------------------------------------------- #
 # Imports das camadas de domínio
 # --------------------------------------------------------------------------- #
+from src.config.settings import config  # noqa: E402
 from src.core.openrouter_client import openrouter_client  # noqa: E402
 from src.generators.prompt_engineering import ThemeCategory  # noqa: E402
 from src.generators.script_generator import ScriptGenerator  # noqa: E402
 from src.generators.theme_generator import ThemeGenerator  # noqa: E402
 from src.pipeline.orchestrator import AiShortsOrchestrator  # noqa: E402
+from src.pipeline.services.broll_acquisition_service import BrollAcquisitionService  # noqa: E402
+from src.pipeline.services.broll_prefetch_service import BrollPrefetchService, BrollQueryHistory  # noqa: E402
 from src.pipeline.services.broll_query_service import BrollQueryService  # noqa: E402
 from src.pipeline.services.caption_service import CaptionService  # noqa: E402
 from src.tts.kokoro_tts import KokoroTTSClient  # noqa: E402
+from src.utils.download_scheduler import DownloadPriority, get_download_scheduler  # noqa: E402
 from src.utils.translator import translator  # noqa: E402
 from src.video.extractors.youtube_extractor import YouTubeExtractor  # noqa: E402
+from src.video.library.asset_library import BrollAssetLibrary  # noqa: E402
 from src.video.matching.semantic_analyzer import SemanticAnalyzer  # noqa: E402
+from src.video.matching.thumbnail_prescreener import ThumbnailCache, ThumbnailPrescreener  # noqa: E402
+from src.video.processing.mezzanine import IntermediateSpec, MezzanineRenderer  # noqa: E402
 from src.video.processing.video_processor import VideoProcessor  # noqa: E402
 from src.video.sync.audio_video_synchronizer import AudioVideoSynchronizer  # noqa: E402
 
@@ -62,6 +69,44 @@ from src.video.sync.audio_video_synchronizer import AudioVideoSynchronizer  # no
 # --------------------------------------------------------------------------- #
 # Fábrica do orquestrador
 # --------------------------------------------------------------------------- #
+def create_prefetch_service(orchestrator: AiShortsOrchestrator) -> BrollPrefetchService:
+    """Cria o serviço que mantém o estoque de B-roll por categoria em segundo plano."""
+    download_scheduler = get_download_scheduler()
+    prefetch_acquisition = BrollAcquisitionService(
+        orchestrator.youtube_extractor,
+        asset_library=orchestrator.asset_library,
+        max_download_workers=1,
+        download_priority=DownloadPriority.PREFETCH,
+    )
+    return BrollPrefetchService(
+        prefetch_acquisition,
+        orchestrator.asset_library,
+        orchestrator.broll_query_service.query_history,
+        idle_check=download_scheduler.is_idle,
+        # Não baixa estoque enquanto um run usa a rede e a biblioteca (TTS e render incluídos)
+        busy_check=orchestrator.is_running,
+    )
+
+
+def create_mezzanine_func():
+    """Retorna a função que gera o intermediário de edição na entrada da biblioteca (ou None)."""
+    settings = config.broll_library
+    if not settings.mezzanine_enabled:
+        return None
+
+    renderer = MezzanineRenderer(str(config.storage.temp_dir / "mezzanine"), max_workers=1)
+    spec = IntermediateSpec(
+        crf=settings.mezzanine_crf,
+        gop_frames=settings.mezzanine_gop_frames,
+        all_intra=settings.mezzanine_all_intra,
+    )
+
+    def build(source_path: str, output_path: str) -> None:
+        renderer.render_intermediate(source_path, spec, output_path=output_path)
+
+    return build
+
+
 def create_orchestrator() -> AiShortsOrchestrator:
     """Instancia e configura todas as dependências do pipeline."""
     logger.info("🚀 Inicializando dependências do pipeline AiShorts v2.0...")
@@ -69,12 +114,29 @@ def create_orchestrator() -> AiShortsOrchestrator:
     theme_generator = ThemeGenerator()
     script_generator = ScriptGenerator()
     tts_client = KokoroTTSClient()
-    youtube_extractor = YouTubeExtractor()
+    download_scheduler = get_download_scheduler()
+    youtube_extractor = YouTubeExtractor(
+        download_scheduler=download_scheduler,
+        concurrent_fragments=config.download.concurrent_fragments,
+        fragment_retries=config.download.fragment_retries,
+        http_chunk_size=config.download.http_chunk_size,
+    )
     semantic_analyzer = SemanticAnalyzer()
     audio_video_sync = AudioVideoSynchronizer()
     video_processor = VideoProcessor()
-    broll_query_service = BrollQueryService(openrouter_client)
+    broll_query_service = BrollQueryService(
+        openrouter_client,
+        query_history=BrollQueryHistory("data/cache/broll_query_history.json"),
+    )
     caption_service = CaptionService()
+    asset_library = BrollAssetLibrary(
+        "data/broll",
+        probe_func=video_processor.get_video_info,
+        mezzanine_func=create_mezzanine_func(),
+    )
+    thumbnail_prescreener = ThumbnailPrescreener(
+        ThumbnailCache("data/cache/thumbnails", scheduler=download_scheduler)
+    )
 
     logger.info("✅ Dependências inicializadas com sucesso!")
 
@@ -89,6 +151,8 @@ def create_orchestrator() -> AiShortsOrchestrator:
         video_processor=video_processor,
         broll_query_service=broll_query_service,
         caption_service=caption_service,
+        asset_library=asset_library,
+        thumbnail_prescreener=thumbnail_prescreener,
         logger=logging.getLogger("AiShortsOrchestrator"),
     )
 
@@ -102,9 +166,14 @@ def main():
     print("=" * 50)
 
     orchestrator = create_orchestrator()
+    prefetch_service = create_prefetch_service(orchestrator)
+    prefetch_service.start(interval=60.0)
 
     print("\n🚀 Executando pipeline completo...")
-    results = orchestrator.run(theme_category=ThemeCategory.ANIMALS)
+    try:
+        results = orchestrator.run(theme_category=ThemeCategory.ANIMALS)
+    finally:
+        prefetch_service.stop(timeout=5.0)
 
     if results.get("status") == "success":
         print("\n🎉 SUCESSO! Vídeo gerado com todas as etapas.")
@@ -99,6 +99,33 @@ class RetrySettings(BaseSettings):
     retry_delay: float = Field(default=1.0, env="RETRY_DELAY")
     rate_limit_per_minute: int = Field(default=20, env="RATE_LIMIT_PER_MINUTE")
 
+class DownloadSettings(BaseSettings):
+    """Configurações do agendador de downloads de mídia."""
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="ignore"
+    )
+    
+    max_bytes_per_second: int = Field(default=0, env="DOWNLOAD_MAX_BYTES_PER_SECOND")  # 0 = ilimitado
+    max_concurrent: int = Field(default=6, env="DOWNLOAD_MAX_CONCURRENT")
+    max_per_origin: int = Field(default=3, env="DOWNLOAD_MAX_PER_ORIGIN")
+    concurrent_fragments: int = Field(default=4, env="DOWNLOAD_CONCURRENT_FRAGMENTS")
+    fragment_retries: int = Field(default=10, env="DOWNLOAD_FRAGMENT_RETRIES")
+    http_chunk_size: int = Field(default=10 * 1024 * 1024, env="DOWNLOAD_HTTP_CHUNK_SIZE")  # 0 = sem chunks
+
+class BrollLibrarySettings(BaseSettings):
+    """Configurações da biblioteca local de B-roll."""
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="ignore"
+    )
+    
+    # Cópia intermediária de edição gerada na entrada do clip (custa disco extra)
+    mezzanine_enabled: bool = Field(default=False, env="BROLL_MEZZANINE_ENABLED")
+    mezzanine_all_intra: bool = Field(default=False, env="BROLL_MEZZANINE_ALL_INTRA")
+    mezzanine_gop_frames: int = Field(default=15, env="BROLL_MEZZANINE_GOP_FRAMES")
+    mezzanine_crf: int = Field(default=16, env="BROLL_MEZZANINE_CRF")
+
 class StorageSettings(BaseSettings):
     """Configurações de armazenamento."""
     model_config = SettingsConfigDict(
@@ -146,6 +173,8 @@ class AiShortsConfig:
         self.theme_gen = ThemeGeneratorSettings()
         self.script_gen = ScriptGeneratorSettings()
         self.retry = RetrySettings()
+        self.download = DownloadSettings()
+        self.broll_library = BrollLibrarySettings()
         self.storage = StorageSettings()
         
         # Configurar debug baseado no ambiente
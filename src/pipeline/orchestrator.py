@@ -1,7 +1,9 @@
 import contextlib
 import json
 import logging
+import threading
 import time
+import uuid
 import wave
 from dataclasses import replace
 from datetime import datetime
@@ -9,11 +11,14 @@ from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
 
 from src.generators.prompt_engineering import ThemeCategory
+from src.pipeline.services.broll_acquisition_service import BrollAcquisitionService
+from src.video.library.asset_library import BrollAssetLibrary
 from src.video.generators.final_video_composer import (
     FinalVideoComposer,
     TemplateConfig,
     VideoSegment,
 )
+from src.video.processing.preview import PreviewResult
 from src.utils.exceptions import ScriptGenerationError
 
 
@@ -33,7 +38,12 @@ class AiShortsOrchestrator:
         video_processor,
         broll_query_service,
         caption_service,
+        broll_acquisition_service: Optional[BrollAcquisitionService] = None,
+        asset_library: Optional[BrollAssetLibrary] = None,
+        thumbnail_prescreener=None,
         video_composer_factory: Optional[Callable[[], FinalVideoComposer]] = None,
+        render_preview: bool = False,
+        preview_approver: Optional[Callable[[PreviewResult], bool]] = None,
         logger: Optional[logging.Logger] = None,
     ):
         self.theme_generator = theme_generator
@@ -46,7 +56,20 @@ class AiShortsOrchestrator:
         self.video_processor = video_processor
         self.broll_query_service = broll_query_service
         self.caption_service = caption_service
+        self.asset_library = asset_library
+        self.broll_acquisition_service = broll_acquisition_service or BrollAcquisitionService(
+            youtube_extractor,
+            asset_library=asset_library,
+            thumbnail_prescreener=thumbnail_prescreener,
+        )
         self._composer_factory = video_composer_factory or (lambda: FinalVideoComposer())
+        # Prévia em rascunho antes do render final; o aprovador pode cancelar o render
+        self.render_preview = render_preview or preview_approver is not None
+        self.preview_approver = preview_approver
+        self.last_preview: Optional[PreviewResult] = None
+        # Runs em andamento (podem se sobrepor na mesma instância)
+        self._active_runs = 0
+        self._runs_lock = threading.Lock()
 
         self.logger = logger or logging.getLogger(self.__class__.__name__)
         self._setup_directories()
@@ -54,14 +77,33 @@ class AiShortsOrchestrator:
     # --------------------------------------------------------------------- #
     # Public API
     # --------------------------------------------------------------------- #
+    def is_running(self) -> bool:
+        """Indica se há um run em andamento (o prefetch de B-roll espera terminar)."""
+        with self._runs_lock:
+            return self._active_runs > 0
+
     def run(self, theme_category: ThemeCategory = ThemeCategory.ANIMALS) -> Dict[str, Any]:
         """Executa o pipeline completo e retorna os resultados das etapas."""
+        # Identifica o run no agendador de downloads e nos pins da biblioteca
+        run_id = f"run-{uuid.uuid4().hex}"
+        with self._runs_lock:
+            self._active_runs += 1
+        try:
+            return self._run(theme_category, run_id)
+        finally:
+            # Libera os clips da biblioteca fixados durante o run
+            self.broll_acquisition_service.release(run_id)
+            with self._runs_lock:
+                self._active_runs -= 1
+
+    def _run(self, theme_category: ThemeCategory, run_id: str) -> Dict[str, Any]:
         self.logger.info("=" * 70)
         self.logger.info("🎬 INICIANDO PIPELINE AISHORTS V2.0 - GERAÇÃO DE VÍDEO")
         self.logger.info("=" * 70)
 
         start_time = time.time()
         results: Dict[str, Any] = {}
+        self.last_preview = None
 
         try:
             theme_obj, theme_result = self._generate_theme(theme_category)
@@ -71,7 +113,8 @@ class AiShortsOrchestrator:
             results["script"] = script_result
 
             broll_queries = self.broll_query_service.generate_queries(
-                script_result["content_en"]["plain_text"]
+                script_result["content_en"]["plain_text"],
+                category=theme_category.value,
             )
             results["script"]["broll_queries"] = broll_queries
             if broll_queries:
@@ -103,6 +146,8 @@ class AiShortsOrchestrator:
             broll_result = self._extract_broll(
                 theme_result["content_en"],
                 search_queries=broll_queries,
+                category=theme_category.value,
+                run_id=run_id,
             )
             results["broll"] = broll_result
             self.logger.info(
@@ -120,7 +165,12 @@ class AiShortsOrchestrator:
                 broll_result["videos"],
                 audio_result["file_path"],
                 captions=captions,
+                run_id=run_id,
             )
+            if self.last_preview is not None:
+                results["preview"] = self.last_preview.to_dict()
+                if self.last_preview.approved is False:
+                    return self._fail_results(results, start_time, "Preview rejected")
             final_video_exists = bool(final_video_path and Path(final_video_path).exists())
 
             results["final"] = {
@@ -315,7 +365,14 @@ class AiShortsOrchestrator:
             "voice": result["voice"],
         }
 
-    def _extract_broll(self, theme_content: str, *, search_queries: Optional[List[str]] = None):
+    def _extract_broll(
+        self,
+        theme_content: str,
+        *,
+        search_queries: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        run_id: Optional[str] = None,
+    ):
         self.logger.info("🎬 ETAPA 3: Extração de B-roll do YouTube...")
 
         keywords = self.semantic_analyzer.extract_keywords(theme_content) if theme_content else []
@@ -330,68 +387,36 @@ class AiShortsOrchestrator:
 
         self.logger.info("🔍 Estratégia de busca para B-roll: %s", queries)
 
-        downloaded_videos: List[str] = []
-        used_queries: List[str] = []
-        visited_ids: set[str] = set()
         output_dir = Path("outputs/video")
+        # Clips do run não entram no estoque de categorias e ficam fixados até o fim do run
+        acquisition = self.broll_acquisition_service.acquire(
+            queries,
+            str(output_dir),
+            target_count=3,
+            owner=run_id,
+            category=category,
+            add_to_pool=False,
+            pin=True,
+        )
 
-        for query in queries:
-            if len(downloaded_videos) >= 3:
-                break
-
-            candidates = self.youtube_extractor.search_videos(query, max_results=3)
-            if not candidates:
-                self.logger.warning("⚠️ Nenhum resultado para query '%s'", query)
-                continue
-
-            used_queries.append(query)
-
-            for video in candidates:
-                if len(downloaded_videos) >= 3:
-                    break
-
-                video_id = video.get("id")
-                if video_id and video_id in visited_ids:
-                    continue
-
-                duration = video.get("duration")
-                if duration and duration > 180:
-                    self.logger.info(
-                        "⏭️ Ignorando vídeo muito longo (%.1fs): %s",
-                        duration,
-                        video.get("title", "sem título"),
-                    )
-                    continue
-
-                try:
-                    real_path = self.youtube_extractor.download_video(video["url"], str(output_dir))
-                    downloaded_videos.append(real_path)
-                    if video_id:
-                        visited_ids.add(video_id)
-                    self.logger.info(
-                        "📥 Vídeo baixado (%d/3): %s",
-                        len(downloaded_videos),
-                        real_path,
-                    )
-                except Exception as error:
-                    self.logger.warning(
-                        "⚠️ Erro ao baixar '%s': %s",
-                        video.get("title", "sem título"),
-                        error,
-                    )
-
-            if len(downloaded_videos) >= 3:
-                break
-
-        if not downloaded_videos:
+        if not acquisition.clips:
             raise RuntimeError("Nenhum vídeo encontrado ou baixado com as queries fornecidas")
 
+        self.logger.info(
+            "📥 B-roll adquirido: %d vídeos (%d da biblioteca local, busca %.2fs, download %.2fs)",
+            len(acquisition.clips),
+            acquisition.library_hits,
+            acquisition.search_time,
+            acquisition.download_time,
+        )
+
         return {
             "success": True,
-            "videos": downloaded_videos,
+            "videos": acquisition.videos,
             "queries": queries,
             "keywords": keywords,
-            "used_queries": used_queries,
+            "used_queries": acquisition.used_queries,
+            "acquisition": acquisition.to_report(),
         }
 
     def _analyze_content(self, theme_content: str) -> Dict[str, Any]:
@@ -425,6 +450,7 @@ class AiShortsOrchestrator:
         audio_path: str,
         *,
         captions: Optional[List[Dict[str, Any]]] = None,
+        run_id: Optional[str] = None,
     ) -> Optional[str]:
         self.logger.info("🎞️ ETAPA 6: Processamento Final com FinalVideoComposer...")
 
@@ -475,6 +501,14 @@ class AiShortsOrchestrator:
             "captions_count": len(captions or []),
         }
 
+        if self.render_preview:
+            preview = self._render_preview(composer, audio_path, segments, template_config, captions, run_id)
+            if preview is not None:
+                metadata["preview_path"] = preview.video_path
+                if preview.approved is False:
+                    self.logger.warning("⚠️ Prévia reprovada; render final cancelado: %s", preview.video_path)
+                    return None
+
         try:
             final_video_path = composer.compose_final_video(
                 audio_path=audio_path,
@@ -491,6 +525,37 @@ class AiShortsOrchestrator:
             print(f"❌ ERRO NA COMPOSIÇÃO FINAL: {error}")
             return None
 
+    def _render_preview(
+        self,
+        composer: FinalVideoComposer,
+        audio_path: str,
+        segments: List[VideoSegment],
+        template_config: TemplateConfig,
+        captions: Optional[List[Dict[str, Any]]],
+        run_id: Optional[str] = None,
+    ) -> Optional[PreviewResult]:
+        """Renderiza a prévia em rascunho e a submete ao aprovador (se houver)."""
+        self.logger.info("👀 Prévia em rascunho antes do render final...")
+        try:
+            preview = composer.compose_preview(
+                audio_path=audio_path,
+                video_segments=segments,
+                template_config=template_config,
+                captions=captions,
+                output_path=f"outputs/final/video_preview_{run_id or 'aishorts'}.mp4",
+            )
+        except Exception as error:
+            self.logger.warning("⚠️ Falha na prévia, seguindo para o render final: %s", error)
+            return None
+
+        self.logger.info("✅ Prévia gerada em %.1fs: %s", preview.elapsed, preview.video_path)
+        if preview.contact_sheet_path:
+            self.logger.info("🖼️ Folha de contatos: %s", preview.contact_sheet_path)
+        if self.preview_approver is not None:
+            preview.approved = bool(self.preview_approver(preview))
+        self.last_preview = preview
+        return preview
+
     # --------------------------------------------------------------------- #
     # Helpers
     # --------------------------------------------------------------------- #
@@ -0,0 +1,621 @@
+import logging
+import math
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from src.utils.download_scheduler import DownloadPriority
+from src.video.library.asset_library import DEFAULT_FORMAT_KEY, BrollAssetLibrary
+
+
+@dataclass
+class BrollCandidate:
+    """Vídeo candidato a B-roll, com atribuição às queries que o encontraram."""
+
+    video_id: str
+    url: str
+    title: str
+    duration: Optional[float]
+    view_count: Optional[int]
+    queries: List[str] = field(default_factory=list)
+    best_rank: int = 0
+    score: float = 0.0
+    info: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class AcquiredClip:
+    """Clip baixado com sucesso."""
+
+    path: str
+    video_id: str
+    title: str
+    queries: List[str]
+    score: float
+    download_time: float
+    source: str = "download"
+    # Arquivo registrado na biblioteca local (não é removido ao descartar o clip)
+    in_library: bool = False
+
+
+@dataclass
+class BrollAcquisitionResult:
+    """Resultado da etapa de aquisição de B-roll."""
+
+    clips: List[AcquiredClip]
+    queries: List[str]
+    used_queries: List[str]
+    failed: List[Dict[str, Any]]
+    cancelled: List[str]
+    search_time: float
+    download_time: float
+    prescreen_rejected: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def videos(self) -> List[str]:
+        return [clip.path for clip in self.clips]
+
+    @property
+    def library_hits(self) -> int:
+        return sum(1 for clip in self.clips if clip.source == "library")
+
+    def to_report(self) -> Dict[str, Any]:
+        return {
+            "attribution": [
+                {
+                    "path": clip.path,
+                    "video_id": clip.video_id,
+                    "title": clip.title,
+                    "queries": clip.queries,
+                    "score": round(clip.score, 3),
+                    "download_time": round(clip.download_time, 2),
+                    "source": clip.source,
+                }
+                for clip in self.clips
+            ],
+            "library_hits": self.library_hits,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "prescreen_rejected": self.prescreen_rejected,
+            "search_time": round(self.search_time, 2),
+            "download_time": round(self.download_time, 2),
+        }
+
+
+class BrollAcquisitionService:
+    """Busca e baixa B-roll do YouTube em paralelo, com concorrência limitada."""
+
+    SEARCH_HOST = "www.youtube.com"
+    # Intervalo (s) em que os downloads verificam o `cancel_event` de `acquire`
+    CANCEL_POLL_SECONDS = 0.5
+
+    def __init__(
+        self,
+        youtube_extractor,
+        *,
+        results_per_query: int = 3,
+        max_search_workers: int = 4,
+        max_download_workers: int = 3,
+        max_connections_per_host: int = 4,
+        max_video_duration: float = 180.0,
+        clip_validator: Optional[Callable[[str], bool]] = None,
+        asset_library: Optional[BrollAssetLibrary] = None,
+        thumbnail_prescreener=None,
+        relevance_weight: float = 0.5,
+        download_priority: DownloadPriority = DownloadPriority.CRITICAL,
+    ):
+        """
+        Args:
+            youtube_extractor: Extrator com `search_videos` e `download_video`.
+            results_per_query: Resultados solicitados por query.
+            max_search_workers: Buscas simultâneas.
+            max_download_workers: Downloads simultâneos.
+            max_connections_per_host: Conexões simultâneas por host (busca + download).
+            max_video_duration: Vídeos mais longos que isso são descartados.
+            clip_validator: Verificação opcional do arquivo baixado.
+            asset_library: Biblioteca local consultada antes de acessar a rede.
+            thumbnail_prescreener: ThumbnailPrescreener opcional; candidatos reprovados
+                pela thumbnail não são baixados.
+            relevance_weight: Peso da relevância da thumbnail no score do candidato.
+            download_priority: Prioridade dos downloads no agendador do extrator.
+        """
+        self._extractor = youtube_extractor
+        self._results_per_query = results_per_query
+        self._max_search_workers = max(1, max_search_workers)
+        self._max_download_workers = max(1, max_download_workers)
+        self._max_connections_per_host = max(1, max_connections_per_host)
+        self._max_video_duration = max_video_duration
+        self._clip_validator = clip_validator or self._default_clip_validator
+        self._asset_library = asset_library
+        self._thumbnail_prescreener = thumbnail_prescreener
+        self._relevance_weight = relevance_weight
+        self._download_priority = download_priority
+        self._format_key = getattr(youtube_extractor, "download_format", None) or DEFAULT_FORMAT_KEY
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        # Assets da biblioteca fixados por dono (run do pipeline), liberados em `release`
+        self._pins: Dict[str, Set[str]] = {}
+        self._pins_lock = threading.Lock()
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    # ------------------------------------------------------------------ #
+    # API pública
+    # ------------------------------------------------------------------ #
+    def acquire(
+        self,
+        queries: List[str],
+        output_dir: str,
+        target_count: int = 3,
+        *,
+        owner: Optional[str] = None,
+        category: Optional[str] = None,
+        exclude_ids: Optional[Set[str]] = None,
+        add_to_pool: bool = True,
+        pin: bool = False,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> BrollAcquisitionResult:
+        """
+        Executa as buscas em paralelo, ranqueia globalmente e baixa os melhores candidatos.
+
+        `owner` identifica o pipeline no agendador de downloads, para revezamento
+        justo entre jobs concorrentes. Com `category`, o estoque local da
+        categoria também é consultado e, se `add_to_pool`, os clips baixados
+        passam a fazer parte dele. Vídeos em `exclude_ids` não são
+        reutilizados nem baixados. Com `pin`, os clips da biblioteca ficam
+        protegidos da remoção em nome de `owner` até `release(owner)`.
+        Quando `cancel_event` é sinalizado, a busca não começa e os downloads
+        em andamento são interrompidos; o resultado traz o que já foi obtido.
+        """
+        exclude_ids = set(exclude_ids or ())
+        local_clips = self._lookup_library(queries, target_count, exclude_ids)
+        if category and len(local_clips) < target_count:
+            local_clips += self._lookup_category_pool(
+                category,
+                queries,
+                target_count - len(local_clips),
+                exclude_ids | {clip.video_id for clip in local_clips},
+            )
+        cancelled_early = cancel_event is not None and cancel_event.is_set()
+        if len(local_clips) >= target_count or cancelled_early:
+            if not cancelled_early:
+                self._logger.info("B-roll atendido pela biblioteca local: %d clips", len(local_clips))
+            if pin and owner:
+                self._pin_clips(local_clips, owner)
+            return BrollAcquisitionResult(
+                clips=local_clips,
+                queries=list(queries),
+                used_queries=sorted({q for clip in local_clips for q in clip.queries}, key=queries.index),
+                failed=[],
+                cancelled=[],
+                search_time=0.0,
+                download_time=0.0,
+            )
+
+        search_start = time.time()
+        candidates, used_queries = self._search_all(queries)
+        search_time = time.time() - search_start
+
+        skip_ids = exclude_ids | {clip.video_id for clip in local_clips}
+        ranked = [c for c in self.rank_candidates(candidates) if c.video_id not in skip_ids]
+        ranked, prescreen_rejected = self._prescreen(ranked)
+        self._logger.info(
+            "Busca paralela concluída em %.2fs: %d candidatos de %d queries",
+            search_time,
+            len(ranked),
+            len(used_queries),
+        )
+
+        download_start = time.time()
+        clips, failed, cancelled = self._download_top(
+            ranked, output_dir, target_count - len(local_clips), owner, category if add_to_pool else None,
+            cancel_event,
+        )
+        download_time = time.time() - download_start
+        if pin and owner:
+            self._pin_clips(local_clips + clips, owner)
+
+        return BrollAcquisitionResult(
+            clips=local_clips + clips,
+            queries=list(queries),
+            used_queries=used_queries,
+            failed=failed,
+            cancelled=cancelled,
+            search_time=search_time,
+            download_time=download_time,
+            prescreen_rejected=prescreen_rejected,
+        )
+
+    def release(self, owner: str) -> None:
+        """Libera os clips fixados em nome de `owner`."""
+        with self._pins_lock:
+            video_ids = self._pins.pop(owner, set())
+        for video_id in video_ids:
+            try:
+                self._asset_library.unpin(video_id, owner, self._format_key)
+            except Exception as error:
+                self._logger.warning("Falha ao liberar '%s' na biblioteca: %s", video_id, error)
+
+    def rank_candidates(self, candidates: List[BrollCandidate]) -> List[BrollCandidate]:
+        """Ordena candidatos de todas as queries por score global."""
+        eligible = []
+        for candidate in candidates:
+            if candidate.duration and candidate.duration > self._max_video_duration:
+                self._logger.info(
+                    "Ignorando vídeo muito longo (%.1fs): %s",
+                    candidate.duration,
+                    candidate.title,
+                )
+                continue
+            candidate.score = self._score_candidate(candidate)
+            eligible.append(candidate)
+
+        eligible.sort(key=lambda item: item.score, reverse=True)
+        return eligible
+
+    # ------------------------------------------------------------------ #
+    # Triagem por thumbnail
+    # ------------------------------------------------------------------ #
+    def _prescreen(self, ranked: List[BrollCandidate]):
+        """Remove candidatos reprovados pela thumbnail e reordena pela relevância."""
+        if self._thumbnail_prescreener is None or not ranked:
+            return ranked, []
+
+        # Cada candidato é comparado com as queries que o encontraram
+        videos = [
+            {
+                "id": c.video_id,
+                "title": c.title,
+                "thumbnail": c.info.get("thumbnail"),
+                "text": " ".join(c.queries),
+            }
+            for c in ranked
+        ]
+        assessments = self._thumbnail_prescreener.screen(videos)
+
+        accepted: List[BrollCandidate] = []
+        rejected: List[Dict[str, Any]] = []
+        for candidate, assessment in zip(ranked, assessments):
+            if not assessment.accepted:
+                self._logger.info("Candidato rejeitado pela thumbnail '%s': %s", candidate.title, assessment.reasons)
+                rejected.append(assessment.to_dict())
+                continue
+            if assessment.relevance is not None:
+                candidate.score += self._relevance_weight * assessment.relevance
+            accepted.append(candidate)
+
+        accepted.sort(key=lambda item: item.score, reverse=True)
+        return accepted, rejected
+
+    # ------------------------------------------------------------------ #
+    # Biblioteca local
+    # ------------------------------------------------------------------ #
+    def _lookup_library(
+        self,
+        queries: List[str],
+        target_count: int,
+        exclude_ids: Optional[Set[str]] = None,
+    ) -> List[AcquiredClip]:
+        if self._asset_library is None:
+            return []
+
+        clips: List[AcquiredClip] = []
+        seen: set = set(exclude_ids or ())
+        for query in queries:
+            for entry in self._asset_library.find_by_query(query, format_key=self._format_key):
+                if len(clips) >= target_count:
+                    return clips
+                if entry.video_id in seen:
+                    continue
+                seen.add(entry.video_id)
+                clips.append(AcquiredClip(
+                    path=entry.media_path,
+                    video_id=entry.video_id,
+                    title=entry.extra.get("title", entry.video_id),
+                    queries=[q for q in queries if q in entry.queries] or [query],
+                    score=0.0,
+                    download_time=0.0,
+                    source="library",
+                    in_library=True,
+                ))
+        return clips
+
+    def _lookup_category_pool(
+        self,
+        category: str,
+        queries: List[str],
+        needed: int,
+        exclude_ids: Set[str],
+    ) -> List[AcquiredClip]:
+        """
+        Completa com o estoque pré-carregado da categoria.
+
+        Só aceita clips cujas queries de origem compartilham alguma palavra
+        relevante com as queries pedidas, para não trocar B-roll específico
+        por material genérico da categoria.
+        """
+        if self._asset_library is None or needed <= 0:
+            return []
+
+        wanted = self._query_words(queries)
+        scored = []
+        for entry in self._asset_library.find_by_category(category, format_key=self._format_key):
+            if entry.video_id in exclude_ids:
+                continue
+            overlap = len(wanted & self._query_words(entry.queries))
+            if overlap:
+                scored.append((overlap, entry))
+
+        scored.sort(key=lambda item: (item[0], item[1].last_access), reverse=True)
+        clips = []
+        for overlap, entry in scored[:needed]:
+            matched = [q for q in queries if self._query_words([q]) & self._query_words(entry.queries)]
+            self._asset_library.lookup(entry.video_id, self._format_key)  # atualiza o LRU
+            self._asset_library.add_queries(entry.video_id, matched, self._format_key)
+            clips.append(AcquiredClip(
+                path=entry.media_path,
+                video_id=entry.video_id,
+                title=entry.extra.get("title", entry.video_id),
+                queries=matched,
+                score=float(overlap),
+                download_time=0.0,
+                source="library",
+                in_library=True,
+            ))
+
+        if clips:
+            self._logger.info("Estoque da categoria '%s' forneceu %d clips", category, len(clips))
+        return clips
+
+    def _pin_clips(self, clips: List[AcquiredClip], owner: str) -> None:
+        if self._asset_library is None:
+            return
+        for clip in clips:
+            if clip.in_library:
+                if self._asset_library.pin(clip.video_id, owner, self._format_key):
+                    with self._pins_lock:
+                        self._pins.setdefault(owner, set()).add(clip.video_id)
+
+    @staticmethod
+    def _query_words(queries: List[str]) -> Set[str]:
+        return {
+            word
+            for query in queries
+            for word in re.findall(r"\w+", query.lower())
+            if len(word) > 3
+        }
+
+    # ------------------------------------------------------------------ #
+    # Busca
+    # ------------------------------------------------------------------ #
+    def _search_all(self, queries: List[str]):
+        results: Dict[str, List[Dict[str, Any]]] = {}
+
+        with ThreadPoolExecutor(max_workers=self._max_search_workers) as executor:
+            futures = {executor.submit(self._search_one, query): query for query in queries}
+            for future in futures:
+                query = futures[future]
+                try:
+                    results[query] = future.result() or []
+                except Exception as error:
+                    self._logger.warning("Erro na busca da query '%s': %s", query, error)
+                    results[query] = []
+
+        merged: Dict[str, BrollCandidate] = {}
+        used_queries: List[str] = []
+        for query in queries:
+            videos = results.get(query) or []
+            if not videos:
+                self._logger.warning("Nenhum resultado para query '%s'", query)
+                continue
+            used_queries.append(query)
+
+            for rank, video in enumerate(videos):
+                video_id = video.get("id") or video.get("url")
+                if not video_id or not video.get("url"):
+                    continue
+                candidate = merged.get(video_id)
+                if candidate is None:
+                    candidate = BrollCandidate(
+                        video_id=video_id,
+                        url=video["url"],
+                        title=video.get("title") or "sem título",
+                        duration=video.get("duration"),
+                        view_count=video.get("view_count"),
+                        best_rank=rank,
+                        info=video,
+                    )
+                    merged[video_id] = candidate
+                if query not in candidate.queries:
+                    candidate.queries.append(query)
+                candidate.best_rank = min(candidate.best_rank, rank)
+
+        return list(merged.values()), used_queries
+
+    def _search_one(self, query: str) -> List[Dict[str, Any]]:
+        with self._host_slot(self.SEARCH_HOST):
+            return self._extractor.search_videos(query, max_results=self._results_per_query)
+
+    def _score_candidate(self, candidate: BrollCandidate) -> float:
+        # Posição no ranking da busca pesa mais; vídeos encontrados por várias
+        # queries e com mais visualizações ganham bônus.
+        rank_score = 1.0 / (1 + candidate.best_rank)
+        query_bonus = 0.25 * (len(candidate.queries) - 1)
+        views = candidate.view_count or 0
+        popularity = min(math.log10(views + 1) / 7.0, 1.0) * 0.2
+
+        duration_score = 0.0
+        if candidate.duration:
+            duration_score = 0.1 if 10 <= candidate.duration <= 120 else -0.1
+
+        return rank_score + query_bonus + popularity + duration_score
+
+    # ------------------------------------------------------------------ #
+    # Download
+    # ------------------------------------------------------------------ #
+    def _download_top(
+        self,
+        ranked: List[BrollCandidate],
+        output_dir: str,
+        target_count: int,
+        owner: Optional[str] = None,
+        category: Optional[str] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        clips: List[AcquiredClip] = []
+        failed: List[Dict[str, Any]] = []
+        cancelled: List[str] = []
+        if not ranked or target_count <= 0:
+            return clips, failed, cancelled
+
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        stop_event = threading.Event()
+
+        queue = list(ranked)
+        executor = ThreadPoolExecutor(max_workers=self._max_download_workers)
+        pending: Dict[Future, BrollCandidate] = {}
+
+        try:
+            while (queue or pending) and len(clips) < target_count:
+                if cancel_event is not None and cancel_event.is_set():
+                    self._logger.info("Aquisição de B-roll interrompida: %d/%d clips", len(clips), target_count)
+                    break
+                # Mantém `max_download_workers` downloads em andamento; os que
+                # ainda estiverem rodando quando a meta for atingida são cancelados.
+                while queue and len(pending) < self._max_download_workers:
+                    candidate = queue.pop(0)
+                    future = executor.submit(
+                        self._download_one, candidate, output_dir, stop_event, owner, category
+                    )
+                    pending[future] = candidate
+
+                done, _ = wait(
+                    pending,
+                    timeout=self.CANCEL_POLL_SECONDS if cancel_event is not None else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    candidate = pending.pop(future)
+                    try:
+                        clip = future.result()
+                    except Exception as error:
+                        self._logger.warning("Erro ao baixar '%s': %s", candidate.title, error)
+                        failed.append({"video_id": candidate.video_id, "queries": candidate.queries, "error": str(error)})
+                        continue
+
+                    if len(clips) >= target_count:
+                        cancelled.append(candidate.video_id)
+                        self._discard(clip)
+                        continue
+                    clips.append(clip)
+                    self._logger.info("Vídeo obtido (%d/%d, %s): %s", len(clips), target_count, clip.source, clip.path)
+        finally:
+            stop_event.set()
+            for future, candidate in pending.items():
+                cancelled.append(candidate.video_id)
+                if not future.cancel():
+                    # Já em andamento: descarta o arquivo quando (e se) terminar
+                    future.add_done_callback(self._discard_result)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return clips, failed, cancelled
+
+    def _download_one(
+        self,
+        candidate: BrollCandidate,
+        output_dir: str,
+        stop_event: threading.Event,
+        owner: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> AcquiredClip:
+        start = time.time()
+        source = "download"
+
+        entry = None
+        in_library = False
+        if self._asset_library is not None:
+            entry = self._asset_library.lookup(candidate.video_id, self._format_key)
+            if entry is not None:
+                self._asset_library.add_queries(
+                    candidate.video_id,
+                    candidate.queries,
+                    self._format_key,
+                    categories=[category] if category else None,
+                )
+
+        if entry is not None:
+            path = entry.media_path
+            source = "library"
+            in_library = True
+        else:
+            with self._host_slot(urlparse(candidate.url).netloc):
+                path = self._extractor.download_video(
+                    candidate.url,
+                    output_dir,
+                    cancel_event=stop_event,
+                    priority=self._download_priority,
+                    owner=owner,
+                )
+
+            if not self._clip_validator(path):
+                raise ValueError(f"Arquivo baixado inválido: {path}")
+
+            if self._asset_library is not None:
+                try:
+                    entry = self._asset_library.put(
+                        candidate.video_id,
+                        path,
+                        format_key=self._format_key,
+                        queries=candidate.queries,
+                        source_url=candidate.url,
+                        move=True,
+                        extra={"title": candidate.title, "duration": candidate.duration},
+                        categories=[category] if category else None,
+                    )
+                    path = entry.media_path
+                    in_library = True
+                except Exception as error:
+                    self._logger.warning("Falha ao armazenar '%s' na biblioteca: %s", candidate.video_id, error)
+
+        return AcquiredClip(
+            path=path,
+            video_id=candidate.video_id,
+            title=candidate.title,
+            queries=list(candidate.queries),
+            score=candidate.score,
+            download_time=time.time() - start,
+            source=source,
+            in_library=in_library,
+        )
+
+    def _discard(self, clip: AcquiredClip) -> None:
+        """Remove o arquivo de um download excedente que não está na biblioteca."""
+        if clip.in_library:
+            return
+        try:
+            Path(clip.path).unlink(missing_ok=True)
+            self._logger.debug("Download excedente removido: %s", clip.path)
+        except OSError as error:
+            self._logger.warning("Falha ao remover download excedente '%s': %s", clip.path, error)
+
+    def _discard_result(self, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._discard(future.result())
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self._max_connections_per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    @staticmethod
+    def _default_clip_validator(path: str) -> bool:
+        path_obj = Path(path)
+        return path_obj.exists() and path_obj.stat().st_size > 0
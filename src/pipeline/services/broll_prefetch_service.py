@@ -0,0 +1,395 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.generators.prompt_engineering import ThemeCategory
+from src.video.library.asset_library import BrollAssetLibrary
+
+
+# Queries usadas enquanto não há histórico para a categoria
+CATEGORY_SEED_QUERIES: Dict[str, List[str]] = {
+    ThemeCategory.SCIENCE.value: ["science laboratory experiment", "microscope cells close up", "chemical reaction colorful"],
+    ThemeCategory.HISTORY.value: ["ancient ruins aerial", "historical city streets", "old manuscripts close up"],
+    ThemeCategory.NATURE.value: ["forest aerial drone", "waterfall slow motion", "mountain landscape sunrise"],
+    ThemeCategory.TECHNOLOGY.value: ["circuit board macro", "robot arm factory", "data center servers"],
+    ThemeCategory.CULTURE.value: ["traditional festival dance", "street market crowd", "artisan hands crafting"],
+    ThemeCategory.SPACE.value: ["galaxy stars timelapse", "planet earth from space", "rocket launch footage"],
+    ThemeCategory.ANIMALS.value: ["wild animals close up", "underwater marine life", "birds flying slow motion"],
+    ThemeCategory.PSYCHOLOGY.value: ["person thinking close up", "brain neurons animation", "crowd walking city"],
+    ThemeCategory.GEOGRAPHY.value: ["desert dunes aerial", "river delta aerial", "volcano eruption footage"],
+    ThemeCategory.FOOD.value: ["cooking close up kitchen", "fresh fruit slow motion", "street food vendor"],
+}
+
+
+def _category_value(category) -> str:
+    return category.value if isinstance(category, ThemeCategory) else str(category)
+
+
+class BrollQueryHistory:
+    """Histórico persistente das queries de B-roll geradas por categoria."""
+
+    def __init__(self, path: str = "data/cache/broll_query_history.json", max_per_category: int = 50):
+        """
+        Args:
+            path: Arquivo JSON do histórico.
+            max_per_category: Queries mantidas por categoria (as mais antigas saem primeiro).
+        """
+        self.path = Path(path)
+        self.max_per_category = max_per_category
+        self._lock = threading.Lock()
+        self._history: Dict[str, List[Dict[str, Any]]] = self._load()
+
+    def record(self, category, queries: Iterable[str]) -> None:
+        """Registra queries geradas para uma categoria."""
+        key = _category_value(category)
+        now = time.time()
+        with self._lock:
+            items = self._history.setdefault(key, [])
+            by_query = {item["query"]: item for item in items}
+            for query in queries:
+                query = " ".join(str(query).split())
+                if not query:
+                    continue
+                item = by_query.get(query)
+                if item is None:
+                    item = {"query": query, "count": 0, "last_used": now}
+                    items.append(item)
+                    by_query[query] = item
+                item["count"] += 1
+                item["last_used"] = now
+
+            items.sort(key=lambda item: item["last_used"])
+            del items[:-self.max_per_category]
+            self._save()
+
+    def recent(self, category, limit: int = 5) -> List[str]:
+        """Queries mais frequentes (e, no empate, mais recentes) da categoria."""
+        with self._lock:
+            items = list(self._history.get(_category_value(category), []))
+        items.sort(key=lambda item: (item["count"], item["last_used"]), reverse=True)
+        return [item["query"] for item in items[:limit]]
+
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._history, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class PrefetchReport:
+    """Resultado de uma rodada de reabastecimento de uma categoria."""
+
+    category: str
+    pool_before: int
+    pool_after: int
+    queries: List[str] = field(default_factory=list)
+    downloaded: List[str] = field(default_factory=list)
+    skipped_reason: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "category": self.category,
+            "pool_before": self.pool_before,
+            "pool_after": self.pool_after,
+            "queries": self.queries,
+            "downloaded": self.downloaded,
+            "skipped_reason": self.skipped_reason,
+        }
+
+
+class BrollPrefetchService:
+    """
+    Mantém um estoque local de B-roll por categoria de tema.
+
+    Em momentos ociosos (ou no horário fora de pico), baixa clips para as
+    categorias cujo estoque está abaixo da meta, usando as queries mais
+    recorrentes do histórico, dentro de uma cota de disco própria.
+    """
+
+    def __init__(
+        self,
+        acquisition_service,
+        asset_library: BrollAssetLibrary,
+        query_history: BrollQueryHistory,
+        *,
+        categories: Optional[Iterable] = None,
+        pool_size: int = 6,
+        queries_per_refill: int = 3,
+        max_clips_per_refill: int = 3,
+        disk_quota_bytes: Optional[int] = 5 * 1024 ** 3,
+        off_peak_hours: Optional[Tuple[int, int]] = (1, 7),
+        idle_check: Optional[Callable[[], bool]] = None,
+        busy_check: Optional[Callable[[], bool]] = None,
+        busy_poll_interval: float = 1.0,
+        staging_dir: str = "data/temp/prefetch",
+        now_func: Callable[[], datetime] = datetime.now,
+    ):
+        """
+        Args:
+            acquisition_service: BrollAcquisitionService (de preferência com prioridade PREFETCH).
+            asset_library: Biblioteca onde fica o estoque.
+            query_history: Histórico de queries geradas por categoria.
+            categories: Categorias mantidas (padrão: todas de ThemeCategory).
+            pool_size: Clips desejados por categoria.
+            queries_per_refill: Queries usadas em cada reabastecimento.
+            max_clips_per_refill: Máximo de downloads por categoria em cada rodada.
+            disk_quota_bytes: Cota de disco do estoque de categorias (None = ilimitada).
+            off_peak_hours: Janela [início, fim) de horas locais em que o reabastecimento
+                roda mesmo sem ociosidade (None = apenas quando ocioso).
+            idle_check: Função que indica se o host está ocioso (ex.: sem downloads críticos).
+            busy_check: Função que indica um run do pipeline em andamento; enquanto
+                verdadeira o prefetch não roda (nem fora de pico) e interrompe a rodada,
+                inclusive os downloads em andamento.
+            busy_poll_interval: Intervalo (s) em que `busy_check` é consultado durante a rodada.
+            staging_dir: Diretório temporário dos downloads.
+            now_func: Relógio (injetável em testes).
+        """
+        self._acquisition = acquisition_service
+        self._library = asset_library
+        self._history = query_history
+        self._categories = [_category_value(c) for c in (categories or list(ThemeCategory))]
+        self._pool_size = pool_size
+        self._queries_per_refill = queries_per_refill
+        self._max_clips_per_refill = max(1, max_clips_per_refill)
+        self._disk_quota_bytes = disk_quota_bytes
+        self._off_peak_hours = off_peak_hours
+        self._idle_check = idle_check
+        self._busy_check = busy_check
+        self._busy_poll_interval = busy_poll_interval
+        self._staging_dir = staging_dir
+        self._now = now_func
+        self._format_key = getattr(acquisition_service, "_format_key", None)
+
+        self._stop_event = threading.Event()
+        # Sinaliza a aquisição da rodada em andamento (run iniciado ou `stop`)
+        self._round_cancel: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._refill_lock = threading.Lock()
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+    # ------------------------------------------------------------------ #
+    # Estado do estoque
+    # ------------------------------------------------------------------ #
+    def pool_status(self) -> Dict[str, Dict[str, int]]:
+        """Clips, bytes e déficit do estoque de cada categoria."""
+        entries = self._library.list_entries()
+        status = {}
+        for category in self._categories:
+            pool = [
+                entry for entry in entries
+                if category in entry.categories
+                and (self._format_key is None or entry.format_key == self._format_key)
+            ]
+            status[category] = {
+                "clips": len(pool),
+                "bytes": sum(entry.total_bytes for entry in pool),
+                "deficit": max(0, self._pool_size - len(pool)),
+            }
+        return status
+
+    def pool_bytes(self) -> int:
+        """Espaço ocupado pelo estoque de categorias."""
+        return sum(entry.total_bytes for entry in self._library.list_entries() if entry.categories)
+
+    def queries_for(self, category) -> List[str]:
+        """Queries de reabastecimento: histórico recente, completado pelas sementes."""
+        key = _category_value(category)
+        queries = self._history.recent(key, limit=self._queries_per_refill)
+        for seed in CATEGORY_SEED_QUERIES.get(key, []):
+            if len(queries) >= self._queries_per_refill:
+                break
+            if seed not in queries:
+                queries.append(seed)
+        return queries
+
+    def should_run(self) -> bool:
+        """Indica se é um bom momento para reabastecer (ocioso ou fora de pico, sem run ativo)."""
+        if self._is_busy():
+            return False
+        if self._idle_check is not None:
+            try:
+                if self._idle_check():
+                    return True
+            except Exception as error:
+                self._logger.debug("Falha no idle_check: %s", error)
+
+        if self._off_peak_hours is not None:
+            start, end = self._off_peak_hours
+            hour = self._now().hour
+            if start <= end:
+                return start <= hour < end
+            return hour >= start or hour < end
+        return False
+
+    # ------------------------------------------------------------------ #
+    # Reabastecimento
+    # ------------------------------------------------------------------ #
+    def refill(self, categories: Optional[Iterable] = None) -> List[PrefetchReport]:
+        """
+        Reabastece as categorias com déficit, maiores déficits primeiro.
+
+        Args:
+            categories: Restringe às categorias informadas (padrão: todas)
+
+        Returns:
+            Relatório por categoria avaliada
+        """
+        wanted = [_category_value(c) for c in categories] if categories else self._categories
+        reports: List[PrefetchReport] = []
+
+        with self._refill_lock:
+            cancel = threading.Event()
+            self._round_cancel = cancel
+            watcher = threading.Thread(
+                target=self._watch_round, args=(cancel,), name="BrollPrefetchWatch", daemon=True
+            )
+            watcher.start()
+            try:
+                self._refill_categories(wanted, reports, cancel)
+            finally:
+                self._round_cancel = None
+                cancel.set()
+                watcher.join()
+            self._enforce_quota()
+
+        return reports
+
+    def _refill_categories(self, wanted: List[str], reports: List[PrefetchReport], cancel: threading.Event) -> None:
+        """Rodada de reabastecimento; para quando `cancel` é sinalizado."""
+        status = self.pool_status()
+        order = sorted(wanted, key=lambda c: status.get(c, {}).get("deficit", 0), reverse=True)
+
+        for category in order:
+            if cancel.is_set() or self._stop_event.is_set() or self._is_busy():
+                break
+            before = status.get(category, {}).get("clips", 0)
+            deficit = max(0, self._pool_size - before)
+            report = PrefetchReport(category=category, pool_before=before, pool_after=before)
+            reports.append(report)
+
+            if deficit == 0:
+                report.skipped_reason = "estoque completo"
+                continue
+            if self._disk_quota_bytes is not None and self.pool_bytes() >= self._disk_quota_bytes:
+                report.skipped_reason = "cota de disco atingida"
+                continue
+
+            report.queries = self.queries_for(category)
+            if not report.queries:
+                report.skipped_reason = "sem queries"
+                continue
+
+            try:
+                result = self._acquisition.acquire(
+                    report.queries,
+                    self._staging_dir,
+                    target_count=min(deficit, self._max_clips_per_refill),
+                    owner="prefetch",
+                    category=category,
+                    exclude_ids={entry.video_id for entry in self._library.list_entries()},
+                    cancel_event=cancel,
+                )
+            except Exception as error:
+                self._logger.warning("Falha no prefetch da categoria '%s': %s", category, error)
+                report.skipped_reason = f"erro: {error}"
+                continue
+
+            report.downloaded = [clip.video_id for clip in result.clips if clip.source == "download"]
+            report.pool_after = len(self._library.find_by_category(category, format_key=self._format_key))
+            self._logger.info(
+                "Prefetch '%s': %d -> %d clips (%s)",
+                category,
+                before,
+                report.pool_after,
+                ", ".join(report.queries),
+            )
+
+    def _watch_round(self, cancel: threading.Event) -> None:
+        """Sinaliza `cancel` quando um run começa ou o serviço é parado durante a rodada."""
+        while not cancel.wait(self._busy_poll_interval):
+            if self._stop_event.is_set() or self._is_busy():
+                cancel.set()
+
+    def _enforce_quota(self) -> None:
+        """Remove os clips de estoque menos usados enquanto a cota estiver excedida."""
+        if self._disk_quota_bytes is None:
+            return
+
+        pool = sorted(
+            (entry for entry in self._library.list_entries() if entry.categories),
+            key=lambda entry: entry.last_access,
+        )
+        total = sum(entry.total_bytes for entry in pool)
+        usage = Counter(category for entry in pool for category in entry.categories)
+        for entry in pool:
+            if total <= self._disk_quota_bytes:
+                break
+            # Preserva o último clip de cada categoria e os que estão em uso por um run
+            if any(usage[category] <= 1 for category in entry.categories):
+                continue
+            if not self._library.is_evictable(entry):
+                continue
+            if self._library.remove(entry.video_id, entry.format_key):
+                total -= entry.total_bytes
+                usage.subtract(entry.categories)
+
+    def _is_busy(self) -> bool:
+        if self._busy_check is None:
+            return False
+        try:
+            return bool(self._busy_check())
+        except Exception as error:
+            self._logger.debug("Falha no busy_check: %s", error)
+            return False
+
+    # ------------------------------------------------------------------ #
+    # Execução em segundo plano
+    # ------------------------------------------------------------------ #
+    def start(self, interval: float = 600.0) -> None:
+        """Inicia a thread que verifica o estoque a cada `interval` segundos."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_loop,
+            args=(interval,),
+            name="BrollPrefetch",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Interrompe a thread de prefetch e os downloads da rodada em andamento."""
+        self._stop_event.set()
+        cancel = self._round_cancel
+        if cancel is not None:
+            cancel.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_loop(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            if not self.should_run():
+                continue
+            try:
+                self.refill()
+            except Exception as error:  # pragma: no cover - proteção da thread
+                self._logger.warning("Erro no ciclo de prefetch: %s", error)
@@ -6,14 +6,25 @@ from typing import List, Optional
 class BrollQueryService:
     """Responsável por gerar queries de B-roll usando modelos LLM."""
 
-    def __init__(self, llm_client, max_tokens: int = 200, temperature: float = 0.3):
+    def __init__(self, llm_client, max_tokens: int = 200, temperature: float = 0.3, query_history=None):
         self._llm_client = llm_client
         self._max_tokens = max_tokens
         self._temperature = temperature
+        self._query_history = query_history
         self._logger = logging.getLogger(self.__class__.__name__)
 
-    def generate_queries(self, script_text: Optional[str]) -> List[str]:
-        """Gera queries curtas e acionáveis para busca de B-roll."""
+    @property
+    def query_history(self):
+        """Histórico de queries por categoria (ou None)."""
+        return self._query_history
+
+    def generate_queries(self, script_text: Optional[str], category: Optional[str] = None) -> List[str]:
+        """
+        Gera queries curtas e acionáveis para busca de B-roll.
+
+        Quando `category` é informada e há histórico configurado, as queries
+        geradas são registradas para o prefetch daquela categoria.
+        """
         if not script_text:
             self._logger.debug("Texto do script vazio; sem queries de B-roll para gerar.")
             return []
@@ -67,4 +78,10 @@ class BrollQueryService:
 
         final_queries = deduped[:5]
         self._logger.info("Queries de B-roll geradas: %s", final_queries)
+
+        if category and self._query_history is not None and final_queries:
+            try:
+                self._query_history.record(category, final_queries)
+            except Exception as error:
+                self._logger.debug("Falha ao registrar histórico de queries: %s", error)
         return final_queries
@@ -0,0 +1,413 @@
+"""
+Agendador de downloads - AiShorts v2.0
+
+Coordena todas as transferências de mídia do processo (YouTube, thumbnails,
+APIs externas) para que disputem a banda de forma controlada:
+- Limite global de bytes/s com token bucket
+- Limite de downloads simultâneos, global e por origem (host)
+- Classes de prioridade: o caminho crítico do job atual passa na frente de prefetch
+- Revezamento justo entre pipelines (donos) concorrentes
+- API de progresso e ETA por transferência e por dono
+"""
+
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from urllib.parse import urlparse
+
+from loguru import logger
+
+
+class DownloadPriority(IntEnum):
+    """Classes de prioridade (menor valor = mais urgente)."""
+    CRITICAL = 0   # caminho crítico do job em renderização
+    NORMAL = 1
+    PREFETCH = 2   # aquecimento de cache em segundo plano
+
+
+@dataclass
+class DownloadTicket:
+    """Transferência registrada no agendador."""
+    ticket_id: int
+    url: str
+    origin: str
+    owner: str
+    priority: DownloadPriority
+    total_bytes: Optional[int] = None
+    bytes_done: int = 0
+    state: str = "queued"  # queued | active | done | failed
+    queued_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _scheduler: Any = field(default=None, repr=False, compare=False)
+
+    def consume(self, nbytes: int) -> None:
+        """Contabiliza bytes recebidos, bloqueando conforme o limite de banda."""
+        self._scheduler._consume(self, nbytes)
+
+    def set_total(self, total_bytes: Optional[int]) -> None:
+        """Informa (ou atualiza) o tamanho total esperado."""
+        if total_bytes:
+            self.total_bytes = int(total_bytes)
+
+    @property
+    def rate(self) -> float:
+        """Taxa média em bytes/s desde o início."""
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or self._scheduler._clock()) - self.started_at
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Tempo restante estimado (s) ou None se desconhecido."""
+        if self.state == "done":
+            return 0.0
+        if not self.total_bytes or not self.rate:
+            return None
+        return max(0.0, (self.total_bytes - self.bytes_done) / self.rate)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.ticket_id,
+            "url": self.url,
+            "origin": self.origin,
+            "owner": self.owner,
+            "priority": self.priority.name.lower(),
+            "state": self.state,
+            "bytes_done": self.bytes_done,
+            "total_bytes": self.total_bytes,
+            "rate": round(self.rate, 1),
+            "eta": None if self.eta is None else round(self.eta, 2),
+        }
+
+
+class DownloadScheduler:
+    """Agendador de downloads compartilhado pelo processo."""
+
+    def __init__(
+        self,
+        max_bytes_per_second: Optional[float] = None,
+        burst_bytes: Optional[int] = None,
+        max_concurrent: int = 6,
+        max_per_origin: int = 3,
+        chunk_size: int = 64 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Inicializa o agendador.
+
+        Args:
+            max_bytes_per_second: Limite global de banda (None = ilimitado)
+            burst_bytes: Capacidade do token bucket (padrão: 1s de banda, mínimo 1 chunk)
+            max_concurrent: Downloads simultâneos no processo
+            max_per_origin: Downloads simultâneos por host de origem
+            chunk_size: Tamanho dos blocos lidos em `fetch` e da contabilização de banda
+            clock: Relógio monotônico (injetável em testes)
+        """
+        self.max_bytes_per_second = max_bytes_per_second or None
+        self.chunk_size = chunk_size
+        self.burst_bytes = burst_bytes or max(chunk_size, int(self.max_bytes_per_second or 0))
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_origin = max(1, max_per_origin)
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._waiting: List[DownloadTicket] = []
+        self._active: Dict[int, DownloadTicket] = {}
+        self._finished: List[DownloadTicket] = []
+        self._active_by_origin: Dict[str, int] = {}
+        self._last_start_by_owner: Dict[str, int] = {}
+        self._start_seq = itertools.count(1)
+
+        # Token bucket
+        self._tokens = float(self.burst_bytes)
+        self._last_refill = clock()
+        self._token_waiters: Dict[int, DownloadPriority] = {}
+
+        self._bytes_total = 0
+        self._completed = 0
+        self._failed = 0
+
+    # ------------------------------------------------------------------ #
+    # Admissão
+    # ------------------------------------------------------------------ #
+    @contextmanager
+    def slot(
+        self,
+        url: str,
+        *,
+        priority: DownloadPriority = DownloadPriority.NORMAL,
+        owner: str = "default",
+        total_bytes: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[DownloadTicket]:
+        """
+        Reserva uma vaga de download; bloqueia até ela ser concedida.
+
+        Args:
+            url: URL do recurso (define a origem)
+            priority: Classe de prioridade
+            owner: Identificador do pipeline/job dono da transferência
+            total_bytes: Tamanho esperado, se conhecido
+            timeout: Tempo máximo de espera pela vaga (s)
+
+        Yields:
+            DownloadTicket para contabilizar bytes e acompanhar o progresso
+
+        Raises:
+            TimeoutError: Se a vaga não for concedida dentro do timeout
+        """
+        ticket = self._acquire(url, priority, owner, total_bytes, timeout)
+        try:
+            yield ticket
+        except BaseException:
+            self._release(ticket, failed=True)
+            raise
+        else:
+            self._release(ticket, failed=False)
+
+    def _acquire(self, url, priority, owner, total_bytes, timeout) -> DownloadTicket:
+        ticket = DownloadTicket(
+            ticket_id=next(self._ids),
+            url=url,
+            origin=urlparse(url).netloc or "local",
+            owner=owner,
+            priority=DownloadPriority(priority),
+            total_bytes=total_bytes,
+            queued_at=self._clock(),
+            _scheduler=self,
+        )
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            self._waiting.append(ticket)
+            while not self._can_start(ticket):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._cond.notify_all()
+                    raise TimeoutError(f"Sem vaga de download para {url} em {timeout}s")
+                self._cond.wait(remaining)
+
+            self._waiting.remove(ticket)
+            ticket.state = "active"
+            ticket.started_at = self._clock()
+            self._active[ticket.ticket_id] = ticket
+            self._active_by_origin[ticket.origin] = self._active_by_origin.get(ticket.origin, 0) + 1
+            self._last_start_by_owner[owner] = next(self._start_seq)
+            self._cond.notify_all()
+
+        logger.debug(f"Download #{ticket.ticket_id} iniciado ({ticket.priority.name}, {owner}): {url}")
+        return ticket
+
+    def _can_start(self, ticket: DownloadTicket) -> bool:
+        """Verifica se o ticket é o próximo da fila entre os elegíveis."""
+        if len(self._active) >= self.max_concurrent:
+            return False
+
+        eligible = [
+            waiting for waiting in self._waiting
+            if self._active_by_origin.get(waiting.origin, 0) < self.max_per_origin
+        ]
+        if ticket not in eligible:
+            return False
+
+        # Prioridade primeiro; dentro da mesma classe, o dono atendido há mais
+        # tempo (revezamento entre pipelines); depois ordem de chegada.
+        best = min(eligible, key=lambda waiting: (
+            waiting.priority,
+            self._last_start_by_owner.get(waiting.owner, 0),
+            waiting.ticket_id,
+        ))
+        return best is ticket
+
+    def _release(self, ticket: DownloadTicket, failed: bool) -> None:
+        with self._cond:
+            ticket.state = "failed" if failed else "done"
+            ticket.finished_at = self._clock()
+            self._active.pop(ticket.ticket_id, None)
+            self._active_by_origin[ticket.origin] -= 1
+            self._finished.append(ticket)
+            del self._finished[:-100]
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------ #
+    # Banda
+    # ------------------------------------------------------------------ #
+    def _consume(self, ticket: DownloadTicket, nbytes: int) -> None:
+        """Debita bytes do token bucket em blocos; prioridades maiores são servidas antes."""
+        nbytes = int(nbytes)
+        if nbytes <= 0:
+            return
+
+        if self.max_bytes_per_second is None:
+            with self._cond:
+                ticket.bytes_done += nbytes
+                self._bytes_total += nbytes
+            return
+
+        remaining = nbytes
+        while remaining > 0:
+            chunk = min(remaining, self.burst_bytes)
+            with self._cond:
+                self._token_waiters[ticket.ticket_id] = ticket.priority
+                try:
+                    while True:
+                        self._refill()
+                        best_priority = min(self._token_waiters.values())
+                        if self._tokens >= chunk and ticket.priority <= best_priority:
+                            self._tokens -= chunk
+                            break
+                        deficit = max(chunk - self._tokens, 1.0)
+                        self._cond.wait(deficit / self.max_bytes_per_second)
+                finally:
+                    del self._token_waiters[ticket.ticket_id]
+                    self._cond.notify_all()
+
+                ticket.bytes_done += chunk
+                self._bytes_total += chunk
+            remaining -= chunk
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.burst_bytes, self._tokens + elapsed * self.max_bytes_per_second)
+            self._last_refill = now
+
+    # ------------------------------------------------------------------ #
+    # Download HTTP
+    # ------------------------------------------------------------------ #
+    def fetch(
+        self,
+        url: str,
+        destination: Optional[Union[str, Path]] = None,
+        *,
+        priority: DownloadPriority = DownloadPriority.NORMAL,
+        owner: str = "default",
+        timeout: float = 30.0,
+    ) -> Union[bytes, str]:
+        """
+        Baixa um recurso HTTP respeitando os limites do agendador.
+
+        Args:
+            url: URL do recurso
+            destination: Arquivo de destino (escrita atômica); se None, retorna os bytes
+            priority: Classe de prioridade
+            owner: Dono da transferência
+            timeout: Timeout de conexão/leitura (s)
+
+        Returns:
+            Conteúdo baixado ou caminho do arquivo salvo
+        """
+        import requests
+
+        with self.slot(url, priority=priority, owner=owner) as ticket:
+            with requests.get(url, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                ticket.set_total(response.headers.get("Content-Length"))
+
+                if destination is None:
+                    parts = []
+                    for chunk in response.iter_content(self.chunk_size):
+                        ticket.consume(len(chunk))
+                        parts.append(chunk)
+                    return b"".join(parts)
+
+                destination = Path(destination)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                part_path = destination.with_name(destination.name + f".{ticket.ticket_id}.part")
+                try:
+                    with open(part_path, "wb") as f:
+                        for chunk in response.iter_content(self.chunk_size):
+                            ticket.consume(len(chunk))
+                            f.write(chunk)
+                    os.replace(part_path, destination)
+                finally:
+                    if part_path.exists():
+                        part_path.unlink()
+                return str(destination)
+
+    # ------------------------------------------------------------------ #
+    # Progresso
+    # ------------------------------------------------------------------ #
+    def get_progress(self, owner: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retorna o progresso das transferências ativas e em fila.
+
+        Args:
+            owner: Filtra por dono (None = todos)
+
+        Returns:
+            Dicionário com `transfers` (lista) e totais agregados, incluindo o
+            ETA do conjunto estimado pela taxa combinada das ativas
+        """
+        with self._cond:
+            tickets = list(self._active.values()) + list(self._waiting)
+            if owner is not None:
+                tickets = [t for t in tickets if t.owner == owner]
+
+            active = [t for t in tickets if t.state == "active"]
+            combined_rate = sum(t.rate for t in active)
+            known = all(t.total_bytes for t in tickets)
+            remaining = sum((t.total_bytes or 0) - t.bytes_done for t in tickets)
+
+            return {
+                "transfers": [t.to_dict() for t in tickets],
+                "active": len(active),
+                "queued": len(tickets) - len(active),
+                "bytes_done": sum(t.bytes_done for t in tickets),
+                "rate": round(combined_rate, 1),
+                "eta": round(remaining / combined_rate, 2) if known and combined_rate > 0 else None,
+            }
+
+    def is_idle(self) -> bool:
+        """Indica se não há transferências ativas nem na fila."""
+        with self._cond:
+            return not self._active and not self._waiting
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas acumuladas do agendador."""
+        with self._cond:
+            return {
+                "bytes_total": self._bytes_total,
+                "completed": self._completed,
+                "failed": self._failed,
+                "active": len(self._active),
+                "queued": len(self._waiting),
+                "max_bytes_per_second": self.max_bytes_per_second,
+                "max_concurrent": self.max_concurrent,
+                "max_per_origin": self.max_per_origin,
+            }
+
+
+_default_scheduler: Optional[DownloadScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_download_scheduler() -> DownloadScheduler:
+    """Retorna o agendador compartilhado do processo (criado a partir da configuração)."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            from src.config.settings import config
+
+            settings = config.download
+            _default_scheduler = DownloadScheduler(
+                max_bytes_per_second=settings.max_bytes_per_second or None,
+                max_concurrent=settings.max_concurrent,
+                max_per_origin=settings.max_per_origin,
+            )
+        return _default_scheduler
@@ -94,6 +94,18 @@ class VideoProcessingError(AiShortsError):
             "ffmpeg_error": ffmpeg_error
         })
 
+class FFmpegError(VideoProcessingError):
+    """Falha de um processo FFmpeg/FFprobe, com a causa classificada."""
+    
+    def __init__(self, message: str, kind: str = "unknown", returncode: Optional[int] = None,
+                 video_path: Optional[str] = None, ffmpeg_error: Optional[str] = None,
+                 command: Optional[str] = None):
+        super().__init__(message, video_path=video_path, ffmpeg_error=ffmpeg_error)
+        self.error_code = "FFMPEG_ERROR"
+        self.kind = kind
+        self.returncode = returncode
+        self.details.update({"kind": kind, "returncode": returncode, "command": command})
+
 class VideoUnavailableError(AiShortsError):
     """Erro quando vídeo não está disponível."""
     
@@ -0,0 +1,436 @@
+"""
+Executor compartilhado de processos FFmpeg/FFprobe - AiShorts v2.0
+
+Substitui chamadas bloqueantes a `subprocess.run` por um executor com:
+- Progresso via `-progress pipe:1` (frame, fps, velocidade, percentual)
+- Timeout de relógio e timeout de travamento (sem progresso por N segundos)
+- Cancelamento cooperativo que encerra o grupo de processos inteiro
+- Captura de stderr com classificação estruturada do erro
+- Uso por threads (`run`) e por asyncio (`run_async`)
+- Lista dos processos ativos para identificar encodes lentos
+"""
+
+import asyncio
+import functools
+import itertools
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+from loguru import logger
+
+from src.utils.exceptions import FFmpegError
+
+
+# Padrões de stderr (minúsculo) -> tipo de erro; o primeiro que casar vence
+ERROR_PATTERNS = (
+    ("input_not_found", ("no such file or directory", "does not exist")),
+    ("permission_denied", ("permission denied",)),
+    ("disk_full", ("no space left on device",)),
+    ("out_of_memory", ("cannot allocate memory", "out of memory")),
+    ("unsupported_codec", (
+        "unknown encoder", "unknown decoder", "encoder not found", "decoder not found",
+        "codec not currently supported", "not supported by the bitstream filter",
+    )),
+    ("invalid_argument", (
+        "unrecognized option", "option not found", "invalid argument", "error parsing",
+        "no such filter", "error initializing filter", "invalid option",
+    )),
+    ("stream_not_found", ("matches no streams", "does not contain any stream")),
+    ("invalid_data", (
+        "invalid data found when processing input", "moov atom not found",
+        "error while decoding", "invalid nal unit", "corrupt",
+    )),
+)
+
+
+def classify_ffmpeg_error(stderr: str, returncode: Optional[int] = None) -> str:
+    """Classifica a falha pelo stderr e pelo código de saída."""
+    text = (stderr or "").lower()
+    for kind, patterns in ERROR_PATTERNS:
+        if any(pattern in text for pattern in patterns):
+            return kind
+    if returncode is not None and returncode < 0:
+        return "killed" if -returncode in (signal.SIGKILL, signal.SIGTERM) else "crashed"
+    return "unknown"
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return int(value) / 1_000_000
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class FFmpegProgress:
+    """Estado de um processo FFmpeg, lido do `-progress`."""
+
+    label: str = ""
+    frame: int = 0
+    fps: float = 0.0
+    speed: Optional[float] = None
+    out_time: float = 0.0
+    total_size: int = 0
+    duration: Optional[float] = None
+    elapsed: float = 0.0
+    done: bool = False
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.duration:
+            return None
+        return min(100.0, 100.0 * self.out_time / self.duration)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "percent": self.percent}
+
+    def update(self, key: str, value: str) -> bool:
+        """Aplica uma linha `chave=valor`; retorna True ao fim de um bloco."""
+        if key == "frame":
+            self.frame = int(value) if value.isdigit() else self.frame
+        elif key == "fps":
+            try:
+                self.fps = float(value)
+            except ValueError:
+                pass
+        elif key == "speed":
+            try:
+                self.speed = float(value.rstrip("x"))
+            except ValueError:
+                self.speed = None
+        elif key in ("out_time_us", "out_time_ms"):
+            # Ambas as chaves vêm em microssegundos no FFmpeg
+            seconds = _parse_seconds(value)
+            if seconds is not None and seconds >= 0:
+                self.out_time = seconds
+        elif key == "total_size":
+            self.total_size = int(value) if value.isdigit() else self.total_size
+        elif key == "progress":
+            self.done = value == "end"
+            return True
+        return False
+
+
+@dataclass
+class FFmpegResult:
+    """Resultado de um processo executado pelo FFmpegRunner."""
+
+    command: List[str]
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    elapsed: float = 0.0
+    progress: Optional[FFmpegProgress] = None
+    error_kind: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+@dataclass
+class _Job:
+    label: str
+    command: List[str]
+    started: float
+    progress: FFmpegProgress
+    last_activity: float = 0.0
+    stdout: List[str] = field(default_factory=list)
+    stderr: Deque[str] = field(default_factory=lambda: deque(maxlen=400))
+
+
+class FFmpegRunner:
+    """
+    Executa FFmpeg/FFprobe com progresso, timeouts e cancelamento.
+
+    Comandos `ffmpeg` recebem `-progress pipe:1 -nostats` automaticamente;
+    o timeout de travamento só se aplica a eles (o FFprobe não reporta
+    progresso). Cada processo roda em uma sessão própria, de modo que o
+    cancelamento encerra também processos filhos.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = 120.0,
+        kill_grace: float = 3.0,
+        poll_interval: float = 0.2,
+    ):
+        """
+        Args:
+            max_concurrent: Processos simultâneos (None = sem limite)
+            timeout: Timeout padrão de relógio em segundos (None = sem limite)
+            stall_timeout: Segundos sem progresso até considerar o FFmpeg travado
+            kill_grace: Espera entre SIGTERM e SIGKILL
+            poll_interval: Intervalo de verificação de timeouts/cancelamento
+        """
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.kill_grace = kill_grace
+        self.poll_interval = poll_interval
+        self._semaphore = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+
+        self._ids = itertools.count(1)
+        self._active: Dict[int, _Job] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "runs": 0, "failures": 0, "timeouts": 0, "stalls": 0, "cancelled": 0, "busy_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # API pública
+    # ------------------------------------------------------------------ #
+    def run(
+        self,
+        command: Sequence[Any],
+        *,
+        duration: Optional[float] = None,
+        timeout: Optional[float] = None,
+        stall_timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+        on_progress: Optional[Callable[[FFmpegProgress], None]] = None,
+        label: Optional[str] = None,
+        check: bool = True,
+        video_path: Optional[str] = None,
+    ) -> FFmpegResult:
+        """
+        Executa o comando e bloqueia até o fim.
+
+        Args:
+            command: Comando (`ffmpeg ...` ou `ffprobe ...`)
+            duration: Duração esperada da saída (s), para o percentual
+            timeout: Timeout de relógio (None = padrão do executor, 0 = sem limite)
+            stall_timeout: Timeout sem progresso (None = padrão, 0 = desativado)
+            cancel_event: Evento de cancelamento cooperativo
+            on_progress: Callback chamado (na thread de leitura) a cada bloco de progresso
+            label: Nome do job em logs e em `active_jobs()`
+            check: Levanta FFmpegError se o código de saída for diferente de zero
+            video_path: Arquivo de origem, anexado aos erros
+
+        Returns:
+            FFmpegResult com stdout, stderr (final), tempo e último progresso
+
+        Raises:
+            FFmpegError: Executável ausente, timeout, travamento, cancelamento
+                ou (com `check`) código de saída diferente de zero
+        """
+        command = [str(part) for part in command]
+        with_progress = Path(command[0]).stem == "ffmpeg" and "-progress" not in command
+        if with_progress:
+            command = [command[0], "-progress", "pipe:1", "-nostats", *command[1:]]
+        timeout = self.timeout if timeout is None else timeout
+        stall_timeout = self.stall_timeout if stall_timeout is None else stall_timeout
+        label = label or Path(command[-1]).name
+
+        if self._semaphore is not None:
+            while not self._semaphore.acquire(timeout=self.poll_interval):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise FFmpegError(f"FFmpeg cancelado antes de iniciar: {label}", kind="cancelled",
+                                      video_path=video_path, command=" ".join(command))
+        try:
+            return self._execute(
+                command, label, duration, timeout, stall_timeout if with_progress else None,
+                cancel_event, on_progress, check, video_path, with_progress,
+            )
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    async def run_async(self, command: Sequence[Any], **kwargs) -> FFmpegResult:
+        """
+        Versão asyncio de `run`: o processo roda em uma thread do executor e
+        o cancelamento da task encerra o processo antes de propagar.
+        """
+        cancel_event = kwargs.pop("cancel_event", None) or threading.Event()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            None, functools.partial(self.run, command, cancel_event=cancel_event, **kwargs)
+        )
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            try:
+                await future
+            except Exception:
+                pass
+            raise
+
+    def active_jobs(self) -> List[Dict[str, Any]]:
+        """Processos em execução, mais lentos (menor velocidade) primeiro."""
+        now = time.monotonic()
+        with self._lock:
+            snapshot = [
+                {**job.progress.to_dict(), "elapsed": now - job.started, "idle": now - job.last_activity}
+                for job in self._active.values()
+            ]
+        return sorted(snapshot, key=lambda job: job["speed"] if job["speed"] is not None else 0.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "active": len(self._active)}
+
+    # ------------------------------------------------------------------ #
+    # Execução
+    # ------------------------------------------------------------------ #
+    def _execute(self, command, label, duration, timeout, stall_timeout, cancel_event,
+                 on_progress, check, video_path, with_progress) -> FFmpegResult:
+        command_text = " ".join(command)
+        started = time.monotonic()
+        job = _Job(label=label, command=command, started=started, last_activity=started,
+                   progress=FFmpegProgress(label=label, duration=duration))
+        try:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors="replace",
+                start_new_session=os.name == "posix",
+            )
+        except FileNotFoundError as error:
+            raise FFmpegError(f"Executável não encontrado: {command[0]}", kind="not_installed",
+                              video_path=video_path, ffmpeg_error=str(error), command=command_text)
+
+        job_id = next(self._ids)
+        with self._lock:
+            self._active[job_id] = job
+            self._stats["runs"] += 1
+
+        readers = [
+            threading.Thread(target=self._read_stdout, args=(process.stdout, job, with_progress, on_progress),
+                             daemon=True),
+            threading.Thread(target=self._read_stderr, args=(process.stderr, job), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        abort = None
+        try:
+            while True:
+                try:
+                    process.wait(timeout=self.poll_interval)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                now = time.monotonic()
+                if cancel_event is not None and cancel_event.is_set():
+                    abort = "cancelled"
+                elif timeout and now - started > timeout:
+                    abort = "timeout"
+                elif stall_timeout and now - job.last_activity > stall_timeout:
+                    abort = "stalled"
+                if abort:
+                    self._terminate(process)
+                    break
+        except BaseException:
+            self._terminate(process)
+            raise
+        finally:
+            for reader in readers:
+                reader.join(timeout=5)
+            elapsed = time.monotonic() - started
+            job.progress.elapsed = elapsed
+            with self._lock:
+                self._active.pop(job_id, None)
+                self._stats["busy_seconds"] += elapsed
+
+        stderr = "".join(job.stderr)
+        result = FFmpegResult(
+            command=command,
+            returncode=process.returncode,
+            stdout="".join(job.stdout),
+            stderr=stderr,
+            elapsed=elapsed,
+            progress=job.progress if with_progress else None,
+        )
+
+        if abort:
+            with self._lock:
+                self._stats[{"cancelled": "cancelled", "timeout": "timeouts", "stalled": "stalls"}[abort]] += 1
+            messages = {
+                "cancelled": f"FFmpeg cancelado: {label}",
+                "timeout": f"Timeout de {timeout:g}s no FFmpeg: {label}" if timeout else "",
+                "stalled": f"FFmpeg sem progresso por {stall_timeout:g}s: {label}" if stall_timeout else "",
+            }
+            logger.warning(f"{messages[abort]} ({elapsed:.1f}s)")
+            raise FFmpegError(messages[abort], kind=abort, returncode=process.returncode,
+                              video_path=video_path, ffmpeg_error=stderr[-2000:], command=command_text)
+
+        if result.returncode != 0:
+            result.error_kind = classify_ffmpeg_error(stderr, result.returncode)
+            with self._lock:
+                self._stats["failures"] += 1
+            if check:
+                raise FFmpegError(
+                    f"FFmpeg falhou ({result.error_kind}, código {result.returncode}): {label}",
+                    kind=result.error_kind, returncode=result.returncode, video_path=video_path,
+                    ffmpeg_error=stderr[-2000:], command=command_text,
+                )
+        elif with_progress:
+            speed = job.progress.speed
+            logger.debug(f"FFmpeg concluído em {elapsed:.2f}s ({speed or 0:.2f}x): {label}")
+        return result
+
+    def _read_stdout(self, stream, job: _Job, with_progress: bool,
+                     on_progress: Optional[Callable[[FFmpegProgress], None]]) -> None:
+        for line in iter(stream.readline, ""):
+            job.last_activity = time.monotonic()
+            if not with_progress:
+                job.stdout.append(line)
+                continue
+            key, _, value = line.strip().partition("=")
+            if job.progress.update(key, value.strip()) and on_progress is not None:
+                job.progress.elapsed = job.last_activity - job.started
+                try:
+                    on_progress(job.progress)
+                except Exception as error:
+                    logger.debug(f"Callback de progresso falhou: {error}")
+        stream.close()
+
+    @staticmethod
+    def _read_stderr(stream, job: _Job) -> None:
+        for line in iter(stream.readline, ""):
+            job.stderr.append(line)
+        stream.close()
+
+    def _terminate(self, process: subprocess.Popen) -> None:
+        """Encerra o grupo de processos: SIGTERM e, após a carência, SIGKILL."""
+        if process.poll() is not None:
+            return
+        if os.name == "posix":
+            for sig in (signal.SIGTERM, signal.SIGKILL):
+                try:
+                    os.killpg(process.pid, sig)
+                except (ProcessLookupError, PermissionError):
+                    return
+                try:
+                    process.wait(timeout=self.kill_grace)
+                    return
+                except subprocess.TimeoutExpired:
+                    continue
+        else:  # pragma: no cover - Windows
+            process.kill()
+            process.wait()
+
+
+_default_runner: Optional[FFmpegRunner] = None
+_default_lock = threading.Lock()
+
+
+def get_ffmpeg_runner() -> FFmpegRunner:
+    """Retorna o executor compartilhado do processo."""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = FFmpegRunner()
+        return _default_runner
@@ -0,0 +1,412 @@
+"""
+Sonda de mídia unificada - AiShorts v2.0
+
+Uma única chamada `ffprobe -print_format json` por arquivo, com resultado
+em cache por (caminho, tamanho, mtime) em memória e em disco:
+- Streams, formato, duração e dados de vídeo/áudio já interpretados
+- Índice de keyframes sob demanda (mesma chamada, lendo os pacotes)
+- Verificação de integridade a partir da leitura dos pacotes
+- Fallback para OpenCV (e `wave` para narrações WAV) quando o ffprobe não está instalado
+"""
+
+import hashlib
+import json
+import os
+import threading
+import wave
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.utils.exceptions import FFmpegError, VideoProcessingError
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return None
+    return result if result == result else None  # descarta NaN
+
+
+def _parse_rate(rate: Optional[str]) -> Optional[float]:
+    """Converte frações do ffprobe ('30000/1001') em float."""
+    if not rate:
+        return None
+    numerator, _, denominator = str(rate).partition("/")
+    num = _to_float(numerator)
+    den = _to_float(denominator) if denominator else 1.0
+    if not num or not den:
+        return None
+    return num / den
+
+
+@dataclass
+class MediaInfo:
+    """Metadados de um arquivo de mídia."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    duration: float = 0.0
+    format_name: Optional[str] = None
+    bit_rate: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    frame_count: Optional[int] = None
+    video_codec: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    streams: List[Dict[str, Any]] = field(default_factory=list)
+    format: Dict[str, Any] = field(default_factory=dict)
+    keyframes: Optional[List[float]] = None
+    packet_count: Optional[int] = None
+    source: str = "ffprobe"
+
+    @property
+    def has_video(self) -> bool:
+        return self.width is not None or any(s.get("codec_type") == "video" for s in self.streams)
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    @property
+    def video_stream(self) -> Optional[Dict[str, Any]]:
+        return next((s for s in self.streams if s.get("codec_type") == "video"), None)
+
+    @property
+    def audio_stream(self) -> Optional[Dict[str, Any]]:
+        return next((s for s in self.streams if s.get("codec_type") == "audio"), None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MediaInfo":
+        known = {name for name in cls.__dataclass_fields__}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+    @classmethod
+    def from_ffprobe(cls, path: str, size: int, mtime_ns: int, data: Dict[str, Any]) -> "MediaInfo":
+        """Interpreta o JSON de `ffprobe -show_format -show_streams [-show_entries packet=...]`."""
+        fmt = data.get("format") or {}
+        streams = data.get("streams") or []
+        video = next((s for s in streams if s.get("codec_type") == "video"), None)
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+        duration = _to_float(fmt.get("duration")) or _to_float((video or {}).get("duration")) or 0.0
+        info = cls(
+            path=path,
+            size=size,
+            mtime_ns=mtime_ns,
+            duration=duration,
+            format_name=fmt.get("format_name"),
+            bit_rate=int(_to_float(fmt.get("bit_rate")) or 0) or None,
+            streams=streams,
+            format=fmt,
+        )
+
+        if video:
+            info.width = video.get("width")
+            info.height = video.get("height")
+            info.fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+            info.video_codec = video.get("codec_name")
+            info.pix_fmt = video.get("pix_fmt")
+            nb_frames = _to_float(video.get("nb_frames"))
+            if nb_frames:
+                info.frame_count = int(nb_frames)
+            elif info.fps and duration:
+                info.frame_count = int(round(info.fps * duration))
+        if audio:
+            info.audio_codec = audio.get("codec_name")
+            info.sample_rate = int(_to_float(audio.get("sample_rate")) or 0) or None
+            info.channels = audio.get("channels")
+
+        if "packets" in data:
+            video_index = (video or {}).get("index")
+            packets = [
+                packet for packet in data.get("packets") or []
+                if video_index is None or packet.get("stream_index", video_index) == video_index
+            ]
+            info.packet_count = len(packets)
+            info.keyframes = sorted(
+                pts for pts in (
+                    _to_float(packet.get("pts_time"))
+                    for packet in packets if "K" in packet.get("flags", "")
+                )
+                if pts is not None
+            )
+        return info
+
+
+class MediaProbe:
+    """
+    Serviço de sondagem de mídia com cache em memória (LRU) e em disco.
+
+    A chave do cache é (caminho absoluto, tamanho, mtime): um arquivo
+    alterado é sondado de novo automaticamente.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = "data/cache/media_probe",
+        max_entries: int = 2048,
+        ffprobe_bin: str = "ffprobe",
+        timeout: float = 60.0,
+        runner: Optional[FFmpegRunner] = None,
+    ):
+        """
+        Args:
+            cache_dir: Diretório do cache persistente (None = apenas memória)
+            max_entries: Entradas mantidas em memória
+            ffprobe_bin: Executável do ffprobe
+            timeout: Tempo máximo (s) de cada chamada ao ffprobe
+            runner: Executor de processos (padrão: executor compartilhado)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max(1, max_entries)
+        self.ffprobe_bin = ffprobe_bin
+        self.timeout = timeout
+        self.runner = runner or get_ffmpeg_runner()
+
+        self._memory: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ffprobe_available: Optional[bool] = None
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "ffprobe_calls": 0, "fallbacks": 0}
+
+    # ------------------------------------------------------------------ #
+    # API pública
+    # ------------------------------------------------------------------ #
+    def probe(self, path: str, *, keyframes: bool = False) -> MediaInfo:
+        """
+        Retorna os metadados do arquivo.
+
+        Args:
+            path: Arquivo de mídia
+            keyframes: Inclui o índice de keyframes (lê todos os pacotes)
+
+        Raises:
+            VideoProcessingError: Arquivo ilegível ou erro do ffprobe
+        """
+        file_path = Path(path)
+        try:
+            stat = file_path.stat()
+        except OSError:
+            # Sem stat não há chave confiável: sonda sem passar pelo cache
+            with self._lock:
+                self._stats["misses"] += 1
+            return self._run_probe(file_path, 0, 0, keyframes)
+
+        key = (str(file_path.resolve()), stat.st_size, stat.st_mtime_ns)
+        cached = self._lookup(key, keyframes)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            self._stats["misses"] += 1
+        info = self._run_probe(file_path, stat.st_size, stat.st_mtime_ns, keyframes)
+        self._store(key, info)
+        return info
+
+    def get_duration(self, path: str, default: float = 0.0) -> float:
+        """Duração em segundos (ou `default` se o arquivo não puder ser sondado)."""
+        try:
+            return self.probe(path).duration or default
+        except VideoProcessingError:
+            return default
+
+    def get_keyframes(self, path: str) -> List[float]:
+        """Posições (s) dos keyframes do primeiro stream de vídeo."""
+        return list(self.probe(path, keyframes=True).keyframes or [])
+
+    def check_integrity(self, path: str) -> bool:
+        """Verifica se o arquivo é legível e tem pacotes de vídeo."""
+        try:
+            info = self.probe(path, keyframes=True)
+        except VideoProcessingError:
+            return False
+        if info.source != "ffprobe":
+            return info.has_video and info.duration > 0
+        return bool(info.packet_count)
+
+    def invalidate(self, path: str) -> None:
+        """Remove do cache (memória) todas as versões do arquivo."""
+        resolved = str(Path(path).resolve())
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == resolved]:
+                del self._memory[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "memory_entries": len(self._memory)}
+
+    # ------------------------------------------------------------------ #
+    # Cache
+    # ------------------------------------------------------------------ #
+    def _lookup(self, key: Tuple[str, int, int], keyframes: bool) -> Optional[MediaInfo]:
+        with self._lock:
+            info = self._memory.get(key)
+            if info is not None and (not keyframes or info.keyframes is not None):
+                self._memory.move_to_end(key)
+                self._stats["hits"] += 1
+                return info
+
+        disk_path = self._disk_path(key)
+        if disk_path is None or not disk_path.exists():
+            return None
+        try:
+            info = MediaInfo.from_dict(json.loads(disk_path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError) as error:
+            logger.debug(f"Cache de sondagem ilegível ({disk_path}): {error}")
+            return None
+        if keyframes and info.keyframes is None:
+            return None
+
+        with self._lock:
+            self._stats["disk_hits"] += 1
+        self._remember(key, info)
+        return info
+
+    def _store(self, key: Tuple[str, int, int], info: MediaInfo) -> None:
+        self._remember(key, info)
+        disk_path = self._disk_path(key)
+        # Resultados do fallback (OpenCV) não são persistidos
+        if disk_path is None or info.source != "ffprobe":
+            return
+        tmp_path = disk_path.with_name(f"{disk_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(info.to_dict()), encoding="utf-8")
+            os.replace(tmp_path, disk_path)
+        except OSError as error:
+            logger.debug(f"Falha ao gravar cache de sondagem: {error}")
+            tmp_path.unlink(missing_ok=True)
+
+    def _remember(self, key: Tuple[str, int, int], info: MediaInfo) -> None:
+        with self._lock:
+            self._memory[key] = info
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_path(self, key: Tuple[str, int, int]) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        digest = hashlib.sha1("|".join(map(str, key)).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{digest}.json"
+
+    # ------------------------------------------------------------------ #
+    # Sondagem
+    # ------------------------------------------------------------------ #
+    def _run_probe(self, path: Path, size: int, mtime_ns: int, keyframes: bool) -> MediaInfo:
+        if self._ffprobe_available is not False:
+            command = [
+                self.ffprobe_bin, "-v", "error",
+                "-print_format", "json",
+                "-show_format", "-show_streams",
+            ]
+            if keyframes:
+                command += ["-show_entries", "packet=stream_index,pts_time,flags"]
+            command.append(str(path))
+
+            try:
+                with self._lock:
+                    self._stats["ffprobe_calls"] += 1
+                result = self.runner.run(
+                    command, timeout=self.timeout, check=False, label=f"ffprobe {path.name}", video_path=str(path)
+                )
+            except FFmpegError as error:
+                if error.kind != "not_installed":
+                    raise
+                logger.warning("ffprobe não encontrado; usando OpenCV para sondagem de mídia")
+                self._ffprobe_available = False
+            else:
+                self._ffprobe_available = True
+                if result.returncode != 0:
+                    raise VideoProcessingError(
+                        f"Erro no FFprobe: {result.stderr}", video_path=str(path), ffmpeg_error=result.stderr
+                    )
+                try:
+                    data = json.loads(result.stdout)
+                except (TypeError, ValueError) as error:
+                    raise VideoProcessingError(
+                        f"Erro ao parsear JSON do FFprobe: {error}", video_path=str(path)
+                    )
+                return MediaInfo.from_ffprobe(str(path), size, mtime_ns, data)
+
+        return self._probe_with_opencv(path, size, mtime_ns)
+
+    def _probe_with_opencv(self, path: Path, size: int, mtime_ns: int) -> MediaInfo:
+        import cv2
+
+        with self._lock:
+            self._stats["fallbacks"] += 1
+        capture = cv2.VideoCapture(str(path))
+        try:
+            if not capture.isOpened():
+                if path.suffix.lower() == ".wav":
+                    return self._probe_wav(path, size, mtime_ns)
+                raise VideoProcessingError(f"Não foi possível abrir a mídia: {path}", video_path=str(path))
+            fps = capture.get(cv2.CAP_PROP_FPS) or None
+            frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            fourcc = int(capture.get(cv2.CAP_PROP_FOURCC) or 0)
+            codec = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip("\x00 ").lower() or None
+            return MediaInfo(
+                path=str(path),
+                size=size,
+                mtime_ns=mtime_ns,
+                duration=frames / fps if fps else 0.0,
+                width=int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+                height=int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+                fps=fps,
+                frame_count=frames or None,
+                video_codec=codec,
+                # Sem leitura de pacotes: índice vazio (cortes caem no re-encode)
+                keyframes=[],
+                source="opencv",
+            )
+        finally:
+            capture.release()
+
+    @staticmethod
+    def _probe_wav(path: Path, size: int, mtime_ns: int) -> MediaInfo:
+        """Lê o cabeçalho WAV (o OpenCV não abre arquivos só de áudio)."""
+        try:
+            with wave.open(str(path), "rb") as reader:
+                rate = reader.getframerate()
+                return MediaInfo(
+                    path=str(path),
+                    size=size,
+                    mtime_ns=mtime_ns,
+                    duration=reader.getnframes() / rate if rate else 0.0,
+                    audio_codec="pcm",
+                    sample_rate=rate or None,
+                    channels=reader.getnchannels(),
+                    source="wave",
+                )
+        except (wave.Error, EOFError) as error:
+            raise VideoProcessingError(f"Não foi possível abrir a mídia: {path} ({error})", video_path=str(path))
+
+
+_default_probe: Optional[MediaProbe] = None
+_default_lock = threading.Lock()
+
+
+def get_media_probe() -> MediaProbe:
+    """Retorna a sonda compartilhada do processo (cache em `<cache_dir>/media_probe`)."""
+    global _default_probe
+    with _default_lock:
+        if _default_probe is None:
+            from src.config.settings import config
+
+            _default_probe = MediaProbe(cache_dir=str(Path(config.storage.cache_dir) / "media_probe"))
+        return _default_probe
@@ -0,0 +1,140 @@
+"""
+Cache em memória com expiração (TTL) - AiShorts v2.0
+
+Cache thread-safe com limite de entradas (LRU), suporte a cache negativo
+(lembrar falhas por um período) e estatísticas de uso.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+_MISSING = object()
+
+
+@dataclass
+class CacheEntry:
+    """Entrada armazenada no cache."""
+    value: Any
+    expires_at: float
+    negative: bool = False
+
+
+class TTLCache:
+    """Cache LRU com tempo de vida por entrada e cache negativo."""
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+        negative_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            ttl: Tempo de vida padrão das entradas (segundos)
+            max_entries: Máximo de entradas (as menos usadas são descartadas)
+            negative_ttl: Tempo de vida das entradas negativas (padrão: ttl)
+            clock: Relógio usado para expiração (injetável em testes)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl if negative_ttl is not None else ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor em cache (positivo) ou `default`."""
+        found, value, negative = self.lookup(key)
+        if not found or negative:
+            return default
+        return value
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Any, bool]:
+        """
+        Consulta o cache.
+
+        Returns:
+            Tupla (encontrado, valor, negativo)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return False, None, False
+
+            if entry.expires_at <= self._clock():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return False, None, False
+
+            self._entries.move_to_end(key)
+            if entry.negative:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+            return True, entry.value, entry.negative
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Armazena um valor."""
+        self._store(key, CacheEntry(value, self._clock() + (ttl if ttl is not None else self.ttl)))
+
+    def set_negative(self, key: Hashable, reason: Any = None, ttl: Optional[float] = None) -> None:
+        """Registra uma falha conhecida (ex.: vídeo indisponível)."""
+        expires_at = self._clock() + (ttl if ttl is not None else self.negative_ttl)
+        self._store(key, CacheEntry(reason, expires_at, negative=True))
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove uma entrada."""
+        with self._lock:
+            return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Remove todas as entradas."""
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.expires_at > self._clock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso."""
+        with self._lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": (self._hits + self._negative_hits) / lookups if lookups else 0.0,
+            }
+
+    def _store(self, key: Hashable, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
@@ -12,7 +12,8 @@ from .script_validator import (
     ValidationReport,
     ScriptValidationError,
     PlatformRequirements,
-    QualityMetrics
+    QualityMetrics,
+    ScriptFeatures
 )
 
 __all__ = [
@@ -21,5 +22,6 @@ __all__ = [
     'ValidationReport',
     'ScriptValidationError',
     'PlatformRequirements',
-    'QualityMetrics'
+    'QualityMetrics',
+    'ScriptFeatures'
 ]
@@ -9,8 +9,11 @@ Sistema avançado de validação de roteiros com:
 - Sugestões de melhorias
 """
 
+import copy
+import hashlib
 import json
 import re
+from collections import OrderedDict
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple, Set
 from dataclasses import dataclass, field
@@ -135,6 +138,26 @@ class ValidationReport:
         }
 
 
+@dataclass
+class ScriptFeatures:
+    """
+    Features de um roteiro extraídas uma única vez e reutilizadas
+    na avaliação de todas as plataformas.
+    
+    `section_percents` guarda (nome, percentual) na ordem das seções;
+    nomes repetidos são avaliados cada um por si.
+    """
+    fingerprint: str
+    script_text: str
+    script_text_lower: str
+    total_chars: int
+    total_duration: float
+    section_percents: Tuple[Tuple[str, float], ...]
+    structure_validation: ValidationResult
+    content_validation: ValidationResult
+    quality_metrics: QualityMetrics
+
+
 class ScriptValidationError(Exception):
     """Exceção específica para erros de validação de roteiro."""
     pass
@@ -197,9 +220,16 @@ class ScriptValidator:
         "anticipation": [r"mais adiante",r"continue assistindo",r"o resultado vai"]
     }
 
-    def __init__(self):
-        """Inicializa o validador."""
+    def __init__(self, feature_cache_size: int = 256):
+        """
+        Inicializa o validador.
+        
+        Args:
+            feature_cache_size: Máximo de roteiros com features em cache
+        """
         self.platform_requirements = self.PLATFORM_REQUIREMENTS
+        self.feature_cache_size = feature_cache_size
+        self._feature_cache: "OrderedDict[str, ScriptFeatures]" = OrderedDict()
         logger.info("ScriptValidator inicializado com sucesso")
 
     def validate_script(self, script: GeneratedScript, platform: PlatformType = PlatformType.TIKTOK) -> ValidationReport:
@@ -217,11 +247,90 @@ class ScriptValidator:
         
         start_time = datetime.now()
         
-        # Validações específicas
-        structure_result = self._validate_structure(script)
-        content_result = self._validate_content(script)
-        platform_result = self._validate_platform_requirements(script, platform)
-        quality_metrics = self._analyze_quality_metrics(script)
+        features = self._features(script)
+        report = self._build_report(script, features, platform)
+        
+        elapsed_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Validação concluída em {elapsed_time:.2f}s - Score: {report.overall_score:.3f}")
+        
+        return report
+
+    def extract_features(self, script: GeneratedScript) -> ScriptFeatures:
+        """
+        Extrai (ou recupera do cache) as features independentes de plataforma.
+        
+        Tokenização, contagem de palavras, análise do hook, checagens de
+        estrutura e métricas de qualidade são calculadas uma única vez por
+        roteiro; apenas os limites variam entre plataformas.
+        
+        Args:
+            script: Roteiro para analisar
+            
+        Returns:
+            Cópia das features do roteiro (alterá-la não afeta o cache)
+        """
+        return copy.deepcopy(self._features(script))
+
+    def _features(self, script: GeneratedScript) -> ScriptFeatures:
+        """Features do cache, compartilhadas: uso interno e somente leitura."""
+        fingerprint = self._script_fingerprint(script)
+        
+        cached = self._feature_cache.get(fingerprint)
+        if cached is not None:
+            self._feature_cache.move_to_end(fingerprint)
+            return cached
+        
+        script_text = script.get_script_text()
+        total_duration = script.total_duration
+        section_percents = tuple(
+            (section.name, (section.duration_seconds / total_duration * 100) if total_duration > 0 else 0)
+            for section in script.sections
+        )
+        
+        features = ScriptFeatures(
+            fingerprint=fingerprint,
+            script_text=script_text,
+            script_text_lower=script_text.lower(),
+            total_chars=len(script_text),
+            total_duration=total_duration,
+            section_percents=section_percents,
+            structure_validation=self._validate_structure(script),
+            content_validation=self._validate_content(script),
+            quality_metrics=self._analyze_quality_metrics(script)
+        )
+        
+        self._feature_cache[fingerprint] = features
+        while len(self._feature_cache) > self.feature_cache_size:
+            self._feature_cache.popitem(last=False)
+        
+        return features
+
+    def clear_feature_cache(self) -> None:
+        """Limpa o cache de features."""
+        self._feature_cache.clear()
+
+    def _script_fingerprint(self, script: GeneratedScript) -> str:
+        """Gera chave de cache a partir do conteúdo que afeta a validação."""
+        category = script.theme.category.value if script.theme and script.theme.category else None
+        payload = json.dumps({
+            "title": script.title,
+            "category": category,
+            "total_duration": script.total_duration,
+            "sections": [
+                [section.name, section.content, section.duration_seconds]
+                for section in script.sections
+            ]
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _build_report(self, script: GeneratedScript, features: ScriptFeatures,
+                      platform: PlatformType) -> ValidationReport:
+        """Monta o relatório de uma plataforma a partir das features já extraídas."""
+        # Cópias: cada relatório pode ser alterado sem afetar o cache nem os demais
+        structure_result = copy.deepcopy(features.structure_validation)
+        content_result = copy.deepcopy(features.content_validation)
+        platform_result = self._evaluate_platform_rules(features, platform)
+        quality_metrics = copy.deepcopy(features.quality_metrics)
         
         # Coleta todos os issues
         all_issues = []
@@ -243,7 +352,7 @@ class ScriptValidator:
         # Gera sugestões
         suggestions = self._generate_suggestions(all_issues, structure_result, content_result, platform_result)
         
-        report = ValidationReport(
+        return ValidationReport(
             script=script,
             platform=platform,
             overall_score=overall_score,
@@ -256,11 +365,6 @@ class ScriptValidator:
             all_issues=all_issues,
             suggestions=suggestions
         )
-        
-        elapsed_time = (datetime.now() - start_time).total_seconds()
-        logger.info(f"Validação concluída em {elapsed_time:.2f}s - Score: {overall_score:.3f}")
-        
-        return report
 
     def _validate_structure(self, script: GeneratedScript) -> ValidationResult:
         """Valida estrutura do roteiro."""
@@ -503,29 +607,34 @@ class ScriptValidator:
 
     def _validate_platform_requirements(self, script: GeneratedScript, platform: PlatformType) -> ValidationResult:
         """Valida requisitos específicos da plataforma."""
+        return self._evaluate_platform_rules(self._features(script), platform)
+
+    def _evaluate_platform_rules(self, features: ScriptFeatures, platform: PlatformType) -> ValidationResult:
+        """Avalia as regras de uma plataforma sobre features pré-calculadas."""
         issues: List[ValidationIssue] = []
         suggestions: List[str] = []
         
         requirements = self.platform_requirements[platform]
+        total_duration = features.total_duration
         
         # Verifica duração total
-        if script.total_duration > requirements.max_duration:
+        if total_duration > requirements.max_duration:
             issues.append(ValidationIssue(
                 code="PLATFORM_DURATION_TOO_LONG",
-                message=f"Duração {script.total_duration}s excede limite {requirements.max_duration}s para {platform.value}",
+                message=f"Duração {total_duration}s excede limite {requirements.max_duration}s para {platform.value}",
                 severity=ValidationSeverity.ERROR,
                 suggestion="Reduza a duração do roteiro"
             ))
-        elif script.total_duration < requirements.min_duration:
+        elif total_duration < requirements.min_duration:
             issues.append(ValidationIssue(
                 code="PLATFORM_DURATION_TOO_SHORT",
-                message=f"Duração {script.total_duration}s é muito curta (min: {requirements.min_duration}s) para {platform.value}",
+                message=f"Duração {total_duration}s é muito curta (min: {requirements.min_duration}s) para {platform.value}",
                 severity=ValidationSeverity.WARNING,
                 suggestion="Aumente a duração do roteiro"
             ))
         
         # Verifica caracteres totais
-        total_chars = len(script.get_script_text())
+        total_chars = features.total_chars
         if total_chars > requirements.max_characters:
             issues.append(ValidationIssue(
                 code="PLATFORM_CHARS_TOO_LONG",
@@ -542,8 +651,7 @@ class ScriptValidator:
             ))
         
         # Verifica palavras proibidas
-        script_text = script.get_script_text().lower()
-        found_banned = [word for word in requirements.banned_words if word in script_text]
+        found_banned = [word for word in requirements.banned_words if word in features.script_text_lower]
         if found_banned:
             issues.append(ValidationIssue(
                 code="PLATFORM_BANNED_WORDS",
@@ -554,10 +662,10 @@ class ScriptValidator:
             ))
         
         # Verifica distribuição de duração por seção
-        self._validate_section_distribution(script, requirements, issues)
+        self._validate_section_distribution(features, requirements, issues)
         
         # Verifica elementos de engajamento específicos da plataforma
-        self._validate_platform_engagement(script, platform, requirements, issues)
+        self._validate_platform_engagement(features, platform, requirements, issues)
         
         # Calcula score
         max_score = 100
@@ -573,14 +681,10 @@ class ScriptValidator:
             suggestions=suggestions
         )
 
-    def _validate_section_distribution(self, script: GeneratedScript, requirements: PlatformRequirements, issues: List[ValidationIssue]):
+    def _validate_section_distribution(self, features: ScriptFeatures, requirements: PlatformRequirements, issues: List[ValidationIssue]):
         """Valida distribuição de duração por seção."""
-        total_duration = script.total_duration
-        
-        for section in script.sections:
-            section_percent = (section.duration_seconds / total_duration * 100) if total_duration > 0 else 0
-            
-            if section.name == "hook":
+        for section_name, section_percent in features.section_percents:
+            if section_name == "hook":
                 expected_percent = requirements.hook_duration_percent * 100
                 if abs(section_percent - expected_percent) > 10:  # Tolerância de 10%
                     issues.append(ValidationIssue(
@@ -591,7 +695,7 @@ class ScriptValidator:
                         suggestion="Ajuste a duração do hook para melhor engajamento"
                     ))
             
-            elif section.name == "development":
+            elif section_name == "development":
                 expected_percent = requirements.development_duration_percent * 100
                 if abs(section_percent - expected_percent) > 15:  # Tolerância de 15%
                     issues.append(ValidationIssue(
@@ -602,7 +706,7 @@ class ScriptValidator:
                         suggestion="Ajuste a duração do desenvolvimento"
                     ))
             
-            elif section.name == "conclusion":
+            elif section_name == "conclusion":
                 expected_percent = requirements.conclusion_duration_percent * 100
                 if abs(section_percent - expected_percent) > 10:  # Tolerância de 10%
                     issues.append(ValidationIssue(
@@ -613,13 +717,11 @@ class ScriptValidator:
                         suggestion="Ajuste a duração da conclusão"
                     ))
 
-    def _validate_platform_engagement(self, script: GeneratedScript, platform: PlatformType, requirements: PlatformRequirements, issues: List[ValidationIssue]):
+    def _validate_platform_engagement(self, features: ScriptFeatures, platform: PlatformType, requirements: PlatformRequirements, issues: List[ValidationIssue]):
         """Valida elementos de engajamento específicos da plataforma."""
-        script_text = script.get_script_text().lower()
-        
         # Verifica frases de engajamento recomendadas
         found_engagement = [phrase for phrase in requirements.required_engagement_phrases 
-                           if phrase.lower() in script_text]
+                           if phrase.lower() in features.script_text_lower]
         
         if not found_engagement:
             issues.append(ValidationIssue(
@@ -774,20 +876,53 @@ class ScriptValidator:
         # Remove duplicatas e retorna
         return list(set(suggestions))
 
-    def validate_multiple_platforms(self, script: GeneratedScript) -> Dict[PlatformType, ValidationReport]:
-        """Valida roteiro para múltiplas plataformas."""
+    def validate_multiple_platforms(self, script: GeneratedScript,
+                                    platforms: Optional[List[PlatformType]] = None) -> Dict[PlatformType, ValidationReport]:
+        """
+        Valida roteiro para múltiplas plataformas.
+        
+        As features do roteiro são extraídas uma única vez; cada plataforma
+        custa apenas a avaliação das suas regras.
+        """
+        platforms = platforms or list(PlatformType)
         reports = {}
         
-        for platform in PlatformType:
+        try:
+            features = self._features(script)
+        except Exception as e:
+            logger.error(f"Erro ao extrair features do roteiro '{script.title}': {e}")
+            return reports
+        
+        for platform in platforms:
             try:
-                report = self.validate_script(script, platform)
-                reports[platform] = report
+                reports[platform] = self._build_report(script, features, platform)
             except Exception as e:
                 logger.error(f"Erro ao validar para {platform.value}: {e}")
                 continue
         
         return reports
 
+    def validate_batch(self, scripts: List[GeneratedScript],
+                       platforms: Optional[List[PlatformType]] = None) -> List[Dict[PlatformType, ValidationReport]]:
+        """
+        Valida uma lista de roteiros para múltiplas plataformas.
+        
+        Args:
+            scripts: Roteiros para validar
+            platforms: Plataformas alvo (padrão: todas)
+            
+        Returns:
+            Lista de relatórios por plataforma, na mesma ordem dos roteiros
+        """
+        start_time = datetime.now()
+        
+        results = [self.validate_multiple_platforms(script, platforms) for script in scripts]
+        
+        elapsed_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Validação em lote de {len(scripts)} roteiros concluída em {elapsed_time:.2f}s")
+        
+        return results
+
     def save_validation_report(self, report: ValidationReport, filepath: Path) -> None:
         """Salva relatório de validação em arquivo."""
         filepath.parent.mkdir(parents=True, exist_ok=True)
@@ -4,6 +4,24 @@ Módulo de extratores de vídeo.
 """
 
 from .youtube_extractor import YouTubeExtractor
-from .segment_processor import SegmentProcessor
+from .segment_processor import (
+    SegmentProcessor,
+    SegmentCut,
+    KeyframeIndex,
+    SegmentJob,
+    SegmentJobResult,
+    SegmentBatchReport,
+)
+from .format_selector import FormatSelectionPolicy, FormatSelection
 
-__all__ = ["YouTubeExtractor", "SegmentProcessor"]
\ No newline at end of file
+__all__ = [
+    "YouTubeExtractor",
+    "SegmentProcessor",
+    "SegmentCut",
+    "KeyframeIndex",
+    "SegmentJob",
+    "SegmentJobResult",
+    "SegmentBatchReport",
+    "FormatSelectionPolicy",
+    "FormatSelection",
+]
\ No newline at end of file
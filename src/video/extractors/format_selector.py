@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+Política de seleção de formatos para downloads do YouTube.
+
+Pontua os formatos disponíveis no info dict do yt-dlp por compatibilidade de
+codec com o pipeline de renderização, proximidade da resolução alvo
+(1080x1920), bitrate e tamanho. Combinações que só exigem cópia de streams
+(remux) têm sempre prioridade sobre as que exigem transcodificação.
+"""
+
+import math
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+
+# Identificadores de codec do yt-dlp/OpenCV (fourcc) para os nomes do ffprobe
+CODEC_ALIASES = {
+    'avc1': 'h264', 'avc3': 'h264', 'hev1': 'hevc', 'hvc1': 'hevc', 'h265': 'hevc',
+    'vp09': 'vp9', 'av01': 'av1', 'mp4a': 'aac',
+}
+
+# Codecs que o pipeline mantém por cópia de stream em MP4 (remux no download e
+# cortes por keyframe); os demais exigem re-encode em algum momento
+MP4_COPY_VIDEO_CODECS = frozenset({'h264', 'hevc'})
+MP4_COPY_AUDIO_CODECS = frozenset({'aac', 'mp3'})
+
+
+def normalize_codec(codec: Optional[str]) -> Optional[str]:
+    """Nome do codec no padrão do ffprobe (`h264`, `hevc`, `vp9`...)."""
+    if not codec:
+        return None
+    codec = codec.lower()
+    return CODEC_ALIASES.get(codec, codec)
+
+
+# Codecs de vídeo aceitos pelo contêiner, com peso de preferência (H.264 é o
+# mais barato de decodificar no pipeline de renderização); em MP4 só os de
+# MP4_COPY_VIDEO_CODECS são copiados
+VIDEO_CODEC_SCORES = {
+    'avc1': 1.0,
+    'h264': 1.0,
+    'hev1': 0.8,
+    'hvc1': 0.8,
+    'h265': 0.8,
+    'vp09': 0.6,
+    'vp9': 0.6,
+    'av01': 0.5,
+}
+
+# Codecs de áudio aceitos pelo contêiner; em MP4 só os de MP4_COPY_AUDIO_CODECS são copiados
+AUDIO_CODEC_SCORES = {
+    'mp4a': 1.0,
+    'aac': 1.0,
+    'opus': 0.7,
+    'mp3': 0.6,
+}
+
+# Ação necessária para obter o arquivo final
+ACTION_COPY = "copy"            # formato já está no contêiner final
+ACTION_REMUX = "remux"          # troca de contêiner/merge sem re-encode
+ACTION_TRANSCODE = "transcode"  # re-encode inevitável
+
+
+@dataclass
+class FormatSelection:
+    """Resultado da seleção de formato."""
+    format_spec: str
+    video_format_id: str
+    audio_format_id: Optional[str]
+    container: str
+    action: str
+    score: float
+    width: Optional[int] = None
+    height: Optional[int] = None
+    vcodec: Optional[str] = None
+    acodec: Optional[str] = None
+    filesize: Optional[int] = None
+    reasons: List[str] = field(default_factory=list)
+
+    @property
+    def requires_transcode(self) -> bool:
+        """Indica se o download exigirá re-encode."""
+        return self.action == ACTION_TRANSCODE
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário (relatórios/metadados)."""
+        data = asdict(self)
+        data['requires_transcode'] = self.requires_transcode
+        return data
+
+
+class FormatSelectionPolicy:
+    """
+    Seleciona o melhor formato (ou par vídeo+áudio) de um info dict do yt-dlp.
+
+    Pesos da pontuação: codec (0.4), resolução (0.35), bitrate (0.15) e
+    tamanho (0.1). Candidatos que exigem transcodificação só são escolhidos
+    quando não há alternativa por remux.
+    """
+
+    # Bitrate de referência (kbps) para 1080x1920; escala com a área em pixels
+    REFERENCE_BITRATE_KBPS = 4000.0
+
+    def __init__(
+        self,
+        target_width: int = 1080,
+        target_height: int = 1920,
+        container: str = 'mp4',
+        include_audio: bool = True,
+        max_filesize: Optional[int] = None,
+        fallback_format: str = 'best[height<=720]',
+    ):
+        """
+        Inicializa a política.
+
+        Args:
+            target_width: Largura do vídeo final
+            target_height: Altura do vídeo final
+            container: Contêiner desejado para o arquivo baixado
+            include_audio: Se True, inclui a melhor trilha de áudio compatível
+            max_filesize: Descarta formatos maiores que este tamanho (bytes)
+            fallback_format: Seletor usado quando não há formatos pontuáveis
+        """
+        self.target_width = target_width
+        self.target_height = target_height
+        self.container = container
+        self.include_audio = include_audio
+        self.max_filesize = max_filesize
+        self.fallback_format = fallback_format
+
+    @property
+    def format_key(self) -> str:
+        """Identificador estável da política (usado como chave na biblioteca de assets)."""
+        audio = "av" if self.include_audio else "v"
+        return f"policy:{self.target_width}x{self.target_height}:{self.container}:{audio}"
+
+    def select(self, info: Dict[str, Any]) -> Optional[FormatSelection]:
+        """
+        Escolhe o formato a baixar.
+
+        Args:
+            info: Info dict do yt-dlp (com a lista `formats`)
+
+        Returns:
+            FormatSelection ou None se nenhum formato puder ser avaliado
+        """
+        candidates = self.rank(info)
+        if not candidates:
+            return None
+
+        selection = candidates[0]
+        if selection.requires_transcode:
+            logger.warning(
+                f"Transcodificação inevitável para {info.get('id')}: "
+                f"{selection.vcodec}/{selection.acodec} não pode ser copiado para {self.container}"
+            )
+        else:
+            logger.debug(
+                f"Formato selecionado para {info.get('id')}: {selection.format_spec} "
+                f"({selection.action}, {selection.width}x{selection.height}, {selection.vcodec})"
+            )
+        return selection
+
+    def rank(self, info: Dict[str, Any]) -> List[FormatSelection]:
+        """Retorna todos os candidatos ordenados (remux antes de transcode, maior pontuação primeiro)."""
+        formats = [fmt for fmt in (info.get('formats') or []) if self._is_usable(fmt)]
+        duration = info.get('duration')
+
+        progressive = [fmt for fmt in formats if self._has_video(fmt) and self._has_audio(fmt)]
+        video_only = [fmt for fmt in formats if self._has_video(fmt) and not self._has_audio(fmt)]
+        audio_only = [fmt for fmt in formats if self._has_audio(fmt) and not self._has_video(fmt)]
+
+        best_audio = self._best_audio(audio_only) if self.include_audio else None
+
+        candidates: List[FormatSelection] = []
+        for fmt in progressive:
+            candidates.append(self._evaluate(fmt, None, duration, progressive=True))
+        for fmt in video_only:
+            if self.include_audio and best_audio is None:
+                continue
+            candidates.append(self._evaluate(fmt, best_audio, duration, progressive=False))
+
+        if self.max_filesize:
+            candidates = [c for c in candidates if not c.filesize or c.filesize <= self.max_filesize]
+
+        candidates.sort(key=lambda c: (c.requires_transcode, -c.score))
+        return candidates
+
+    def _evaluate(
+        self,
+        video: Dict[str, Any],
+        audio: Optional[Dict[str, Any]],
+        duration: Optional[float],
+        progressive: bool,
+    ) -> FormatSelection:
+        """Pontua um formato progressivo ou um par vídeo+áudio."""
+        reasons: List[str] = []
+        vcodec = self._codec_family(video.get('vcodec'))
+        acodec = self._codec_family((audio or video).get('acodec')) if (audio or progressive) else None
+
+        video_copyable = vcodec in VIDEO_CODEC_SCORES and self._copyable(vcodec, MP4_COPY_VIDEO_CODECS)
+        audio_copyable = acodec is None or (
+            acodec in AUDIO_CODEC_SCORES and self._copyable(acodec, MP4_COPY_AUDIO_CODECS)
+        )
+        if not video_copyable:
+            reasons.append(f"codec de vídeo '{vcodec}' incompatível com {self.container}")
+        if not audio_copyable:
+            reasons.append(f"codec de áudio '{acodec}' incompatível com {self.container}")
+
+        if not (video_copyable and audio_copyable):
+            action = ACTION_TRANSCODE
+        elif progressive and video.get('ext') == self.container:
+            action = ACTION_COPY
+        else:
+            action = ACTION_REMUX
+
+        codec_score = VIDEO_CODEC_SCORES.get(vcodec, 0.2)
+        if acodec is not None:
+            codec_score = 0.8 * codec_score + 0.2 * AUDIO_CODEC_SCORES.get(acodec, 0.2)
+
+        width, height = video.get('width'), video.get('height')
+        resolution_score = self._resolution_score(width, height)
+
+        expected_kbps = self._expected_bitrate(width, height)
+        bitrate = self._bitrate(video) + (self._bitrate(audio) if audio else 0.0)
+        bitrate_score = min(1.0, bitrate / expected_kbps) if bitrate else 0.5
+
+        filesize = self._filesize(video, duration)
+        if audio:
+            audio_size = self._filesize(audio, duration)
+            filesize = filesize + audio_size if filesize and audio_size else filesize
+        if filesize and duration:
+            expected_bytes = expected_kbps * 1000 / 8 * duration
+            size_score = min(1.0, expected_bytes / filesize)
+        else:
+            size_score = 0.5
+
+        score = (
+            0.4 * codec_score
+            + 0.35 * resolution_score
+            + 0.15 * bitrate_score
+            + 0.1 * size_score
+        )
+
+        audio_id = audio.get('format_id') if audio else None
+        format_spec = f"{video['format_id']}+{audio_id}" if audio_id else str(video['format_id'])
+
+        return FormatSelection(
+            format_spec=format_spec,
+            video_format_id=str(video['format_id']),
+            audio_format_id=audio_id,
+            container=self.container,
+            action=action,
+            score=round(score, 4),
+            width=width,
+            height=height,
+            vcodec=vcodec,
+            acodec=acodec,
+            filesize=int(filesize) if filesize else None,
+            reasons=reasons,
+        )
+
+    def _copyable(self, codec: str, mp4_codecs: frozenset) -> bool:
+        """Em MP4, só os codecs que o pipeline inteiro mantém por cópia de stream."""
+        return self.container != 'mp4' or normalize_codec(codec) in mp4_codecs
+
+    def _resolution_score(self, width: Optional[int], height: Optional[int]) -> float:
+        """
+        Compara o lado menor do formato com o lado menor do alvo.
+
+        Abaixo do alvo (upscale) a pontuação cai linearmente; acima do alvo a
+        queda é mais suave (apenas bytes desperdiçados).
+        """
+        if not width or not height:
+            return 0.3
+
+        target_short = min(self.target_width, self.target_height)
+        ratio = min(width, height) / target_short
+        if ratio <= 1.0:
+            return ratio
+        return max(0.0, 1.0 - 0.5 * (ratio - 1.0))
+
+    def _expected_bitrate(self, width: Optional[int], height: Optional[int]) -> float:
+        """Bitrate de referência (kbps) para a área do formato."""
+        target_area = self.target_width * self.target_height
+        area = (width or 0) * (height or 0) or target_area
+        return max(500.0, self.REFERENCE_BITRATE_KBPS * area / target_area)
+
+    def _best_audio(self, formats: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Escolhe a trilha de áudio: compatível com o contêiner primeiro, depois maior bitrate."""
+        if not formats:
+            return None
+
+        def _key(fmt: Dict[str, Any]) -> Tuple[bool, float]:
+            codec = self._codec_family(fmt.get('acodec'))
+            copyable = codec in AUDIO_CODEC_SCORES and self._copyable(codec, MP4_COPY_AUDIO_CODECS)
+            return (copyable, self._bitrate(fmt))
+
+        return max(formats, key=_key)
+
+    @staticmethod
+    def _is_usable(fmt: Dict[str, Any]) -> bool:
+        """Descarta storyboards e formatos sem identificação."""
+        if not fmt or not fmt.get('format_id'):
+            return False
+        return fmt.get('ext') != 'mhtml' and fmt.get('protocol') != 'mhtml'
+
+    @staticmethod
+    def _has_video(fmt: Dict[str, Any]) -> bool:
+        return fmt.get('vcodec') not in (None, 'none')
+
+    @staticmethod
+    def _has_audio(fmt: Dict[str, Any]) -> bool:
+        return fmt.get('acodec') not in (None, 'none')
+
+    @staticmethod
+    def _codec_family(codec: Optional[str]) -> Optional[str]:
+        """Normaliza o codec (ex.: 'avc1.64001F' -> 'avc1')."""
+        if not codec or codec == 'none':
+            return None
+        return codec.split('.')[0].lower()
+
+    @staticmethod
+    def _bitrate(fmt: Optional[Dict[str, Any]]) -> float:
+        """Bitrate total do formato em kbps (0 se desconhecido)."""
+        if not fmt:
+            return 0.0
+        for key in ('tbr', 'vbr', 'abr'):
+            value = fmt.get(key)
+            if value:
+                return float(value)
+        return 0.0
+
+    @classmethod
+    def _filesize(cls, fmt: Dict[str, Any], duration: Optional[float]) -> Optional[float]:
+        """Tamanho do formato em bytes (estimado pelo bitrate quando ausente)."""
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if size:
+            return float(size)
+        bitrate = cls._bitrate(fmt)
+        if bitrate and duration and not math.isnan(duration):
+            return bitrate * 1000 / 8 * duration
+        return None
@@ -3,10 +3,16 @@
 Processador de segmentos de vídeo usando FFmpeg.
 """
 
+import bisect
 import os
+import shutil
 import subprocess
 import tempfile
-from typing import Dict, Any, Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
 from loguru import logger
@@ -16,6 +22,191 @@ from src.utils.exceptions import (
     VideoUnavailableError,
     ErrorHandler
 )
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+from src.utils.media_probe import MediaInfo, MediaProbe, get_media_probe
+from src.video.extractors.format_selector import MP4_COPY_VIDEO_CODECS, normalize_codec
+
+
+@dataclass
+class KeyframeIndex:
+    """Posições (s) dos keyframes e formato do stream de vídeo."""
+    
+    keyframes: List[float] = field(default_factory=list)
+    codec: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    # Perfil e nível do codec (ffprobe); o trecho re-encodado do corte parcial usa os mesmos
+    profile: Optional[str] = None
+    level: Optional[int] = None
+    
+    @classmethod
+    def from_media_info(cls, info: MediaInfo) -> "KeyframeIndex":
+        """Monta o índice a partir de uma sondagem feita com `keyframes=True`."""
+        stream = info.video_stream or {}
+        return cls(
+            keyframes=list(info.keyframes or []),
+            codec=normalize_codec(info.video_codec),
+            pix_fmt=info.pix_fmt,
+            profile=stream.get("profile"),
+            level=stream.get("level"),
+        )
+    
+    def previous(self, timestamp: float) -> Optional[float]:
+        """Último keyframe em ou antes de `timestamp`."""
+        position = bisect.bisect_right(self.keyframes, timestamp + 1e-6)
+        return self.keyframes[position - 1] if position else None
+    
+    def next(self, timestamp: float) -> Optional[float]:
+        """Primeiro keyframe em ou depois de `timestamp`."""
+        position = bisect.bisect_left(self.keyframes, timestamp - 1e-6)
+        return self.keyframes[position] if position < len(self.keyframes) else None
+
+
+@dataclass
+class CutPlan:
+    """Plano de corte: modo e tempos efetivos na origem."""
+    
+    mode: str
+    start: float
+    duration: float
+    seek: float
+    split: Optional[float] = None
+    reason: str = ""
+
+
+@dataclass
+class SegmentCut:
+    """Resultado de um corte, com o caminho tomado."""
+    
+    path: str
+    mode: str
+    requested_start: float
+    start: float
+    duration: float
+    elapsed: float
+    reason: str = ""
+    
+    @property
+    def start_offset(self) -> float:
+        """Deslocamento (s) entre o início efetivo e o solicitado."""
+        return self.start - self.requested_start
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "requested_start": self.requested_start,
+            "start": self.start,
+            "duration": self.duration,
+            "elapsed": self.elapsed,
+            "reason": self.reason,
+        }
+
+
+@dataclass
+class SegmentJob:
+    """Corte pedido ao processamento em lote."""
+    
+    video_path: str
+    start: float
+    duration: float
+    output_path: Optional[str] = None
+    mode: str = "auto"
+    # Formato de saída opcional (força re-encode com redimensionamento/FPS)
+    target_size: Optional[Tuple[int, int]] = None
+    target_fps: Optional[float] = None
+    
+    @property
+    def has_target(self) -> bool:
+        return self.target_size is not None or self.target_fps is not None
+
+
+@dataclass
+class SegmentJobResult:
+    """Resultado de um job do lote, com tempos de fila e execução."""
+    
+    job: SegmentJob
+    index: int
+    cut: Optional[SegmentCut] = None
+    error: Optional[str] = None
+    threads: int = 1
+    queued: float = 0.0
+    elapsed: float = 0.0
+    
+    @property
+    def ok(self) -> bool:
+        return self.cut is not None
+    
+    @property
+    def path(self) -> Optional[str]:
+        return self.cut.path if self.cut else None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "video_path": self.job.video_path,
+            "start": self.job.start,
+            "duration": self.job.duration,
+            "ok": self.ok,
+            "error": self.error,
+            "threads": self.threads,
+            "queued": self.queued,
+            "elapsed": self.elapsed,
+            "cut": self.cut.to_dict() if self.cut else None,
+        }
+
+
+@dataclass
+class SegmentBatchReport:
+    """Resultados do lote (na ordem dos jobs) e tempo total."""
+    
+    results: List[SegmentJobResult]
+    wall_time: float
+    workers: int
+    cpu_budget: int
+    
+    @property
+    def paths(self) -> List[Optional[str]]:
+        return [result.path for result in self.results]
+    
+    @property
+    def failed(self) -> List[SegmentJobResult]:
+        return [result for result in self.results if not result.ok]
+    
+    @property
+    def total_job_time(self) -> float:
+        """Soma do tempo de cada job (o que custaria rodar em série)."""
+        return sum(result.elapsed for result in self.results)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_time": self.wall_time,
+            "total_job_time": self.total_job_time,
+            "workers": self.workers,
+            "cpu_budget": self.cpu_budget,
+            "failed": len(self.failed),
+            "results": [result.to_dict() for result in self.results],
+        }
+
+
+class _CoreBudget:
+    """Semáforo ponderado: cada processo FFmpeg reserva os núcleos que vai usar."""
+    
+    def __init__(self, total: int):
+        self.total = max(1, total)
+        self._available = self.total
+        self._condition = threading.Condition()
+    
+    def acquire(self, cost: int) -> int:
+        cost = min(max(1, cost), self.total)
+        with self._condition:
+            self._condition.wait_for(lambda: self._available >= cost)
+            self._available -= cost
+        return cost
+    
+    def release(self, cost: int) -> None:
+        with self._condition:
+            self._available += cost
+            self._condition.notify_all()
 
 
 class SegmentProcessor:
@@ -23,21 +214,45 @@ class SegmentProcessor:
     Processador de segmentos de vídeo usando FFmpeg.
     
     Capabilities:
-    - Extração de segmentos de vídeo
+    - Extração de segmentos de vídeo (cópia de streams alinhada a keyframes)
+    - Extração em lote paralela com orçamento de núcleos por processo
     - Normalização de formato de vídeo
     - Obtenção de informações de vídeo
     - Conversão de codecs e resoluções
     """
     
-    def __init__(self, temp_dir: Optional[str] = None):
+    CUT_MODES = ("auto", "copy", "smart", "reencode")
+    # Codecs em que o trecho re-encodado pode ser concatenado ao restante copiado
+    SMART_CUT_CODECS = {"h264"}
+    # Codecs que podem ser copiados sem re-encode para contêineres MP4 (mesma tabela da seleção de formato)
+    MP4_COPY_CODECS = MP4_COPY_VIDEO_CODECS
+    MP4_SUFFIXES = {".mp4", ".m4v", ".mov"}
+    # Perfis H.264 (ffprobe) que o libx264 reproduz em yuv420p
+    X264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+    # Campos do stream que precisam coincidir para unir o trecho re-encodado ao copiado
+    SMART_CUT_STREAM_KEYS = ("codec_name", "profile", "level", "width", "height", "pix_fmt")
+    
+    def __init__(self, temp_dir: Optional[str] = None, keyframe_tolerance: float = 0.5,
+                 media_probe: Optional[MediaProbe] = None, runner: Optional[FFmpegRunner] = None):
         """
         Inicializa o processador.
         
         Args:
             temp_dir: Diretório temporário para processamento
+            keyframe_tolerance: Deslocamento máximo (s) do início do corte para
+                alinhá-lo a um keyframe e copiar os streams
+            media_probe: Sonda de mídia (padrão: sonda compartilhada do processo)
+            runner: Executor de processos FFmpeg (padrão: executor compartilhado)
         """
         self.temp_dir = Path(temp_dir) if temp_dir else Path(tempfile.gettempdir()) / "aishorts_processor"
         self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.keyframe_tolerance = keyframe_tolerance
+        self.media_probe = media_probe or get_media_probe()
+        self.runner = runner or get_ffmpeg_runner()
+        
+        self._cut_stats = {"copy": 0, "smart": 0, "reencode": 0}
+        self._cut_stats_lock = threading.Lock()
+        self.last_cut: Optional[SegmentCut] = None
         
         # Verificar se FFmpeg está disponível
         self._check_ffmpeg()
@@ -71,6 +286,9 @@ class SegmentProcessor:
         """
         Extrai um segmento de vídeo.
         
+        Usa `cut_segment` no modo automático: cópia de streams quando o corte
+        pode ser alinhado a keyframes e re-encode mínimo caso contrário.
+        
         Args:
             video_path: Caminho para o vídeo de origem
             start: Tempo de início em segundos
@@ -83,6 +301,55 @@ class SegmentProcessor:
         Raises:
             VideoProcessingError: Se houver erro no processamento
         """
+        return self.cut_segment(video_path, start, duration, output_path).path
+    
+    def cut_segment(self, video_path: str, start: float, duration: float,
+                    output_path: Optional[str] = None, *, mode: str = "auto",
+                    keyframe_tolerance: Optional[float] = None,
+                    keyframes: Optional[Union[List[float], KeyframeIndex]] = None,
+                    threads: Optional[int] = None,
+                    target_size: Optional[Tuple[int, int]] = None,
+                    target_fps: Optional[float] = None) -> SegmentCut:
+        """
+        Corta um segmento escolhendo o caminho mais barato.
+        
+        - ``copy``: início alinhado ao keyframe mais próximo (dentro da
+          tolerância) e streams copiados, sem decodificar (em MP4, só
+          H.264/HEVC).
+        - ``smart``: re-encode apenas do trecho até o próximo keyframe (GOP
+          inicial) e cópia do restante (somente H.264; se o trecho
+          re-encodado não tiver o mesmo perfil/nível/formato da origem, o
+          intervalo é re-encodado por inteiro).
+        - ``reencode``: seek na entrada (antes de ``-i``) e re-encode do intervalo.
+        
+        Args:
+            video_path: Caminho para o vídeo de origem
+            start: Tempo de início em segundos
+            duration: Duração do segmento em segundos
+            output_path: Caminho de saída (opcional)
+            mode: "auto", "copy", "smart" ou "reencode"
+            keyframe_tolerance: Deslocamento máximo (s) aceito ao alinhar o
+                início a um keyframe (padrão: o do processador)
+            keyframes: Keyframes já conhecidos (lista ou índice; evita sondar)
+            threads: Threads de cada encode do FFmpeg (None = padrão do FFmpeg)
+            target_size: (largura, altura) de saída; força re-encode com
+                redimensionamento mantendo o aspecto e bordas pretas
+            target_fps: FPS de saída; força re-encode
+            
+        Returns:
+            SegmentCut com o caminho gerado e o modo efetivamente usado
+            
+        Raises:
+            VideoProcessingError: Se houver erro no processamento
+        """
+        # Validar parâmetros
+        if start < 0:
+            raise ValueError(f"Tempo de início deve ser positivo: {start}")
+        if duration <= 0:
+            raise ValueError(f"Duração deve ser positiva: {duration}")
+        if mode not in self.CUT_MODES:
+            raise ValueError(f"Modo de corte inválido: {mode}. Use: {list(self.CUT_MODES)}")
+        
         video_path = Path(video_path)
         if not video_path.exists():
             raise VideoProcessingError(f"Vídeo não encontrado: {video_path}")
@@ -91,69 +358,450 @@ class SegmentProcessor:
             output_path = self.temp_dir / f"segment_{start}_{duration}s.mp4"
         else:
             output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"Extraindo segmento: {video_path} ({start}s, {duration}s)")
         
-        # Validar parâmetros
-        if start < 0:
-            raise ValueError(f"Tempo de início deve ser positivo: {start}")
-        if duration <= 0:
-            raise ValueError(f"Duração deve ser positiva: {duration}")
+        tolerance = self.keyframe_tolerance if keyframe_tolerance is None else keyframe_tolerance
+        video_filter = self._target_filter(target_size, target_fps)
+        if video_filter:
+            # Mudar resolução/FPS exige decodificar: não há caminho por cópia
+            mode = "reencode"
         
-        # Comando FFmpeg para extração de segmento
-        ffmpeg_cmd = [
-            'ffmpeg',
-            '-i', str(video_path),
-            '-ss', str(start),           # Start time
-            '-t', str(duration),         # Duration
-            '-c:v', 'libx264',          # Video codec
-            '-c:a', 'aac',              # Audio codec
-            '-preset', 'fast',          # Encoding preset
-            '-crf', '23',               # Quality (lower = better)
-            '-movflags', '+faststart',  # Optimize for streaming
-            '-y',                       # Overwrite output
-            str(output_path)
-        ]
+        if isinstance(keyframes, KeyframeIndex):
+            index = keyframes
+        elif keyframes is not None:
+            index = self._stream_format(str(video_path))
+            index.keyframes = sorted(float(k) for k in keyframes)
+        elif mode == "reencode":
+            index = KeyframeIndex(keyframes=[])
+        else:
+            index = self.probe_keyframes(str(video_path))
         
-        def _extract():
-            result = subprocess.run(
-                ffmpeg_cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutos timeout
-            )
-            
-            if result.returncode != 0:
-                error_msg = f"FFmpeg error: {result.stderr}"
-                logger.error(error_msg)
-                raise VideoProcessingError(
-                    f"Erro na extração do segmento: {error_msg}",
-                    video_path=str(video_path),
-                    ffmpeg_error=result.stderr
+        container = output_path.suffix.lower() or ".mp4"
+        plan = self.plan_cut(index, start, duration, tolerance=tolerance, mode=mode, container=container)
+        if video_filter:
+            plan.reason = "formato de saída especificado"
+        started = time.perf_counter()
+        
+        try:
+            try:
+                self._run_cut(video_path, output_path, plan, threads=threads, video_filter=video_filter,
+                              index=index)
+            except VideoProcessingError as error:
+                if plan.mode == "reencode":
+                    raise
+                logger.warning(f"Corte por '{plan.mode}' falhou, re-encodando o intervalo: {error}")
+                plan = self.plan_cut(index, start, duration, tolerance=tolerance, mode="reencode")
+                self._run_cut(video_path, output_path, plan, threads=threads)
+        except Exception as e:
+            error_msg = f"Erro na extração do segmento: {str(e)}"
+            logger.error(error_msg)
+            raise VideoProcessingError(error_msg, video_path=str(video_path))
+        
+        cut = SegmentCut(
+            path=str(output_path),
+            mode=plan.mode,
+            requested_start=start,
+            start=plan.start,
+            duration=plan.duration,
+            elapsed=time.perf_counter() - started,
+            reason=plan.reason,
+        )
+        with self._cut_stats_lock:
+            self._cut_stats[cut.mode] += 1
+        self.last_cut = cut
+        
+        logger.info(f"Segmento extraído com sucesso ({cut.mode}, {cut.elapsed:.2f}s): {cut.path}")
+        return cut
+    
+    def cut_segments(self, jobs: Sequence[Union[SegmentJob, Dict[str, Any]]], *,
+                     max_workers: Optional[int] = None,
+                     cpu_budget: Optional[int] = None,
+                     threads_per_encode: Optional[int] = None) -> SegmentBatchReport:
+        """
+        Corta vários segmentos em paralelo.
+        
+        Cada processo FFmpeg reserva núcleos de um orçamento comum antes de
+        rodar: cópias de stream custam 1 núcleo; encodes custam
+        `threads_per_encode` e recebem `-threads` com esse valor, de modo que
+        processos × threads não ultrapasse o orçamento. Os keyframes de cada
+        arquivo de origem são sondados uma única vez e os jobs do mesmo
+        arquivo são despachados juntos.
+        
+        Args:
+            jobs: SegmentJob ou dicionários com os mesmos campos
+            max_workers: Processos FFmpeg simultâneos (padrão: orçamento de núcleos)
+            cpu_budget: Núcleos disponíveis (padrão: `os.cpu_count()`)
+            threads_per_encode: Threads por encode (padrão: orçamento dividido
+                entre os encodes do lote)
+        
+        Returns:
+            SegmentBatchReport com um resultado por job, na ordem recebida.
+            Falhas não interrompem o lote: ficam em `result.error`.
+        """
+        started = time.perf_counter()
+        jobs = [job if isinstance(job, SegmentJob) else SegmentJob(**job) for job in jobs]
+        budget = _CoreBudget(cpu_budget or os.cpu_count() or 1)
+        results = [SegmentJobResult(job=job, index=i) for i, job in enumerate(jobs)]
+        if not jobs:
+            return SegmentBatchReport(results=[], wall_time=0.0, workers=0, cpu_budget=budget.total)
+        
+        # Agrupa por arquivo de origem: uma sondagem de keyframes por arquivo
+        groups: Dict[str, List[int]] = {}
+        for i, job in enumerate(jobs):
+            groups.setdefault(str(Path(job.video_path).resolve()), []).append(i)
+        
+        workers = max(1, min(max_workers or budget.total, len(jobs)))
+        with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as pool:
+            indexes = dict(zip(groups, pool.map(self._batch_keyframes, groups)))
+        
+        planned: List[Tuple[int, str]] = []
+        for source, members in groups.items():
+            for i in members:
+                job = jobs[i]
+                try:
+                    if job.has_target or job.mode == "reencode":
+                        mode = "reencode"
+                    else:
+                        container = Path(job.output_path).suffix if job.output_path else ".mp4"
+                        mode = self.plan_cut(indexes[source], job.start, job.duration, mode=job.mode,
+                                             container=container).mode
+                except Exception:
+                    mode = "reencode"
+                planned.append((i, mode))
+        
+        encodes = sum(1 for _, mode in planned if mode != "copy")
+        threads = threads_per_encode or max(1, budget.total // max(1, min(encodes, workers)))
+        threads = min(threads, budget.total)
+        
+        def _run(i: int, mode: str, source: str) -> None:
+            job, result = jobs[i], results[i]
+            cost = 1 if mode == "copy" else threads
+            queued_at = time.perf_counter()
+            cost = budget.acquire(cost)
+            result.queued = time.perf_counter() - queued_at
+            result.threads = cost
+            job_started = time.perf_counter()
+            try:
+                result.cut = self.cut_segment(
+                    job.video_path, job.start, job.duration,
+                    job.output_path or str(self._batch_output_path(job, i)),
+                    mode=job.mode,
+                    keyframes=indexes[source],
+                    # Também na cópia: se ela falhar, o re-encode de fallback
+                    # fica nos núcleos reservados em vez de usar todos
+                    threads=cost,
+                    target_size=job.target_size,
+                    target_fps=job.target_fps,
                 )
+            except Exception as e:
+                result.error = str(e)
+                logger.warning(f"Job {i} do lote falhou ({job.video_path}): {e}")
+            finally:
+                result.elapsed = time.perf_counter() - job_started
+                budget.release(cost)
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_run, i, mode, str(Path(jobs[i].video_path).resolve()))
+                for i, mode in planned
+            ]
+            for future in futures:
+                future.result()
+        
+        report = SegmentBatchReport(
+            results=results,
+            wall_time=time.perf_counter() - started,
+            workers=workers,
+            cpu_budget=budget.total,
+        )
+        logger.info(
+            f"Lote de {len(jobs)} cortes em {report.wall_time:.2f}s "
+            f"(soma dos jobs {report.total_job_time:.2f}s, {workers} processos, "
+            f"{threads} threads/encode, {len(report.failed)} falhas)"
+        )
+        return report
+    
+    def _batch_keyframes(self, video_path: str) -> KeyframeIndex:
+        if not Path(video_path).exists():
+            return KeyframeIndex(keyframes=[])
+        return self.probe_keyframes(video_path)
+    
+    def _batch_output_path(self, job: SegmentJob, position: int) -> Path:
+        stem = Path(job.video_path).stem
+        return self.temp_dir / f"{stem}_{position:03d}_{job.start:.3f}_{job.duration:.3f}s.mp4"
+    
+    def probe_keyframes(self, video_path: str) -> KeyframeIndex:
+        """
+        Lista os keyframes do primeiro stream de vídeo (apenas demux, sem decodificar).
+        
+        O resultado fica no cache da sonda de mídia (caminho, tamanho e mtime).
+        Se a sondagem falhar, retorna um índice vazio (o corte cai no re-encode).
+        """
+        try:
+            return KeyframeIndex.from_media_info(self.media_probe.probe(video_path, keyframes=True))
+        except VideoProcessingError as e:
+            logger.warning(f"Não foi possível listar keyframes de {video_path}: {e}")
+            return KeyframeIndex(keyframes=[])
+    
+    def plan_cut(self, index: KeyframeIndex, start: float, duration: float, *,
+                 tolerance: Optional[float] = None, mode: str = "auto",
+                 container: str = ".mp4") -> CutPlan:
+        """
+        Decide como cortar `[start, start + duration]` a partir dos keyframes.
+        
+        Args:
+            index: Keyframes (e codec) do vídeo de origem
+            start: Início solicitado (s)
+            duration: Duração solicitada (s)
+            tolerance: Deslocamento máximo (s) aceito para alinhar o início
+            mode: "auto" ou um modo forçado ("copy", "smart", "reencode")
+            container: Extensão do arquivo de saída (limita os codecs copiáveis)
             
-            if not output_path.exists():
-                raise VideoProcessingError(
-                    f"Arquivo de saída não foi criado: {output_path}"
+        Returns:
+            CutPlan com o modo e os tempos efetivos
+        """
+        tolerance = self.keyframe_tolerance if tolerance is None else tolerance
+        end = start + duration
+        previous_kf = index.previous(start)
+        next_kf = index.next(start)
+        copyable = container.lower() not in self.MP4_SUFFIXES or index.codec in self.MP4_COPY_CODECS
+        
+        if mode in ("auto", "copy") and index.keyframes and copyable:
+            candidates = [kf for kf in (previous_kf, next_kf) if kf is not None and kf < end]
+            nearest = min(candidates, key=lambda kf: abs(kf - start), default=None)
+            if nearest is not None and (mode == "copy" or abs(nearest - start) <= tolerance):
+                return CutPlan(
+                    mode="copy",
+                    start=nearest,
+                    duration=duration,
+                    seek=nearest,
+                    reason=f"keyframe a {abs(nearest - start):.3f}s do início",
                 )
-            
-            return str(output_path)
         
-        try:
-            output_file = ErrorHandler.retry_with_backoff(
-                _extract,
-                max_retries=2,
-                delay=1.0,
-                context=f"extract_segment: {video_path} ({start}s, {duration}s)"
+        if mode in ("auto", "smart") and next_kf is not None and start < next_kf < end - 0.1:
+            compatible = (
+                index.codec in self.SMART_CUT_CODECS
+                and index.pix_fmt in (None, "yuv420p")
+                and index.profile in self.X264_PROFILES
+                and index.level is not None
             )
+            if compatible or mode == "smart":
+                return CutPlan(
+                    mode="smart",
+                    start=start,
+                    duration=duration,
+                    seek=previous_kf if previous_kf is not None else 0.0,
+                    split=next_kf,
+                    reason=f"re-encode de {next_kf - start:.3f}s até o keyframe {next_kf:.3f}s",
+                )
+        
+        reason = "sem keyframes conhecidos" if not index.keyframes else "corte fora da tolerância"
+        if index.keyframes and not copyable:
+            reason = f"codec {index.codec or 'desconhecido'} não pode ser copiado para {container}"
+        if mode == "reencode":
+            reason = "re-encode solicitado"
+        return CutPlan(
+            mode="reencode",
+            start=start,
+            duration=duration,
+            seek=start,
+            reason=reason,
+        )
+    
+    def get_cut_stats(self) -> Dict[str, int]:
+        """Quantos cortes usaram cópia, re-encode parcial ou re-encode completo."""
+        with self._cut_stats_lock:
+            return dict(self._cut_stats)
+    
+    @staticmethod
+    def _target_filter(target_size: Optional[Tuple[int, int]], target_fps: Optional[float]) -> Optional[str]:
+        """Filtro de vídeo para o formato de saída de um corte (ou None)."""
+        filters = []
+        if target_size is not None:
+            width, height = target_size
+            filters.append(f"scale={width}:{height}:force_original_aspect_ratio=decrease")
+            filters.append(f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black")
+            filters.append("setsar=1")
+        if target_fps is not None:
+            filters.append(f"fps={target_fps:g}")
+        return ",".join(filters) or None
+    
+    def _stream_format(self, video_path: str) -> KeyframeIndex:
+        """Codec, perfil e nível do vídeo (sem ler os pacotes); vazio se a sondagem falhar."""
+        try:
+            index = KeyframeIndex.from_media_info(self.media_probe.probe(video_path))
+        except VideoProcessingError as e:
+            logger.debug(f"Não foi possível sondar o formato de {video_path}: {e}")
+            return KeyframeIndex()
+        index.keyframes = []
+        return index
+    
+    def _run_cut(self, video_path: Path, output_path: Path, plan: CutPlan, *,
+                 threads: Optional[int] = None, video_filter: Optional[str] = None,
+                 index: Optional[KeyframeIndex] = None) -> None:
+        """Executa os comandos FFmpeg do plano de corte."""
+        encode_args = ['-threads', str(threads)] if threads else []
+        if plan.mode == "copy":
+            self._run_ffmpeg([
+                'ffmpeg',
+                '-ss', f"{plan.seek:.6f}",      # Seek na entrada: pula direto ao keyframe
+                '-i', str(video_path),
+                '-t', f"{plan.duration:.6f}",
+                '-map', '0:v:0',
+                '-map', '0:a:0?',
+                '-c', 'copy',
+                '-avoid_negative_ts', 'make_zero',
+                '-movflags', '+faststart',
+                '-y',
+                str(output_path)
+            ], video_path, output_path)
+        elif plan.mode == "smart":
+            self._run_smart_cut(video_path, output_path, plan, encode_args=encode_args, index=index)
+        else:
+            self._run_ffmpeg([
+                'ffmpeg',
+                '-ss', f"{plan.seek:.6f}",      # Seek na entrada (preciso com re-encode)
+                '-i', str(video_path),
+                '-t', f"{plan.duration:.6f}",
+                '-map', '0:v:0',
+                '-map', '0:a:0?',
+                *(['-vf', video_filter] if video_filter else []),
+                '-c:v', 'libx264',
+                '-c:a', 'aac',
+                '-preset', 'fast',
+                '-crf', '23',
+                *encode_args,
+                '-movflags', '+faststart',
+                '-y',
+                str(output_path)
+            ], video_path, output_path)
+    
+    def _run_smart_cut(self, video_path: Path, output_path: Path, plan: CutPlan,
+                       encode_args: Sequence[str] = (), index: Optional[KeyframeIndex] = None) -> None:
+        """
+        Re-encoda o trecho até o primeiro keyframe e copia o restante.
+        
+        As partes são geradas em MPEG-TS (parâmetros do codec em banda) e
+        unidas pelo concat demuxer sem novo encode. O trecho re-encodado usa
+        o perfil e o nível da origem e é conferido antes da junção.
+        
+        Raises:
+            VideoProcessingError: Falha do FFmpeg ou parâmetros do codec
+                diferentes entre as partes (o chamador re-encoda o intervalo)
+        """
+        end = plan.start + plan.duration
+        index = index or KeyframeIndex()
+        profile_args = []
+        if index.profile in self.X264_PROFILES:
+            profile_args += ['-profile:v', self.X264_PROFILES[index.profile]]
+        if index.level:
+            profile_args += ['-level', f"{index.level / 10:.1f}"]
+        work_dir = Path(tempfile.mkdtemp(prefix="smartcut_", dir=self.temp_dir))
+        head_path = work_dir / "head.ts"
+        tail_path = work_dir / "tail.ts"
+        list_path = work_dir / "parts.txt"
+        
+        try:
+            self._run_ffmpeg([
+                'ffmpeg',
+                '-ss', f"{plan.start:.6f}",     # Preciso: decodifica só a partir do keyframe anterior
+                '-i', str(video_path),
+                '-t', f"{plan.split - plan.start:.6f}",
+                '-map', '0:v:0',
+                '-map', '0:a:0?',
+                '-c:v', 'libx264',
+                '-preset', 'fast',
+                '-crf', '18',
+                '-pix_fmt', 'yuv420p',
+                *profile_args,
+                '-c:a', 'aac',
+                *encode_args,
+                '-f', 'mpegts',
+                '-y',
+                str(head_path)
+            ], video_path, head_path)
+            self._check_smart_cut_params(video_path, head_path)
+            self._run_ffmpeg([
+                'ffmpeg',
+                '-ss', f"{plan.split:.6f}",
+                '-i', str(video_path),
+                '-t', f"{end - plan.split:.6f}",
+                '-map', '0:v:0',
+                '-map', '0:a:0?',
+                '-c:v', 'copy',
+                '-c:a', 'aac',
+                '-bsf:v', 'h264_mp4toannexb',
+                '-avoid_negative_ts', 'make_zero',
+                '-f', 'mpegts',
+                '-y',
+                str(tail_path)
+            ], video_path, tail_path)
             
-            logger.info(f"Segmento extraído com sucesso: {output_file}")
-            return output_file
-            
-        except Exception as e:
-            error_msg = f"Erro na extração do segmento: {str(e)}"
+            list_path.write_text(
+                "".join(f"file '{part.as_posix()}'\n" for part in (head_path, tail_path)),
+                encoding="utf-8",
+            )
+            self._run_ffmpeg([
+                'ffmpeg',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', str(list_path),
+                '-c', 'copy',
+                '-bsf:a', 'aac_adtstoasc',
+                '-movflags', '+faststart',
+                '-y',
+                str(output_path)
+            ], video_path, output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _check_smart_cut_params(self, video_path: Path, head_path: Path) -> None:
+        """
+        Confere se o trecho re-encodado tem os mesmos parâmetros de codec
+        (perfil, nível, resolução, formato de pixel) que o restante copiado;
+        partes com SPS diferentes geram um arquivo que não reproduz.
+        """
+        try:
+            source = self.media_probe.probe(str(video_path)).video_stream or {}
+            head = self.media_probe.probe(str(head_path)).video_stream or {}
+        except VideoProcessingError as e:
+            raise VideoProcessingError(f"Não foi possível conferir o corte parcial: {e}", video_path=str(video_path))
+        
+        mismatched = [
+            key for key in self.SMART_CUT_STREAM_KEYS
+            if source.get(key) is None or source.get(key) != head.get(key)
+        ]
+        if mismatched:
+            raise VideoProcessingError(
+                f"Corte parcial com parâmetros de codec diferentes da origem: {', '.join(mismatched)}",
+                video_path=str(video_path),
+            )
+    
+    def _run_ffmpeg(self, ffmpeg_cmd: List[str], video_path: Path, output_path: Path) -> None:
+        """Executa um comando FFmpeg e valida o arquivo gerado."""
+        result = self.runner.run(
+            ffmpeg_cmd,
+            timeout=300,  # 5 minutos timeout
+            check=False,
+            label=output_path.name,
+            video_path=str(video_path),
+        )
+        
+        if result.returncode != 0:
+            error_msg = f"FFmpeg error ({result.error_kind}): {result.stderr}"
             logger.error(error_msg)
-            raise VideoProcessingError(error_msg, video_path=str(video_path))
+            raise VideoProcessingError(
+                f"Erro na extração do segmento: {error_msg}",
+                video_path=str(video_path),
+                ffmpeg_error=result.stderr
+            )
+        
+        if not output_path.exists():
+            raise VideoProcessingError(
+                f"Arquivo de saída não foi criado: {output_path}"
+            )
     
     def normalize_video(self, segment_path: str, target_format: str = "mp4",
                        target_resolution: str = "720p", target_fps: int = 30,
@@ -215,11 +863,12 @@ class SegmentProcessor:
         ]
         
         def _normalize():
-            result = subprocess.run(
+            result = self.runner.run(
                 ffmpeg_cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minutos timeout
+                timeout=300,  # 5 minutos timeout
+                check=False,
+                label=output_path.name,
+                video_path=str(segment_path),
             )
             
             if result.returncode != 0:
@@ -273,90 +922,44 @@ class SegmentProcessor:
         
         logger.info(f"Analisando vídeo: {video_path}")
         
-        # Comando FFprobe para obter informações
-        ffprobe_cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            str(video_path)
-        ]
+        media = self.media_probe.probe(str(video_path))
+        video_info = {
+            'file_path': str(video_path),
+            'file_size': media.size,
+            'format': media.format,
+            'streams': media.streams,
+        }
         
-        try:
-            result = subprocess.run(
-                ffprobe_cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if result.returncode != 0:
-                raise VideoProcessingError(f"Erro no FFprobe: {result.stderr}")
-            
-            import json
-            probe_data = json.loads(result.stdout)
-            
-            # Extrair informações relevantes
-            video_info = {
-                'file_path': str(video_path),
-                'file_size': video_path.stat().st_size,
-                'format': probe_data.get('format', {}),
-                'streams': probe_data.get('streams', []),
+        video_stream = media.video_stream
+        if video_stream:
+            video_info['video_stream'] = {
+                'codec': media.video_codec,
+                'width': media.width,
+                'height': media.height,
+                'fps': media.fps or 0.0,
+                'duration': video_stream.get('duration'),
+                'bit_rate': video_stream.get('bit_rate'),
             }
-            
-            # Encontrar stream de vídeo
-            video_stream = None
-            audio_stream = None
-            
-            for stream in probe_data.get('streams', []):
-                if stream.get('codec_type') == 'video':
-                    video_stream = stream
-                elif stream.get('codec_type') == 'audio':
-                    audio_stream = stream
-            
-            # Informações específicas do vídeo
-            if video_stream:
-                video_info['video_stream'] = {
-                    'codec': video_stream.get('codec_name'),
-                    'width': video_stream.get('width'),
-                    'height': video_stream.get('height'),
-                    'fps': eval(video_stream.get('r_frame_rate', '0/1')),  # Parse fraction
-                    'duration': video_stream.get('duration'),
-                    'bit_rate': video_stream.get('bit_rate'),
-                }
-            
-            # Informações específicas do áudio
-            if audio_stream:
-                video_info['audio_stream'] = {
-                    'codec': audio_stream.get('codec_name'),
-                    'sample_rate': audio_stream.get('sample_rate'),
-                    'channels': audio_stream.get('channels'),
-                    'duration': audio_stream.get('duration'),
-                    'bit_rate': audio_stream.get('bit_rate'),
-                }
-            
-            # Informações gerais
-            format_info = probe_data.get('format', {})
-            video_info['general'] = {
-                'duration': float(format_info.get('duration', 0)),
-                'bit_rate': format_info.get('bit_rate'),
-                'format_name': format_info.get('format_name'),
-                'format_long_name': format_info.get('format_long_name'),
+        
+        audio_stream = media.audio_stream
+        if audio_stream:
+            video_info['audio_stream'] = {
+                'codec': media.audio_codec,
+                'sample_rate': audio_stream.get('sample_rate'),
+                'channels': media.channels,
+                'duration': audio_stream.get('duration'),
+                'bit_rate': audio_stream.get('bit_rate'),
             }
-            
-            logger.info(f"Análise concluída: {video_info['general']['duration']:.1f}s, "
-                       f"{video_info['video_stream']['width']}x{video_info['video_stream']['height']}")
-            
-            return video_info
-            
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError) as e:
-            error_msg = f"Erro na análise do vídeo: {str(e)}"
-            logger.error(error_msg)
-            raise VideoProcessingError(error_msg, video_path=str(video_path))
-        except json.JSONDecodeError as e:
-            error_msg = f"Erro ao parsear JSON do FFprobe: {str(e)}"
-            raise VideoProcessingError(error_msg, video_path=str(video_path))
+        
+        video_info['general'] = {
+            'duration': media.duration,
+            'bit_rate': media.format.get('bit_rate'),
+            'format_name': media.format_name,
+            'format_long_name': media.format.get('format_long_name'),
+        }
+        
+        logger.info(f"Análise concluída: {media.duration:.1f}s, {media.width}x{media.height}")
+        return video_info
     
     def get_video_duration(self, video_path: str) -> float:
         """
@@ -3,10 +3,15 @@
 Extrator de vídeos do YouTube usando yt-dlp.
 """
 
+import copy
 import os
+import re
 import tempfile
-from typing import List, Dict, Any, Optional
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs
 
 import yt_dlp
 from loguru import logger
@@ -18,6 +23,10 @@ from src.utils.exceptions import (
     NetworkError,
     ErrorHandler
 )
+from src.utils.ttl_cache import TTLCache
+from src.utils.download_scheduler import DownloadPriority, DownloadScheduler
+from src.video.extractors.format_selector import FormatSelectionPolicy, FormatSelection
+from src.video.extractors.segment_processor import SegmentBatchReport, SegmentJob, SegmentProcessor
 
 
 class YouTubeExtractor:
@@ -28,16 +37,55 @@ class YouTubeExtractor:
     - Search de vídeos por query
     - Extração de informações de vídeos
     - Download de segmentos específicos
+    - Vários cortes de um vídeo a partir de um único download (lote paralelo)
     - Tratamento robusto de erros
+    - Cache com TTL de buscas e metadados (inclusive falhas conhecidas)
+    - Download de fragmentos em paralelo, com retomada de parciais
     """
     
-    def __init__(self, temp_dir: Optional[str] = None, output_dir: Optional[str] = None):
+    def __init__(
+        self,
+        temp_dir: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        *,
+        search_cache_ttl: float = 3600.0,
+        info_cache_ttl: float = 3600.0,
+        negative_cache_ttl: float = 6 * 3600.0,
+        raw_info_cache_ttl: float = 1800.0,
+        cache_max_entries: int = 512,
+        format_policy: Optional[FormatSelectionPolicy] = None,
+        download_scheduler: Optional[DownloadScheduler] = None,
+        concurrent_fragments: int = 4,
+        fragment_retries: int = 10,
+        http_chunk_size: Optional[int] = 10 * 1024 * 1024,
+        min_size_ratio: float = 0.9,
+        segment_processor: Optional[SegmentProcessor] = None,
+    ):
         """
         Inicializa o extrator.
         
         Args:
             temp_dir: Diretório temporário para arquivos de download
             output_dir: Diretório de saída para vídeos processados
+            search_cache_ttl: Validade (s) dos resultados de busca em cache
+            info_cache_ttl: Validade (s) das informações de vídeo em cache
+            negative_cache_ttl: Validade (s) do registro de vídeos indisponíveis
+            raw_info_cache_ttl: Validade (s) do info dict bruto do yt-dlp, que
+                contém URLs assinadas de mídia que expiram
+            cache_max_entries: Máximo de entradas por cache
+            format_policy: Política de seleção de formato dos downloads completos
+                (padrão: FormatSelectionPolicy para 1080x1920, priorizando remux)
+            download_scheduler: Agendador compartilhado que controla banda,
+                concorrência e prioridade dos downloads (opcional)
+            concurrent_fragments: Fragmentos DASH/HLS baixados em paralelo
+            fragment_retries: Tentativas por fragmento (e por conexão HTTP)
+                antes de falhar o download inteiro
+            http_chunk_size: Tamanho (bytes) dos blocos com Range nos formatos
+                progressivos; None desativa
+            min_size_ratio: Fração mínima do tamanho esperado para aceitar o
+                arquivo baixado (verificação de integridade)
+            segment_processor: Processador dos cortes em lote de `download_segments`
+                (padrão: criado no primeiro uso)
         """
         self.temp_dir = Path(temp_dir) if temp_dir else Path(tempfile.gettempdir()) / "aishorts"
         self.output_dir = Path(output_dir) if output_dir else Path("./outputs/video")
@@ -46,6 +94,20 @@ class YouTubeExtractor:
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # Política de formato dos downloads; `download_format` identifica o
+        # asset na biblioteca local
+        self.format_policy = format_policy or FormatSelectionPolicy()
+        self.download_format = self.format_policy.format_key
+        self._format_stats = {'copy': 0, 'remux': 0, 'transcode': 0, 'fallback': 0}
+        self._format_stats_lock = threading.Lock()
+        self.download_scheduler = download_scheduler
+        self.concurrent_fragments = max(1, concurrent_fragments)
+        self.fragment_retries = max(0, fragment_retries)
+        self.http_chunk_size = http_chunk_size or None
+        self.min_size_ratio = min_size_ratio
+        self._segment_processor = segment_processor
+        self._segment_processor_lock = threading.Lock()
+        
         # Configurações do yt-dlp
         self.ydl_opts = {
             'format': 'best[height<=720]',  # Resolução máxima 720p
@@ -54,7 +116,27 @@ class YouTubeExtractor:
             'extract_flat': False,
             'writesubtitles': False,
             'writeautomaticsub': False,
+            # Retomada de arquivos parciais (.part/.ytdl) entre tentativas
+            'continuedl': True,
+            'nopart': False,
+            'keep_fragments': False,
+            # Falhas de rede são repetidas por fragmento/bloco, não pelo vídeo inteiro
+            'concurrent_fragment_downloads': self.concurrent_fragments,
+            'fragment_retries': self.fragment_retries,
+            'retries': self.fragment_retries,
+            'skip_unavailable_fragments': False,
         }
+        if self.http_chunk_size:
+            self.ydl_opts['http_chunk_size'] = int(self.http_chunk_size)
+        
+        # Caches: buscas por (query normalizada, quantidade); metadados por ID do vídeo
+        self.search_cache = TTLCache(ttl=search_cache_ttl, max_entries=cache_max_entries)
+        self.info_cache = TTLCache(
+            ttl=info_cache_ttl,
+            max_entries=cache_max_entries,
+            negative_ttl=negative_cache_ttl,
+        )
+        self.raw_info_cache = TTLCache(ttl=raw_info_cache_ttl, max_entries=cache_max_entries)
         
         logger.info(f"YouTubeExtractor inicializado - Temp: {self.temp_dir}, Output: {self.output_dir}")
     
@@ -72,6 +154,12 @@ class YouTubeExtractor:
         Raises:
             YouTubeExtractionError: Se houver erro na busca
         """
+        cache_key = (self._normalize_query(query), max_results)
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Busca em cache para: '{query}' (max_results: {max_results})")
+            return copy.deepcopy(cached)
+        
         logger.info(f"Pesquisando vídeos para: '{query}' (max_results: {max_results})")
         
         def _search():
@@ -93,6 +181,7 @@ class YouTubeExtractor:
             
             if not result or 'entries' not in result:
                 logger.warning(f"Nenhum vídeo encontrado para query: {query}")
+                self.search_cache.set(cache_key, [])
                 return []
             
             videos = []
@@ -111,6 +200,7 @@ class YouTubeExtractor:
                     videos.append(video_info)
             
             logger.info(f"Encontrados {len(videos)} vídeos para '{query}'")
+            self.search_cache.set(cache_key, copy.deepcopy(videos))
             return videos
             
         except Exception as e:
@@ -133,6 +223,29 @@ class YouTubeExtractor:
             NetworkError: Se houver problema de conectividade
             YouTubeExtractionError: Outros erros de extração
         """
+        video_id = self.extract_video_id(video_url)
+        if video_id:
+            found, cached, negative = self.info_cache.lookup(video_id)
+            if found:
+                if negative:
+                    logger.debug(f"Vídeo marcado como indisponível em cache: {video_url}")
+                    raise cached
+                logger.debug(f"Informações em cache para: {video_url}")
+                return copy.deepcopy(cached)
+        
+        try:
+            video_info = self._extract_video_info(video_url)
+        except (VideoUnavailableError, VideoTooShortError) as e:
+            if video_id:
+                self.info_cache.set_negative(video_id, e)
+            raise
+        
+        if video_id:
+            self.info_cache.set(video_id, copy.deepcopy(video_info))
+        return video_info
+    
+    def _extract_video_info(self, video_url: str) -> Dict[str, Any]:
+        """Extrai as informações do vídeo via yt-dlp (sem consultar o cache)."""
         logger.info(f"Extraindo informações do vídeo: {video_url}")
         
         def _extract_info():
@@ -152,6 +265,9 @@ class YouTubeExtractor:
                     video_url=video_url
                 )
             
+            if info.get('id'):
+                self.raw_info_cache.set(info['id'], info)
+            
             # Verificar se o vídeo tem duração adequada
             duration = info.get('duration', 0)
             if duration and duration < 5:  # Mínimo 5 segundos
@@ -194,7 +310,13 @@ class YouTubeExtractor:
             error_msg = f"Erro na extração de informações de {video_url}: {str(e)}"
             
             # Verificar erros específicos
-            if " vídeo é privado" in str(e).lower() or "private" in str(e).lower():
+            if self._is_age_restricted_error(e):
+                raise VideoUnavailableError(
+                    f"Vídeo com restrição de idade: {video_url}",
+                    video_url=video_url,
+                    unavailable_reason="age_restricted"
+                )
+            elif " vídeo é privado" in str(e).lower() or "private" in str(e).lower():
                 raise VideoUnavailableError(
                     f"Vídeo privado ou indisponível: {video_url}",
                     video_url=video_url,
@@ -214,13 +336,30 @@ class YouTubeExtractor:
             
             raise YouTubeExtractionError(error_msg, video_url=video_url, youtube_error=str(e))
     
-    def download_video(self, video_url: str, output_dir: Optional[str] = None) -> str:
+    def download_video(
+        self,
+        video_url: str,
+        output_dir: Optional[str] = None,
+        *,
+        rate_limit: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None,
+        priority: DownloadPriority = DownloadPriority.CRITICAL,
+        owner: Optional[str] = None,
+    ) -> str:
         """
         Baixa um vídeo completo do YouTube.
         
+        O formato é escolhido pela `format_policy`, que prioriza combinações
+        que só exigem cópia de streams (remux) para MP4; a transcodificação só
+        ocorre quando nenhum formato disponível pode ser copiado.
+        
         Args:
             video_url: URL do vídeo
             output_dir: Diretório de saída (opcional)
+            rate_limit: Limite de banda do download em bytes/s (opcional)
+            cancel_event: Evento que, quando sinalizado, interrompe o download
+            priority: Prioridade no agendador de downloads
+            owner: Pipeline/job dono do download (revezamento no agendador)
             
         Returns:
             Caminho para o arquivo baixado
@@ -236,60 +375,173 @@ class YouTubeExtractor:
             output_dir_path = Path(output_dir) if output_dir else self.output_dir
             output_dir_path.mkdir(parents=True, exist_ok=True)
             
-            # Configurar opções para download do vídeo completo
-            download_opts = {
+            base_opts = {
                 **self.ydl_opts,
-                'format': 'best[height<=720]',  # Resolução adequada para shorts
                 'outtmpl': str(output_dir_path / '%(id)s.%(ext)s'),
-                'postprocessors': [{
-                    'key': 'FFmpegVideoConvertor',
-                    'preferedformat': 'mp4',  # Convert to MP4 for consistency
-                }],
-                'keepvideo': True,
             }
+            if rate_limit:
+                base_opts['ratelimit'] = self._per_connection_rate(rate_limit)
+            if cancel_event is not None:
+                base_opts['progress_hooks'] = [self._cancel_hook(cancel_event)]
+            
+            # Metadados completos (com formatos) para a política de seleção
+            video_id = self.extract_video_id(video_url)
+            info = self.raw_info_cache.get(video_id) if video_id else None
+            if not self._is_downloadable_info(info):
+                info = ErrorHandler.retry_with_backoff(
+                    lambda: self._fetch_info(video_url, {**self.ydl_opts, 'format': self.format_policy.fallback_format}),
+                    max_retries=2,
+                    delay=2.0
+                )
+                if info and info.get('id'):
+                    self.raw_info_cache.set(info['id'], info)
+            if not info:
+                raise VideoUnavailableError(
+                    f"Vídeo indisponível ou não encontrado: {video_url}",
+                    video_url=video_url
+                )
+            
+            selection = self.format_policy.select(info)
+            download_opts = {**base_opts, **self._build_format_opts(selection)}
+            self._record_format_selection(selection)
+            target_ext = selection.container if selection else 'mp4'
+            expected_sizes = self._expected_stream_sizes(info, selection)
+            # Transcodificação muda o tamanho final; nesse caso (ou sem o tamanho
+            # exato de todos os streams) só descarta arquivo vazio
+            selected = [fid for fid in (selection.video_format_id, selection.audio_format_id) if fid] if selection else []
+            expected_total = None if selection is None or selection.requires_transcode else (
+                sum(expected_sizes.values()) if selected and all(str(fid) in expected_sizes for fid in selected) else None
+            )
             
             def _download():
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                # Parciais de tentativas anteriores são retomados, exceto os inconsistentes
+                self._discard_invalid_partials(output_dir_path, info.get('id'), expected_sizes)
                 with yt_dlp.YoutubeDL(download_opts) as ydl:
-                    info = ydl.extract_info(video_url, download=True)
-                    
-                    # O arquivo é salvo com o template, encontramos o arquivo real
-                    video_id = info.get('id')
-                    pattern = str(output_dir_path / f"{video_id}.*")
-                    
-                    import glob
-                    downloaded_files = glob.glob(pattern)
-                    if not downloaded_files:
-                        raise YouTubeExtractionError(
-                            f"Arquivo não encontrado após download: {video_url}"
-                        )
-                    
-                    return downloaded_files[0]
+                    try:
+                        ydl.process_ie_result(dict(info), download=True)
+                    except yt_dlp.utils.DownloadCancelled:
+                        return None
+                
+                downloaded_file = self._find_downloaded_file(output_dir_path, f"{info.get('id')}", target_ext)
+                if not downloaded_file:
+                    raise YouTubeExtractionError(
+                        f"Arquivo não encontrado após download: {video_url}"
+                    )
+                self._verify_download(downloaded_file, expected_total)
+                return downloaded_file
             
-            file_path = ErrorHandler.retry_with_backoff(
-                _download,
-                max_retries=2,
-                delay=3.0
-            )
+            with self._scheduled_download(video_url, download_opts, priority, owner):
+                file_path = ErrorHandler.retry_with_backoff(
+                    _download,
+                    max_retries=2,
+                    delay=3.0
+                )
+            
+            if file_path is None:
+                raise YouTubeExtractionError(
+                    f"Download cancelado: {video_url}",
+                    video_url=video_url,
+                    youtube_error="cancelled"
+                )
             
             logger.info(f"Vídeo baixado com sucesso: {file_path}")
             return file_path
             
-        except (VideoUnavailableError, VideoTooShortError):
+        except (VideoUnavailableError, VideoTooShortError, YouTubeExtractionError):
             raise
         except Exception as e:
             error_msg = f"Erro no download do vídeo {video_url}: {str(e)}"
             logger.error(error_msg)
             raise YouTubeExtractionError(error_msg, video_url=video_url, youtube_error=str(e))
+    
+    def select_download_format(self, info: Dict[str, Any]) -> Optional[FormatSelection]:
+        """
+        Aplica a política de formato a um info dict do yt-dlp.
+        
+        Args:
+            info: Info dict com a lista de formatos
+            
+        Returns:
+            FormatSelection escolhido ou None (usa o seletor de fallback)
+        """
+        return self.format_policy.select(info)
+    
+    def get_format_stats(self) -> Dict[str, int]:
+        """Retorna quantos downloads foram copiados, remuxados, transcodificados ou usaram fallback."""
+        with self._format_stats_lock:
+            return dict(self._format_stats)
+    
+    def _build_format_opts(self, selection: Optional[FormatSelection]) -> Dict[str, Any]:
+        """Monta as opções do yt-dlp (formato e pós-processamento) para a seleção."""
+        if selection is None:
+            # Sem formatos avaliáveis: comportamento anterior (converte para MP4)
+            return {
+                'format': self.format_policy.fallback_format,
+                'postprocessors': [{
+                    'key': 'FFmpegVideoConvertor',
+                    'preferedformat': 'mp4',
+                }],
+            }
+        
+        opts: Dict[str, Any] = {'format': selection.format_spec}
+        if selection.audio_format_id:
+            opts['merge_output_format'] = selection.container
+        
+        if selection.requires_transcode:
+            opts['postprocessors'] = [{
+                'key': 'FFmpegVideoConvertor',
+                'preferedformat': selection.container,
+            }]
+        elif selection.action == 'remux':
+            opts['postprocessors'] = [{
+                'key': 'FFmpegVideoRemuxer',
+                'preferedformat': selection.container,
+            }]
+        return opts
+    
+    def _record_format_selection(self, selection: Optional[FormatSelection]) -> None:
+        """Atualiza as estatísticas de seleção de formato."""
+        key = selection.action if selection else 'fallback'
+        with self._format_stats_lock:
+            self._format_stats[key] += 1
 
-    def download_segment(self, video_url: str, start_time: float, duration: float, output_dir: Optional[str] = None) -> str:
+    # Protocolos em que o yt-dlp consegue baixar apenas um intervalo
+    # (requisições HTTP com Range ou fragmentos DASH/HLS) via ffmpeg
+    RANGE_PROTOCOLS = {'http', 'https', 'http_dash_segments', 'm3u8', 'm3u8_native'}
+    
+    def download_segment(
+        self,
+        video_url: str,
+        start_time: float,
+        duration: float,
+        output_dir: Optional[str] = None,
+        *,
+        info: Optional[Dict[str, Any]] = None,
+        precise_cut: bool = True,
+        keyframe_padding: float = 2.0,
+        priority: DownloadPriority = DownloadPriority.CRITICAL,
+        owner: Optional[str] = None,
+    ) -> str:
         """
         Baixa um segmento específico de um vídeo.
         
+        Quando o formato permite, apenas os bytes/fragmentos que cobrem
+        `[start_time, start_time + duration]` são transferidos. Caso
+        contrário, o vídeo completo é baixado e cortado localmente.
+        
         Args:
             video_url: URL do vídeo
             start_time: Tempo de início em segundos
             duration: Duração do segmento em segundos
             output_dir: Diretório de saída (opcional)
+            info: Info dict do yt-dlp já obtido (evita nova extração)
+            precise_cut: Re-encoda apenas o intervalo para corte exato; se False,
+                copia os streams com margem de `keyframe_padding` segundos
+            keyframe_padding: Margem (s) aplicada ao intervalo no modo de cópia
+            priority: Prioridade no agendador de downloads
+            owner: Pipeline/job dono do download (revezamento no agendador)
             
         Returns:
             Caminho para o arquivo baixado
@@ -309,58 +561,90 @@ class YouTubeExtractor:
             raise ValueError(f"Duração muito longa (máximo 300s): {duration}")
         
         try:
-            # Verificar duração do vídeo primeiro
-            video_info = self.extract_video_info(video_url)
-            video_duration = video_info.get('duration', 0)
-            
-            if video_duration and start_time + duration > video_duration:
-                raise ValueError(
-                    f"Segmento excede duração do vídeo. "
-                    f"Vídeo: {video_duration}s, Solicitado: {start_time}s + {duration}s"
-                )
-            
             # Definir diretório de saída
             output_dir_path = Path(output_dir) if output_dir else self.output_dir
             output_dir_path.mkdir(parents=True, exist_ok=True)
             
-            # Configurar opções para download do segmento
-            download_opts = {
+            segment_tag = f"segment_{int(round(start_time * 1000))}"
+            base_opts = {
                 **self.ydl_opts,
                 'format': 'best[height<=720]',  # Resolução adequada para shorts
-                'outtmpl': str(output_dir_path / '%(id)s_segment.%(ext)s'),
+                'outtmpl': str(output_dir_path / f'%(id)s_{segment_tag}.%(ext)s'),
                 'postprocessors': [{
                     'key': 'FFmpegVideoConvertor',
                     'preferedformat': 'mp4',  # Convert to MP4 for consistency
                 }],
-                'postprocessor_args': [
-                    '-ss', str(start_time),  # Start time
-                    '-t', str(duration),     # Duration
-                ],
-                'keepvideo': True,
             }
             
+            # Reutiliza o info dict recebido (ou em cache) ou faz uma única extração
+            if not self._is_downloadable_info(info):
+                video_id = self.extract_video_id(video_url)
+                info = self.raw_info_cache.get(video_id) if video_id else None
+            if not self._is_downloadable_info(info):
+                info = ErrorHandler.retry_with_backoff(
+                    lambda: self._fetch_info(video_url, base_opts),
+                    max_retries=2,
+                    delay=2.0
+                )
+                if info and info.get('id'):
+                    self.raw_info_cache.set(info['id'], info)
+            if not info:
+                raise VideoUnavailableError(
+                    f"Vídeo indisponível ou não encontrado: {video_url}",
+                    video_url=video_url
+                )
+            
+            video_duration = info.get('duration', 0)
+            if video_duration and start_time + duration > video_duration:
+                raise ValueError(
+                    f"Segmento excede duração do vídeo. "
+                    f"Vídeo: {video_duration}s, Solicitado: {start_time}s + {duration}s"
+                )
+            
+            if self._supports_range_download(info):
+                range_start, range_end = start_time, start_time + duration
+                if not precise_cut:
+                    range_start = max(0.0, start_time - keyframe_padding)
+                    range_end = range_end + keyframe_padding
+                    if video_duration:
+                        range_end = min(range_end, float(video_duration))
+                
+                download_opts = {
+                    **base_opts,
+                    'download_ranges': yt_dlp.utils.download_range_func(None, [(range_start, range_end)]),
+                    'force_keyframes_at_cuts': precise_cut,
+                }
+                logger.debug(f"Download por intervalo: {range_start:.2f}s - {range_end:.2f}s")
+            else:
+                logger.info(f"Formato não permite download por intervalo; baixando vídeo completo: {video_url}")
+                download_opts = {
+                    **base_opts,
+                    'postprocessor_args': [
+                        '-ss', str(start_time),  # Start time
+                        '-t', str(duration),     # Duration
+                    ],
+                    'keepvideo': True,
+                }
+            
             def _download():
                 with yt_dlp.YoutubeDL(download_opts) as ydl:
-                    info = ydl.extract_info(video_url, download=True)
-                    
-                    # O arquivo é salvo com o template, encontramos o arquivo real
-                    video_id = info.get('id')
-                    pattern = str(output_dir_path / f"{video_id}_segment.*")
-                    
-                    import glob
-                    downloaded_files = glob.glob(pattern)
-                    if not downloaded_files:
-                        raise YouTubeExtractionError(
-                            f"Arquivo não encontrado após download: {video_url}"
-                        )
-                    
-                    return downloaded_files[0]
+                    ydl.process_ie_result(dict(info), download=True)
+                
+                downloaded_file = self._find_downloaded_file(
+                    output_dir_path, f"{info.get('id')}_{segment_tag}", 'mp4'
+                )
+                if not downloaded_file:
+                    raise YouTubeExtractionError(
+                        f"Arquivo não encontrado após download: {video_url}"
+                    )
+                return downloaded_file
             
-            file_path = ErrorHandler.retry_with_backoff(
-                _download,
-                max_retries=2,
-                delay=3.0
-            )
+            with self._scheduled_download(video_url, download_opts, priority, owner):
+                file_path = ErrorHandler.retry_with_backoff(
+                    _download,
+                    max_retries=2,
+                    delay=3.0
+                )
             
             logger.info(f"Segmento baixado com sucesso: {file_path}")
             return file_path
@@ -372,6 +656,326 @@ class YouTubeExtractor:
             logger.error(error_msg)
             raise YouTubeExtractionError(error_msg, video_url=video_url, youtube_error=str(e))
     
+    def download_segments(
+        self,
+        video_url: str,
+        segments: Sequence[Tuple[float, float]],
+        output_dir: Optional[str] = None,
+        *,
+        target_size: Optional[Tuple[int, int]] = None,
+        target_fps: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        cpu_budget: Optional[int] = None,
+        priority: DownloadPriority = DownloadPriority.CRITICAL,
+        owner: Optional[str] = None,
+    ) -> SegmentBatchReport:
+        """
+        Baixa o vídeo uma única vez e corta vários segmentos em paralelo.
+        
+        Os cortes usam `SegmentProcessor.cut_segments` (cópia de streams
+        alinhada a keyframes quando possível, processos FFmpeg dentro de um
+        orçamento de núcleos).
+        
+        Args:
+            video_url: URL do vídeo
+            segments: Pares (início, duração) em segundos
+            output_dir: Diretório dos cortes (opcional)
+            target_size: (largura, altura) de saída dos cortes (opcional)
+            target_fps: FPS de saída dos cortes (opcional)
+            max_workers: Processos FFmpeg simultâneos
+            cpu_budget: Núcleos disponíveis para os cortes
+            priority: Prioridade do download no agendador
+            owner: Pipeline/job dono do download (revezamento no agendador)
+            
+        Returns:
+            SegmentBatchReport com um resultado por segmento, na ordem recebida
+            
+        Raises:
+            ValueError: Segmento com início negativo ou duração não positiva
+            VideoUnavailableError: Se vídeo não estiver disponível
+            YouTubeExtractionError: Se houver erro no download
+        """
+        for start_time, duration in segments:
+            if start_time < 0:
+                raise ValueError(f"Tempo de início deve ser positivo: {start_time}")
+            if duration <= 0:
+                raise ValueError(f"Duração deve ser positiva: {duration}")
+        
+        output_dir_path = Path(output_dir) if output_dir else self.output_dir
+        output_dir_path.mkdir(parents=True, exist_ok=True)
+        source_path = self.download_video(video_url, str(self.temp_dir), priority=priority, owner=owner)
+        stem = Path(source_path).stem
+        
+        jobs = [
+            SegmentJob(
+                video_path=source_path,
+                start=float(start_time),
+                duration=float(duration),
+                output_path=str(output_dir_path / f"{stem}_segment_{int(round(start_time * 1000))}.mp4"),
+                target_size=target_size,
+                target_fps=target_fps,
+            )
+            for start_time, duration in segments
+        ]
+        report = self._get_segment_processor().cut_segments(jobs, max_workers=max_workers, cpu_budget=cpu_budget)
+        logger.info(
+            f"{len(jobs) - len(report.failed)}/{len(jobs)} segmentos cortados de {video_url} "
+            f"em {report.wall_time:.2f}s"
+        )
+        return report
+    
+    def _get_segment_processor(self) -> SegmentProcessor:
+        with self._segment_processor_lock:
+            if self._segment_processor is None:
+                self._segment_processor = SegmentProcessor(temp_dir=str(self.temp_dir / "segments"))
+            return self._segment_processor
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna estatísticas dos caches de busca e de metadados."""
+        return {
+            'search': self.search_cache.get_stats(),
+            'info': self.info_cache.get_stats(),
+            'raw_info': self.raw_info_cache.get_stats(),
+        }
+    
+    def clear_cache(self) -> None:
+        """Limpa os caches de busca e de metadados."""
+        self.search_cache.clear()
+        self.info_cache.clear()
+        self.raw_info_cache.clear()
+    
+    @staticmethod
+    def extract_video_id(video_url: str) -> Optional[str]:
+        """
+        Extrai o ID do vídeo de uma URL do YouTube.
+        
+        Args:
+            video_url: URL do vídeo (watch, youtu.be, shorts, embed) ou o próprio ID
+            
+        Returns:
+            ID do vídeo ou None se não for possível identificá-lo
+        """
+        if not video_url:
+            return None
+        
+        parsed = urlparse(video_url)
+        if not parsed.netloc:
+            return video_url if re.fullmatch(r'[\w-]{11}', video_url) else None
+        
+        host = parsed.netloc.lower()
+        if host.endswith('youtu.be'):
+            return parsed.path.strip('/').split('/')[0] or None
+        
+        video_ids = parse_qs(parsed.query).get('v')
+        if video_ids:
+            return video_ids[0]
+        
+        match = re.match(r'^/(?:shorts|embed|live|v)/([\w-]+)', parsed.path)
+        return match.group(1) if match else None
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Normaliza a query para uso como chave de cache."""
+        return " ".join(query.lower().split())
+    
+    @staticmethod
+    def _is_age_restricted_error(error: Exception) -> bool:
+        """Identifica erros do yt-dlp causados por restrição de idade."""
+        message = str(error).lower()
+        return any(marker in message for marker in (
+            'confirm your age',
+            'age-restricted',
+            'age restricted',
+            'inappropriate for some users',
+        ))
+    
+    def _fetch_info(self, video_url: str, opts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Extrai o info dict do yt-dlp (com seleção de formato) sem baixar."""
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            return ydl.extract_info(video_url, download=False)
+    
+    @staticmethod
+    def _is_downloadable_info(info: Optional[Dict[str, Any]]) -> bool:
+        """Indica se o info dict é o original do yt-dlp (e não o resumo de `extract_video_info`)."""
+        if not info or not info.get('id'):
+            return False
+        formats = info.get('formats') or []
+        return bool(info.get('url') or info.get('requested_formats')
+                    or any(fmt.get('protocol') for fmt in formats))
+    
+    def _supports_range_download(self, info: Dict[str, Any]) -> bool:
+        """Verifica se o formato selecionado permite baixar apenas um intervalo."""
+        if info.get('is_live'):
+            return False
+        
+        selected = info.get('requested_formats') or [info]
+        protocols = [fmt.get('protocol') for fmt in selected]
+        if not all(protocol in self.RANGE_PROTOCOLS for protocol in protocols):
+            return False
+        
+        from yt_dlp.downloader.external import FFmpegFD
+        return bool(FFmpegFD.available())
+    
+    # Sufixos de arquivos intermediários do yt-dlp (parciais, estado de retomada)
+    PARTIAL_SUFFIXES = ('.part', '.ytdl', '.temp')
+    _FRAGMENT_PATTERN = re.compile(r'-Frag\d+(\.part)?$')
+    _FORMAT_TAG_PATTERN = re.compile(r'\.f([\w-]+)\.[^.]+$')
+    
+    def _per_connection_rate(self, rate_limit: int) -> int:
+        """
+        Divide o limite de banda entre as conexões: o yt-dlp aplica `ratelimit`
+        a cada fragmento baixado em paralelo.
+        """
+        return max(1, int(rate_limit) // self.concurrent_fragments)
+    
+    @staticmethod
+    def _expected_stream_sizes(
+        info: Dict[str, Any],
+        selection: Optional[FormatSelection],
+    ) -> Dict[str, int]:
+        """
+        Tamanho exato (bytes) de cada stream selecionado, por format_id.
+        
+        `filesize_approx` fica de fora: é uma estimativa do yt-dlp, muitas vezes
+        acima do tamanho real, e rejeitaria downloads completos.
+        """
+        if selection is None:
+            return {}
+        formats = {str(fmt.get('format_id')): fmt for fmt in info.get('formats') or []}
+        sizes = {}
+        for format_id in (selection.video_format_id, selection.audio_format_id):
+            fmt = formats.get(str(format_id)) if format_id else None
+            size = fmt and fmt.get('filesize')
+            if size:
+                sizes[str(format_id)] = int(size)
+        return sizes
+    
+    def _discard_invalid_partials(
+        self,
+        output_dir: Path,
+        video_id: Optional[str],
+        expected_sizes: Dict[str, int],
+    ) -> List[Path]:
+        """
+        Remove arquivos parciais que não podem ser retomados com segurança:
+        maiores que o tamanho declarado do stream (fonte mudou ou arquivo
+        corrompido). Os demais ficam para o yt-dlp continuar de onde parou.
+        """
+        if not video_id:
+            return []
+        
+        removed = []
+        for partial in output_dir.glob(f"{video_id}.*.part"):
+            match = self._FORMAT_TAG_PATTERN.search(partial.name[:-len('.part')])
+            format_id = match.group(1) if match else None
+            if format_id is None and len(expected_sizes) == 1:
+                format_id = next(iter(expected_sizes))
+            expected = expected_sizes.get(format_id) if format_id else None
+            if expected is None or partial.stat().st_size <= expected:
+                continue
+            
+            logger.warning(f"Parcial inconsistente descartado ({partial.stat().st_size} > {expected} bytes): {partial}")
+            for stale in (partial, partial.with_name(partial.name[:-len('.part')] + '.ytdl')):
+                try:
+                    stale.unlink()
+                    removed.append(stale)
+                except FileNotFoundError:
+                    pass
+        return removed
+    
+    @classmethod
+    def _find_downloaded_file(cls, output_dir: Path, stem: str, target_ext: str) -> Optional[str]:
+        """Localiza o arquivo final (ignorando parciais), preferindo o contêiner alvo."""
+        candidates = [
+            path for path in output_dir.glob(f"{stem}.*")
+            if path.is_file()
+            and not path.name.endswith(cls.PARTIAL_SUFFIXES)
+            and not cls._FRAGMENT_PATTERN.search(path.name)
+        ]
+        if not candidates:
+            return None
+        candidates.sort(key=lambda path: (path.suffix != f".{target_ext}", path.name))
+        return str(candidates[0])
+    
+    def _verify_download(self, file_path: str, expected_bytes: Optional[int]) -> None:
+        """
+        Confere a integridade do arquivo final pelo tamanho declarado dos streams.
+        
+        Raises:
+            YouTubeExtractionError: Arquivo vazio ou truncado (é removido para
+                que a próxima tentativa baixe novamente)
+        """
+        size = Path(file_path).stat().st_size
+        truncated = expected_bytes and size < expected_bytes * self.min_size_ratio
+        if size > 0 and not truncated:
+            return
+        
+        Path(file_path).unlink(missing_ok=True)
+        raise YouTubeExtractionError(
+            f"Download incompleto: {size} de {expected_bytes or '?'} bytes esperados ({file_path})",
+            youtube_error="incomplete_download",
+        )
+    
+    @contextmanager
+    def _scheduled_download(
+        self,
+        video_url: str,
+        download_opts: Dict[str, Any],
+        priority: DownloadPriority,
+        owner: Optional[str],
+    ):
+        """
+        Reserva vaga no agendador (se houver) e registra o progress hook que
+        contabiliza os bytes recebidos; o hook bloqueia o yt-dlp quando o
+        limite global de banda é atingido.
+        """
+        if self.download_scheduler is None:
+            yield None
+            return
+        
+        with self.download_scheduler.slot(video_url, priority=priority, owner=owner or "default") as ticket:
+            download_opts['progress_hooks'] = [
+                *download_opts.get('progress_hooks', []),
+                self._scheduler_hook(ticket),
+            ]
+            yield ticket
+    
+    @staticmethod
+    def _scheduler_hook(ticket):
+        """
+        Cria progress hook que repassa os bytes baixados ao agendador.
+        
+        Em retentativas (de fragmento ou do download inteiro) o yt-dlp volta
+        `downloaded_bytes` para trás; só o que passa do maior valor já
+        cobrado de cada arquivo é repassado, para não cobrar os mesmos bytes
+        duas vezes do limite de banda.
+        """
+        charged: Dict[str, int] = {}
+        totals: Dict[str, int] = {}
+        
+        def _hook(status: Dict[str, Any]) -> None:
+            # Formatos DASH baixam vídeo e áudio em arquivos separados
+            filename = status.get('filename') or ''
+            total = status.get('total_bytes') or status.get('total_bytes_estimate')
+            if total:
+                totals[filename] = int(total)
+                ticket.set_total(sum(totals.values()))
+            
+            current = status.get('downloaded_bytes') or 0
+            delta = max(0, current - charged.get(filename, 0))
+            if delta > 0:
+                charged[filename] = current
+                ticket.consume(delta)
+        return _hook
+    
+    @staticmethod
+    def _cancel_hook(cancel_event: threading.Event):
+        """Cria progress hook do yt-dlp que aborta o download quando o evento é sinalizado."""
+        def _hook(status: Dict[str, Any]) -> None:
+            if cancel_event.is_set():
+                raise yt_dlp.utils.DownloadCancelled("Download cancelado pelo chamador")
+        return _hook
+    
     def _extract_format_info(self, formats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Extrai informações relevantes dos formatos disponíveis.
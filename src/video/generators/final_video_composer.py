@@ -9,10 +9,12 @@ Features:
 - Otimização multi-plataforma
 - Batch export e thumbnails
 - Métricas de qualidade e analytics
+- Prévia em modo rascunho (mesma linha do tempo, render barato)
 """
 
 import os
 import json
+import time
 import cv2
 import numpy as np
 from typing import List, Dict, Optional, Any, Tuple, Union
@@ -20,21 +22,76 @@ from pathlib import Path
 import logging
 from datetime import datetime
 import hashlib
+import shutil
 import tempfile
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from enum import Enum
 
-from moviepy.editor import (
-    VideoFileClip, ImageClip, TextClip, concatenate_videoclips,
-    CompositeVideoClip, CompositeAudioClip, ColorClip,
-    AudioFileClip,  # Import específico para trilhas de áudio
-    vfx, afx
-)
-from moviepy.audio.fx import volumex, audio_loop
+try:
+    from moviepy.editor import (
+        VideoClip, VideoFileClip, ImageClip, TextClip, concatenate_videoclips,
+        CompositeVideoClip, CompositeAudioClip, ColorClip,
+        AudioFileClip,  # Import específico para trilhas de áudio
+        vfx, afx
+    )
+    from moviepy.audio.fx import volumex, audio_loop
+except ImportError:
+    # MoviePy 2.x não tem `moviepy.editor`; o backend ffmpeg não depende dele
+    from moviepy import (  # type: ignore
+        VideoClip, VideoFileClip, ImageClip, TextClip, concatenate_videoclips,
+        CompositeVideoClip, CompositeAudioClip, ColorClip,
+        AudioFileClip,
+        vfx, afx
+    )
 from PIL import Image, ImageDraw, ImageFont
 import imagehash
 
-from config.video_settings import get_config
+from src.utils.exceptions import VideoProcessingError
+from src.utils.media_probe import get_media_probe
+from src.video.processing.ass_captions import (
+    CAPTION_STYLE_DEFAULTS,
+    AssSubtitles,
+    layout_caption,
+    libass_available,
+    load_font,
+    measure_text,
+    subtitles_filter,
+    wrap_text,
+    write_ass_subtitles,
+)
+from src.video.processing.background_blur import BackgroundSpec, BlurredBackgroundCache, LowResBlur
+from src.video.processing.filtergraph_composer import (
+    CaptionOverlay,
+    CompositionJob,
+    CompositionSegment,
+    FilterGraphRenderer,
+    colorx_filter,
+    keyframe_times,
+)
+from src.video.processing.mezzanine import MezzanineRenderer, MezzanineSpec
+from src.video.processing.multi_export import ExportTarget, MultiPlatformExporter
+from src.video.processing.preview import (
+    DraftProfile,
+    PreviewResult,
+    build_contact_sheet,
+    scale_caption_style,
+    scale_captions,
+)
+from src.video.processing.streaming_sources import PeakMemoryMonitor, StreamingSources
+from src.video.processing.quality_monitor import (
+    QualityIssue,
+    QualityMonitor,
+    QualityReport,
+    QualityThresholds,
+    attach_to_clip,
+    ignore_ranges,
+    localize_issues,
+)
+
+
+# Backends de renderização da composição final
+RENDER_BACKENDS = ("moviepy", "ffmpeg")
 
 
 class VideoQuality(Enum):
@@ -107,14 +164,34 @@ class FinalVideoComposer:
     - Métricas e analytics integrados
     """
     
-    def __init__(self, config: Optional[Dict] = None):
+    # Realce de cor final (`vfx.colorx`); com legendas ASS vai para o -vf, depois delas
+    FINAL_COLORX = 1.1
+    
+    def __init__(
+        self,
+        config: Optional[Dict] = None,
+        mezzanine_renderer: Optional[MezzanineRenderer] = None,
+        filtergraph_renderer: Optional[FilterGraphRenderer] = None,
+        background_cache: Optional[BlurredBackgroundCache] = None,
+        platform_exporter: Optional[MultiPlatformExporter] = None
+    ):
         """
         Inicializa o compositor de vídeo final.
         
         Args:
             config: Configurações customizadas (opcional)
+            mezzanine_renderer: Preparador de clips em uma passada do FFmpeg
+                (padrão: criado conforme `final_composition.mezzanine`)
+            filtergraph_renderer: Executor do backend `ffmpeg` (filter_complex único)
+            background_cache: Cache dos fundos desfocados do layout sandwich
+                (padrão: criado conforme `final_composition.background_blur`)
+            platform_exporter: Export em lote (uma decodificação para todas as plataformas)
         """
-        self.config = config or get_config()
+        if config is None:
+            # Import tardio: quem passa a configuração não precisa do pacote `config`
+            from config.video_settings import get_config
+            config = get_config()
+        self.config = config
         self.logger = logging.getLogger(__name__)
         
         # Configurações de qualidade
@@ -122,6 +199,10 @@ class FinalVideoComposer:
         self.default_resolution = self.quality_settings.get('default_resolution', (1080, 1920))
         self.default_fps = self.quality_settings.get('default_fps', 30)
         self.target_bitrate = self.quality_settings.get('target_bitrate', '5M')
+        self.render_preset = self.quality_settings.get('render_preset', 'medium')
+        
+        # Prévia em modo rascunho (resolução reduzida, ultrafast, FPS menor)
+        self.draft_profile = DraftProfile.from_settings(self.quality_settings.get('draft'))
         
         # Diretórios de trabalho
         self.temp_dir = Path(self.quality_settings.get('temp_dir', tempfile.gettempdir()))
@@ -136,7 +217,64 @@ class FinalVideoComposer:
         # Configurações de template
         self.templates = self._load_default_templates()
         
-        # Sistema de retry para quality check
+        # Preparação dos segmentos em uma passada do FFmpeg (corte + layout + FPS)
+        mezzanine_settings = self.quality_settings.get('mezzanine', {})
+        self.use_mezzanine = mezzanine_settings.get('enabled', True)
+        self.mezzanine_renderer = mezzanine_renderer or MezzanineRenderer(
+            cache_dir=mezzanine_settings.get('cache_dir', str(self.temp_dir / 'mezzanine')),
+            max_workers=mezzanine_settings.get('max_workers', 2),
+        )
+        
+        # Fundo desfocado do layout sandwich em baixa resolução (e cache por clip)
+        background_settings = self.quality_settings.get('background_blur', {})
+        self.background_downscale = background_settings.get('downscale', 8)
+        self.background_fps = background_settings.get('fps')
+        self.background_cache = background_cache
+        if self.background_cache is None and background_settings.get('cache', True):
+            self.background_cache = BlurredBackgroundCache(
+                cache_dir=background_settings.get('cache_dir', str(self.temp_dir / 'backgrounds'))
+            )
+        
+        # Modo streaming: cada fonte é aberta só durante o próprio intervalo e o cache
+        # de quadros do fundo desfocado é limitado (vários renders na mesma máquina)
+        streaming_settings = self.quality_settings.get('streaming', {})
+        self.streaming_composition = streaming_settings.get('enabled', False)
+        self.max_open_sources = streaming_settings.get('max_open_sources', 2)
+        self.background_frame_cache = (
+            streaming_settings.get('frame_cache', 64) if self.streaming_composition else 512
+        )
+        self._streaming_sources: Optional[StreamingSources] = None
+        self.last_render_stats: Optional[Dict[str, Any]] = None
+        
+        # Legendas: "ass" (arquivo único queimado pela libass no encode) ou "pil" (uma imagem por legenda)
+        self.caption_renderer = self.quality_settings.get('caption_renderer', 'ass')
+        
+        # Backend padrão do render final ("moviepy" ou "ffmpeg"); pode ser trocado por job
+        self.render_backend = self.quality_settings.get('render_backend', 'moviepy')
+        self.filtergraph_renderer = filtergraph_renderer or FilterGraphRenderer(
+            timeout=self.quality_settings.get('render_timeout', 1800)
+        )
+        self.platform_exporter = platform_exporter or MultiPlatformExporter(
+            timeout=self.quality_settings.get('render_timeout', 1800)
+        )
+        
+        # Render do backend `ffmpeg` em trechos paralelos (bordas de clips) juntados por cópia
+        parallel_settings = self.quality_settings.get('parallel_render', {})
+        self.render_workers = parallel_settings.get('workers') or os.cpu_count() or 1
+        self.min_chunk_duration = parallel_settings.get('min_chunk_duration', 2.0)
+        if not parallel_settings.get('enabled', True):
+            self.render_workers = 1
+        
+        # Métricas de qualidade calculadas durante o encode e reparo só dos trechos com problema
+        monitor_settings = self.quality_settings.get('quality_monitor', {})
+        self.use_quality_monitor = monitor_settings.get('enabled', True)
+        self.repair_segments = monitor_settings.get('repair', True)
+        self.quality_monitor_thresholds = QualityThresholds.from_settings(monitor_settings.get('thresholds'))
+        self.quality_analysis_width = monitor_settings.get('analysis_width', 270)
+        self.target_loudness_db = monitor_settings.get('target_loudness_db', -20.0)
+        self.last_quality_report: Optional[QualityReport] = None
+        
+        # Sistema de retry para quality check (sem monitor de qualidade)
         self.max_retries = self.quality_settings.get('max_quality_retries', 3)
         self.quality_thresholds = self.quality_settings.get('quality_thresholds', {
             'min_resolution_score': 0.8,
@@ -154,7 +292,9 @@ class FinalVideoComposer:
         template_config: TemplateConfig,
         captions: Optional[List[Dict[str, Any]]] = None,
         output_path: Optional[str] = None,
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        render_backend: Optional[str] = None,
+        draft: bool = False
     ) -> str:
         """
         Compoe vídeo final com sincronização de áudio TTS.
@@ -166,12 +306,20 @@ class FinalVideoComposer:
             captions: Legendas sincronizadas para sobreposição (opcional)
             output_path: Caminho de saída (opcional)
             metadata: Metadados do vídeo
+            render_backend: "moviepy" (quadros compostos em Python) ou "ffmpeg"
+                (composição compilada em um filter_complex); padrão da configuração
+            draft: Prévia em rascunho: sem validação de qualidade, retries nem metadados
             
         Returns:
             Caminho do vídeo final gerado
         """
         try:
-            self.logger.info(f"Iniciando composição final com {len(video_segments)} segmentos")
+            backend = (render_backend or self.render_backend or 'moviepy').lower()
+            if backend not in RENDER_BACKENDS:
+                raise ValueError(f"Backend de renderização inválido: {backend}")
+            self.logger.info(
+                f"Iniciando composição final com {len(video_segments)} segmentos (backend: {backend})"
+            )
             
             if not audio_path or not os.path.exists(audio_path):
                 raise ValueError(f"Arquivo de áudio não encontrado: {audio_path}")
@@ -184,49 +332,103 @@ class FinalVideoComposer:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 output_path = str(self.output_dir / f"final_video_{timestamp}.mp4")
             
-            # Step 1: Carregar e preparar áudio
-            audio_clip = self._load_audio_track(audio_path)
-            
-            # Step 2: Sincronizar segmentos com áudio
-            synchronized_segments = self._sync_segments_with_audio(
-                video_segments, audio_clip, template_config
-            )
-            
-            # Step 3: Criar estrutura do vídeo
-            video_clips = self._create_video_structure(
-                synchronized_segments, template_config
-            )
-            
-            # Step 4: Adicionar transições e efeitos
-            final_clips = self._apply_transitions_and_effects(
-                video_clips, template_config
-            )
-            
-            # Step 5: Concatenar todos os clips
-            final_video = concatenate_videoclips(final_clips)
+            work_dir = Path(tempfile.mkdtemp(prefix='composition_', dir=self.temp_dir))
+            memory = PeakMemoryMonitor().start()
+            try:
+                # Steps 1-9 compilados em um único filter_complex (backend "ffmpeg")
+                job, monitor = None, None
+                if backend == 'ffmpeg':
+                    job, monitor = self._compose_with_filtergraph(
+                        audio_path, video_segments, template_config, captions, output_path, work_dir
+                    )
+                
+                if job is None:
+                    # Step 1: Carregar e preparar áudio
+                    audio_clip = self._load_audio_track(audio_path)
+                    
+                    # Step 2: Sincronizar segmentos com áudio
+                    synchronized_segments = self._sync_segments_with_audio(
+                        video_segments, audio_clip.duration, template_config
+                    )
+                    
+                    # Step 3: Criar estrutura do vídeo
+                    video_clips = self._create_video_structure(
+                        synchronized_segments, template_config
+                    )
+                    
+                    # Step 4: Adicionar transições e efeitos
+                    final_clips = self._apply_transitions_and_effects(
+                        video_clips, template_config
+                    )
+                    timeline = [clip.duration for clip in final_clips]
+                    
+                    # Step 5: Concatenar todos os clips
+                    final_video = concatenate_videoclips(final_clips)
 
-            # Step 5.1: Aplicar legendas (se fornecidas)
-            final_video = self._apply_captions(final_video, captions, template_config)
-            
-            # Step 6: Adicionar áudio sincronizado
-            final_video = self._sync_audio_with_video(final_video, audio_clip)
-            
-            # Step 7: Aplicar template e branding
-            final_video = self._apply_template_branding(final_video, template_config)
-            
-            # Step 8: Aplicar configurações finais
-            final_video = self._apply_final_video_settings(final_video, template_config)
-            
-            # Step 9: Renderizar vídeo final
-            self._render_final_video(final_video, output_path, template_config)
+                    # Step 5.1: Aplicar legendas (se fornecidas); em ASS são queimadas no encode
+                    subtitles = self._prepare_ass_captions(captions, template_config, work_dir)
+                    if subtitles is None:
+                        final_video = self._apply_captions(final_video, captions, template_config)
+                    
+                    # Step 6: Adicionar áudio sincronizado
+                    final_video = self._sync_audio_with_video(final_video, audio_clip)
+                    
+                    # Step 7: Aplicar template e branding
+                    final_video = self._apply_template_branding(final_video, template_config)
+                    
+                    # Step 8: Aplicar configurações finais
+                    final_video = self._apply_final_video_settings(
+                        final_video, template_config, apply_color=subtitles is None
+                    )
+                    
+                    # Step 8.1: Métricas de qualidade sobre os quadros e o áudio do encode
+                    monitor = self._create_quality_monitor()
+                    if monitor is not None:
+                        final_video = attach_to_clip(final_video, monitor)
+                    
+                    # Step 9: Renderizar vídeo final (quadros-chave nas bordas dos clips)
+                    self._render_final_video(
+                        final_video, output_path, template_config, subtitles=subtitles,
+                        keyframes=keyframe_times(timeline, self.default_fps)
+                    )
+                
+                # Step 9.1: Refazer só os trechos (ou só o áudio) com problema
+                quality_report = monitor.report() if monitor is not None else None
+                if quality_report is not None:
+                    # Intro/outro de cor sólida não são problemas de qualidade
+                    quality_report = ignore_ranges(
+                        quality_report, self._color_ranges(template_config, quality_report.duration),
+                        self.quality_monitor_thresholds,
+                    )
+                if quality_report is not None and not quality_report.passed and self.repair_segments:
+                    if job is None:
+                        job = self._build_composition_job(
+                            synchronized_segments, template_config, captions,
+                            audio_path, audio_clip.duration, work_dir
+                        )
+                        if not self._same_timeline(job, timeline):
+                            self.logger.warning("Linha do tempo do job difere do render; reparo só do áudio")
+                            job = None
+                    quality_report = self._repair_quality_issues(output_path, quality_report, job, work_dir)
+            finally:
+                memory.stop()
+                self._finish_render_stats(memory)
+                shutil.rmtree(work_dir, ignore_errors=True)
             
             # Step 10: Cleanup e validação
             self._cleanup_temp_files()
+            if draft:
+                return output_path
             
-            # Step 11: Validar qualidade automaticamente
-            quality_valid = self._validate_final_quality(output_path, audio_path)
+            # Step 11: Validar qualidade (métricas do encode; sem monitor, reabre o vídeo)
+            quality_valid = self._validate_final_quality(output_path, audio_path, quality_report)
             
-            if not quality_valid and (metadata or {}).get('retry_on_quality_fail', True):
+            if not quality_valid and quality_report is not None:
+                self.logger.warning(
+                    "Problemas de qualidade não corrigidos: "
+                    + ", ".join(f"{i.kind} {i.start:.1f}-{i.end:.1f}s" for i in quality_report.issues)
+                )
+            elif not quality_valid and (metadata or {}).get('retry_on_quality_fail', True):
                 retry_count = (metadata or {}).get('retry_count', 0)
                 if retry_count >= self.max_retries:
                     self.logger.warning(
@@ -236,7 +438,8 @@ class FinalVideoComposer:
                 self.logger.warning("Qualidade abaixo do padrão, tentando novamente...")
                 meta_next = {**(metadata or {}), 'retry_count': retry_count + 1}
                 return self._retry_composition_with_improvements(
-                    audio_path, video_segments, template_config, captions, output_path, meta_next
+                    audio_path, video_segments, template_config, captions, output_path, meta_next,
+                    render_backend=backend
                 )
             
             # Step 12: Gerar metadados finais
@@ -250,6 +453,103 @@ class FinalVideoComposer:
             self.logger.error(f"Erro na composição final: {e}")
             raise
     
+    def compose_preview(
+        self,
+        audio_path: str,
+        video_segments: List[VideoSegment],
+        template_config: TemplateConfig,
+        captions: Optional[List[Dict[str, Any]]] = None,
+        output_path: Optional[str] = None,
+        render_backend: Optional[str] = None,
+        contact_sheet: Optional[bool] = None
+    ) -> PreviewResult:
+        """
+        Renderiza uma prévia em modo rascunho para revisão antes do render final.
+        
+        Usa a mesma linha do tempo de `compose_final_video` (segmentos, layout,
+        transições, legendas e áudio), com resolução reduzida (`draft.max_height`,
+        padrão 960), preset ultrafast e FPS reduzido; os tamanhos do estilo das
+        legendas são escalados junto para manter o layout. Sem métricas de
+        qualidade, reparos ou retries.
+        
+        Args:
+            audio_path: Caminho do arquivo de áudio TTS
+            video_segments: Lista de segmentos de vídeo
+            template_config: Configuração do template (na resolução final)
+            captions: Legendas sincronizadas (opcional)
+            output_path: Caminho da prévia (opcional)
+            render_backend: "moviepy" ou "ffmpeg"; padrão da configuração
+            contact_sheet: Gera a folha de contatos (padrão: `draft.contact_sheet`)
+            
+        Returns:
+            PreviewResult com o vídeo, a folha de contatos e o tempo gasto
+        """
+        profile = self.draft_profile
+        resolution = profile.resolution(template_config.resolution)
+        scale = profile.scale(template_config.resolution)
+        draft_template = replace(
+            template_config,
+            resolution=resolution,
+            text_style=scale_caption_style(template_config.text_style, scale)
+        )
+        if not output_path:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = str(self.output_dir / f"preview_{timestamp}.mp4")
+        
+        self.logger.info(
+            f"Prévia em rascunho: {resolution[0]}x{resolution[1]} a {profile.fps} fps ({profile.preset})"
+        )
+        start_time = time.time()
+        with self._draft_render_settings(profile):
+            video_path = self.compose_final_video(
+                audio_path=audio_path,
+                video_segments=video_segments,
+                template_config=draft_template,
+                captions=scale_captions(captions, scale),
+                output_path=output_path,
+                render_backend=render_backend,
+                draft=True
+            )
+        
+        sheet_path = None
+        if profile.contact_sheet if contact_sheet is None else contact_sheet:
+            sheet_path = build_contact_sheet(
+                video_path,
+                str(Path(video_path).with_suffix('.contact.jpg')),
+                columns=profile.sheet_columns,
+                rows=profile.sheet_rows,
+                width=profile.sheet_width
+            )
+        
+        result = PreviewResult(
+            video_path=video_path,
+            resolution=resolution,
+            fps=profile.fps,
+            elapsed=time.time() - start_time,
+            contact_sheet_path=sheet_path
+        )
+        self.logger.info(f"Prévia gerada em {result.elapsed:.1f}s: {video_path}")
+        return result
+    
+    @contextmanager
+    def _draft_render_settings(self, profile: DraftProfile):
+        """Troca temporariamente os parâmetros de encode pelos do rascunho"""
+        saved = {
+            'default_fps': self.default_fps,
+            'target_bitrate': self.target_bitrate,
+            'render_preset': self.render_preset,
+            'use_quality_monitor': self.use_quality_monitor,
+        }
+        self.default_fps = profile.fps
+        self.target_bitrate = profile.bitrate
+        self.render_preset = profile.preset
+        self.use_quality_monitor = False
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                setattr(self, name, value)
+    
     def apply_final_effects(self, composed_video_path: str) -> str:
         """
         Aplica efeitos finais profissionais ao vídeo.
@@ -476,23 +776,31 @@ class FinalVideoComposer:
         self,
         final_video_path: str,
         platforms: List[Union[PlatformType, str]],
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        quality: VideoQuality = VideoQuality.HIGH
     ) -> Dict[str, str]:
         """
         Export em lote para múltiplas plataformas.
         
+        O master é decodificado uma única vez e distribuído para um encoder por
+        plataforma (resolução, bitrate, corte de duração e loudness próprios);
+        uma plataforma com erro não interrompe as demais.
+        
         Args:
             final_video_path: Caminho do vídeo final
             platforms: Lista de plataformas para export
             output_dir: Diretório de saída customizado
+            quality: Nível de qualidade (define o preset do encoder)
             
         Returns:
             Dicionário com caminhos dos vídeos otimizados por plataforma
+            (None para as plataformas que falharam)
         """
         try:
             self.logger.info(f"Export em lote para {len(platforms)} plataformas")
             
-            results = {}
+            if not os.path.exists(final_video_path):
+                raise ValueError(f"Vídeo não encontrado: {final_video_path}")
             
             # Criar diretório de saída se especificado
             if output_dir:
@@ -502,23 +810,34 @@ class FinalVideoComposer:
                 export_dir = self.output_dir / f"batch_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 export_dir.mkdir(exist_ok=True)
             
+            results = {}
+            targets = {}
             for platform in platforms:
+                platform_name = platform.value if isinstance(platform, PlatformType) else str(platform).lower()
                 try:
-                    # Otimizar para cada plataforma
-                    optimized_path = self.optimize_for_platform(final_video_path, platform)
-                    
-                    # Mover para diretório do batch
-                    platform_name = platform.value if isinstance(platform, PlatformType) else platform
-                    final_path = export_dir / f"{platform_name}.mp4"
-                    Path(optimized_path).rename(final_path)
-                    
-                    results[platform_name] = str(final_path)
-                    
-                    self.logger.info(f"✓ Export para {platform_name} concluído")
-                    
-                except Exception as e:
+                    platform_type = platform if isinstance(platform, PlatformType) else PlatformType(platform_name)
+                except ValueError as e:
                     self.logger.error(f"✗ Erro no export para {platform}: {e}")
                     results[platform_name] = None
+                    continue
+                targets[platform_name] = (
+                    platform_type,
+                    self._build_export_target(platform_name, platform_type, export_dir, quality)
+                )
+            
+            if targets:
+                report = self.platform_exporter.export(
+                    final_video_path, [target for _, target in targets.values()]
+                )
+                for platform_name, (platform_type, _) in targets.items():
+                    result = report.results[platform_name]
+                    results[platform_name] = result.path if result.ok else None
+                    if not result.ok:
+                        self.logger.error(f"✗ Erro no export para {platform_name}: {result.error}")
+                        continue
+                    if not self._validate_platform_compliance(result.path, platform_type, quality):
+                        self.logger.warning(f"Vídeo pode não estar em conformidade com {platform_name}")
+                    self.logger.info(f"✓ Export para {platform_name} concluído ({result.mode})")
             
             # Gerar relatório de export
             self._generate_batch_export_report(export_dir, results)
@@ -530,6 +849,31 @@ class FinalVideoComposer:
             self.logger.error(f"Erro no export em lote: {e}")
             raise
     
+    def _build_export_target(
+        self,
+        platform_name: str,
+        platform: PlatformType,
+        export_dir: Path,
+        quality: VideoQuality
+    ) -> ExportTarget:
+        """Saída do export em lote a partir da configuração da plataforma"""
+        platform_config = self._get_platform_config(platform)
+        width, height = platform_config['resolution']
+        presets = {VideoQuality.HIGH: 'slow', VideoQuality.MEDIUM: 'medium', VideoQuality.LOW: 'fast'}
+        return ExportTarget(
+            name=platform_name,
+            output_path=str(export_dir / f"{platform_name}.{platform_config['format']}"),
+            width=width,
+            height=height,
+            fps=platform_config['fps'],
+            bitrate=platform_config['bitrate'],
+            max_duration=platform_config['max_duration'],
+            loudness=platform_config.get('loudness'),
+            preset=presets[quality],
+            video_codec=platform_config['video_codec'],
+            audio_codec=platform_config['audio_codec'],
+        )
+    
     def _load_audio_track(self, audio_path: str):
         """Carrega e pré-processa track de áudio"""
         try:
@@ -547,12 +891,11 @@ class FinalVideoComposer:
     def _sync_segments_with_audio(
         self,
         video_segments: List[VideoSegment],
-        audio_clip,
+        audio_duration: float,
         template_config: TemplateConfig
     ) -> List[VideoSegment]:
         """Sincroniza segmentos de vídeo com áudio TTS"""
         try:
-            audio_duration = audio_clip.duration
             synchronized_segments: List[VideoSegment] = []
             current_time = 0.0
             min_segment_duration = 2.5
@@ -615,38 +958,36 @@ class FinalVideoComposer:
                 intro_clip = self._create_intro_clip(template_config)
                 video_clips.append(intro_clip)
             
-            # Processar segmentos de vídeo
-            for segment in segments:
-                try:
-                    # Carregar clip de vídeo
-                    if os.path.exists(segment.path):
-                        clip = VideoFileClip(segment.path)
-
-                        # Ajustar duração
-                        if clip.duration > segment.duration:
-                            clip = clip.subclip(0, segment.duration)
-                        elif clip.duration < segment.duration:
-                            # Loop do clip se necessário
-                            clip = clip.fx(vfx.loop, duration=segment.duration)
-                        
-                        # Aplicar efeitos específicos do segmento
-                        if segment.effects:
-                            clip = self._apply_segment_effects(clip, segment.effects)
-
-                        # Garantir duração exata e layout vertical sem distorção
-                        clip = clip.set_duration(segment.duration)
-                        clip = clip.without_audio()
-                        clip = self._apply_vertical_sandwich_layout(clip, template_config)
-
-                        video_clips.append(clip)
-                        
-                except Exception as e:
-                    self.logger.warning(f"Erro ao processar segmento {segment.path}: {e}")
-                    # Criar placeholder se segmento falhar
-                    placeholder_clip = self._create_placeholder_clip(
-                        template_config, segment.duration
-                    )
-                    video_clips.append(placeholder_clip)
+            # Segmentos já cortados, no layout vertical e com FPS normalizado
+            prepared = self._prepare_mezzanine_segments(segments, template_config)
+            
+            if self.streaming_composition:
+                # Cada segmento é aberto só quando o encode chega ao seu intervalo
+                sources = StreamingSources(max_open=self.max_open_sources)
+                self._streaming_sources = sources
+                position = sum(clip.duration for clip in video_clips)
+                for segment, mezzanine in zip(segments, prepared):
+                    if mezzanine is None and not os.path.exists(segment.path):
+                        continue
+                    video_clips.append(self._create_streaming_segment_clip(
+                        sources, position, segment, mezzanine, template_config
+                    ))
+                    position += segment.duration
+            else:
+                # Processar segmentos de vídeo
+                for segment, mezzanine in zip(segments, prepared):
+                    try:
+                        clip = self._create_segment_clip(segment, mezzanine, template_config)
+                        if clip is not None:
+                            video_clips.append(clip)
+                            
+                    except Exception as e:
+                        self.logger.warning(f"Erro ao processar segmento {segment.path}: {e}")
+                        # Criar placeholder se segmento falhar
+                        placeholder_clip = self._create_placeholder_clip(
+                            template_config, segment.duration
+                        )
+                        video_clips.append(placeholder_clip)
             
             # Adicionar outro se especificado
             if template_config.outro_duration > 0:
@@ -660,6 +1001,116 @@ class FinalVideoComposer:
             self.logger.error(f"Erro ao criar estrutura de vídeo: {e}")
             raise
 
+    def _finish_render_stats(self, memory: PeakMemoryMonitor):
+        """Fecha as fontes ainda abertas do modo streaming e registra o pico de memória"""
+        stats = {'streaming': self.streaming_composition}
+        if self._streaming_sources is not None:
+            self._streaming_sources.close_all()
+            stats.update(self._streaming_sources.stats.to_dict())
+            self._streaming_sources = None
+        stats['peak_rss_mb'] = memory.peak_rss_mb
+        stats['rss_growth_mb'] = memory.growth_mb
+        self.last_render_stats = stats
+        if memory.peak_rss_mb is not None:
+            self.logger.info(
+                f"Pico de memória (RSS) na composição: {memory.peak_rss_mb:.1f} MB "
+                f"(+{memory.growth_mb or 0.0:.1f} MB)"
+            )
+    
+    def _create_segment_clip(
+        self,
+        segment: VideoSegment,
+        mezzanine: Optional[Any],
+        template_config: TemplateConfig
+    ) -> Optional[VideoFileClip]:
+        """Abre o segmento já no layout vertical, com duração exata e efeitos (None se o arquivo não existe)."""
+        if mezzanine is not None:
+            clip = VideoFileClip(mezzanine.path).without_audio()
+            if segment.effects:
+                clip = self._apply_segment_effects(clip, segment.effects)
+            return clip.set_duration(segment.duration)
+        
+        # Carregar clip de vídeo
+        if not os.path.exists(segment.path):
+            return None
+        clip = VideoFileClip(segment.path)
+
+        # Ajustar duração
+        if clip.duration > segment.duration:
+            clip = clip.subclip(0, segment.duration)
+        elif clip.duration < segment.duration:
+            # Loop do clip se necessário
+            clip = clip.fx(vfx.loop, duration=segment.duration)
+        
+        # Garantir duração exata e layout vertical sem distorção
+        clip = clip.set_duration(segment.duration)
+        clip = clip.without_audio()
+        clip = self._apply_vertical_sandwich_layout(clip, template_config)
+
+        # Efeitos do segmento sobre o quadro composto (como nos clips preparados)
+        if segment.effects:
+            clip = self._apply_segment_effects(clip, segment.effects)
+        return clip
+
+    def _create_streaming_segment_clip(
+        self,
+        sources: StreamingSources,
+        start: float,
+        segment: VideoSegment,
+        mezzanine: Optional[Any],
+        template_config: TemplateConfig
+    ) -> VideoClip:
+        """
+        Clip do segmento que só abre a fonte (e o fundo desfocado) quando um
+        quadro do seu intervalo é pedido; a fonte é fechada quando o encode passa
+        do intervalo.
+        """
+        def open_segment():
+            try:
+                clip = self._create_segment_clip(segment, mezzanine, template_config)
+                if clip is not None:
+                    return clip
+            except Exception as e:
+                self.logger.warning(f"Erro ao processar segmento {segment.path}: {e}")
+            return self._create_placeholder_clip(template_config, segment.duration)
+        
+        key = sources.register(start, start + segment.duration, open_segment)
+        # Sem make_frame no construtor: o MoviePy decodificaria o quadro 0 para descobrir o tamanho
+        clip = VideoClip(duration=segment.duration)
+        clip.make_frame = lambda t: sources.get_frame(key, t)
+        clip.size = tuple(template_config.resolution)
+        clip.fps = self.default_fps
+        return clip
+
+    def _prepare_mezzanine_segments(
+        self,
+        segments: List[VideoSegment],
+        template_config: TemplateConfig
+    ) -> List[Optional[Any]]:
+        """
+        Prepara os segmentos em paralelo com uma única passada do FFmpeg cada
+        (corte, layout sandwich, FPS e formato de pixel).
+        
+        Segmentos que falharem (ou com o recurso desativado) retornam None e
+        seguem pelo caminho MoviePy.
+        """
+        if not self.use_mezzanine or not segments:
+            return [None] * len(segments)
+        
+        spec = MezzanineSpec.from_template(template_config, fps=self.default_fps)
+        jobs = [
+            {"video_path": segment.path, "start": 0.0, "duration": segment.duration}
+            for segment in segments
+        ]
+        prepared = self.mezzanine_renderer.render_many(jobs, spec)
+        
+        ready = sum(1 for clip in prepared if clip is not None)
+        self.logger.info(
+            f"Segmentos preparados em uma passada: {ready}/{len(segments)} "
+            f"({sum(clip.elapsed for clip in prepared if clip):.2f}s de FFmpeg)"
+        )
+        return prepared
+
     def _apply_vertical_sandwich_layout(
         self,
         clip: VideoFileClip,
@@ -826,18 +1277,19 @@ class FinalVideoComposer:
             self.logger.error(f"Erro ao aplicar branding: {e}")
             return video_clip
     
-    def _apply_final_video_settings(self, video_clip, template_config):
-        """Aplica configurações finais de qualidade"""
+    def _apply_final_video_settings(self, video_clip, template_config, apply_color: bool = True):
+        """Aplica configurações finais de qualidade (cor só se `apply_color`)"""
         try:
             # Garantir FPS consistente
             if video_clip.fps != self.default_fps:
                 video_clip = video_clip.set_fps(self.default_fps)
             
             # Aplicar configurações de cor (usar fx para compatibilidade)
-            try:
-                video_clip = video_clip.fx(vfx.colorx, 1.1)
-            except Exception:
-                pass
+            if apply_color:
+                try:
+                    video_clip = video_clip.fx(vfx.colorx, self.FINAL_COLORX)
+                except Exception:
+                    pass
             
             return video_clip
             
@@ -845,9 +1297,22 @@ class FinalVideoComposer:
             self.logger.error(f"Erro nas configurações finais: {e}")
             return video_clip
     
-    def _render_final_video(self, video_clip, output_path, template_config):
+    def _render_final_video(self, video_clip, output_path, template_config,
+                            subtitles: Optional[AssSubtitles] = None,
+                            keyframes: Optional[List[float]] = None):
         """Renderiza vídeo final com configurações otimizadas"""
         try:
+            ffmpeg_params = [
+                '-movflags', '+faststart',  # Otimizar para streaming
+                '-pix_fmt', 'yuv420p'       # Compatibilidade máxima
+            ]
+            if keyframes:
+                # Permite substituir um clip depois sem reencodar o vídeo inteiro
+                ffmpeg_params += ['-force_key_frames', ','.join(f"{t:.6f}" for t in keyframes)]
+            if subtitles is not None:
+                # Legendas desenhadas pela libass durante o encode e realce de cor
+                # depois delas, na mesma ordem do backend ffmpeg
+                ffmpeg_params += ['-vf', f"{subtitles_filter(subtitles)},{colorx_filter(self.FINAL_COLORX)}"]
             video_clip.write_videofile(
                 output_path,
                 fps=self.default_fps,
@@ -856,11 +1321,8 @@ class FinalVideoComposer:
                 bitrate=self.target_bitrate,
                 temp_audiofile=self.temp_dir / 'temp-audio.m4a',
                 remove_temp=True,
-                preset='medium',  # Balance entre qualidade e velocidade
-                ffmpeg_params=[
-                    '-movflags', '+faststart',  # Otimizar para streaming
-                    '-pix_fmt', 'yuv420p'       # Compatibilidade máxima
-                ]
+                preset=self.render_preset,  # Balance entre qualidade e velocidade
+                ffmpeg_params=ffmpeg_params
             )
             
             # Fechar recursos
@@ -870,20 +1332,180 @@ class FinalVideoComposer:
             self.logger.error(f"Erro no render final: {e}")
             raise
     
-    def _validate_final_quality(self, video_path: str, audio_path: str) -> bool:
-        """Validação automática de qualidade do vídeo final"""
+    def _prepare_ass_captions(
+        self,
+        captions: Optional[List[Dict[str, Any]]],
+        template_config: TemplateConfig,
+        work_dir: Path
+    ) -> Optional[AssSubtitles]:
+        """
+        Gera o arquivo ASS das legendas quando o renderizador é "ass".
+        
+        Returns:
+            None se não houver legendas, se o renderizador for "pil" ou se o
+            FFmpeg não tiver libass (as legendas seguem então como imagens)
+        """
+        if not captions or self.caption_renderer != 'ass' or not libass_available():
+            return None
         try:
-            metrics = self._calculate_quality_metrics(video_path, audio_path)
-            
-            # Verificar thresholds
-            quality_checks = [
-                metrics.resolution_score >= self.quality_thresholds['min_resolution_score'],
-                metrics.audio_sync_score >= self.quality_thresholds['min_audio_sync_score'],
-                metrics.visual_clarity_score >= self.quality_thresholds['min_visual_clarity_score'],
-                metrics.overall_score >= self.quality_thresholds['min_overall_score']
-            ]
-            
-            is_valid = all(quality_checks)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            subtitles = write_ass_subtitles(
+                captions, template_config.resolution, str(work_dir / f"captions_{timestamp}.ass"),
+                font_resolver=self._resolve_font_path
+            )
+        except Exception as e:
+            self.logger.warning(f"Falha ao gerar legendas ASS, usando PIL: {e}")
+            return None
+        if subtitles is not None:
+            self.logger.info(f"Legendas em ASS: {subtitles.captions} legendas, {subtitles.events} eventos")
+        return subtitles
+    
+    def _compose_with_filtergraph(
+        self,
+        audio_path: str,
+        video_segments: List[VideoSegment],
+        template_config: TemplateConfig,
+        captions: Optional[List[Dict[str, Any]]],
+        output_path: str,
+        work_dir: Path
+    ) -> Tuple[Optional[CompositionJob], Optional[QualityMonitor]]:
+        """
+        Renderiza a composição com o backend `ffmpeg` (um único filter_complex).
+        
+        Returns:
+            O job renderizado (usado para reparar trechos) e o monitor de
+            qualidade do encode, ou (None, None) se o FFmpeg falhar; a
+            composição segue então pelo caminho MoviePy
+        """
+        try:
+            audio_duration = get_media_probe().get_duration(audio_path)
+            if audio_duration <= 0:
+                raise VideoProcessingError(f"Duração do áudio desconhecida: {audio_path}")
+            synchronized_segments = self._sync_segments_with_audio(
+                video_segments, audio_duration, template_config
+            )
+            job = self._build_composition_job(
+                synchronized_segments, template_config, captions, audio_path, audio_duration, work_dir
+            )
+            monitor = self._create_quality_monitor()
+            if self.render_workers > 1:
+                self.filtergraph_renderer.render_chunked(
+                    job, output_path, self.render_workers, monitor=monitor,
+                    min_chunk_duration=self.min_chunk_duration
+                )
+            else:
+                self.filtergraph_renderer.render(job, output_path, monitor=monitor)
+            return job, monitor
+        except VideoProcessingError as e:
+            self.logger.warning(f"Backend ffmpeg falhou, usando MoviePy: {e}")
+            return None, None
+    
+    def _build_composition_job(
+        self,
+        segments: List[VideoSegment],
+        template_config: TemplateConfig,
+        captions: Optional[List[Dict[str, Any]]],
+        audio_path: str,
+        audio_duration: float,
+        work_dir: Path
+    ) -> CompositionJob:
+        """Traduz a estrutura do caminho MoviePy (Steps 3-8) para um CompositionJob."""
+        width, height = template_config.resolution
+        timeline: List[CompositionSegment] = []
+        
+        if template_config.intro_duration > 0:
+            timeline.append(CompositionSegment(
+                duration=template_config.intro_duration, color=template_config.background_color
+            ))
+        
+        probe = get_media_probe()
+        for segment in segments:
+            if not os.path.exists(segment.path):
+                continue
+            try:
+                info = probe.probe(segment.path)
+                timeline.append(CompositionSegment(
+                    duration=segment.duration,
+                    path=segment.path,
+                    source_size=(info.width or width, info.height or height),
+                    loop=0 < info.duration < segment.duration,
+                    effects=list(segment.effects or []),
+                ))
+            except VideoProcessingError as e:
+                self.logger.warning(f"Erro ao processar segmento {segment.path}: {e}")
+                timeline.append(CompositionSegment(duration=segment.duration, color='#808080'))
+        
+        if template_config.outro_duration > 0:
+            timeline.append(CompositionSegment(duration=template_config.outro_duration, color='#000000'))
+        
+        subtitles = self._prepare_ass_captions(captions, template_config, work_dir)
+        overlays: List[CaptionOverlay] = []
+        for index, caption in enumerate((captions or []) if subtitles is None else []):
+            text = caption.get('text', '').strip()
+            if not text:
+                continue
+            start_time = float(caption.get('start_time', 0.0))
+            end_time = float(caption.get('end_time', start_time + 2.0))
+            rendered = self._render_caption_image(text, (width, height), caption.get('style', {}))
+            if rendered is None:
+                continue
+            image, y_pos = rendered
+            image_path = work_dir / f"caption_{index:04d}.png"
+            image.save(image_path)
+            overlays.append(CaptionOverlay(
+                image_path=str(image_path),
+                x=(width - image.width) // 2,
+                y=y_pos,
+                start=start_time,
+                end=start_time + max(end_time - start_time, 0.5),
+            ))
+        
+        return CompositionJob(
+            width=int(width),
+            height=int(height),
+            fps=int(self.default_fps),
+            segments=timeline,
+            audio_path=audio_path,
+            audio_duration=audio_duration,
+            captions=overlays,
+            subtitles=subtitles,
+            background_color=template_config.background_color or '#000000',
+            template_effects=list(template_config.effects_config or []),
+            bitrate=self.target_bitrate,
+            preset=self.render_preset,
+            final_colorx=self.FINAL_COLORX,
+        )
+    
+    def _validate_final_quality(
+        self,
+        video_path: str,
+        audio_path: str,
+        report: Optional[QualityReport] = None
+    ) -> bool:
+        """
+        Validação automática de qualidade do vídeo final.
+        
+        Com o relatório do monitor (calculado durante o encode) o vídeo não é
+        reaberto: a validação exige que não restem problemas localizados e os
+        scores são derivados das mesmas métricas.
+        """
+        try:
+            self.last_quality_report = report
+            if report is not None:
+                metrics = self._quality_metrics_from_report(report, video_path)
+                is_valid = report.passed
+            else:
+                metrics = self._calculate_quality_metrics(video_path, audio_path)
+                
+                # Verificar thresholds
+                quality_checks = [
+                    metrics.resolution_score >= self.quality_thresholds['min_resolution_score'],
+                    metrics.audio_sync_score >= self.quality_thresholds['min_audio_sync_score'],
+                    metrics.visual_clarity_score >= self.quality_thresholds['min_visual_clarity_score'],
+                    metrics.overall_score >= self.quality_thresholds['min_overall_score']
+                ]
+                
+                is_valid = all(quality_checks)
             
             if is_valid:
                 self.logger.info(f"Qualidade validada com sucesso (score: {metrics.overall_score:.2f})")
@@ -896,6 +1518,197 @@ class FinalVideoComposer:
             self.logger.error(f"Erro na validação de qualidade: {e}")
             return False
     
+    def _quality_metrics_from_report(self, report: QualityReport, video_path: str) -> QualityMetrics:
+        """Scores de qualidade a partir das métricas calculadas durante o encode."""
+        width, height = report.video_size
+        resolution_score = min(1.0, (width * height) / (1080 * 1920))
+        if report.audio_duration and report.duration:
+            audio_sync_score = max(0.0, 1.0 - abs(report.audio_duration - report.duration) / report.duration)
+        else:
+            audio_sync_score = 0.9
+        visual_clarity_score = min(1.0, report.sharpness / 20.0)
+        try:
+            bitrate_mbps = (os.path.getsize(video_path) * 8) / (max(report.duration, 1e-6) * 1024 * 1024)
+            compression_efficiency = min(1.0, bitrate_mbps / 5.0)
+        except OSError:
+            compression_efficiency = 0.5
+        engagement_potential = min(1.0, report.motion / 5.0)
+        overall_score = (
+            resolution_score * 0.2 +
+            audio_sync_score * 0.3 +
+            visual_clarity_score * 0.25 +
+            compression_efficiency * 0.15 +
+            engagement_potential * 0.1
+        )
+        return QualityMetrics(
+            resolution_score=resolution_score,
+            audio_sync_score=audio_sync_score,
+            visual_clarity_score=visual_clarity_score,
+            compression_efficiency=compression_efficiency,
+            engagement_potential=engagement_potential,
+            platform_compliance=report.passed,
+            overall_score=overall_score
+        )
+    
+    def _create_quality_monitor(self) -> Optional[QualityMonitor]:
+        """Novo monitor de qualidade para um encode (None se desativado)."""
+        if not self.use_quality_monitor:
+            return None
+        return QualityMonitor(
+            thresholds=self.quality_monitor_thresholds,
+            fps=self.default_fps,
+            analysis_width=self.quality_analysis_width,
+        )
+    
+    def _color_ranges(self, template_config: TemplateConfig, duration: float) -> List[Tuple[float, float]]:
+        """(início, fim) da intro e do outro de cor sólida na linha do tempo."""
+        ranges = []
+        if template_config.intro_duration > 0:
+            ranges.append((0.0, template_config.intro_duration))
+        if template_config.outro_duration > 0:
+            ranges.append((max(duration - template_config.outro_duration, 0.0), duration))
+        return ranges
+    
+    def _same_timeline(self, job: CompositionJob, timeline: List[float]) -> bool:
+        """Confere se o job tem os mesmos clips (durações) do vídeo renderizado pelo MoviePy."""
+        durations = [segment.duration for segment in job.segments]
+        return len(durations) == len(timeline) and all(
+            abs(a - b) < 1.0 / self.default_fps for a, b in zip(durations, timeline)
+        )
+    
+    def _repair_quality_issues(
+        self,
+        output_path: str,
+        report: QualityReport,
+        job: Optional[CompositionJob],
+        work_dir: Path
+    ) -> QualityReport:
+        """
+        Corrige os problemas localizados sem renderizar o vídeo inteiro.
+        
+        Problemas visuais: o clip afetado é renderizado de novo com outra
+        janela do vídeo de origem (preto/congelado) ou com nitidez reforçada
+        (borrado) e substitui o trecho por cópia. Problemas de áudio: só a
+        trilha é reencodada (ganho e limitador).
+        
+        Returns:
+            Relatório com os problemas restantes e os corrigidos
+        """
+        remaining = list(report.issues)
+        repaired: List[QualityIssue] = []
+        
+        if job is not None and report.visual_issues:
+            skip = [index for index, segment in enumerate(job.segments) if segment.is_color]
+            located = localize_issues(report.issues, job.segment_bounds(), skip=skip)
+            replacements: Dict[int, str] = {}
+            for index, issues in sorted(located.items()):
+                piece = self._repair_segment(job, index, issues, work_dir)
+                if piece is not None:
+                    replacements[index] = piece
+            if replacements:
+                try:
+                    spliced = work_dir / f"spliced{Path(output_path).suffix}"
+                    self.filtergraph_renderer.splice(output_path, job, replacements, str(spliced))
+                    shutil.move(str(spliced), output_path)
+                except VideoProcessingError as e:
+                    self.logger.warning(f"Falha ao substituir trechos reparados: {e}")
+                else:
+                    for issue in report.visual_issues:
+                        owners = [index for index, issues in located.items() if issue in issues]
+                        if owners and all(index in replacements for index in owners):
+                            remaining.remove(issue)
+                            repaired.append(issue)
+        
+        if report.audio_issues:
+            fixed = self._repair_audio(output_path, report, work_dir)
+            for issue in fixed:
+                remaining.remove(issue)
+                repaired.append(issue)
+        
+        if repaired:
+            self.logger.info(
+                f"Reparo localizado: {len(repaired)} problema(s) corrigido(s), {len(remaining)} restante(s)"
+            )
+        return replace(report, issues=remaining, repaired=report.repaired + repaired)
+    
+    def _repair_segment(
+        self,
+        job: CompositionJob,
+        index: int,
+        issues: List[QualityIssue],
+        work_dir: Path
+    ) -> Optional[str]:
+        """Renderiza de novo o clip `index` com correções; None se não houver correção possível."""
+        segment = job.segments[index]
+        kinds = {issue.kind for issue in issues}
+        candidate = segment
+        if 'blur' in kinds and 'sharpen' not in segment.effects:
+            candidate = replace(candidate, effects=[*candidate.effects, 'sharpen'])
+        if kinds & {'black', 'freeze'}:
+            start = self._alternative_window(segment)
+            if start is not None:
+                candidate = replace(candidate, start=start, loop=False)
+            elif not kinds - {'black', 'freeze'}:
+                self.logger.warning(f"Sem trecho alternativo para o clip {index} ({segment.path})")
+                return None
+        
+        fixed_job = replace(job, segments=[candidate if i == index else s for i, s in enumerate(job.segments)])
+        try:
+            piece = self.filtergraph_renderer.render_segment(
+                fixed_job, index, str(work_dir / f"repair_{index:03d}.mp4"),
+                monitor=self._create_quality_monitor()
+            )
+        except VideoProcessingError as e:
+            self.logger.warning(f"Falha ao renderizar o clip {index} reparado: {e}")
+            return None
+        if piece.quality is not None and piece.quality.visual_issues:
+            self.logger.warning(
+                f"Reparo do clip {index} não resolveu: {[issue.kind for issue in piece.quality.visual_issues]}"
+            )
+            return None
+        self.logger.info(f"Clip {index} reparado ({', '.join(sorted(kinds))}) em {piece.elapsed:.2f}s")
+        return piece.path
+    
+    def _alternative_window(self, segment: CompositionSegment) -> Optional[float]:
+        """Início de outro trecho do vídeo de origem, sem sobrepor o trecho usado."""
+        try:
+            source_duration = get_media_probe().get_duration(segment.path)
+        except VideoProcessingError:
+            return None
+        latest = source_duration - segment.duration
+        for start in (segment.start + segment.duration, 0.0, latest):
+            if 0.0 <= start <= latest and abs(start - segment.start) >= segment.duration:
+                return start
+        return None
+    
+    def _repair_audio(self, output_path: str, report: QualityReport, work_dir: Path) -> List[QualityIssue]:
+        """Reencoda só o áudio do vídeo final; retorna os problemas corrigidos."""
+        clipping = [issue for issue in report.audio_issues if issue.kind == 'clipping']
+        quiet = [issue for issue in report.audio_issues if issue.kind == 'quiet']
+        gain_db = 0.0
+        if report.loudness_db is not None and report.loudness_db < self.target_loudness_db:
+            gain_db = min(self.target_loudness_db - report.loudness_db, 12.0)
+        elif clipping:
+            gain_db = -1.0
+        # Trechos em silêncio absoluto (pausas) não são corrigidos por ganho
+        fixed_quiet = [
+            issue for issue in quiet
+            if gain_db > 0 and issue.value + gain_db >= self.quality_monitor_thresholds.quiet_db
+        ]
+        if not clipping and not fixed_quiet:
+            return []
+        try:
+            fixed = work_dir / f"audio_fixed{Path(output_path).suffix}"
+            self.filtergraph_renderer.repair_audio(
+                output_path, str(fixed), gain_db=gain_db, limit=True, duration=report.duration
+            )
+            shutil.move(str(fixed), output_path)
+        except VideoProcessingError as e:
+            self.logger.warning(f"Falha ao reparar o áudio: {e}")
+            return []
+        self.logger.info(f"Áudio reparado sem reencodar o vídeo (ganho {gain_db:+.1f} dB, limitador)")
+        return clipping + fixed_quiet
+    
     def _calculate_quality_metrics(self, video_path: str, audio_path: str) -> QualityMetrics:
         """Calcula métricas de qualidade do vídeo"""
         try:
@@ -1077,7 +1890,8 @@ class FinalVideoComposer:
                 'bitrate': '4M',
                 'format': 'mp4',
                 'audio_codec': 'aac',
-                'video_codec': 'h264'
+                'video_codec': 'h264',
+                'loudness': -14.0
             },
             PlatformType.YOUTUBE_SHORTS: {
                 'resolution': (1080, 1920),
@@ -1086,7 +1900,8 @@ class FinalVideoComposer:
                 'bitrate': '8M',
                 'format': 'mp4',
                 'audio_codec': 'aac',
-                'video_codec': 'h264'
+                'video_codec': 'h264',
+                'loudness': -14.0
             },
             PlatformType.INSTAGRAM_REELS: {
                 'resolution': (1080, 1920),
@@ -1095,7 +1910,8 @@ class FinalVideoComposer:
                 'bitrate': '6M',
                 'format': 'mp4',
                 'audio_codec': 'aac',
-                'video_codec': 'h264'
+                'video_codec': 'h264',
+                'loudness': -14.0
             }
         }
         
@@ -1120,6 +1936,8 @@ class FinalVideoComposer:
             final_metadata = {
                 **metadata,
                 'quality_validated': quality_valid,
+                'quality_report': self.last_quality_report.to_dict() if self.last_quality_report else None,
+                'render_stats': self.last_render_stats,
                 'generated_at': datetime.now().isoformat(),
                 'composer_version': '1.0.0',
                 'platform_optimized': True
@@ -1140,7 +1958,8 @@ class FinalVideoComposer:
         template_config: TemplateConfig,
         captions: Optional[List[Dict[str, Any]]],
         output_path: str,
-        metadata: Dict
+        metadata: Dict,
+        render_backend: Optional[str] = None
     ) -> str:
         """Sistema de retry com melhorias automáticas"""
         try:
@@ -1156,7 +1975,8 @@ class FinalVideoComposer:
                 template_config=improved_template,
                 captions=captions,
                 output_path=output_path.replace('.mp4', '_retry.mp4'),
-                metadata={**(metadata or {}), 'retry_attempt': True}
+                metadata={**(metadata or {}), 'retry_attempt': True},
+                render_backend=render_backend
             )
             
         except Exception as e:
@@ -1250,13 +2070,34 @@ class FinalVideoComposer:
         target_size: Tuple[int, int],
         blur_sigma: int = 35
     ) -> VideoFileClip:
-        """Cria background desfocado a partir do próprio vídeo."""
-        resized = clip.resize(target_size).without_audio()
-
-        def _gaussian(frame):
-            return cv2.GaussianBlur(frame, (0, 0), blur_sigma)
+        """
+        Cria background desfocado a partir do próprio vídeo.
+        
+        O desfoque é calculado em baixa resolução (`background_blur.downscale`)
+        e ampliado; com `background_blur.fps` o fundo é atualizado numa taxa
+        menor. Se o clip vem de um arquivo, o fundo é gerado uma vez pelo
+        FFmpeg e reaproveitado do cache (loops, retries e novos renders).
+        """
+        spec = BackgroundSpec(
+            width=int(target_size[0]),
+            height=int(target_size[1]),
+            blur_sigma=blur_sigma,
+            downscale=self.background_downscale,
+            fps=self.background_fps,
+        )
+        source = getattr(clip, 'filename', None)
+        if self.background_cache is not None and source and os.path.exists(source):
+            try:
+                background = VideoFileClip(self.background_cache.get(source, spec)).without_audio()
+                if background.duration < clip.duration:
+                    background = background.fx(vfx.loop, duration=clip.duration)
+                else:
+                    background = background.subclip(0, clip.duration)
+                return background.resize(target_size)
+            except Exception as cache_error:
+                self.logger.debug(f"Fundo em cache indisponível para {source}: {cache_error}")
 
-        return resized.fl_image(_gaussian)
+        return clip.without_audio().fl(LowResBlur(spec, max_frames=self.background_frame_cache))
 
     def _create_caption_clip(
         self,
@@ -1266,50 +2107,49 @@ class FinalVideoComposer:
         style: Dict[str, Any]
     ) -> Optional[ImageClip]:
         """Cria clip de legenda com fundo arredondado."""
+        rendered = self._render_caption_image(text, video_size, style)
+        if rendered is None:
+            return None
+        image, y_pos = rendered
+        caption_clip = ImageClip(np.array(image)).set_duration(duration)
+        return caption_clip.set_position(("center", y_pos))
+
+    def _render_caption_image(
+        self,
+        text: str,
+        video_size: Tuple[int, int],
+        style: Dict[str, Any]
+    ) -> Optional[Tuple[Image.Image, int]]:
+        """Desenha o painel da legenda (RGBA) e retorna-o com a posição vertical."""
         try:
             font_path = self._resolve_font_path(style.get('font_path'))
-            font_size = int(style.get('font_size', 54))
-            line_spacing = int(style.get('line_spacing', 12))
-            max_width_ratio = float(style.get('max_width_ratio', 0.9))
-            padding_x = int(style.get('padding_horizontal', 48))
-            padding_y = int(style.get('padding_vertical', 32))
             background_opacity = float(style.get('background_opacity', 0.85))
             text_color = style.get('font_color', '#FFFFFF')
             stroke_color = style.get('stroke_color', '#000000')
-            stroke_width = int(style.get('stroke_width', 2))
+            stroke_width = int(style.get('stroke_width', CAPTION_STYLE_DEFAULTS['stroke_width']))
 
-            font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default()
-
-            max_text_width = int(video_size[0] * max_width_ratio) - (padding_x * 2)
-            lines = self._wrap_caption_text(text, font, max_text_width)
-            if not lines:
+            # Mesmo layout das legendas em ASS (quebra, painel e posição)
+            layout = layout_caption(text, video_size, style, font_path)
+            if layout is None:
                 return None
-
-            ascent, descent = font.getmetrics() if hasattr(font, "getmetrics") else (font_size, int(font_size * 0.2))
-            line_height = ascent + descent
-            text_height = len(lines) * line_height + (len(lines) - 1) * line_spacing
-            panel_width = min(
-                int(video_size[0] * max_width_ratio),
-                max(self._measure_text(font, line)[0] + padding_x * 2 for line in lines)
-            )
-            panel_height = text_height + padding_y * 2
+            font = load_font(font_path, int(style.get('font_size', CAPTION_STYLE_DEFAULTS['font_size'])))
 
             bg_color_rgb = self._parse_hex_color(style.get('background_color', '#101010'))
             alpha = int(255 * background_opacity)
             background_rgba = (*bg_color_rgb, alpha)
 
-            image = Image.new("RGBA", (panel_width, panel_height), (0, 0, 0, 0))
+            image = Image.new("RGBA", (layout.panel_width, layout.panel_height), (0, 0, 0, 0))
             draw = ImageDraw.Draw(image)
             draw.rounded_rectangle(
-                [(0, 0), (panel_width, panel_height)],
+                [(0, 0), (layout.panel_width, layout.panel_height)],
                 radius=24,
                 fill=background_rgba
             )
 
-            current_y = padding_y
-            for line in lines:
+            current_y = layout.padding_y
+            for line in layout.lines:
                 line_width, _ = self._measure_text(font, line)
-                x = (panel_width - line_width) // 2
+                x = (layout.panel_width - line_width) // 2
                 draw.text(
                     (x, current_y),
                     line,
@@ -1318,22 +2158,9 @@ class FinalVideoComposer:
                     stroke_width=stroke_width,
                     stroke_fill=stroke_color if stroke_width > 0 else None
                 )
-                current_y += line_height + line_spacing
+                current_y += layout.line_height + layout.line_spacing
 
-            np_image = np.array(image)
-            caption_clip = ImageClip(np_image).set_duration(duration)
-
-            baseline = style.get('baseline', 'bottom')
-            vertical_margin_ratio = float(style.get('vertical_margin_ratio', 0.075))
-            if baseline == 'top':
-                y_pos = int(video_size[1] * vertical_margin_ratio)
-            elif baseline == 'center':
-                y_pos = (video_size[1] - panel_height) // 2
-            else:
-                y_pos = video_size[1] - panel_height - int(video_size[1] * vertical_margin_ratio)
-
-            caption_clip = caption_clip.set_position(("center", y_pos))
-            return caption_clip
+            return image, layout.panel_y
 
         except Exception as e:
             self.logger.error(f"Erro ao criar legenda: {e}")
@@ -1357,36 +2184,11 @@ class FinalVideoComposer:
 
     def _wrap_caption_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
         """Quebra o texto para caber na largura disponível."""
-        if not text:
-            return []
-        words = text.split()
-        lines: List[str] = []
-        current_line: List[str] = []
-
-        for word in words:
-            test_line = " ".join(current_line + [word]).strip()
-            line_width, _ = self._measure_text(font, test_line)
-            if line_width <= max_width or not current_line:
-                current_line.append(word)
-            else:
-                lines.append(" ".join(current_line))
-                current_line = [word]
-
-        if current_line:
-            lines.append(" ".join(current_line))
-
-        return lines
+        return wrap_text(text, font, max_width)
 
     def _measure_text(self, font: ImageFont.ImageFont, text: str) -> Tuple[int, int]:
         """Calcula largura e altura de um texto usando o font informado."""
-        if hasattr(font, "getbbox"):
-            bbox = font.getbbox(text)
-            return bbox[2] - bbox[0], bbox[3] - bbox[1]
-
-        dummy_image = Image.new("RGB", (10, 10))
-        draw = ImageDraw.Draw(dummy_image)
-        bbox = draw.textbbox((0, 0), text, font=font)
-        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+        return measure_text(font, text)
     
     def _create_professional_text_clip(
         self,
@@ -0,0 +1,7 @@
+"""
+Biblioteca local de assets de vídeo (B-roll) com cache persistente em disco.
+"""
+
+from .asset_library import AssetEntry, BrollAssetLibrary, DEFAULT_FORMAT_KEY
+
+__all__ = ["AssetEntry", "BrollAssetLibrary", "DEFAULT_FORMAT_KEY"]
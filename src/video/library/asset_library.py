@@ -0,0 +1,582 @@
+# -*- coding: utf-8 -*-
+"""
+Biblioteca local de assets de B-roll.
+
+Armazena vídeos baixados indexados por ID do YouTube e formato, junto com
+metadados de probe, thumbnail e as queries que os originaram. Opcionalmente
+guarda também uma cópia em formato intermediário de edição (mezzanine),
+gerada uma única vez na entrada do clip. Escritas são atômicas e a
+biblioteca é segura para múltiplos workers via file lock.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+DEFAULT_FORMAT_KEY = "default"
+
+
+@dataclass
+class AssetEntry:
+    """Asset armazenado na biblioteca."""
+    video_id: str
+    format_key: str
+    path: str
+    size_bytes: int
+    sha256: str
+    created_at: float
+    last_access: float
+    queries: List[str] = field(default_factory=list)
+    probe: Dict[str, Any] = field(default_factory=dict)
+    thumbnail_path: Optional[str] = None
+    source_url: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+    categories: List[str] = field(default_factory=list)
+    mezzanine_path: Optional[str] = None
+    mezzanine_size_bytes: int = 0
+    # Donos (ex.: run do pipeline) que estão usando o asset -> expiração do pin (epoch);
+    # não é removido enquanto houver algum pin válido
+    pinned_by: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def media_path(self) -> str:
+        """Arquivo para composição e análise: o mezzanine, se existir, senão o original."""
+        if self.mezzanine_path and Path(self.mezzanine_path).exists():
+            return self.mezzanine_path
+        return self.path
+
+    @property
+    def total_bytes(self) -> int:
+        """Espaço em disco ocupado pelo asset (original + mezzanine)."""
+        return self.size_bytes + self.mezzanine_size_bytes
+
+    def is_pinned(self, now: Optional[float] = None) -> bool:
+        """Indica se algum dono ainda tem um pin válido (pins vencidos são ignorados)."""
+        now = time.time() if now is None else now
+        return any(expires_at > now for expires_at in self.pinned_by.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AssetEntry":
+        """Cria a partir de dicionário."""
+        known = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        if isinstance(known.get("pinned_by"), list):
+            # Formato antigo, sem prazo: os pins são tratados como vencidos
+            known["pinned_by"] = {owner: 0.0 for owner in known["pinned_by"]}
+        return cls(**known)
+
+
+class BrollAssetLibrary:
+    """
+    Biblioteca persistente de B-roll com orçamento de disco LRU.
+
+    Layout em disco:
+        <root>/assets/<video_id>/<format_hash>/media.<ext>
+        <root>/assets/<video_id>/<format_hash>/mezzanine.mp4   (opcional)
+        <root>/assets/<video_id>/<format_hash>/thumbnail.jpg
+        <root>/assets/<video_id>/<format_hash>/meta.json
+    """
+
+    META_FILE = "meta.json"
+    MEZZANINE_FILE = "mezzanine.mp4"
+
+    def __init__(
+        self,
+        root_dir: str = "data/broll",
+        max_size_bytes: Optional[int] = 20 * 1024 ** 3,
+        max_age_days: Optional[float] = None,
+        eviction_grace_seconds: float = 600.0,
+        pin_ttl_seconds: float = 6 * 3600,
+        probe_func: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+        mezzanine_func: Optional[Callable[[str, str], Any]] = None,
+    ):
+        """
+        Inicializa a biblioteca.
+
+        Args:
+            root_dir: Diretório raiz da biblioteca
+            max_size_bytes: Orçamento total de disco (None = ilimitado)
+            max_age_days: Idade máxima desde o último acesso (None = ilimitado)
+            eviction_grace_seconds: Assets acessados há menos que isso não são
+                removidos pelo orçamento (podem estar em uso por outro processo)
+            pin_ttl_seconds: Validade de um pin; um dono que morreu sem liberar
+                seus assets não os prende para sempre
+            probe_func: Função opcional que retorna metadados de um arquivo de vídeo
+            mezzanine_func: Função opcional `(origem, destino)` que grava em
+                `destino` a versão intermediária de edição do vídeo
+        """
+        self.root_dir = Path(root_dir)
+        self.assets_dir = self.root_dir / "assets"
+        self.tmp_dir = self.root_dir / "tmp"
+        self.lock_path = self.root_dir / ".lock"
+        self.max_size_bytes = max_size_bytes
+        self.max_age_days = max_age_days
+        self.eviction_grace_seconds = eviction_grace_seconds
+        self.pin_ttl_seconds = pin_ttl_seconds
+        self.probe_func = probe_func
+        self.mezzanine_func = mezzanine_func
+
+        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        self._hits = 0
+        self._misses = 0
+
+        logger.info(f"BrollAssetLibrary inicializada em {self.root_dir}")
+
+    # ------------------------------------------------------------------ #
+    # Consulta
+    # ------------------------------------------------------------------ #
+    def lookup(self, video_id: str, format_key: str = DEFAULT_FORMAT_KEY) -> Optional[AssetEntry]:
+        """
+        Procura um asset pelo ID do vídeo e formato.
+
+        Args:
+            video_id: ID do vídeo no YouTube
+            format_key: Identificador do formato baixado
+
+        Returns:
+            Entrada do asset ou None se não estiver na biblioteca
+        """
+        entry_dir = self._entry_dir(video_id, format_key)
+        entry = self._read_meta(entry_dir)
+
+        if entry is None or not Path(entry.path).exists() or Path(entry.path).stat().st_size != entry.size_bytes:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        return self._touch(entry_dir, entry)
+
+    def find_by_query(self, query: str, format_key: Optional[str] = None, limit: Optional[int] = None) -> List[AssetEntry]:
+        """
+        Retorna assets originados pela query informada, mais recentes primeiro.
+
+        Args:
+            query: Query de busca (comparação normalizada)
+            format_key: Filtra por formato (opcional)
+            limit: Máximo de resultados
+        """
+        normalized = self._normalize_query(query)
+        matches = [
+            entry for entry in self.list_entries()
+            if normalized in {self._normalize_query(q) for q in entry.queries}
+            and (format_key is None or entry.format_key == format_key)
+            and Path(entry.path).exists()
+        ]
+        matches.sort(key=lambda entry: entry.last_access, reverse=True)
+        return matches[:limit] if limit else matches
+
+    def find_by_category(
+        self,
+        category: str,
+        format_key: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[AssetEntry]:
+        """
+        Retorna assets do estoque de uma categoria de tema, mais recentes primeiro.
+
+        Args:
+            category: Categoria (ex.: valor de `ThemeCategory`)
+            format_key: Filtra por formato (opcional)
+            limit: Máximo de resultados
+        """
+        matches = [
+            entry for entry in self.list_entries()
+            if category in entry.categories
+            and (format_key is None or entry.format_key == format_key)
+            and Path(entry.path).exists()
+        ]
+        matches.sort(key=lambda entry: entry.last_access, reverse=True)
+        return matches[:limit] if limit else matches
+
+    def list_entries(self) -> List[AssetEntry]:
+        """Lista todos os assets da biblioteca."""
+        entries = []
+        for meta_path in self.assets_dir.glob(f"*/*/{self.META_FILE}"):
+            entry = self._read_meta(meta_path.parent)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    # ------------------------------------------------------------------ #
+    # Escrita
+    # ------------------------------------------------------------------ #
+    def put(
+        self,
+        video_id: str,
+        source_path: str,
+        *,
+        format_key: str = DEFAULT_FORMAT_KEY,
+        queries: Optional[List[str]] = None,
+        probe: Optional[Dict[str, Any]] = None,
+        thumbnail_path: Optional[str] = None,
+        source_url: Optional[str] = None,
+        move: bool = False,
+        extra: Optional[Dict[str, Any]] = None,
+        categories: Optional[List[str]] = None,
+    ) -> AssetEntry:
+        """
+        Adiciona (ou substitui) um asset na biblioteca.
+
+        O arquivo é copiado para um diretório temporário da própria biblioteca
+        e então movido com `os.replace`, de modo que leitores nunca vejam um
+        arquivo parcial.
+
+        Args:
+            video_id: ID do vídeo no YouTube
+            source_path: Arquivo de vídeo baixado
+            format_key: Identificador do formato baixado
+            queries: Queries que originaram o asset
+            probe: Metadados do vídeo (se None, usa `probe_func`)
+            thumbnail_path: Thumbnail local (se None, extrai um frame)
+            source_url: URL de origem
+            move: Move o arquivo em vez de copiar
+            extra: Metadados adicionais
+            categories: Categorias de tema do estoque a que o asset pertence
+
+        Returns:
+            Entrada criada
+        """
+        source = Path(source_path)
+        if not source.exists():
+            raise FileNotFoundError(f"Arquivo de origem não encontrado: {source_path}")
+
+        entry_dir = self._entry_dir(video_id, format_key)
+        media_name = f"media{source.suffix or '.mp4'}"
+
+        # Prepara arquivos fora do lock
+        staged_media = self._stage_file(source, move=move)
+        sha256 = self._file_sha256(staged_media)
+
+        if probe is None and self.probe_func is not None:
+            try:
+                probe = self.probe_func(str(staged_media)) or {}
+            except Exception as e:
+                logger.warning(f"Falha no probe de {source_path}: {e}")
+                probe = {}
+
+        staged_mezzanine = self._build_mezzanine(staged_media, source_path)
+
+        staged_thumb = None
+        if thumbnail_path and Path(thumbnail_path).exists():
+            staged_thumb = self._stage_file(Path(thumbnail_path), move=False)
+        else:
+            staged_thumb = self._extract_thumbnail(staged_mezzanine or staged_media)
+
+        with self._locked():
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            previous = self._read_meta(entry_dir)
+
+            media_path = entry_dir / media_name
+            os.replace(staged_media, media_path)
+
+            # Um mezzanine antigo não corresponde mais ao arquivo substituído
+            mezzanine_path = entry_dir / self.MEZZANINE_FILE
+            if staged_mezzanine is not None:
+                os.replace(staged_mezzanine, mezzanine_path)
+            elif mezzanine_path.exists():
+                mezzanine_path.unlink()
+
+            final_thumb = None
+            if staged_thumb is not None:
+                final_thumb = entry_dir / "thumbnail.jpg"
+                os.replace(staged_thumb, final_thumb)
+
+            merged_queries = list(previous.queries) if previous else []
+            for query in queries or []:
+                if query and query not in merged_queries:
+                    merged_queries.append(query)
+
+            merged_categories = list(previous.categories) if previous else []
+            for category in categories or []:
+                if category and category not in merged_categories:
+                    merged_categories.append(category)
+
+            now = time.time()
+            entry = AssetEntry(
+                video_id=video_id,
+                format_key=format_key,
+                path=str(media_path),
+                size_bytes=media_path.stat().st_size,
+                sha256=sha256,
+                created_at=previous.created_at if previous else now,
+                last_access=now,
+                queries=merged_queries,
+                probe=probe or (previous.probe if previous else {}),
+                thumbnail_path=str(final_thumb) if final_thumb else None,
+                source_url=source_url,
+                extra=extra or {},
+                categories=merged_categories,
+                mezzanine_path=str(mezzanine_path) if staged_mezzanine is not None else None,
+                mezzanine_size_bytes=mezzanine_path.stat().st_size if staged_mezzanine is not None else 0,
+                pinned_by=dict(previous.pinned_by) if previous else {},
+            )
+            self._write_meta(entry_dir, entry)
+            self._enforce_budget_locked()
+
+        logger.info(
+            f"Asset adicionado à biblioteca: {video_id} ({format_key}) - {entry.size_bytes} bytes"
+            + (f" + mezzanine {entry.mezzanine_size_bytes} bytes" if entry.mezzanine_path else "")
+        )
+        return entry
+
+    def add_queries(
+        self,
+        video_id: str,
+        queries: List[str],
+        format_key: str = DEFAULT_FORMAT_KEY,
+        categories: Optional[List[str]] = None,
+    ) -> Optional[AssetEntry]:
+        """Associa novas queries (e categorias de tema) a um asset existente."""
+        entry_dir = self._entry_dir(video_id, format_key)
+        with self._locked():
+            entry = self._read_meta(entry_dir)
+            if entry is None:
+                return None
+            for query in queries:
+                if query and query not in entry.queries:
+                    entry.queries.append(query)
+            for category in categories or []:
+                if category and category not in entry.categories:
+                    entry.categories.append(category)
+            self._write_meta(entry_dir, entry)
+        return entry
+
+    def pin(
+        self,
+        video_id: str,
+        owner: str,
+        format_key: str = DEFAULT_FORMAT_KEY,
+        ttl_seconds: Optional[float] = None,
+    ) -> bool:
+        """
+        Protege um asset da remoção pelo orçamento enquanto `owner` o usa.
+
+        O pin vence após `ttl_seconds` (padrão: `pin_ttl_seconds`); fixar de
+        novo renova o prazo.
+        """
+        expires_at = time.time() + (self.pin_ttl_seconds if ttl_seconds is None else ttl_seconds)
+        return self._update_pins(video_id, format_key, lambda pins: {**pins, owner: expires_at})
+
+    def unpin(self, video_id: str, owner: str, format_key: str = DEFAULT_FORMAT_KEY) -> bool:
+        """Libera a proteção de `owner` sobre um asset."""
+        return self._update_pins(
+            video_id, format_key, lambda pins: {pin: expires for pin, expires in pins.items() if pin != owner}
+        )
+
+    def is_evictable(self, entry: AssetEntry, now: Optional[float] = None) -> bool:
+        """Indica se o asset pode ser removido: sem pins válidos e sem acesso recente."""
+        now = time.time() if now is None else now
+        if entry.is_pinned(now):
+            return False
+        return now - entry.last_access >= self.eviction_grace_seconds
+
+    def remove(self, video_id: str, format_key: str = DEFAULT_FORMAT_KEY) -> bool:
+        """Remove um asset da biblioteca."""
+        entry_dir = self._entry_dir(video_id, format_key)
+        with self._locked():
+            return self._remove_dir(entry_dir)
+
+    def enforce_budget(self) -> List[AssetEntry]:
+        """Aplica os limites de tamanho e idade, removendo os assets menos usados."""
+        with self._locked():
+            return self._enforce_budget_locked()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas da biblioteca."""
+        entries = self.list_entries()
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(entries),
+            "total_bytes": sum(entry.total_bytes for entry in entries),
+            "mezzanine_bytes": sum(entry.mezzanine_size_bytes for entry in entries),
+            "max_size_bytes": self.max_size_bytes,
+            "max_age_days": self.max_age_days,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # Internos
+    # ------------------------------------------------------------------ #
+    def _enforce_budget_locked(self) -> List[AssetEntry]:
+        entries = sorted(self.list_entries(), key=lambda entry: entry.last_access)
+        evicted: List[AssetEntry] = []
+        now = time.time()
+
+        if self.max_age_days is not None:
+            cutoff = now - self.max_age_days * 86400
+            for entry in list(entries):
+                if entry.last_access < cutoff and not entry.is_pinned(now):
+                    self._remove_dir(Path(entry.path).parent)
+                    entries.remove(entry)
+                    evicted.append(entry)
+
+        if self.max_size_bytes is not None:
+            total = sum(entry.total_bytes for entry in entries)
+            # Nunca remove o asset mais recente (acabou de ser adicionado/usado)
+            # nem os em uso: fixados por algum dono ou acessados há pouco
+            candidates = [entry for entry in entries[:-1] if self.is_evictable(entry, now)]
+            while total > self.max_size_bytes and candidates:
+                entry = candidates.pop(0)
+                self._remove_dir(Path(entry.path).parent)
+                total -= entry.total_bytes
+                evicted.append(entry)
+
+        if evicted:
+            logger.info(f"Biblioteca de B-roll: {len(evicted)} assets removidos pelo orçamento de disco")
+        return evicted
+
+    def _entry_dir(self, video_id: str, format_key: str) -> Path:
+        safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in video_id)
+        format_hash = hashlib.sha1(format_key.encode("utf-8")).hexdigest()[:12]
+        return self.assets_dir / safe_id / format_hash
+
+    def _read_meta(self, entry_dir: Path) -> Optional[AssetEntry]:
+        meta_path = entry_dir / self.META_FILE
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return AssetEntry.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.warning(f"Metadados corrompidos em {meta_path}: {e}")
+            return None
+
+    def _write_meta(self, entry_dir: Path, entry: AssetEntry) -> None:
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.json"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, entry_dir / self.META_FILE)
+
+    def _touch(self, entry_dir: Path, entry: AssetEntry) -> AssetEntry:
+        """Atualiza só o último acesso, relendo os metadados sob o lock."""
+        entry.last_access = time.time()
+        try:
+            with self._locked():
+                # A leitura de `lookup` foi feita fora do lock: uma escrita
+                # concorrente (ex.: `add_queries`) não pode ser sobrescrita
+                current = self._read_meta(entry_dir)
+                if current is None:
+                    return entry
+                current.last_access = entry.last_access
+                self._write_meta(entry_dir, current)
+                return current
+        except OSError as e:
+            logger.debug(f"Não foi possível atualizar último acesso de {entry.video_id}: {e}")
+            return entry
+
+    def _update_pins(
+        self, video_id: str, format_key: str, update: Callable[[Dict[str, float]], Dict[str, float]]
+    ) -> bool:
+        entry_dir = self._entry_dir(video_id, format_key)
+        with self._locked():
+            entry = self._read_meta(entry_dir)
+            if entry is None:
+                return False
+            now = time.time()
+            # Pins vencidos (dono encerrado sem liberar) são descartados na escrita
+            entry.pinned_by = {
+                owner: expires for owner, expires in update(dict(entry.pinned_by)).items() if expires > now
+            }
+            self._write_meta(entry_dir, entry)
+        return True
+
+    def _stage_file(self, source: Path, move: bool) -> Path:
+        staged = self.tmp_dir / f"{uuid.uuid4().hex}{source.suffix}"
+        if move:
+            shutil.move(str(source), str(staged))
+        else:
+            shutil.copy2(source, staged)
+        return staged
+
+    def _build_mezzanine(self, staged_media: Path, source_path: str) -> Optional[Path]:
+        """Gera o mezzanine do arquivo preparado; falhas mantêm só o original."""
+        if self.mezzanine_func is None:
+            return None
+        staged = self.tmp_dir / f"{uuid.uuid4().hex}.mp4"
+        try:
+            self.mezzanine_func(str(staged_media), str(staged))
+        except Exception as e:
+            logger.warning(f"Falha ao gerar mezzanine de {source_path}: {e}")
+            staged.unlink(missing_ok=True)
+            return None
+        if not staged.exists() or staged.stat().st_size == 0:
+            staged.unlink(missing_ok=True)
+            return None
+        return staged
+
+    def _extract_thumbnail(self, media_path: Path) -> Optional[Path]:
+        try:
+            import cv2
+        except ImportError:
+            return None
+
+        capture = cv2.VideoCapture(str(media_path))
+        try:
+            frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            if frame_count > 0:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, frame_count // 2)
+            ok, frame = capture.read()
+            if not ok:
+                return None
+            thumb_path = self.tmp_dir / f"{uuid.uuid4().hex}.jpg"
+            cv2.imwrite(str(thumb_path), frame)
+            return thumb_path
+        finally:
+            capture.release()
+
+    def _remove_dir(self, entry_dir: Path) -> bool:
+        if not entry_dir.exists():
+            return False
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            entry_dir.parent.rmdir()  # Remove diretório do vídeo se vazio
+        except OSError:
+            pass
+        return True
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Lock exclusivo entre processos sobre a biblioteca."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a+") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _file_sha256(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
@@ -5,9 +5,13 @@ Implementa análise semântica e busca inteligente de conteúdo.
 
 from .semantic_analyzer import SemanticAnalyzer
 from .video_searcher import VideoSearcher, VideoInfo
+from .thumbnail_prescreener import ThumbnailPrescreener, ThumbnailCache, ThumbnailAssessment
 
 __all__ = [
     'SemanticAnalyzer',
     'VideoSearcher', 
-    'VideoInfo'
+    'VideoInfo',
+    'ThumbnailPrescreener',
+    'ThumbnailCache',
+    'ThumbnailAssessment'
 ]
\ No newline at end of file
@@ -162,6 +162,39 @@ class CLIPRelevanceScorer:
             self.logger.error(f"Erro ao calcular relevância: {e}")
             return 0.0
     
+    def score_text_image_relevance(self, text: str, image_path: str) -> Optional[float]:
+        """
+        Calcula a similaridade CLIP entre texto e uma imagem (ex.: thumbnail).
+
+        Args:
+            text: Texto de referência
+            image_path: Caminho da imagem
+
+        Returns:
+            Similaridade de cosseno (0.0 a 1.0) ou None se CLIP não estiver disponível
+        """
+        if self.model is None or not text or not image_path:
+            return None
+
+        text_embedding = self.get_text_embedding(text)
+        if text_embedding is None:
+            return None
+
+        try:
+            image = Image.open(image_path).convert("RGB")
+            inputs = self.processor(images=[image], return_tensors="pt").to(self.device)
+
+            with torch.no_grad():
+                image_features = self.model.get_image_features(**inputs)
+                embedding = image_features.cpu().numpy()[0]
+                embedding = embedding / np.linalg.norm(embedding)
+
+            return float(max(0.0, min(1.0, np.dot(text_embedding, embedding))))
+
+        except Exception as e:
+            self.logger.error(f"Erro no scoring CLIP da imagem {image_path}: {e}")
+            return None
+
     def _score_with_clip(self, text: str, video_path: str) -> float:
         """Calcula score usando modelo CLIP."""
         try:
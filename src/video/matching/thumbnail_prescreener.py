@@ -0,0 +1,368 @@
+"""
+Thumbnail Prescreener - AiShorts v2.0
+Triagem de candidatos a B-roll pelas thumbnails, antes de qualquer download
+
+Avalia apenas a thumbnail de cada resultado de busca para:
+- Medir relevância em relação à query/roteiro (CLIP quando disponível)
+- Detectar letterbox (faixas pretas de cinema) e janelas pequenas
+- Detectar thumbnails dominadas por texto sobreposto
+- Eliminar duplicatas visuais (difference hash)
+
+As thumbnails ficam em cache local em disco, o que permite reprocessar
+(e testar) a triagem sem acesso à rede.
+"""
+
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+YOUTUBE_THUMBNAIL_URL = "https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+
+@dataclass
+class ThumbnailAssessment:
+    """Resultado da triagem de uma thumbnail."""
+    video_id: str
+    thumbnail_path: Optional[str] = None
+    relevance: Optional[float] = None
+    content_aspect: Optional[float] = None
+    content_fraction: Optional[float] = None
+    text_ratio: Optional[float] = None
+    dhash: Optional[int] = None
+    duplicate_of: Optional[str] = None
+    accepted: bool = True
+    reasons: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário (relatórios)."""
+        return {
+            "video_id": self.video_id,
+            "relevance": None if self.relevance is None else round(self.relevance, 3),
+            "content_aspect": None if self.content_aspect is None else round(self.content_aspect, 2),
+            "content_fraction": None if self.content_fraction is None else round(self.content_fraction, 2),
+            "text_ratio": None if self.text_ratio is None else round(self.text_ratio, 3),
+            "duplicate_of": self.duplicate_of,
+            "accepted": self.accepted,
+            "reasons": list(self.reasons),
+        }
+
+
+class ThumbnailCache:
+    """Cache de thumbnails em disco, indexado pelo ID do vídeo."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        fetcher: Optional[Callable[[str], bytes]] = None,
+        timeout: float = 5.0,
+        scheduler=None,
+    ):
+        """
+        Args:
+            cache_dir: Diretório do cache (padrão: data/cache/thumbnails)
+            fetcher: Função que baixa a URL e retorna os bytes (padrão: requests)
+            timeout: Timeout (s) do download padrão
+            scheduler: DownloadScheduler opcional usado pelo download padrão
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else Path("data/cache/thumbnails")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self._fetcher = fetcher or self._http_fetch
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, video_id: str) -> Path:
+        """Caminho da thumbnail em cache."""
+        safe_id = re.sub(r"[^\w-]", "_", video_id)
+        return self.cache_dir / f"{safe_id}.jpg"
+
+    def get(self, video_id: str, url: Optional[str] = None) -> Optional[str]:
+        """
+        Retorna a thumbnail local, baixando-a se necessário.
+
+        Args:
+            video_id: ID do vídeo
+            url: URL da thumbnail (padrão: hqdefault do YouTube)
+
+        Returns:
+            Caminho do arquivo ou None se não foi possível obtê-lo
+        """
+        path = self.path_for(video_id)
+        if path.exists() and path.stat().st_size > 0:
+            self.hits += 1
+            return str(path)
+
+        self.misses += 1
+        try:
+            data = self._fetcher(url or YOUTUBE_THUMBNAIL_URL.format(video_id=video_id))
+        except Exception as e:
+            logger.warning(f"Falha ao baixar thumbnail de {video_id}: {e}")
+            return None
+        if not data:
+            return None
+
+        # Escrita atômica: outro processo pode estar lendo o mesmo cache
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return str(path)
+
+    def _http_fetch(self, url: str) -> bytes:
+        if self.scheduler is not None:
+            return self.scheduler.fetch(url, owner="thumbnails", timeout=self.timeout)
+
+        import requests
+
+        response = requests.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+
+class ThumbnailPrescreener:
+    """
+    Triagem de candidatos a B-roll pelas thumbnails.
+
+    Candidatos com letterbox de cinema, texto dominante ou duplicados de um
+    candidato melhor ranqueado são rejeitados; os demais recebem um score
+    de relevância usado para reordenar a lista.
+    """
+
+    def __init__(
+        self,
+        thumbnail_cache: Optional[ThumbnailCache] = None,
+        clip_scorer=None,
+        min_relevance: float = 0.18,
+        max_content_aspect: float = 2.0,
+        min_content_fraction: float = 0.15,
+        max_text_ratio: float = 0.12,
+        duplicate_distance: int = 6,
+        max_workers: int = 8,
+    ):
+        """
+        Args:
+            thumbnail_cache: Cache de thumbnails (padrão: ThumbnailCache())
+            clip_scorer: CLIPRelevanceScorer opcional para relevância texto-imagem;
+                sem ele, a relevância usa sobreposição de palavras com o título
+            min_relevance: Relevância CLIP mínima para aceitar o candidato
+            max_content_aspect: Proporção máxima da área útil (acima disso é letterbox de cinema)
+            min_content_fraction: Fração mínima da thumbnail ocupada por conteúdo
+            max_text_ratio: Fração máxima da área útil coberta por texto
+            duplicate_distance: Distância de Hamming máxima entre hashes duplicados
+            max_workers: Downloads de thumbnails simultâneos
+        """
+        self.thumbnail_cache = thumbnail_cache or ThumbnailCache()
+        self.clip_scorer = clip_scorer
+        self.min_relevance = min_relevance
+        self.max_content_aspect = max_content_aspect
+        self.min_content_fraction = min_content_fraction
+        self.max_text_ratio = max_text_ratio
+        self.duplicate_distance = duplicate_distance
+        self.max_workers = max(1, max_workers)
+
+    def screen(self, videos: List[Dict[str, Any]], text: str = "") -> List[ThumbnailAssessment]:
+        """
+        Avalia uma lista de resultados de busca (em ordem de ranking).
+
+        Args:
+            videos: Dicionários com `id`, `title` e opcionalmente `thumbnail` e
+                `text` (texto de referência próprio do vídeo, ex.: suas queries)
+            text: Texto de referência padrão (query ou trecho do roteiro)
+
+        Returns:
+            Avaliações na mesma ordem da entrada
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            paths = list(executor.map(
+                lambda video: self.thumbnail_cache.get(video["id"], video.get("thumbnail")),
+                videos,
+            ))
+
+        assessments = []
+        accepted_hashes: List[Tuple[str, int]] = []
+        for video, path in zip(videos, paths):
+            assessment = self.assess(
+                video["id"], path, video.get("text") or text, title=video.get("title") or ""
+            )
+
+            if assessment.accepted and assessment.dhash is not None:
+                for other_id, other_hash in accepted_hashes:
+                    if self.hamming_distance(assessment.dhash, other_hash) <= self.duplicate_distance:
+                        assessment.accepted = False
+                        assessment.duplicate_of = other_id
+                        assessment.reasons.append(f"duplicata de {other_id}")
+                        break
+                else:
+                    accepted_hashes.append((video["id"], assessment.dhash))
+
+            assessments.append(assessment)
+
+        rejected = sum(1 for a in assessments if not a.accepted)
+        logger.info(f"Triagem de thumbnails: {len(assessments) - rejected} aceitas, {rejected} rejeitadas")
+        return assessments
+
+    def assess(
+        self,
+        video_id: str,
+        thumbnail_path: Optional[str],
+        text: str,
+        title: str = "",
+    ) -> ThumbnailAssessment:
+        """
+        Avalia uma thumbnail isolada (sem verificação de duplicatas).
+
+        Thumbnails ausentes ou ilegíveis não rejeitam o candidato: a triagem
+        é apenas uma economia, não um requisito.
+        """
+        assessment = ThumbnailAssessment(video_id=video_id, thumbnail_path=thumbnail_path)
+        image = cv2.imread(thumbnail_path) if thumbnail_path else None
+        if image is None:
+            assessment.reasons.append("thumbnail indisponível")
+            assessment.relevance = self._title_relevance(text, title)
+            return assessment
+
+        top, bottom, left, right = self.content_box(image)
+        content = image[top:bottom, left:right]
+        height, width = image.shape[:2]
+        assessment.content_aspect = (right - left) / max(1, bottom - top)
+        assessment.content_fraction = ((right - left) * (bottom - top)) / float(width * height)
+        assessment.text_ratio = self.text_ratio(content)
+        assessment.dhash = self.dhash(content)
+
+        if assessment.content_aspect > self.max_content_aspect:
+            assessment.accepted = False
+            assessment.reasons.append(f"letterbox (proporção útil {assessment.content_aspect:.2f})")
+        if assessment.content_fraction < self.min_content_fraction:
+            assessment.accepted = False
+            assessment.reasons.append(f"conteúdo ocupa {assessment.content_fraction:.0%} da imagem")
+        if assessment.text_ratio > self.max_text_ratio:
+            assessment.accepted = False
+            assessment.reasons.append(f"texto dominante ({assessment.text_ratio:.0%} da área)")
+
+        clip_relevance = self._clip_relevance(text, thumbnail_path)
+        if clip_relevance is not None:
+            assessment.relevance = clip_relevance
+            if clip_relevance < self.min_relevance:
+                assessment.accepted = False
+                assessment.reasons.append(f"baixa relevância ({clip_relevance:.2f})")
+        else:
+            assessment.relevance = self._title_relevance(text, title)
+
+        return assessment
+
+    # ------------------------------------------------------------------ #
+    # Heurísticas de imagem
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def content_box(image: np.ndarray, dark_threshold: int = 24) -> Tuple[int, int, int, int]:
+        """
+        Localiza a área útil da imagem, descartando faixas pretas uniformes.
+
+        Returns:
+            Tupla (top, bottom, left, right) em pixels
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        row_dark = (gray.mean(axis=1) < dark_threshold) & (gray.std(axis=1) < 10)
+        col_dark = (gray.mean(axis=0) < dark_threshold) & (gray.std(axis=0) < 10)
+
+        def _span(mask: np.ndarray) -> Tuple[int, int]:
+            content = np.flatnonzero(~mask)
+            if content.size == 0:
+                return 0, mask.size
+            return int(content[0]), int(content[-1]) + 1
+
+        top, bottom = _span(row_dark)
+        left, right = _span(col_dark)
+        return top, bottom, left, right
+
+    @staticmethod
+    def text_ratio(image: np.ndarray) -> float:
+        """
+        Estima a fração da imagem coberta por texto sobreposto.
+
+        Texto gera componentes de borda pequenos e de altura parecida que,
+        unidos horizontalmente, formam linhas largas e baixas. Bordas de
+        objetos (contornos longos, curvas) não passam no filtro de caractere.
+        """
+        if image.size == 0:
+            return 0.0
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        height, width = gray.shape[:2]
+
+        gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8))
+        _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        # Componentes com dimensões de caractere
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        chars = np.zeros_like(binary)
+        for index in range(1, count):
+            x, y, w, h, area = stats[index]
+            if not (0.03 * height <= h <= 0.2 * height and w <= 2 * h):
+                continue
+            if 0.15 <= area / float(w * h) <= 0.9:
+                chars[y:y + h, x:x + w] = 255
+
+        # Caracteres próximos formam linhas de texto
+        lines = cv2.morphologyEx(
+            chars, cv2.MORPH_CLOSE,
+            cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, width // 30), 1)),
+        )
+        contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        text_area = 0
+        for contour in contours:
+            _, _, w, h = cv2.boundingRect(contour)
+            if w >= 2.5 * h:
+                text_area += w * h
+
+        return min(1.0, text_area / float(width * height))
+
+    @staticmethod
+    def dhash(image: np.ndarray, size: int = 8) -> int:
+        """Difference hash de 64 bits (robusto a redimensionamento e compressão)."""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        resized = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+        bits = (resized[:, 1:] > resized[:, :-1]).flatten()
+        return int("".join("1" if bit else "0" for bit in bits), 2)
+
+    @staticmethod
+    def hamming_distance(hash1: int, hash2: int) -> int:
+        """Número de bits diferentes entre dois hashes."""
+        return bin(hash1 ^ hash2).count("1")
+
+    # ------------------------------------------------------------------ #
+    # Relevância
+    # ------------------------------------------------------------------ #
+    def _clip_relevance(self, text: str, image_path: str) -> Optional[float]:
+        if self.clip_scorer is None or not text:
+            return None
+        try:
+            return self.clip_scorer.score_text_image_relevance(text, image_path)
+        except Exception as e:
+            logger.warning(f"Erro no scoring CLIP da thumbnail: {e}")
+            return None
+
+    @staticmethod
+    def _title_relevance(text: str, title: str) -> float:
+        """Fração das palavras do texto presentes no título."""
+        words = {w for w in re.findall(r"\w+", text.lower()) if len(w) > 2}
+        if not words:
+            return 0.0
+        title_words = set(re.findall(r"\w+", title.lower()))
+        return len(words & title_words) / len(words)
@@ -5,5 +5,12 @@ Contém ferramentas para ajustar vídeos para TikTok, YouTube Shorts e Instagram
 """
 
 from .platform_optimizer import PlatformOptimizer, VideoProcessingError
+from .mezzanine import MezzanineRenderer, MezzanineSpec, MezzanineClip, IntermediateSpec
+from .concat import ConcatPlan, plan_concat
+from .filtergraph_composer import CompositionJob, FilterGraphRenderer
+from .quality_monitor import QualityMonitor, QualityReport
+from .multi_export import ExportTarget, MultiPlatformExporter
+from .streaming_sources import PeakMemoryMonitor, StreamingSources
+from .preview import DraftProfile, PreviewResult
 
-__all__ = ["PlatformOptimizer", "VideoProcessingError"]
\ No newline at end of file
+__all__ = ["PlatformOptimizer", "VideoProcessingError", "MezzanineRenderer", "MezzanineSpec", "MezzanineClip", "IntermediateSpec", "ConcatPlan", "plan_concat", "CompositionJob", "FilterGraphRenderer", "QualityMonitor", "QualityReport", "ExportTarget", "MultiPlatformExporter", "PeakMemoryMonitor", "StreamingSources", "DraftProfile", "PreviewResult"]
\ No newline at end of file
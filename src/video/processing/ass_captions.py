@@ -0,0 +1,394 @@
+"""
+Legendas em ASS renderizadas pela libass do FFmpeg.
+
+Gera um único arquivo de legendas (estilos, posições e, opcionalmente,
+tempo de karaokê por palavra) a partir dos dados de legenda do pipeline;
+o FFmpeg desenha as legendas durante o encode (filtro `subtitles`). O
+custo do render deixa de crescer com o número de legendas — não há uma
+camada de imagem por legenda na composição.
+
+O layout reproduz o painel desenhado com PIL pelo compositor: texto
+quebrado na mesma largura, painel arredondado com opacidade e linhas
+centralizadas com o mesmo espaçamento.
+"""
+
+import functools
+import logging
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+)
+PANEL_RADIUS = 24
+# Tamanhos em pixels (resolução final) usados quando o estilo da legenda não os define
+CAPTION_STYLE_DEFAULTS = {
+    "font_size": 54,
+    "line_spacing": 12,
+    "padding_horizontal": 48,
+    "padding_vertical": 32,
+    "stroke_width": 2,
+}
+# Fator de controle da curva de Bézier que aproxima um quarto de círculo
+_BEZIER_K = 0.5523
+
+
+@functools.lru_cache(maxsize=64)
+def load_font(font_path: Optional[str], font_size: int):
+    """Carrega a fonte uma única vez por (arquivo, tamanho)."""
+    if font_path:
+        return ImageFont.truetype(font_path, font_size)
+    return ImageFont.load_default()
+
+
+def resolve_font_path(preferred_path: Optional[str] = None) -> Optional[str]:
+    """Primeira fonte existente entre a preferida e as fontes padrão."""
+    for path in ((preferred_path,) if preferred_path else ()) + DEFAULT_FONT_PATHS:
+        if path and Path(path).exists():
+            return path
+    return None
+
+
+def measure_text(font, text: str) -> Tuple[int, int]:
+    """Largura e altura de um texto na fonte informada."""
+    if hasattr(font, "getbbox"):
+        bbox = font.getbbox(text)
+        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+    draw = ImageDraw.Draw(Image.new("RGB", (10, 10)))
+    bbox = draw.textbbox((0, 0), text, font=font)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+def wrap_text(text: str, font, max_width: int) -> List[str]:
+    """Quebra o texto para caber na largura disponível."""
+    lines: List[str] = []
+    current: List[str] = []
+    for word in (text or "").split():
+        candidate = " ".join(current + [word]).strip()
+        if measure_text(font, candidate)[0] <= max_width or not current:
+            current.append(word)
+        else:
+            lines.append(" ".join(current))
+            current = [word]
+    if current:
+        lines.append(" ".join(current))
+    return lines
+
+
+def font_metrics(font, font_size: int) -> Tuple[int, int]:
+    """(ascent, descent) da fonte."""
+    if hasattr(font, "getmetrics"):
+        return font.getmetrics()
+    return font_size, int(font_size * 0.2)
+
+
+@dataclass
+class CaptionLayout:
+    """Geometria de uma legenda no quadro (mesma do painel PIL)."""
+
+    lines: List[str]
+    panel_x: int
+    panel_y: int
+    panel_width: int
+    panel_height: int
+    line_height: int
+    line_spacing: int
+    padding_y: int
+
+
+def layout_caption(text: str, video_size: Tuple[int, int], style: Dict[str, Any],
+                   font_path: Optional[str]) -> Optional[CaptionLayout]:
+    """Calcula quebra de linhas, painel e posição vertical da legenda."""
+    font_size = int(style.get("font_size", CAPTION_STYLE_DEFAULTS["font_size"]))
+    line_spacing = int(style.get("line_spacing", CAPTION_STYLE_DEFAULTS["line_spacing"]))
+    max_width_ratio = float(style.get("max_width_ratio", 0.9))
+    padding_x = int(style.get("padding_horizontal", CAPTION_STYLE_DEFAULTS["padding_horizontal"]))
+    padding_y = int(style.get("padding_vertical", CAPTION_STYLE_DEFAULTS["padding_vertical"]))
+
+    font = load_font(font_path, font_size)
+    lines = wrap_text(text, font, int(video_size[0] * max_width_ratio) - padding_x * 2)
+    if not lines:
+        return None
+
+    ascent, descent = font_metrics(font, font_size)
+    line_height = ascent + descent
+    text_height = len(lines) * line_height + (len(lines) - 1) * line_spacing
+    panel_width = min(
+        int(video_size[0] * max_width_ratio),
+        max(measure_text(font, line)[0] + padding_x * 2 for line in lines),
+    )
+    panel_height = text_height + padding_y * 2
+
+    baseline = style.get("baseline", "bottom")
+    vertical_margin_ratio = float(style.get("vertical_margin_ratio", 0.075))
+    if baseline == "top":
+        panel_y = int(video_size[1] * vertical_margin_ratio)
+    elif baseline == "center":
+        panel_y = (video_size[1] - panel_height) // 2
+    else:
+        panel_y = video_size[1] - panel_height - int(video_size[1] * vertical_margin_ratio)
+
+    return CaptionLayout(
+        lines=lines,
+        panel_x=(video_size[0] - panel_width) // 2,
+        panel_y=panel_y,
+        panel_width=panel_width,
+        panel_height=panel_height,
+        line_height=line_height,
+        line_spacing=line_spacing,
+        padding_y=padding_y,
+    )
+
+
+def ass_color(hex_color: Optional[str], opacity: float = 1.0) -> str:
+    """'#RRGGBB' -> '&HAABBGGRR' (alfa do ASS: 00 opaco, FF transparente)."""
+    value = (hex_color or "#000000").lstrip("#")
+    if len(value) == 3:
+        value = "".join(ch * 2 for ch in value)
+    value = (value + "000000")[:6]
+    alpha = max(0, min(255, round(255 * (1.0 - opacity))))
+    return f"&H{alpha:02X}{value[4:6]}{value[2:4]}{value[0:2]}".upper()
+
+
+def ass_time(seconds: float) -> str:
+    """Segundos -> H:MM:SS.cc"""
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, rest = divmod(centiseconds, 360000)
+    minutes, rest = divmod(rest, 6000)
+    secs, cs = divmod(rest, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{cs:02d}"
+
+
+def escape_ass_text(text: str) -> str:
+    """Evita que o texto seja interpretado como tags de override."""
+    return text.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}").replace("\n", " ")
+
+
+def rounded_rect_path(width: int, height: int, radius: int = PANEL_RADIUS) -> str:
+    """Desenho ASS (\\p1) de um retângulo com cantos arredondados."""
+    r = max(0, min(radius, width // 2, height // 2))
+    k = r * _BEZIER_K
+    w, h = width, height
+
+    def pt(x: float, y: float) -> str:
+        return f"{round(x)} {round(y)}"
+
+    return " ".join([
+        f"m {pt(r, 0)}",
+        f"l {pt(w - r, 0)}", f"b {pt(w - r + k, 0)} {pt(w, r - k)} {pt(w, r)}",
+        f"l {pt(w, h - r)}", f"b {pt(w, h - r + k)} {pt(w - r + k, h)} {pt(w - r, h)}",
+        f"l {pt(r, h)}", f"b {pt(r - k, h)} {pt(0, h - r + k)} {pt(0, h - r)}",
+        f"l {pt(0, r)}", f"b {pt(0, r - k)} {pt(r - k, 0)} {pt(r, 0)}",
+    ])
+
+
+def word_timings(caption: Dict[str, Any], words: Sequence[str], start: float, end: float) -> List[float]:
+    """
+    Duração (s) de cada palavra para o karaokê.
+
+    Usa `caption["words"]` (itens com start_time/end_time) quando presente;
+    caso contrário distribui o tempo da legenda proporcionalmente ao
+    tamanho das palavras.
+    """
+    timed = caption.get("words") or []
+    if len(timed) == len(words) and all("end_time" in item for item in timed):
+        durations, cursor = [], start
+        for item in timed:
+            word_end = min(float(item["end_time"]), end)
+            durations.append(max(word_end - cursor, 0.0))
+            cursor = max(cursor, word_end)
+        return durations
+    total = sum(len(word) + 1 for word in words) or 1
+    return [(end - start) * (len(word) + 1) / total for word in words]
+
+
+@dataclass
+class AssSubtitles:
+    """Arquivo ASS gerado."""
+
+    path: str
+    fonts_dir: Optional[str]
+    captions: int
+    events: int
+
+
+class AssCaptionBuilder:
+    """Converte as legendas do pipeline em um documento ASS."""
+
+    def __init__(self, video_size: Tuple[int, int],
+                 font_resolver: Callable[[Optional[str]], Optional[str]] = resolve_font_path):
+        self.video_size = (int(video_size[0]), int(video_size[1]))
+        self.font_resolver = font_resolver
+        self._styles: Dict[Tuple, str] = {}
+        self._style_lines: List[str] = []
+        self.font_dirs: List[str] = []
+
+    def _style_name(self, style: Dict[str, Any], font_path: Optional[str]) -> str:
+        font_size = int(style.get("font_size", CAPTION_STYLE_DEFAULTS["font_size"]))
+        stroke_width = int(style.get("stroke_width", CAPTION_STYLE_DEFAULTS["stroke_width"]))
+        karaoke = bool(style.get("karaoke"))
+        text_color = style.get("font_color", "#FFFFFF")
+        key = (
+            font_path, font_size, text_color, style.get("stroke_color", "#000000"),
+            stroke_width, karaoke, style.get("highlight_color", "#FFD400"),
+        )
+        if key in self._styles:
+            return self._styles[key]
+
+        font = load_font(font_path, font_size)
+        ascent, descent = font_metrics(font, font_size)
+        try:
+            family, variant = font.getname()
+        except AttributeError:
+            family, variant = "Sans", ""
+        if font_path:
+            font_dir = str(Path(font_path).parent)
+            if font_dir not in self.font_dirs:
+                self.font_dirs.append(font_dir)
+
+        # Karaokê: SecondaryColour antes da palavra ser "cantada", PrimaryColour depois
+        primary = style.get("highlight_color", "#FFD400") if karaoke else text_color
+        name = f"Caption{len(self._styles) + 1}"
+        self._styles[key] = name
+        self._style_lines.append(",".join(str(value) for value in [
+            f"Style: {name}", family, ascent + descent,
+            ass_color(primary), ass_color(text_color),
+            ass_color(style.get("stroke_color", "#000000")), "&H00000000",
+            -1 if "bold" in (variant or "").lower() else 0, 0, 0, 0, 100, 100, 0, 0,
+            1, stroke_width, 0, 8, 0, 0, 0, 1,
+        ]))
+        return name
+
+    def build(self, captions: Sequence[Dict[str, Any]]) -> Tuple[str, int, int]:
+        """Retorna (documento ASS, legendas emitidas, eventos)."""
+        events: List[str] = []
+        emitted = 0
+        width, height = self.video_size
+        for caption in captions:
+            text = str(caption.get("text", "")).strip()
+            if not text:
+                continue
+            start = float(caption.get("start_time", 0.0))
+            end_time = float(caption.get("end_time", start + 2.0))
+            end = start + max(end_time - start, 0.5)
+            style = caption.get("style", {}) or {}
+            font_path = self.font_resolver(style.get("font_path"))
+
+            layout = layout_caption(text, self.video_size, style, font_path)
+            if layout is None:
+                continue
+            style_name = self._style_name(style, font_path)
+            emitted += 1
+
+            box_color = ass_color(style.get("background_color", "#101010"))
+            box_alpha = ass_color("#000000", float(style.get("background_opacity", 0.85)))[2:4]
+            events.append(
+                f"Dialogue: 0,{ass_time(start)},{ass_time(end)},Box,,0,0,0,,"
+                f"{{\\an7\\pos({layout.panel_x},{layout.panel_y})\\1c&H{box_color[4:]}&"
+                f"\\1a&H{box_alpha}&\\bord0\\shad0\\p1}}"
+                f"{rounded_rect_path(layout.panel_width, layout.panel_height)}{{\\p0}}"
+            )
+
+            karaoke = bool(style.get("karaoke"))
+            if karaoke:
+                words = [word for line in layout.lines for word in line.split()]
+                durations = iter(word_timings(caption, words, start, end))
+            elapsed_cs = 0
+            for index, line in enumerate(layout.lines):
+                y = layout.panel_y + layout.padding_y + index * (layout.line_height + layout.line_spacing)
+                body = escape_ass_text(line)
+                if karaoke:
+                    parts = [f"{{\\k{elapsed_cs}}}"] if elapsed_cs else []
+                    for word in line.split():
+                        centiseconds = int(round(next(durations) * 100))
+                        elapsed_cs += centiseconds
+                        parts.append(f"{{\\kf{centiseconds}}}{escape_ass_text(word)} ")
+                    body = "".join(parts).rstrip()
+                events.append(
+                    f"Dialogue: 1,{ass_time(start)},{ass_time(end)},{style_name},,0,0,0,,"
+                    f"{{\\an8\\pos({width // 2},{y})}}{body}"
+                )
+
+        header = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "WrapStyle: 2",
+            "ScaledBorderAndShadow: yes",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+            "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+            "Style: Box,Sans,20,&H00000000,&H00000000,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,0,0,7,0,0,0,1",
+            *self._style_lines,
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+            *events,
+        ]
+        return "\n".join(header) + "\n", emitted, len(events)
+
+
+def write_ass_subtitles(
+    captions: Sequence[Dict[str, Any]],
+    video_size: Tuple[int, int],
+    output_path: str,
+    font_resolver: Callable[[Optional[str]], Optional[str]] = resolve_font_path,
+) -> Optional[AssSubtitles]:
+    """Grava o arquivo ASS das legendas; None se nenhuma legenda tiver texto."""
+    builder = AssCaptionBuilder(video_size, font_resolver=font_resolver)
+    document, emitted, events = builder.build(captions)
+    if not emitted:
+        return None
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(document, encoding="utf-8")
+    return AssSubtitles(
+        path=str(path),
+        fonts_dir=builder.font_dirs[0] if builder.font_dirs else None,
+        captions=emitted,
+        events=events,
+    )
+
+
+def escape_filter_value(value: str) -> str:
+    """Escapa um valor para opção de filtro dentro de um filter graph (dois níveis)."""
+    option_level = value.replace("\\", "\\\\").replace("'", "\\'").replace(":", "\\:")
+    graph_level = option_level.replace("\\", "\\\\").replace("'", "\\'")
+    for char in "[],;":
+        graph_level = graph_level.replace(char, f"\\{char}")
+    return graph_level
+
+
+def subtitles_filter(subtitles: AssSubtitles) -> str:
+    """Filtro `subtitles` (libass) que queima o arquivo ASS no vídeo."""
+    parts = [f"subtitles=filename={escape_filter_value(subtitles.path)}"]
+    if subtitles.fonts_dir:
+        parts.append(f"fontsdir={escape_filter_value(subtitles.fonts_dir)}")
+    return ":".join(parts)
+
+
+@functools.lru_cache(maxsize=4)
+def libass_available(ffmpeg_bin: str = "ffmpeg") -> bool:
+    """Verifica se o FFmpeg instalado tem o filtro `subtitles` (libass)."""
+    try:
+        result = subprocess.run(
+            [ffmpeg_bin, "-hide_banner", "-filters"], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    available = any(line.split()[1:2] == ["subtitles"] for line in result.stdout.splitlines())
+    if not available:
+        logger.warning("FFmpeg sem libass; legendas serão desenhadas com PIL")
+    return available
@@ -0,0 +1,216 @@
+"""
+Fundo desfocado do layout vertical "sandwich" em baixa resolução.
+
+O desfoque forte esconde os detalhes do quadro, então o fundo pode ser
+calculado em uma fração da resolução de saída (com sigma proporcional) e
+ampliado depois — o resultado visual é o mesmo e o custo por quadro cai em
+mais de uma ordem de grandeza. Opcionalmente o fundo é atualizado numa taxa
+menor que a do vídeo (o quadro desfocado é mantido entre atualizações).
+
+Dois caminhos:
+
+- `LowResBlur`: filtro por quadro (MoviePy `fl`), com memória dos quadros
+  já desfocados em baixa resolução;
+- `BlurredBackgroundCache`: gera pelo FFmpeg um vídeo de fundo em baixa
+  resolução por clip de origem e o guarda em disco, reutilizado por loops,
+  retries e novas renderizações.
+"""
+
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.utils.exceptions import FFmpegError, VideoProcessingError
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+
+
+@dataclass(frozen=True)
+class BackgroundSpec:
+    """Parâmetros do fundo desfocado."""
+
+    width: int = 1080
+    height: int = 1920
+    # Sigma equivalente na resolução de saída (o mesmo do cv2.GaussianBlur original)
+    blur_sigma: float = 35.0
+    downscale: int = 8
+    # Taxa de atualização do fundo (quadros/s); None mantém a taxa do vídeo
+    fps: Optional[float] = None
+
+    @property
+    def small_size(self) -> Tuple[int, int]:
+        """Resolução em que o desfoque é calculado (lados pares)."""
+        factor = max(1, int(self.downscale))
+        return (
+            max(2, (self.width // factor) // 2 * 2),
+            max(2, (self.height // factor) // 2 * 2),
+        )
+
+    @property
+    def small_sigma(self) -> float:
+        return max(self.blur_sigma / max(1, int(self.downscale)), 0.5)
+
+    def cache_token(self) -> str:
+        """Identificador estável da especificação (parte da chave de cache)."""
+        payload = repr(sorted(asdict(self).items())).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+
+def blur_frame_lowres(frame: np.ndarray, spec: BackgroundSpec) -> np.ndarray:
+    """Reduz o quadro esticado para o fundo e desfoca em baixa resolução."""
+    small = cv2.resize(frame, spec.small_size, interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(small, (0, 0), spec.small_sigma)
+
+
+def upscale_background(small: np.ndarray, spec: BackgroundSpec) -> np.ndarray:
+    """Amplia o fundo desfocado para a resolução de saída."""
+    return cv2.resize(small, (spec.width, spec.height), interpolation=cv2.INTER_LINEAR)
+
+
+class LowResBlur:
+    """
+    Filtro `fl(get_frame, t)` que gera o fundo desfocado em baixa resolução.
+
+    Com `spec.fps` o tempo é quantizado e o mesmo fundo é mantido entre
+    atualizações. Os quadros desfocados (pequenos) ficam em uma LRU, então
+    pedir de novo o mesmo instante não decodifica nem desfoca novamente.
+    """
+
+    def __init__(self, spec: BackgroundSpec, max_frames: int = 512):
+        self.spec = spec
+        self.max_frames = max_frames
+        self._frames: "OrderedDict[float, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def source_time(self, t: float) -> float:
+        """Instante de origem usado para o fundo no tempo `t` (com frame hold)."""
+        if not self.spec.fps:
+            return round(float(t), 6)
+        return int(float(t) * self.spec.fps + 1e-6) / float(self.spec.fps)
+
+    def small_frame(self, get_frame: Callable[[float], np.ndarray], t: float) -> np.ndarray:
+        key = self.source_time(t)
+        cached = self._frames.get(key)
+        if cached is not None:
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        small = blur_frame_lowres(get_frame(key), self.spec)
+        self._frames[key] = small
+        if len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+        return small
+
+    def __call__(self, get_frame: Callable[[float], np.ndarray], t: float) -> np.ndarray:
+        return upscale_background(self.small_frame(get_frame, t), self.spec)
+
+
+def build_background_command(input_path: str, output_path: str, spec: BackgroundSpec) -> list:
+    """Comando FFmpeg do vídeo de fundo em baixa resolução (sem ampliar)."""
+    small_w, small_h = spec.small_size
+    filters = []
+    if spec.fps:
+        filters.append(f"fps={spec.fps:g}")
+    filters += [
+        f"scale={small_w}:{small_h}:flags=area",
+        f"gblur=sigma={spec.small_sigma:.2f}",
+        "setsar=1",
+        "format=yuv420p",
+    ]
+    return [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y",
+        "-i", str(input_path),
+        "-map", "0:v:0", "-an",
+        "-vf", ",".join(filters),
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+
+
+class BlurredBackgroundCache:
+    """
+    Vídeos de fundo desfocado em baixa resolução, em cache por clip de origem.
+
+    A chave usa o caminho, tamanho e mtime da origem e a especificação; o
+    arquivo cobre o clip inteiro, então loops e cortes do mesmo clip usam o
+    mesmo fundo.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        timeout: float = 300.0,
+        runner: Optional[FFmpegRunner] = None,
+    ):
+        """
+        Args:
+            cache_dir: Diretório dos fundos gerados
+            timeout: Tempo máximo (s) de cada geração
+            runner: Executor de processos FFmpeg (padrão: executor compartilhado)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(tempfile.gettempdir()) / "aishorts_backgrounds"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.runner = runner or get_ffmpeg_runner()
+        self.logger = logging.getLogger(__name__)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, video_path: str, spec: BackgroundSpec) -> str:
+        """
+        Caminho do fundo desfocado de `video_path`, gerando-o se necessário.
+
+        Raises:
+            VideoProcessingError: Se a origem não existir ou o FFmpeg falhar
+        """
+        source = Path(video_path)
+        if not source.exists():
+            raise VideoProcessingError(f"Vídeo não encontrado: {source}", video_path=str(source))
+
+        target = self._cache_path(source, spec)
+        with self._lock_for(str(target)):
+            if target.exists() and target.stat().st_size > 0:
+                self.stats["hits"] += 1
+                return str(target)
+
+            self.stats["misses"] += 1
+            partial = target.with_name(f"{target.stem}.partial{target.suffix}")
+            try:
+                result = self.runner.run(
+                    build_background_command(str(source), str(partial), spec),
+                    timeout=self.timeout, label=target.name, video_path=str(source),
+                )
+            except FFmpegError as error:
+                partial.unlink(missing_ok=True)
+                raise VideoProcessingError(
+                    f"Erro ao gerar fundo desfocado ({error.kind}): {source}",
+                    video_path=str(source),
+                    ffmpeg_error=error.details.get("ffmpeg_error"),
+                ) from error
+            if not partial.exists():
+                raise VideoProcessingError(f"Fundo desfocado não foi criado: {partial}", video_path=str(source))
+            partial.replace(target)
+
+        self.logger.info(f"Fundo desfocado gerado ({result.elapsed:.2f}s): {source.name} -> {target.name}")
+        return str(target)
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _cache_path(self, source: Path, spec: BackgroundSpec) -> Path:
+        stat = source.stat()
+        key = "|".join([str(source.resolve()), str(stat.st_size), str(stat.st_mtime_ns), spec.cache_token()])
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{source.stem}_bg_{digest}.mp4"
@@ -0,0 +1,256 @@
+"""
+Planejamento de concatenação sem re-encode.
+
+Compara os parâmetros dos streams (codec, perfil, resolução, formato de
+pixel, frame rate, timebase e áudio) de cada entrada. Entradas compatíveis
+são unidas pelo concat demuxer do FFmpeg com `-c copy`; apenas as
+divergentes são re-encodadas para a especificação comum antes da cópia.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from src.utils.media_probe import MediaInfo
+
+
+# Codecs de destino que sabemos re-encodar para igualar as demais entradas
+VIDEO_ENCODERS = {"h264": "libx264", "hevc": "libx265", "mpeg4": "mpeg4", "vp9": "libvpx-vp9"}
+AUDIO_ENCODERS = {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus"}
+X264_PROFILES = {
+    "constrained baseline": "baseline", "baseline": "baseline", "main": "main", "high": "high",
+}
+CHANNEL_LAYOUTS = {1: "mono", 2: "stereo", 6: "5.1"}
+
+
+def _normalize_sar(value: Optional[str]) -> str:
+    return "1:1" if value in (None, "", "0:1", "N/A") else str(value)
+
+
+@dataclass(frozen=True)
+class StreamSignature:
+    """Parâmetros que precisam coincidir para concatenar por cópia."""
+
+    video_codec: Optional[str]
+    profile: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    pix_fmt: Optional[str]
+    frame_rate: Optional[str]
+    time_base: Optional[str]
+    sample_aspect_ratio: str = "1:1"
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+    @classmethod
+    def from_media_info(cls, info: MediaInfo) -> Optional["StreamSignature"]:
+        """Assinatura a partir da sondagem; None se o ffprobe não descreveu os streams."""
+        video = info.video_stream
+        if info.source != "ffprobe" or video is None:
+            return None
+        audio = info.audio_stream or {}
+        return cls(
+            video_codec=video.get("codec_name"),
+            profile=video.get("profile"),
+            width=video.get("width"),
+            height=video.get("height"),
+            pix_fmt=video.get("pix_fmt"),
+            frame_rate=video.get("r_frame_rate"),
+            time_base=video.get("time_base"),
+            sample_aspect_ratio=_normalize_sar(video.get("sample_aspect_ratio")),
+            audio_codec=audio.get("codec_name"),
+            sample_rate=int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+            channels=audio.get("channels"),
+        )
+
+    def differences(self, other: "StreamSignature") -> List[str]:
+        """Campos que diferem de `other`."""
+        return [f.name for f in fields(self) if getattr(self, f.name) != getattr(other, f.name)]
+
+
+@dataclass
+class ConcatInput:
+    """Entrada do plano e o que fazer com ela."""
+
+    path: str
+    duration: float
+    signature: Optional[StreamSignature]
+    action: str = "copy"
+    reason: str = ""
+
+
+@dataclass
+class ConcatPlan:
+    """
+    Plano de concatenação.
+
+    strategy:
+        ``copy``: todas compatíveis, só concat demuxer
+        ``conform``: algumas entradas re-encodadas antes da cópia
+        ``fallback``: parâmetros desconhecidos ou sem encoder para o destino
+    """
+
+    inputs: List[ConcatInput]
+    target: Optional[StreamSignature]
+    strategy: str
+    reason: str = ""
+    elapsed: float = 0.0
+    prepared_paths: List[str] = field(default_factory=list)
+
+    @property
+    def reencoded(self) -> List[ConcatInput]:
+        return [item for item in self.inputs if item.action == "reencode"]
+
+    @property
+    def expected_duration(self) -> float:
+        return sum(item.duration for item in self.inputs)
+
+
+def plan_concat(infos: Sequence[MediaInfo]) -> ConcatPlan:
+    """
+    Escolhe a especificação comum (a assinatura que cobre mais tempo de
+    vídeo) e marca para re-encode apenas as entradas divergentes.
+    """
+    inputs = [
+        ConcatInput(path=info.path, duration=info.duration, signature=StreamSignature.from_media_info(info))
+        for info in infos
+    ]
+    if not inputs:
+        return ConcatPlan(inputs=[], target=None, strategy="fallback", reason="nenhuma entrada")
+    if any(item.signature is None for item in inputs):
+        return ConcatPlan(inputs=inputs, target=None, strategy="fallback", reason="streams não descritos pelo ffprobe")
+
+    weights: Counter = Counter()
+    for item in inputs:
+        weights[item.signature] += max(item.duration, 0.001)
+    target = weights.most_common(1)[0][0]
+
+    for item in inputs:
+        diff = item.signature.differences(target)
+        if diff:
+            item.action = "reencode"
+            item.reason = ", ".join(diff)
+
+    if not any(item.action == "reencode" for item in inputs):
+        return ConcatPlan(inputs=inputs, target=target, strategy="copy", reason="parâmetros idênticos")
+    if target.video_codec not in VIDEO_ENCODERS or (
+        target.audio_codec is not None and target.audio_codec not in AUDIO_ENCODERS
+    ):
+        return ConcatPlan(
+            inputs=inputs, target=target, strategy="fallback",
+            reason=f"sem encoder para {target.video_codec}/{target.audio_codec}",
+        )
+    reencoded = sum(1 for item in inputs if item.action == "reencode")
+    return ConcatPlan(
+        inputs=inputs, target=target, strategy="conform",
+        reason=f"{reencoded} de {len(inputs)} entradas re-encodadas",
+    )
+
+
+def build_conform_command(input_path: str, output_path: str, has_audio: bool,
+                          target: StreamSignature, crf: int = 18) -> List[str]:
+    """Comando que re-encoda uma entrada para a assinatura de destino."""
+    command = ["ffmpeg", "-hide_banner", "-nostdin", "-y", "-i", str(input_path)]
+    audio_map = "0:a:0"
+    if target.audio_codec and not has_audio:
+        # Áudio silencioso para manter o mesmo layout de streams das demais entradas
+        layout = CHANNEL_LAYOUTS.get(target.channels or 2, "stereo")
+        command += ["-f", "lavfi", "-i", f"anullsrc=r={target.sample_rate or 48000}:cl={layout}"]
+        audio_map = "1:a:0"
+
+    width, height = target.width, target.height
+    video_filter = ",".join([
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease",
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+        f"setsar={target.sample_aspect_ratio.replace(':', '/')}",
+        f"fps={target.frame_rate}",
+        f"format={target.pix_fmt}",
+    ])
+    command += ["-map", "0:v:0"]
+    if target.audio_codec:
+        command += ["-map", audio_map]
+    command += ["-vf", video_filter, "-c:v", VIDEO_ENCODERS[target.video_codec]]
+
+    if target.video_codec == "h264":
+        profile = X264_PROFILES.get((target.profile or "").lower())
+        if profile:
+            command += ["-profile:v", profile]
+        # SPS/PPS em banda: o trecho decodifica mesmo com o extradata da 1ª entrada
+        command += ["-x264-params", "repeat-headers=1"]
+    if target.video_codec in ("h264", "hevc"):
+        command += ["-preset", "fast", "-crf", str(crf)]
+    if target.time_base and "/" in target.time_base:
+        command += ["-video_track_timescale", target.time_base.split("/", 1)[1]]
+
+    if target.audio_codec:
+        command += [
+            "-c:a", AUDIO_ENCODERS[target.audio_codec],
+            "-ar", str(target.sample_rate or 48000),
+            "-ac", str(target.channels or 2),
+        ]
+        if not has_audio:
+            command += ["-shortest"]
+    else:
+        command += ["-an"]
+
+    command += ["-movflags", "+faststart", str(output_path)]
+    return command
+
+
+def write_concat_list(paths: Sequence[str], list_path: Path) -> None:
+    """Grava a lista do concat demuxer (aspas simples escapadas)."""
+    lines = []
+    for path in paths:
+        escaped = Path(path).resolve().as_posix().replace("'", "'\\''")
+        lines.append(f"file '{escaped}'\n")
+    list_path.write_text("".join(lines), encoding="utf-8")
+
+
+def build_concat_command(list_path: str, output_path: str) -> List[str]:
+    """Concat demuxer com cópia de streams."""
+    return [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y",
+        "-f", "concat", "-safe", "0",
+        "-i", str(list_path),
+        "-map", "0",
+        "-c", "copy",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+
+
+def build_split_command(input_path: str, frames: Sequence[int], output_pattern: str) -> List[str]:
+    """
+    Divide o vídeo (sem reencodar) nos quadros indicados.
+
+    Os cortes precisam cair em quadros-chave; o corte por índice de quadro é
+    exato mesmo com B-frames, ao contrário de `inpoint`/`outpoint`.
+    """
+    return [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y",
+        "-i", str(input_path),
+        "-map", "0:v:0",
+        "-c", "copy",
+        "-f", "segment",
+        "-segment_frames", ",".join(str(frame) for frame in frames),
+        "-segment_format", "mp4",
+        "-reset_timestamps", "1",
+        str(output_pattern),
+    ]
+
+
+def build_splice_command(list_path: str, audio_source: str, output_path: str) -> List[str]:
+    """Junta os trechos de vídeo da lista com o áudio original, tudo por cópia."""
+    return [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y",
+        "-f", "concat", "-safe", "0",
+        "-i", str(list_path),
+        "-i", str(audio_source),
+        "-map", "0:v:0",
+        "-map", "1:a?",
+        "-c", "copy",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
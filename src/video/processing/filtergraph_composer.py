@@ -0,0 +1,727 @@
+"""
+Renderização da composição final como um único filter_complex do FFmpeg.
+
+Compila a mesma composição do FinalVideoComposer (intro/outro, segmentos
+cortados ou repetidos no layout vertical sandwich, efeitos, fades entre
+clips, legendas, trilha de áudio e ajuste final de cor) em um grafo de
+filtros executado nativamente pelo FFmpeg — sem gerar cada quadro em
+Python como no caminho MoviePy. A linha do tempo também pode ser dividida
+em trechos renderizados em paralelo e juntados por cópia (`render_chunked`).
+"""
+
+import logging
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils.exceptions import FFmpegError, VideoProcessingError
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+from src.video.processing.ass_captions import AssSubtitles, subtitles_filter
+from src.video.processing.concat import (
+    build_concat_command,
+    build_splice_command,
+    build_split_command,
+    write_concat_list,
+)
+from src.video.processing.mezzanine import MezzanineSpec, _ffmpeg_color, build_sandwich_filtergraph
+from src.video.processing.quality_monitor import QualityMonitor, QualityReport, QualityTap, merge_reports
+
+
+def colorx_filter(factor: float) -> str:
+    """Equivalente a `vfx.colorx`: multiplica os canais RGB (com saturação em 255)."""
+    return f"colorchannelmixer=rr={factor:g}:gg={factor:g}:bb={factor:g}"
+
+
+def lum_contrast_filter(contrast: float, lum: float = 0.0, threshold: float = 127.0) -> str:
+    """Equivalente a `vfx.lum_contrast`: val + lum + contrast * (val - threshold)."""
+    expr = f"clip(val+{lum:g}+{contrast:g}*(val-{threshold:g})\\,0\\,255)"
+    return f"lutrgb=r={expr}:g={expr}:b={expr}"
+
+
+# Mesmos efeitos de `_apply_segment_effects` e `_apply_template_effect`
+SEGMENT_EFFECTS = {
+    "brightness_up": colorx_filter(1.1),
+    "contrast_boost": lum_contrast_filter(30),
+    # Usado pelo reparo de segmentos borrados
+    "sharpen": "unsharp=5:5:1.2:5:5:0.0",
+}
+TEMPLATE_EFFECTS = {
+    "color_enhance": colorx_filter(1.15),
+    "contrast_boost": lum_contrast_filter(20),
+    "vibrance": colorx_filter(1.2),
+}
+
+
+def segment_frames(durations: Sequence[float], fps: float) -> List[Tuple[int, int]]:
+    """Faixa de quadros [início, fim) de cada clip de uma linha do tempo."""
+    frames, position = [], 0.0
+    for duration in durations:
+        start, position = position, position + duration
+        frames.append((math.ceil(round(start * fps, 6)), math.ceil(round(position * fps, 6))))
+    return frames
+
+
+def keyframe_times(durations: Sequence[float], fps: float) -> List[float]:
+    """
+    Instantes (no primeiro quadro de cada clip, exceto o primeiro) em que o
+    encode deve forçar quadros-chave para que um clip possa ser trocado sem
+    reencodar o restante do vídeo.
+    """
+    return [start / fps for start, _ in segment_frames(durations, fps)[1:]]
+
+
+@dataclass
+class CompositionSegment:
+    """Um clip da linha do tempo: trecho de vídeo ou quadro de cor sólida."""
+
+    duration: float
+    path: Optional[str] = None
+    source_size: Tuple[int, int] = (0, 0)
+    loop: bool = False
+    # Início do trecho usado no vídeo de origem
+    start: float = 0.0
+    color: str = "#000000"
+    effects: List[str] = field(default_factory=list)
+
+    @property
+    def is_color(self) -> bool:
+        return self.path is None
+
+
+@dataclass
+class CaptionOverlay:
+    """Imagem de legenda já renderizada e sua janela de exibição."""
+
+    image_path: str
+    x: int
+    y: int
+    start: float
+    end: float
+
+
+@dataclass
+class CompositionJob:
+    """Descrição completa de uma renderização final."""
+
+    width: int
+    height: int
+    fps: int
+    segments: List[CompositionSegment]
+    audio_path: Optional[str] = None
+    audio_duration: float = 0.0
+    captions: List[CaptionOverlay] = field(default_factory=list)
+    # Legendas em ASS queimadas pela libass (alternativa às imagens sobrepostas)
+    subtitles: Optional[AssSubtitles] = None
+    background_color: str = "#000000"
+    template_effects: List[str] = field(default_factory=list)
+    fade_duration: float = 0.5
+    final_colorx: float = 1.1
+    video_codec: str = "libx264"
+    audio_codec: str = "aac"
+    bitrate: Optional[str] = "5M"
+    preset: str = "medium"
+    pix_fmt: str = "yuv420p"
+
+    @property
+    def total_duration(self) -> float:
+        return sum(segment.duration for segment in self.segments)
+
+    def segment_bounds(self) -> List[Tuple[float, float]]:
+        """(início, fim) de cada clip na linha do tempo."""
+        bounds, position = [], 0.0
+        for segment in self.segments:
+            bounds.append((position, position + segment.duration))
+            position += segment.duration
+        return bounds
+
+    def segment_frames(self) -> List[Tuple[int, int]]:
+        """(primeiro quadro, quadro seguinte ao último) de cada clip."""
+        return segment_frames([segment.duration for segment in self.segments], self.fps)
+
+    def keyframe_times(self) -> List[float]:
+        """Instantes dos quadros-chave forçados nas bordas internas dos clips."""
+        return keyframe_times([segment.duration for segment in self.segments], self.fps)
+
+    def layout_spec(self) -> MezzanineSpec:
+        return MezzanineSpec(
+            width=self.width, height=self.height, fps=self.fps,
+            pix_fmt=self.pix_fmt, background_color=self.background_color,
+        )
+
+
+@dataclass
+class CompositionResult:
+    """Saída da renderização e métricas."""
+
+    path: str
+    duration: float
+    elapsed: float
+    command: List[str] = field(default_factory=list)
+    quality: Optional[QualityReport] = None
+    # Trechos renderizados em paralelo (1 = processo único)
+    chunks: int = 1
+
+    @property
+    def speed(self) -> float:
+        """Segundos de vídeo por segundo de render (1.0 = tempo real)."""
+        return self.duration / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _segment_chain(job: CompositionJob, index: int, count: int) -> List[str]:
+    """Efeitos e fades do clip, na mesma ordem do caminho MoviePy."""
+    segment = job.segments[index]
+    chain = [SEGMENT_EFFECTS[name] for name in segment.effects if name in SEGMENT_EFFECTS]
+    if count > 1:
+        fade = min(job.fade_duration, segment.duration)
+        if index > 0:
+            chain.append(f"fade=t=in:st=0:d={fade:g}")
+        chain.extend(TEMPLATE_EFFECTS[name] for name in job.template_effects if name in TEMPLATE_EFFECTS)
+        if index < count - 1:
+            chain.append(f"fade=t=out:st={max(segment.duration - fade, 0.0):g}:d={fade:g}")
+    chain.append(f"format={job.pix_fmt}")
+    return chain
+
+
+def _add_segment(job: CompositionJob, index: int, inputs: List[str], graph: List[str], input_index: int) -> int:
+    """Adiciona o clip `index` ao grafo (saída `[seg{index}]`); retorna o próximo índice de entrada."""
+    segment = job.segments[index]
+    label = f"seg{index}"
+    if segment.is_color:
+        graph.append(
+            f"color=c={_ffmpeg_color(segment.color)}:s={job.width}x{job.height}"
+            f":r={job.fps}:d={segment.duration:.3f},setsar=1[{label}_l]"
+        )
+    else:
+        if segment.loop:
+            inputs += ["-stream_loop", "-1"]
+        if segment.start > 0:
+            inputs += ["-ss", f"{segment.start:.3f}"]
+        inputs += ["-t", f"{segment.duration:.3f}", "-i", str(segment.path)]
+        graph.append(
+            f"[{input_index}:v]trim=duration={segment.duration:.3f},setpts=PTS-STARTPTS[{label}_t]"
+        )
+        graph.append(build_sandwich_filtergraph(
+            job.layout_spec(), segment.source_size, input_label=f"{label}_t",
+            output_label=f"{label}_l", label_prefix=f"{label}_",
+        ))
+        input_index += 1
+    graph.append(f"[{label}_l]{','.join(_segment_chain(job, index, len(job.segments)))}[{label}]")
+    return input_index
+
+
+def _add_overlays(
+    job: CompositionJob,
+    current: str,
+    inputs: List[str],
+    graph: List[str],
+    input_index: int,
+    window: Optional[Tuple[float, float]] = None,
+) -> int:
+    """
+    Legendas (ASS e imagens) e ajuste final de cor; a saída é `[vout]`.
+
+    Com `window` (início, fim) o vídeo corresponde só a esse trecho da linha
+    do tempo: as legendas são deslocadas para o mesmo intervalo.
+    """
+    offset = window[0] if window else 0.0
+    if job.subtitles is not None:
+        subtitles = subtitles_filter(job.subtitles)
+        if offset:
+            subtitles = f"setpts=PTS+{offset:.6f}/TB,{subtitles},setpts=PTS-STARTPTS"
+        graph.append(f"[{current}]{subtitles}[subs]")
+        current = "subs"
+
+    for caption_index, caption in enumerate(job.captions):
+        if window and not (caption.start < window[1] and window[0] < caption.end):
+            continue
+        inputs += ["-i", str(caption.image_path)]
+        output = f"cap{caption_index}"
+        graph.append(
+            f"[{current}][{input_index}:v]overlay=x={caption.x}:y={caption.y}"
+            f":enable='between(t,{caption.start - offset:.3f},{caption.end - offset:.3f})'[{output}]"
+        )
+        current = output
+        input_index += 1
+
+    final = [colorx_filter(job.final_colorx)] if job.final_colorx != 1.0 else []
+    final.append(f"format={job.pix_fmt}")
+    graph.append(f"[{current}]{','.join(final)}[vout]")
+    return input_index
+
+
+def _tap_video(graph: List[str], tap: QualityTap) -> None:
+    """Divide a saída `[vout]` para a saída de análise `[qv]` do monitor."""
+    graph[-1] = graph[-1][:-len("[vout]")] + ",split=2[vout][qv_src]"
+    graph.append(f"[qv_src]{tap.video_filter()}[qv]")
+
+
+def build_composition_graph(job: CompositionJob, tap: Optional[QualityTap] = None) -> Tuple[List[str], str]:
+    """
+    Monta as entradas e o filter_complex da composição.
+
+    Args:
+        job: Composição
+        tap: Saídas de análise do monitor de qualidade (`[qv]` e, com trilha, `[qa]`)
+
+    Returns:
+        (argumentos de entrada do FFmpeg, filter graph) — a saída de vídeo é
+        `[vout]` e a de áudio, quando houver trilha, `[aout]`.
+    """
+    if not job.segments:
+        raise VideoProcessingError("Composição sem segmentos")
+
+    inputs: List[str] = []
+    graph: List[str] = []
+    count = len(job.segments)
+    input_index = 0
+
+    for index in range(count):
+        input_index = _add_segment(job, index, inputs, graph, input_index)
+
+    labels = "".join(f"[seg{index}]" for index in range(count))
+    graph.append(f"{labels}concat=n={count}:v=1:a=0[cat]")
+    input_index = _add_overlays(job, "cat", inputs, graph, input_index)
+    if tap is not None:
+        _tap_video(graph, tap)
+
+    if job.audio_path:
+        # Trilha mais curta que o vídeo é repetida; mais longa, cortada
+        if job.audio_duration and job.audio_duration < job.total_duration:
+            inputs += ["-stream_loop", "-1"]
+        inputs += ["-i", str(job.audio_path)]
+        tap_audio = tap is not None and tap.audio_path is not None
+        graph.append(
+            f"[{input_index}:a]atrim=duration={job.total_duration:.3f},asetpts=PTS-STARTPTS"
+            + (",asplit=2[aout][qa_src]" if tap_audio else "[aout]")
+        )
+        if tap_audio:
+            graph.append(f"[qa_src]{tap.audio_filter()}[qa]")
+
+    return inputs, ";".join(graph)
+
+
+def _encode_args(job: CompositionJob) -> List[str]:
+    args = ["-c:v", job.video_codec, "-preset", job.preset]
+    if job.bitrate:
+        args += ["-b:v", job.bitrate]
+    return args + ["-pix_fmt", job.pix_fmt, "-r", str(job.fps)]
+
+
+def build_composition_command(
+    job: CompositionJob, output_path: str, tap: Optional[QualityTap] = None
+) -> List[str]:
+    """Comando FFmpeg completo da renderização final."""
+    inputs, graph = build_composition_graph(job, tap)
+    command = ["ffmpeg", "-hide_banner", "-nostdin", "-y", *inputs, "-filter_complex", graph, "-map", "[vout]"]
+    if job.audio_path:
+        command += ["-map", "[aout]", "-c:a", job.audio_codec]
+    else:
+        command += ["-an"]
+    command += _encode_args(job)
+    keyframes = job.keyframe_times()
+    if keyframes:
+        command += ["-force_key_frames", ",".join(f"{t:.6f}" for t in keyframes)]
+    command += [
+        "-t", f"{job.total_duration:.3f}",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+    if tap is not None:
+        command += tap.output_args()
+    return command
+
+
+def plan_chunks(job: CompositionJob, workers: int, min_duration: float = 2.0) -> List[Tuple[int, int]]:
+    """
+    Divide a linha do tempo em trechos contíguos de clips [primeiro, último)
+    com durações equilibradas, no máximo um por worker.
+
+    Os cortes caem sempre em bordas de clips, onde o encode já força
+    quadros-chave; trechos com menos de `min_duration` segundos não compensam
+    o custo de abrir mais um processo.
+    """
+    count = len(job.segments)
+    total = job.total_duration
+    chunks = min(max(1, workers), count, max(1, int(total // max(min_duration, 1e-3))))
+    if chunks <= 1:
+        return [(0, count)]
+    starts = [start for start, _ in job.segment_bounds()]
+    cuts: List[int] = []
+    for part in range(1, chunks):
+        goal = total * part / chunks
+        cut = min(range(1, count), key=lambda index: abs(starts[index] - goal))
+        if not cuts or cut > cuts[-1]:
+            cuts.append(cut)
+    return list(zip([0, *cuts], [*cuts, count]))
+
+
+def build_chunk_command(
+    job: CompositionJob,
+    first: int,
+    last: int,
+    output_path: str,
+    tap: Optional[QualityTap] = None,
+    threads: Optional[int] = None,
+) -> List[str]:
+    """
+    Comando que renderiza só os clips [first, last) da composição (sem áudio),
+    com os mesmos efeitos, fades, legendas e parâmetros de encode do vídeo
+    completo e o número exato de quadros do trecho — os trechos são juntados
+    por cópia no vídeo final.
+    """
+    frames = job.segment_frames()
+    start_frame, end_frame = frames[first][0], frames[last - 1][1]
+    bounds = job.segment_bounds()
+    window = (bounds[first][0], bounds[last - 1][1])
+    inputs: List[str] = []
+    graph: List[str] = []
+    input_index = 0
+    for index in range(first, last):
+        input_index = _add_segment(job, index, inputs, graph, input_index)
+    current = f"seg{first}"
+    if last - first > 1:
+        labels = "".join(f"[seg{index}]" for index in range(first, last))
+        graph.append(f"{labels}concat=n={last - first}:v=1:a=0[cat]")
+        current = "cat"
+    _add_overlays(job, current, inputs, graph, input_index, window=window)
+    # Repete o último quadro se o arredondamento da duração deixar o trecho um quadro curto
+    graph[-1] = graph[-1][:-len("[vout]")] + ",tpad=stop_mode=clone:stop=2[vout]"
+    if tap is not None:
+        _tap_video(graph, tap)
+    command = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y", *inputs,
+        "-filter_complex", ";".join(graph), "-map", "[vout]", "-an",
+        *_encode_args(job),
+    ]
+    if threads:
+        command += ["-threads", str(threads)]
+    if job.video_codec == "libx264":
+        # SPS/PPS em cada quadro-chave: o trecho é concatenado a outros por cópia
+        command += ["-x264-params", "repeat-headers=1"]
+    # Quadros-chave nas bordas internas dos clips (permitem o reparo por segmento)
+    keyframes = [(frame - start_frame) / job.fps for frame, _ in frames[first + 1:last]]
+    if keyframes:
+        command += ["-force_key_frames", ",".join(f"{t:.6f}" for t in keyframes)]
+    command += ["-frames:v", str(end_frame - start_frame), str(output_path)]
+    if tap is not None:
+        command += tap.output_args(frames=end_frame - start_frame)
+    return command
+
+
+def build_segment_command(
+    job: CompositionJob, index: int, output_path: str, tap: Optional[QualityTap] = None
+) -> List[str]:
+    """
+    Comando que renderiza só o segmento `index` da composição (sem áudio),
+    usado para substituir o trecho no arquivo final.
+    """
+    return build_chunk_command(job, index, index + 1, output_path, tap)
+
+
+def build_audio_command(job: CompositionJob, output_path: str, tap: Optional[QualityTap] = None) -> List[str]:
+    """Comando que renderiza só a trilha de áudio da composição (repetida ou cortada na duração total)."""
+    inputs: List[str] = []
+    if job.audio_duration and job.audio_duration < job.total_duration:
+        inputs += ["-stream_loop", "-1"]
+    inputs += ["-i", str(job.audio_path)]
+    tap_audio = tap is not None and tap.audio_path is not None
+    graph = [
+        f"[0:a]atrim=duration={job.total_duration:.3f},asetpts=PTS-STARTPTS"
+        + (",asplit=2[aout][qa_src]" if tap_audio else "[aout]")
+    ]
+    if tap_audio:
+        graph.append(f"[qa_src]{tap.audio_filter()}[qa]")
+    command = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y", *inputs,
+        "-filter_complex", ";".join(graph), "-map", "[aout]", "-vn",
+        "-c:a", job.audio_codec, str(output_path),
+    ]
+    if tap is not None:
+        command += tap.output_args()
+    return command
+
+
+class FilterGraphRenderer:
+    """Executa composições finais com um único processo FFmpeg."""
+
+    def __init__(self, timeout: float = 1800.0, runner: Optional[FFmpegRunner] = None):
+        """
+        Args:
+            timeout: Tempo máximo (s) de cada renderização
+            runner: Executor de processos FFmpeg (padrão: executor compartilhado)
+        """
+        self.timeout = timeout
+        self.runner = runner or get_ffmpeg_runner()
+        self.logger = logging.getLogger(__name__)
+
+    def render(
+        self, job: CompositionJob, output_path: str, monitor: Optional[QualityMonitor] = None
+    ) -> CompositionResult:
+        """
+        Renderiza a composição em `output_path`.
+
+        Args:
+            job: Composição
+            output_path: Arquivo de saída
+            monitor: Monitor de qualidade alimentado durante o encode
+                (o relatório fica em `CompositionResult.quality`)
+
+        Raises:
+            VideoProcessingError: Se o FFmpeg falhar ou não gerar a saída
+        """
+        target = Path(output_path)
+        start_time = time.time()
+        command = self._run_with_tap(
+            lambda partial, tap: build_composition_command(job, partial, tap),
+            target, job.total_duration, monitor, with_audio=bool(job.audio_path),
+            video_size=(job.width, job.height),
+        )
+        result = CompositionResult(
+            path=str(target), duration=job.total_duration,
+            elapsed=time.time() - start_time, command=command,
+            quality=monitor.report() if monitor else None,
+        )
+        self.logger.info(
+            f"Composição renderizada por filter_complex: {len(job.segments)} clips, "
+            f"{len(job.captions)} legendas, {result.duration:.1f}s em {result.elapsed:.2f}s "
+            f"({result.speed:.2f}x tempo real)"
+        )
+        return result
+
+    def render_chunked(
+        self,
+        job: CompositionJob,
+        output_path: str,
+        workers: int,
+        monitor: Optional[QualityMonitor] = None,
+        min_chunk_duration: float = 2.0,
+    ) -> CompositionResult:
+        """
+        Renderiza a composição em trechos paralelos juntados por cópia.
+
+        A linha do tempo é dividida em bordas de clips (`plan_chunks`); cada
+        trecho é um processo FFmpeg com o mesmo encode e o número exato de
+        quadros, a trilha de áudio é renderizada uma única vez e tudo é
+        reunido pelo concat demuxer sem reencodar. Com um só trecho, equivale
+        a `render`.
+
+        Args:
+            job: Composição
+            output_path: Arquivo de saída
+            workers: Processos FFmpeg simultâneos
+            monitor: Monitor de qualidade; recebe a junção dos relatórios dos trechos
+            min_chunk_duration: Duração mínima (s) de cada trecho
+
+        Raises:
+            VideoProcessingError: Se algum trecho, o áudio ou a junção falharem
+        """
+        chunks = plan_chunks(job, workers, min_chunk_duration)
+        if len(chunks) <= 1:
+            return self.render(job, output_path, monitor=monitor)
+
+        target = Path(output_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        start_time = time.time()
+        frames = job.segment_frames()
+        # Divide os núcleos entre os encoders simultâneos
+        threads = max(1, (os.cpu_count() or 1) // len(chunks))
+        monitors = [monitor.sibling() if monitor else None for _ in chunks]
+        audio_monitor = monitor.sibling() if monitor and job.audio_path else None
+
+        with tempfile.TemporaryDirectory(prefix="chunks_", dir=str(target.parent)) as work_dir:
+            work = Path(work_dir)
+
+            def _render_chunk(position: int) -> str:
+                first, last = chunks[position]
+                path = work / f"chunk{position:04d}.mp4"
+                self._run_with_tap(
+                    lambda partial, tap: build_chunk_command(job, first, last, partial, tap, threads),
+                    path, (frames[last - 1][1] - frames[first][0]) / job.fps, monitors[position],
+                    with_audio=False, video_size=(job.width, job.height),
+                )
+                return str(path)
+
+            def _render_audio() -> str:
+                path = work / "audio.m4a"
+                self._run_with_tap(
+                    lambda partial, tap: build_audio_command(job, partial, tap),
+                    path, job.total_duration, audio_monitor,
+                    with_audio=True, video_size=(job.width, job.height), with_video=False,
+                )
+                return str(path)
+
+            with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+                audio_future = pool.submit(_render_audio) if job.audio_path else None
+                parts = list(pool.map(_render_chunk, range(len(chunks))))
+                audio_path = audio_future.result() if audio_future else None
+
+            list_path = work / "chunks.txt"
+            write_concat_list(parts, list_path)
+            partial = str(self._partial(target))
+            command = (
+                build_splice_command(str(list_path), audio_path, partial) if audio_path
+                else build_concat_command(str(list_path), partial)
+            )
+            self._execute(command, target, job.total_duration, label=f"concat_{target.name}",
+                          video_path=str(target))
+
+        quality = None
+        if monitor is not None:
+            quality = merge_reports(
+                [(frames[first][0] / job.fps, chunk_monitor.report())
+                 for (first, _), chunk_monitor in zip(chunks, monitors)],
+                audio_monitor.report() if audio_monitor else None,
+                fps=job.fps,
+            )
+            monitor.absorb(quality)
+        result = CompositionResult(
+            path=str(target), duration=job.total_duration, elapsed=time.time() - start_time,
+            command=command, quality=quality, chunks=len(chunks),
+        )
+        self.logger.info(
+            f"Composição renderizada em {len(chunks)} trechos paralelos: {len(job.segments)} clips, "
+            f"{result.duration:.1f}s em {result.elapsed:.2f}s ({result.speed:.2f}x tempo real)"
+        )
+        return result
+
+    def render_segment(
+        self, job: CompositionJob, index: int, output_path: str, monitor: Optional[QualityMonitor] = None
+    ) -> CompositionResult:
+        """
+        Renderiza só o clip `index` da composição (sem áudio), pronto para
+        substituir o mesmo trecho do vídeo completo com `splice`.
+
+        Raises:
+            VideoProcessingError: Se o FFmpeg falhar ou não gerar a saída
+        """
+        target = Path(output_path)
+        start_frame, end_frame = job.segment_frames()[index]
+        duration = (end_frame - start_frame) / job.fps
+        start_time = time.time()
+        command = self._run_with_tap(
+            lambda partial, tap: build_segment_command(job, index, partial, tap),
+            target, duration, monitor, with_audio=False, video_size=(job.width, job.height),
+        )
+        return CompositionResult(
+            path=str(target), duration=duration, elapsed=time.time() - start_time,
+            command=command, quality=monitor.report() if monitor else None,
+        )
+
+    def splice(
+        self, source_path: str, job: CompositionJob, replacements: Dict[int, str], output_path: str
+    ) -> str:
+        """
+        Substitui clips do vídeo renderizado por trechos renderizados de novo.
+
+        O vídeo é dividido por cópia nos quadros-chave das bordas dos clips
+        substituídos e reunido com os novos trechos e o áudio original — nada
+        além dos trechos novos é reencodado.
+
+        Raises:
+            VideoProcessingError: Se a divisão ou a junção falharem
+        """
+        frames = job.segment_frames()
+        cuts = sorted({
+            frame for index in replacements for frame in frames[index]
+            if 0 < frame < frames[-1][1]
+        })
+        target = Path(output_path)
+        with tempfile.TemporaryDirectory(prefix="splice_", dir=str(target.parent)) as work_dir:
+            work = Path(work_dir)
+            self._execute(
+                build_split_command(source_path, cuts, str(work / "part%04d.mp4")),
+                None, None, label=f"split_{target.name}", video_path=source_path,
+            )
+            if len(list(work.glob("part*.mp4"))) != len(cuts) + 1:
+                raise VideoProcessingError(
+                    f"Divisão sem quadros-chave nas bordas dos clips: {source_path}", video_path=source_path
+                )
+            # Trecho i do vídeo original cobre [cuts[i-1], cuts[i])
+            boundaries = [0, *cuts, frames[-1][1]]
+            starts = {frames[index][0]: path for index, path in replacements.items()}
+            parts = []
+            for part_index, frame in enumerate(boundaries[:-1]):
+                original = work / f"part{part_index:04d}.mp4"
+                parts.append(starts.get(frame, str(original)))
+            missing = [part for part in parts if not Path(part).exists()]
+            if missing:
+                raise VideoProcessingError(f"Trechos ausentes na junção: {missing}", video_path=source_path)
+            list_path = work / "splice.txt"
+            write_concat_list(parts, list_path)
+            self._execute(
+                build_splice_command(str(list_path), source_path, str(self._partial(target))),
+                target, job.total_duration, label=f"splice_{target.name}", video_path=str(target),
+            )
+        self.logger.info(f"{len(replacements)} clip(s) substituído(s) por junção sem reencode: {target.name}")
+        return str(target)
+
+    def repair_audio(self, source_path: str, output_path: str, gain_db: float = 0.0,
+                     limit: bool = False, duration: Optional[float] = None) -> str:
+        """
+        Reencoda só a trilha de áudio (ganho e/ou limitador); o vídeo é copiado.
+
+        Raises:
+            VideoProcessingError: Se o FFmpeg falhar
+        """
+        filters = []
+        if gain_db:
+            filters.append(f"volume={gain_db:.1f}dB")
+        if limit or gain_db > 0:
+            filters.append("alimiter=limit=0.891:level=disabled")
+        target = Path(output_path)
+        command = [
+            "ffmpeg", "-hide_banner", "-nostdin", "-y",
+            "-i", str(source_path),
+            "-map", "0:v:0", "-map", "0:a:0",
+            "-c:v", "copy",
+            "-af", ",".join(filters or ["anull"]),
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            str(self._partial(target)),
+        ]
+        self._execute(command, target, duration, label=f"audio_{target.name}", video_path=str(target))
+        return str(target)
+
+    def _run_with_tap(self, build, target: Path, duration: float, monitor: Optional[QualityMonitor],
+                      with_audio: bool, video_size: Tuple[int, int], with_video: bool = True) -> List[str]:
+        if monitor is None:
+            command = build(str(self._partial(target)), None)
+            self._execute(command, target, duration, label=target.name, video_path=str(target))
+            return command
+        with QualityTap(monitor, video_size, with_audio=with_audio, with_video=with_video) as tap:
+            command = build(str(self._partial(target)), tap)
+            self._execute(command, target, duration, label=target.name, video_path=str(target))
+        return command
+
+    @staticmethod
+    def _partial(target: Path) -> Path:
+        return target.with_name(f"{target.stem}.partial{target.suffix}")
+
+    def _execute(self, command: List[str], target: Optional[Path], duration: Optional[float],
+                 label: str, video_path: str) -> None:
+        """Executa o FFmpeg; com `target`, o comando grava no arquivo parcial, que substitui o destino ao final."""
+        partial = self._partial(target) if target is not None else None
+        if target is not None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.runner.run(
+                command, duration=duration, timeout=self.timeout, label=label, video_path=video_path,
+            )
+        except FFmpegError as error:
+            if partial is not None:
+                partial.unlink(missing_ok=True)
+            raise VideoProcessingError(
+                f"Erro na renderização por filter_complex ({error.kind}): {video_path}",
+                video_path=video_path,
+                ffmpeg_error=error.details.get("ffmpeg_error"),
+            ) from error
+        if partial is None:
+            return
+        if not partial.exists():
+            raise VideoProcessingError(f"Renderização não gerou saída: {partial}", video_path=str(target))
+        partial.replace(target)
@@ -0,0 +1,482 @@
+"""
+Preparação de clips "mezzanine" em uma única passada do FFmpeg.
+
+Um clip de B-roll é cortado, redimensionado para o layout vertical
+"sandwich" (vídeo centralizado sobre fundo desfocado com barras), tem FPS e
+formato de pixel normalizados e é gravado pronto para concatenação — uma
+única decodificação e um único encode, em vez de corte, normalização e
+composição em etapas separadas.
+
+Também gera o formato intermediário de edição da biblioteca de B-roll
+(GOP curto ou só intra, resolução/FPS/formato de pixel fixos), em que
+seek, amostragem de frames e loop custam uma decodificação curta.
+"""
+
+import hashlib
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+
+from src.utils.exceptions import FFmpegError, VideoProcessingError
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+
+
+@dataclass(frozen=True)
+class MezzanineSpec:
+    """Formato de saída dos clips preparados (equivalente ao layout do compositor)."""
+
+    width: int = 1080
+    height: int = 1920
+    fps: int = 30
+    pix_fmt: str = "yuv420p"
+    background_color: str = "#000000"
+    blur_sigma: float = 35.0
+    # O fundo é desfocado em resolução reduzida (mesmo resultado visual, bem mais barato)
+    blur_downscale: int = 8
+    bar_opacity: float = 0.92
+    codec: str = "libx264"
+    preset: str = "veryfast"
+    crf: int = 18
+    # Keyframe a cada `gop_seconds` para cortes posteriores por cópia
+    gop_seconds: float = 1.0
+    keep_audio: bool = False
+
+    @classmethod
+    def from_template(cls, template_config, fps: int = 30, **overrides) -> "MezzanineSpec":
+        """Cria a especificação a partir de um TemplateConfig do compositor."""
+        width, height = template_config.resolution
+        return cls(
+            width=int(width),
+            height=int(height),
+            fps=int(fps),
+            background_color=template_config.background_color or "#000000",
+            **overrides,
+        )
+
+    def cache_token(self) -> str:
+        """Identificador estável da especificação (parte da chave de cache)."""
+        payload = repr(sorted(asdict(self).items())).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class IntermediateSpec:
+    """
+    Formato intermediário de edição dos clips da biblioteca.
+
+    Sem layout: o vídeo só é redimensionado para caber no quadro de destino
+    (mantendo o aspecto), com FPS e formato de pixel constantes e GOP curto
+    (ou apenas quadros intra), sem B-frames.
+    """
+
+    width: int = 1080
+    height: int = 1920
+    fps: int = 30
+    pix_fmt: str = "yuv420p"
+    codec: str = "libx264"
+    preset: str = "veryfast"
+    crf: int = 16
+    gop_frames: int = 15
+    all_intra: bool = False
+    keep_audio: bool = False
+
+    @classmethod
+    def from_template(cls, template_config, fps: int = 30, **overrides) -> "IntermediateSpec":
+        """Cria a especificação a partir de um TemplateConfig do compositor."""
+        width, height = template_config.resolution
+        return cls(width=int(width), height=int(height), fps=int(fps), **overrides)
+
+    @property
+    def gop(self) -> int:
+        return 1 if self.all_intra else max(1, int(self.gop_frames))
+
+    def cache_token(self) -> str:
+        """Identificador estável da especificação (parte da chave de cache)."""
+        payload = repr(sorted(asdict(self).items())).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+
+@dataclass
+class MezzanineClip:
+    """Clip preparado e métricas da preparação."""
+
+    path: str
+    source_path: str
+    start: float
+    duration: float
+    elapsed: float
+    cached: bool = False
+    looped: bool = False
+    command: List[str] = field(default_factory=list)
+
+
+def _ffmpeg_color(hex_color: str) -> str:
+    """Converte '#RRGGBB' para a notação de cor do FFmpeg (0xRRGGBB)."""
+    value = (hex_color or "#000000").lstrip("#")
+    if len(value) == 3:
+        value = "".join(ch * 2 for ch in value)
+    return f"0x{value[:6].upper()}"
+
+
+def fitted_size(source_size: Tuple[int, int], target_size: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    Dimensões do vídeo centralizado no layout sandwich (mantém o aspecto,
+    encaixado pela largura ou pela altura, com lados pares).
+    """
+    src_w, src_h = source_size
+    target_w, target_h = target_size
+    if not src_w or not src_h:
+        return target_w, target_h
+    if src_w / src_h >= target_w / target_h:
+        width, height = target_w, round(src_h * target_w / src_w)
+    else:
+        width, height = round(src_w * target_h / src_h), target_h
+    return max(2, width - width % 2), max(2, height - height % 2)
+
+
+def build_sandwich_filtergraph(
+    spec: MezzanineSpec,
+    source_size: Tuple[int, int],
+    input_label: str = "0:v",
+    output_label: str = "v",
+    label_prefix: str = "",
+) -> str:
+    """
+    Monta o filter graph do layout vertical sandwich.
+
+    Fundo: o próprio vídeo esticado para o quadro e desfocado (em resolução
+    reduzida); barras semitransparentes acima e abaixo do vídeo; vídeo
+    redimensionado mantendo o aspecto, centralizado. FPS e formato de pixel
+    são normalizados no mesmo grafo.
+
+    `label_prefix` diferencia os rótulos internos quando vários layouts
+    fazem parte do mesmo filter_complex.
+    """
+    width, height = spec.width, spec.height
+    fit_w, fit_h = fitted_size(source_size, (width, height))
+    padding = max((height - fit_h) // 2, 0)
+    downscale = max(1, int(spec.blur_downscale))
+    small_w = max(2, (width // downscale) // 2 * 2)
+    small_h = max(2, (height // downscale) // 2 * 2)
+    sigma = max(spec.blur_sigma / downscale, 0.5)
+    color = f"{_ffmpeg_color(spec.background_color)}@{spec.bar_opacity:.2f}"
+
+    background = [
+        f"scale={small_w}:{small_h}",
+        f"gblur=sigma={sigma:.2f}",
+        f"scale={width}:{height}",
+        "setsar=1",
+    ]
+    if padding > 0:
+        background.extend([
+            f"drawbox=x=0:y=0:w={width}:h={padding}:color={color}:t=fill",
+            f"drawbox=x=0:y={height - padding}:w={width}:h={padding}:color={color}:t=fill",
+        ])
+
+    p = label_prefix
+    return ";".join([
+        f"[{input_label}]fps={spec.fps},split=2[{p}bg_src][{p}fg_src]",
+        f"[{p}bg_src]{','.join(background)}[{p}bg]",
+        f"[{p}fg_src]scale={fit_w}:{fit_h},setsar=1[{p}fg]",
+        f"[{p}bg][{p}fg]overlay=x=(W-w)/2:y=(H-h)/2,format={spec.pix_fmt}[{output_label}]",
+    ])
+
+
+def probe_video_size(video_path: str) -> Tuple[Tuple[int, int], float]:
+    """Retorna ((largura, altura), duração em segundos) lendo o cabeçalho do vídeo."""
+    capture = cv2.VideoCapture(str(video_path))
+    try:
+        if not capture.isOpened():
+            raise VideoProcessingError(f"Não foi possível abrir o vídeo: {video_path}", video_path=str(video_path))
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0.0
+        duration = frames / fps if fps > 0 else 0.0
+        return (width, height), duration
+    finally:
+        capture.release()
+
+
+def build_mezzanine_command(
+    input_path: str,
+    output_path: str,
+    spec: MezzanineSpec,
+    source_size: Tuple[int, int],
+    *,
+    start: float = 0.0,
+    duration: Optional[float] = None,
+    loop: bool = False,
+) -> List[str]:
+    """
+    Comando FFmpeg de uma passada: corte (seek na entrada), layout, FPS,
+    formato de pixel e encode do clip mezzanine.
+    """
+    command = ["ffmpeg", "-hide_banner", "-nostdin", "-y"]
+    if loop:
+        # Clips mais curtos que o trecho pedido são repetidos, como no compositor
+        command += ["-stream_loop", "-1"]
+    if start > 0:
+        command += ["-ss", f"{start:.3f}"]
+    command += ["-i", str(input_path)]
+    if duration is not None:
+        command += ["-t", f"{duration:.3f}"]
+
+    command += [
+        "-filter_complex", build_sandwich_filtergraph(spec, source_size),
+        "-map", "[v]",
+    ]
+    if spec.keep_audio:
+        command += ["-map", "0:a:0?", "-c:a", "aac", "-b:a", "128k", "-ar", "48000"]
+    else:
+        command += ["-an"]
+
+    command += [
+        "-c:v", spec.codec,
+        "-preset", spec.preset,
+        "-crf", str(spec.crf),
+        "-pix_fmt", spec.pix_fmt,
+        "-r", str(spec.fps),
+        "-g", str(max(1, int(round(spec.fps * spec.gop_seconds)))),
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+    return command
+
+
+def build_intermediate_command(
+    input_path: str,
+    output_path: str,
+    spec: IntermediateSpec,
+    source_size: Tuple[int, int],
+) -> List[str]:
+    """Comando FFmpeg que converte o vídeo inteiro para o formato intermediário."""
+    fit_w, fit_h = fitted_size(source_size, (spec.width, spec.height))
+    command = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y",
+        "-i", str(input_path),
+        "-map", "0:v:0",
+        "-vf", f"fps={spec.fps},scale={fit_w}:{fit_h}:flags=lanczos,setsar=1,format={spec.pix_fmt}",
+    ]
+    if spec.keep_audio:
+        command += ["-map", "0:a:0?", "-c:a", "aac", "-b:a", "128k", "-ar", "48000"]
+    else:
+        command += ["-an"]
+
+    command += [
+        "-c:v", spec.codec,
+        "-preset", spec.preset,
+        "-crf", str(spec.crf),
+        "-pix_fmt", spec.pix_fmt,
+        "-r", str(spec.fps),
+        "-g", str(spec.gop),
+        "-keyint_min", str(spec.gop),
+        "-sc_threshold", "0",
+        "-bf", "0",
+        "-movflags", "+faststart",
+        str(output_path),
+    ]
+    return command
+
+
+class MezzanineRenderer:
+    """
+    Gera clips mezzanine em uma passada do FFmpeg, com cache em disco.
+
+    O nome do arquivo deriva da origem (caminho, tamanho, mtime), do trecho e
+    da especificação; preparar de novo o mesmo trecho reaproveita o arquivo.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_workers: int = 2,
+        timeout: float = 600.0,
+        runner: Optional[FFmpegRunner] = None,
+    ):
+        """
+        Args:
+            cache_dir: Diretório dos clips preparados
+            max_workers: Processos FFmpeg simultâneos em `render_many`
+            timeout: Tempo máximo (s) de cada passada
+            runner: Executor de processos FFmpeg (padrão: executor compartilhado)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(tempfile.gettempdir()) / "aishorts_mezzanine"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.runner = runner or get_ffmpeg_runner()
+        self.logger = logging.getLogger(__name__)
+
+    def render(
+        self,
+        video_path: str,
+        spec: MezzanineSpec,
+        *,
+        start: float = 0.0,
+        duration: Optional[float] = None,
+        output_path: Optional[str] = None,
+    ) -> MezzanineClip:
+        """
+        Prepara um trecho do vídeo no formato da especificação.
+
+        Args:
+            video_path: Vídeo de origem
+            spec: Formato/layout de saída
+            start: Início do trecho (s)
+            duration: Duração do trecho (s); None usa o restante do vídeo.
+                Se o vídeo for mais curto, ele é repetido até completar.
+            output_path: Caminho de saída (padrão: cache)
+
+        Returns:
+            MezzanineClip com o caminho gerado
+
+        Raises:
+            VideoProcessingError: Se a origem não existir ou o FFmpeg falhar
+        """
+        source = Path(video_path)
+        if not source.exists():
+            raise VideoProcessingError(f"Vídeo não encontrado: {source}", video_path=str(source))
+
+        source_size, source_duration = probe_video_size(str(source))
+        loop = bool(duration and source_duration and start + duration > source_duration + 0.05)
+        target = Path(output_path) if output_path else self._cache_path(source, spec, start, duration)
+        if output_path is None and target.exists() and target.stat().st_size > 0:
+            return MezzanineClip(
+                path=str(target), source_path=str(source), start=start,
+                duration=duration or max(source_duration - start, 0.0), elapsed=0.0,
+                cached=True, looped=loop,
+            )
+
+        partial = self._partial_path(target)
+        command = build_mezzanine_command(
+            str(source), str(partial), spec, source_size,
+            start=start, duration=duration, loop=loop,
+        )
+        elapsed = self._execute(command, source, partial, target, duration=duration)
+
+        self.logger.info(
+            f"Clip preparado em uma passada ({elapsed:.2f}s): {source.name} -> {target.name}"
+        )
+        return MezzanineClip(
+            path=str(target), source_path=str(source), start=start,
+            duration=duration or max(source_duration - start, 0.0), elapsed=elapsed,
+            looped=loop, command=command,
+        )
+
+    def render_intermediate(
+        self,
+        video_path: str,
+        spec: IntermediateSpec,
+        *,
+        output_path: Optional[str] = None,
+    ) -> MezzanineClip:
+        """
+        Converte o vídeo inteiro para o formato intermediário de edição.
+
+        Args:
+            video_path: Vídeo de origem
+            spec: Formato intermediário
+            output_path: Caminho de saída (padrão: cache)
+
+        Raises:
+            VideoProcessingError: Se a origem não existir ou o FFmpeg falhar
+        """
+        source = Path(video_path)
+        if not source.exists():
+            raise VideoProcessingError(f"Vídeo não encontrado: {source}", video_path=str(source))
+
+        source_size, source_duration = probe_video_size(str(source))
+        target = Path(output_path) if output_path else self._cache_path(source, spec, 0.0, None)
+        if output_path is None and target.exists() and target.stat().st_size > 0:
+            return MezzanineClip(
+                path=str(target), source_path=str(source), start=0.0,
+                duration=source_duration, elapsed=0.0, cached=True,
+            )
+
+        partial = self._partial_path(target)
+        command = build_intermediate_command(str(source), str(partial), spec, source_size)
+        elapsed = self._execute(command, source, partial, target, duration=source_duration)
+
+        self.logger.info(
+            f"Intermediário gerado ({elapsed:.2f}s, GOP {spec.gop}): {source.name} -> {target.name}"
+        )
+        return MezzanineClip(
+            path=str(target), source_path=str(source), start=0.0,
+            duration=source_duration, elapsed=elapsed, command=command,
+        )
+
+    def render_many(
+        self,
+        jobs: Sequence[Dict[str, Any]],
+        spec: MezzanineSpec,
+    ) -> List[Optional[MezzanineClip]]:
+        """
+        Prepara vários trechos em paralelo.
+
+        Args:
+            jobs: Dicionários com `video_path` e, opcionalmente, `start` e `duration`
+            spec: Formato/layout de saída
+
+        Returns:
+            Lista na mesma ordem dos jobs; None para os que falharam
+        """
+        def _render(job: Dict[str, Any]) -> Optional[MezzanineClip]:
+            try:
+                return self.render(
+                    job["video_path"], spec,
+                    start=float(job.get("start", 0.0)),
+                    duration=job.get("duration"),
+                )
+            except Exception as error:
+                self.logger.warning(f"Falha ao preparar {job.get('video_path')}: {error}")
+                return None
+
+        if len(jobs) <= 1 or self.max_workers == 1:
+            return [_render(job) for job in jobs]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            return list(pool.map(_render, jobs))
+
+    def _execute(self, command: List[str], source: Path, partial: Path, target: Path,
+                 duration: Optional[float] = None) -> float:
+        """Roda o FFmpeg gravando em `partial` e publica em `target`; retorna o tempo gasto."""
+        try:
+            result = self.runner.run(
+                command, duration=duration, timeout=self.timeout, label=target.name, video_path=str(source)
+            )
+        except FFmpegError as error:
+            partial.unlink(missing_ok=True)
+            raise VideoProcessingError(
+                f"Erro na preparação do clip ({error.kind}): {source}",
+                video_path=str(source),
+                ffmpeg_error=error.details.get("ffmpeg_error"),
+            ) from error
+        if not partial.exists():
+            raise VideoProcessingError(f"Clip preparado não foi criado: {partial}", video_path=str(source))
+        partial.replace(target)
+        return result.elapsed
+
+    @staticmethod
+    def _partial_path(target: Path) -> Path:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target.with_name(f"{target.stem}.partial{target.suffix}")
+
+    def _cache_path(
+        self,
+        source: Path,
+        spec: Union[MezzanineSpec, IntermediateSpec],
+        start: float,
+        duration: Optional[float],
+    ) -> Path:
+        stat = source.stat()
+        key = "|".join([
+            str(source.resolve()), str(stat.st_size), str(stat.st_mtime_ns),
+            f"{start:.3f}", f"{duration:.3f}" if duration else "full", spec.cache_token(),
+        ])
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"{source.stem}_{digest}.mp4"
@@ -0,0 +1,253 @@
+"""
+Export do vídeo final para várias plataformas em uma única passada do FFmpeg.
+
+O master é decodificado uma vez; `split`/`asplit` distribuem os quadros e o
+áudio para um encoder por plataforma (resolução, FPS, bitrate, corte de
+duração e alvo de loudness próprios), todos no mesmo processo e rodando em
+paralelo. Se a passada conjunta falhar, cada plataforma é refeita em um
+processo isolado, de modo que o erro de uma saída não derruba as demais.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from src.utils.exceptions import FFmpegError
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+from src.utils.media_probe import get_media_probe
+
+
+@dataclass
+class ExportTarget:
+    """Saída de uma plataforma no export em lote."""
+
+    name: str
+    output_path: str
+    width: int = 1080
+    height: int = 1920
+    fps: float = 30
+    bitrate: Optional[str] = "4M"
+    max_duration: Optional[float] = None
+    # Loudness integrada (LUFS) e pico verdadeiro (dBTP); None mantém o áudio do master
+    loudness: Optional[float] = -14.0
+    true_peak: float = -1.5
+    preset: str = "medium"
+    video_codec: str = "libx264"
+    audio_codec: str = "aac"
+    audio_bitrate: str = "192k"
+    sample_rate: int = 48000
+    pix_fmt: str = "yuv420p"
+
+    def duration(self, source_duration: float) -> float:
+        """Duração da saída após o corte em `max_duration`."""
+        if self.max_duration and (not source_duration or self.max_duration < source_duration):
+            return float(self.max_duration)
+        return source_duration
+
+    def video_filter(self) -> str:
+        """Conversão de FPS e resolução (sem distorcer: reduz e completa com barras)."""
+        return (
+            f"fps={self.fps:g},"
+            f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease:flags=lanczos,"
+            f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2:color=black,"
+            f"setsar=1,format={self.pix_fmt}"
+        )
+
+    def audio_filter(self) -> str:
+        """Normalização de loudness (uma passada) e reamostragem para a taxa de saída."""
+        filters = []
+        if self.loudness is not None:
+            filters.append(f"loudnorm=I={self.loudness:g}:TP={self.true_peak:g}:LRA=11")
+        filters.append(f"aresample={self.sample_rate}")
+        return ",".join(filters)
+
+
+@dataclass
+class ExportResult:
+    """Resultado do export de uma plataforma."""
+
+    name: str
+    path: Optional[str]
+    # "shared" (passada única) ou "isolated" (refeito em processo próprio)
+    mode: str = "shared"
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None and self.error is None
+
+
+@dataclass
+class MultiExportReport:
+    """Resumo do export em lote."""
+
+    source: str
+    duration: float
+    results: Dict[str, ExportResult] = field(default_factory=dict)
+    elapsed: float = 0.0
+    decodes: int = 0
+
+    @property
+    def paths(self) -> Dict[str, Optional[str]]:
+        return {name: result.path if result.ok else None for name, result in self.results.items()}
+
+
+def _partial_path(output_path: str) -> Path:
+    target = Path(output_path)
+    return target.with_name(f"{target.stem}.partial{target.suffix}")
+
+
+def build_multi_export_command(
+    input_path: str, targets: Sequence[ExportTarget], has_audio: bool = True
+) -> List[str]:
+    """
+    Comando FFmpeg que decodifica `input_path` uma vez e grava uma saída por alvo.
+
+    Cada saída é gravada no respectivo arquivo parcial (`<nome>.partial.mp4`).
+    """
+    if not targets:
+        raise ValueError("Nenhuma plataforma para exportar")
+    count = len(targets)
+    chains = []
+    if count > 1:
+        chains.append("[0:v]split=" + str(count) + "".join(f"[v{i}]" for i in range(count)))
+    for index, target in enumerate(targets):
+        source = f"[v{index}]" if count > 1 else "[0:v]"
+        chains.append(f"{source}{target.video_filter()}[vout{index}]")
+    if has_audio:
+        if count > 1:
+            chains.append("[0:a]asplit=" + str(count) + "".join(f"[a{i}]" for i in range(count)))
+        for index, target in enumerate(targets):
+            source = f"[a{index}]" if count > 1 else "[0:a]"
+            chains.append(f"{source}{target.audio_filter()}[aout{index}]")
+
+    command = ["ffmpeg", "-hide_banner", "-nostdin", "-y", "-i", str(input_path),
+               "-filter_complex", ";".join(chains)]
+    for index, target in enumerate(targets):
+        command += ["-map", f"[vout{index}]"]
+        if has_audio:
+            command += ["-map", f"[aout{index}]", "-c:a", target.audio_codec, "-b:a", target.audio_bitrate]
+        else:
+            command += ["-an"]
+        command += ["-c:v", target.video_codec, "-preset", target.preset]
+        if target.bitrate:
+            command += ["-b:v", target.bitrate]
+        command += ["-r", f"{target.fps:g}"]
+        if target.max_duration:
+            command += ["-t", f"{target.max_duration:.3f}"]
+        command += ["-movflags", "+faststart", str(_partial_path(target.output_path))]
+    return command
+
+
+class MultiPlatformExporter:
+    """Exporta o master para várias plataformas com uma única decodificação."""
+
+    def __init__(self, timeout: float = 1800.0, runner: Optional[FFmpegRunner] = None):
+        """
+        Args:
+            timeout: Tempo máximo (s) de cada execução do FFmpeg
+            runner: Executor de processos FFmpeg (padrão: executor compartilhado)
+        """
+        self.timeout = timeout
+        self.runner = runner or get_ffmpeg_runner()
+        self.logger = logging.getLogger(__name__)
+
+    def export(
+        self,
+        input_path: str,
+        targets: Sequence[ExportTarget],
+        has_audio: Optional[bool] = None,
+        duration: Optional[float] = None,
+    ) -> MultiExportReport:
+        """
+        Exporta `input_path` para todos os alvos.
+
+        Args:
+            input_path: Vídeo master
+            targets: Saídas por plataforma
+            has_audio: Se o master tem áudio (padrão: consulta a sonda de mídia)
+            duration: Duração do master (padrão: consulta a sonda de mídia)
+
+        Returns:
+            Relatório com o resultado de cada plataforma; falhas ficam em
+            `ExportResult.error` em vez de interromper as demais saídas.
+        """
+        start_time = time.time()
+        if has_audio is None or duration is None:
+            info = get_media_probe().probe(input_path)
+            if has_audio is None:
+                # Sem ffprobe a sonda não enxerga o áudio; o master final sempre tem trilha
+                has_audio = info.has_audio or info.source != "ffprobe"
+            if duration is None:
+                duration = info.duration
+        report = MultiExportReport(source=str(input_path), duration=duration or 0.0)
+
+        try:
+            self._run(input_path, targets, has_audio, report.duration, label=f"export {len(targets)} plataformas")
+            report.decodes += 1
+        except FFmpegError as error:
+            report.decodes += 1
+            self.logger.warning(
+                "Export conjunto falhou (%s); refazendo cada plataforma isoladamente", error.kind
+            )
+            for target in targets:
+                report.results[target.name] = self._export_isolated(input_path, target, has_audio, report)
+        else:
+            elapsed = time.time() - start_time
+            for target in targets:
+                report.results[target.name] = self._finish(target, "shared", elapsed)
+
+        report.elapsed = time.time() - start_time
+        self.logger.info(
+            "Export em lote: %d/%d plataformas em %.1fs (%d decodificações)",
+            sum(1 for result in report.results.values() if result.ok), len(targets),
+            report.elapsed, report.decodes,
+        )
+        return report
+
+    def _export_isolated(
+        self, input_path: str, target: ExportTarget, has_audio: bool, report: MultiExportReport
+    ) -> ExportResult:
+        start_time = time.time()
+        try:
+            self._run(input_path, [target], has_audio, report.duration, label=f"export {target.name}")
+        except FFmpegError as error:
+            self.logger.error("Export para %s falhou: %s", target.name, error)
+            return ExportResult(
+                name=target.name, path=None, mode="isolated",
+                error=error.details.get("ffmpeg_error") or str(error),
+                elapsed=time.time() - start_time,
+            )
+        finally:
+            report.decodes += 1
+        return self._finish(target, "isolated", time.time() - start_time)
+
+    def _run(self, input_path: str, targets: Sequence[ExportTarget], has_audio: bool,
+             duration: float, label: str) -> None:
+        for target in targets:
+            Path(target.output_path).parent.mkdir(parents=True, exist_ok=True)
+        command = build_multi_export_command(input_path, targets, has_audio)
+        try:
+            self.runner.run(
+                command,
+                duration=max(target.duration(duration) for target in targets) or None,
+                timeout=self.timeout, label=label, video_path=str(input_path),
+            )
+        except FFmpegError:
+            for target in targets:
+                _partial_path(target.output_path).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _finish(target: ExportTarget, mode: str, elapsed: float) -> ExportResult:
+        partial = _partial_path(target.output_path)
+        if not partial.exists() or partial.stat().st_size == 0:
+            partial.unlink(missing_ok=True)
+            return ExportResult(
+                name=target.name, path=None, mode=mode, error="Export não gerou saída", elapsed=elapsed
+            )
+        partial.replace(target.output_path)
+        return ExportResult(name=target.name, path=str(target.output_path), mode=mode, elapsed=elapsed)
@@ -5,7 +5,6 @@ Ajusta vídeos para atender aos requisitos específicos de cada plataforma.
 """
 
 import os
-import subprocess
 import tempfile
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
@@ -15,6 +14,8 @@ from dataclasses import asdict
 from src.config.video_platforms import (
     Platform, VideoPlatformConfig, video_config, get_category_config, get_timing_preset
 )
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+from src.utils.media_probe import MediaProbe, get_media_probe
 
 class VideoProcessingError(Exception):
     """Exceção específica para processamento de vídeo."""
@@ -23,16 +24,21 @@ class VideoProcessingError(Exception):
 class PlatformOptimizer:
     """Otimizador de vídeo para diferentes plataformas."""
     
-    def __init__(self, temp_dir: str = None):
+    def __init__(self, temp_dir: str = None, media_probe: Optional[MediaProbe] = None,
+                 runner: Optional[FFmpegRunner] = None):
         """
         Inicializa o otimizador.
         
         Args:
             temp_dir: Diretório temporário para arquivos intermediários
+            media_probe: Sonda de mídia (padrão: sonda compartilhada do processo)
+            runner: Executor de processos FFmpeg (padrão: executor compartilhado)
         """
         self.config = video_config
         self.temp_dir = temp_dir or tempfile.mkdtemp(prefix="video_opt_")
         self.logger = logging.getLogger(__name__)
+        self.media_probe = media_probe or get_media_probe()
+        self.runner = runner or get_ffmpeg_runner()
         
         # Criar diretório temporário se não existir
         Path(self.temp_dir).mkdir(parents=True, exist_ok=True)
@@ -257,11 +263,12 @@ class PlatformOptimizer:
         ]
         
         # Executar comando
-        result = subprocess.run(
-            ffmpeg_cmd, 
-            capture_output=True, 
-            text=True, 
-            timeout=300  # 5 minutos máximo
+        result = self.runner.run(
+            ffmpeg_cmd,
+            duration=self._get_video_duration(input_path) or None,
+            timeout=300,  # 5 minutos máximo
+            check=False,
+            video_path=input_path,
         )
         
         return {
@@ -269,6 +276,8 @@ class PlatformOptimizer:
             "return_code": result.returncode,
             "stdout": result.stdout,
             "stderr": result.stderr,
+            "error_kind": result.error_kind,
+            "elapsed": result.elapsed,
             "file_size": os.path.getsize(output_path) if os.path.exists(output_path) else 0
         }
     
@@ -284,39 +293,20 @@ class PlatformOptimizer:
     
     def _get_video_duration(self, video_path: str) -> float:
         """Obtém a duração do vídeo em segundos."""
-        cmd = [
-            "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-            "-of", "default=noprint_wrappers=1:nokey=1", video_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-        return 0.0
+        return self.media_probe.get_duration(video_path)
     
     def _get_video_info(self, video_path: str) -> Dict[str, Any]:
-        """Obtém informações detalhadas do vídeo."""
-        cmd = [
-            "ffprobe", "-v", "quiet", "-print_format", "json",
-            "-show_format", "-show_streams", video_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            import json
-            return json.loads(result.stdout)
-        return {}
+        """Obtém informações detalhadas do vídeo (formato e streams do ffprobe)."""
+        try:
+            info = self.media_probe.probe(video_path)
+        except Exception as e:
+            self.logger.warning(f"Não foi possível sondar {video_path}: {e}")
+            return {}
+        return {"format": info.format, "streams": info.streams}
     
     def _check_video_integrity(self, video_path: str) -> bool:
         """Verifica integridade do arquivo de vídeo."""
-        cmd = [
-            "ffprobe", "-v", "error", "-select_streams", "v:0",
-            "-count_packets", "-show_entries", "stream=nb_read_packets",
-            "-of", "default=noprint_wrappers=1:nokey=1", video_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
+        return self.media_probe.check_integrity(video_path)
     
     def _calculate_optimal_timing(self, duration: float, specs, timing_config: Dict[str, int]) -> Dict[str, Any]:
         """Calcula timing otimizado para o vídeo."""
@@ -371,13 +361,14 @@ class PlatformOptimizer:
             output_path
         ]
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = self.runner.run(cmd, check=False, video_path=input_path)
         
         return {
             "command": " ".join(cmd),
             "return_code": result.returncode,
             "output": result.stdout,
-            "error": result.stderr
+            "error": result.stderr,
+            "error_kind": result.error_kind,
         }
     
     def _validate_output_video(self, video_path: str, specs) -> Dict[str, Any]:
@@ -0,0 +1,165 @@
+"""
+Modo rascunho (draft) da composição final.
+
+Perfil de render barato para iterar em templates, legendas e layout: a
+mesma linha do tempo do render final em resolução reduzida (540x960 ou
+menor), preset `ultrafast` e FPS reduzido. Tamanhos em pixels do estilo das
+legendas são escalados junto, então a prévia mantém o layout. Opcionalmente
+gera uma folha de contatos (quadros fixos em grade) para revisão rápida.
+"""
+
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.video.processing.ass_captions import CAPTION_STYLE_DEFAULTS
+
+
+logger = logging.getLogger(__name__)
+
+# Chaves do estilo de legenda medidas em pixels (proporções ficam como estão)
+PIXEL_STYLE_KEYS = ("font_size", "line_spacing", "padding_horizontal", "padding_vertical", "stroke_width")
+
+
+@dataclass
+class DraftProfile:
+    """Parâmetros do render de rascunho."""
+
+    max_height: int = 960
+    fps: int = 15
+    preset: str = "ultrafast"
+    bitrate: Optional[str] = "1M"
+    contact_sheet: bool = True
+    sheet_columns: int = 4
+    sheet_rows: int = 3
+    sheet_width: int = 1280
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> "DraftProfile":
+        known = set(cls.__dataclass_fields__)
+        return cls(**{key: value for key, value in (settings or {}).items() if key in known})
+
+    def resolution(self, resolution: Tuple[int, int]) -> Tuple[int, int]:
+        """Resolução do rascunho: no máximo `max_height` de altura, lados pares."""
+        return draft_resolution(resolution, self.max_height)
+
+    def scale(self, resolution: Tuple[int, int]) -> float:
+        width, _ = self.resolution(resolution)
+        return width / float(resolution[0]) if resolution[0] else 1.0
+
+
+@dataclass
+class PreviewResult:
+    """Saídas do render de rascunho."""
+
+    video_path: str
+    resolution: Tuple[int, int]
+    fps: int
+    elapsed: float
+    contact_sheet_path: Optional[str] = None
+    # Preenchido por quem revisa a prévia (ex.: orquestrador)
+    approved: Optional[bool] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def draft_resolution(resolution: Tuple[int, int], max_height: int = 960) -> Tuple[int, int]:
+    """Reduz `resolution` mantendo a proporção (nunca amplia)."""
+    width, height = int(resolution[0]), int(resolution[1])
+    if height <= max_height:
+        return width // 2 * 2, height // 2 * 2
+    scale = max_height / float(height)
+    return max(int(round(width * scale)) // 2 * 2, 2), max(int(max_height) // 2 * 2, 2)
+
+
+def scale_caption_style(style: Optional[Dict[str, Any]], scale: float) -> Dict[str, Any]:
+    """Cópia do estilo com os tamanhos em pixels multiplicados por `scale`."""
+    scaled = dict(style or {})
+    for key in PIXEL_STYLE_KEYS:
+        if key in scaled and isinstance(scaled[key], (int, float)):
+            scaled[key] = max(1, int(round(scaled[key] * scale))) if scaled[key] else scaled[key]
+    return scaled
+
+
+def scale_captions(captions: Optional[List[Dict[str, Any]]], scale: float) -> Optional[List[Dict[str, Any]]]:
+    """
+    Legendas com o estilo escalado para a resolução do rascunho.
+
+    Tamanhos ausentes recebem o padrão do renderizador antes da escala; sem
+    isso sairiam no tamanho da resolução final sobre o quadro reduzido.
+    """
+    if not captions:
+        return captions
+    scaled = []
+    for caption in captions:
+        style = {**CAPTION_STYLE_DEFAULTS, **(caption.get("style") or {})}
+        scaled.append({**caption, "style": scale_caption_style(style, scale)})
+    return scaled
+
+
+def build_contact_sheet(
+    video_path: str,
+    output_path: str,
+    columns: int = 4,
+    rows: int = 3,
+    width: int = 1280,
+) -> Optional[str]:
+    """
+    Gera uma folha de contatos: `columns` x `rows` quadros distribuídos pelo
+    vídeo, com o instante de cada um.
+
+    Returns:
+        Caminho da imagem, ou None se o vídeo não puder ser lido
+    """
+    capture = cv2.VideoCapture(str(video_path))
+    try:
+        if not capture.isOpened():
+            logger.warning(f"Folha de contatos: não foi possível abrir {video_path}")
+            return None
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if total <= 0 or fps <= 0:
+            return None
+        count = max(1, columns * rows)
+        # Centro de cada fatia do vídeo: evita o primeiro e o último quadro (fades)
+        wanted = sorted({min(total - 1, int((index + 0.5) * total / count)) for index in range(count)})
+        frames = []
+        position = 0
+        for target in wanted:
+            # Leitura sequencial: buscar quadros (seek) em H.264 é lento e impreciso
+            frame = None
+            while position <= target:
+                ok, frame = capture.read()
+                if not ok:
+                    frame = None
+                    break
+                position += 1
+            if frame is None:
+                break
+            frames.append((target / fps, frame))
+    finally:
+        capture.release()
+
+    if not frames:
+        return None
+    cell_width = max(width // columns, 2)
+    frame_height, frame_width = frames[0][1].shape[:2]
+    cell_height = max(int(round(frame_height * cell_width / frame_width)), 2)
+    sheet = np.zeros((cell_height * rows, cell_width * columns, 3), dtype=np.uint8)
+    for index, (timestamp, frame) in enumerate(frames):
+        cell = cv2.resize(frame, (cell_width, cell_height), interpolation=cv2.INTER_AREA)
+        label = f"{timestamp:.1f}s"
+        cv2.putText(cell, label, (6, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3, cv2.LINE_AA)
+        cv2.putText(cell, label, (6, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+        row, column = divmod(index, columns)
+        sheet[row * cell_height:(row + 1) * cell_height, column * cell_width:(column + 1) * cell_width] = cell
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    if not cv2.imwrite(str(output_path), sheet):
+        return None
+    return str(output_path)
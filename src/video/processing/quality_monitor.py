@@ -0,0 +1,598 @@
+"""
+Métricas de qualidade calculadas durante o encode da composição final.
+
+Os quadros e as amostras de áudio são analisados enquanto o vídeo é gerado
+— no caminho MoviePy por um filtro `fl` sobre o clip final, no backend
+FFmpeg por saídas extras do mesmo processo (quadros reduzidos em cinza e
+PCM) lidas por FIFOs. Não é preciso reabrir o vídeo para validá-lo.
+
+Cada problema é localizado em um intervalo de tempo (quadros pretos,
+congelados ou borrados; áudio baixo ou saturado), o que permite refazer só
+o segmento afetado em vez de renderizar o vídeo inteiro de novo.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+VIDEO_ISSUES = ("black", "freeze", "blur")
+AUDIO_ISSUES = ("quiet", "clipping")
+
+
+@dataclass
+class QualityThresholds:
+    """Limites de detecção dos problemas (valores na resolução de análise)."""
+
+    # Quadro preto: fração mínima de pixels com luminância (0-255) abaixo de black_pixel_luma
+    black_pixel_luma: float = 26.0
+    black_ratio: float = 0.98
+    black_min_duration: float = 1.0
+    # Diferença média de luminância entre quadros consecutivos
+    freeze_motion: float = 0.5
+    freeze_min_duration: float = 2.0
+    # Percentil 90 de |Laplaciano| na faixa horizontal mais nítida do quadro
+    blur_sharpness: float = 5.0
+    blur_min_duration: float = 1.5
+    # Nível RMS (dBFS) das janelas de áudio consideradas silenciosas
+    quiet_db: float = -45.0
+    quiet_min_duration: float = 2.5
+    # Amostras com |valor| >= clip_level contam como saturadas
+    clip_level: float = 0.999
+    clip_ratio: float = 0.001
+    clip_min_duration: float = 0.0
+    audio_window: float = 0.1
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> "QualityThresholds":
+        known = {item.name for item in fields(cls)}
+        return cls(**{key: float(value) for key, value in (settings or {}).items() if key in known})
+
+
+@dataclass
+class QualityIssue:
+    """Problema detectado em um intervalo do vídeo."""
+
+    kind: str
+    start: float
+    end: float
+    # Valor médio da métrica no intervalo (fração de pixels pretos, movimento, nitidez,
+    # dBFS ou fração de amostras saturadas)
+    value: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def is_visual(self) -> bool:
+        return self.kind in VIDEO_ISSUES
+
+    def overlaps(self, start: float, end: float) -> bool:
+        return self.start < end and start < self.end
+
+    def shifted(self, offset: float) -> "QualityIssue":
+        return QualityIssue(self.kind, round(self.start + offset, 3), round(self.end + offset, 3), self.value)
+
+
+@dataclass
+class QualityReport:
+    """Resultado da análise de uma renderização."""
+
+    duration: float = 0.0
+    frames: int = 0
+    audio_duration: float = 0.0
+    video_size: Tuple[int, int] = (0, 0)
+    issues: List[QualityIssue] = field(default_factory=list)
+    luma: float = 0.0
+    motion: float = 0.0
+    sharpness: float = 0.0
+    loudness_db: Optional[float] = None
+    peak_db: Optional[float] = None
+    # Problemas corrigidos por reparo de segmento ou de áudio
+    repaired: List[QualityIssue] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return self.frames > 0 and not self.issues
+
+    @property
+    def visual_issues(self) -> List[QualityIssue]:
+        return [issue for issue in self.issues if issue.is_visual]
+
+    @property
+    def audio_issues(self) -> List[QualityIssue]:
+        return [issue for issue in self.issues if not issue.is_visual]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["passed"] = self.passed
+        return data
+
+
+class _RunTracker:
+    """Agrupa amostras consecutivas sinalizadas em intervalos com duração mínima."""
+
+    def __init__(self, kind: str, min_duration: float):
+        self.kind = kind
+        self.min_duration = min_duration
+        self.issues: List[QualityIssue] = []
+        self._start: Optional[float] = None
+        self._end = 0.0
+        self._values: List[float] = []
+
+    def update(self, t: float, step: float, flagged: bool, value: float) -> None:
+        if flagged:
+            if self._start is None:
+                self._start = t
+                self._values = []
+            self._end = t + step
+            self._values.append(value)
+        elif self._start is not None:
+            self._close()
+
+    def finish(self) -> List[QualityIssue]:
+        if self._start is not None:
+            self._close()
+        return self.issues
+
+    def _close(self) -> None:
+        if self._end - self._start >= self.min_duration:
+            self.issues.append(QualityIssue(
+                self.kind, round(self._start, 3), round(self._end, 3), float(np.mean(self._values)),
+            ))
+        self._start = None
+
+
+def analysis_size(video_size: Tuple[int, int], analysis_width: int = 270) -> Tuple[int, int]:
+    """Resolução (lados pares) em que os quadros são analisados."""
+    width, height = int(video_size[0]), int(video_size[1])
+    target = min(int(analysis_width), width) // 2 * 2
+    return max(target, 2), max(int(round(height * target / max(width, 1))) // 2 * 2, 2)
+
+
+def frame_sharpness(gray: np.ndarray, bands: int = 8) -> float:
+    """
+    Nitidez do quadro: percentil 90 de |Laplaciano| na faixa horizontal mais nítida.
+
+    No layout sandwich o fundo desfocado ocupa boa parte do quadro e as bordas
+    das barras são linhas finas e nítidas; medir por faixas e por percentil
+    evita que qualquer um dos dois decida o resultado.
+    """
+    laplacian = np.abs(cv2.Laplacian(gray, cv2.CV_32F))
+    height = laplacian.shape[0]
+    step = max(height // bands, 1)
+    return max(
+        float(np.percentile(laplacian[start:start + step], 90))
+        for start in range(0, height - step + 1, step)
+    )
+
+
+class QualityMonitor:
+    """Acumula métricas por quadro e por janela de áudio e localiza problemas."""
+
+    def __init__(
+        self,
+        thresholds: Optional[QualityThresholds] = None,
+        fps: float = 30.0,
+        analysis_width: int = 270,
+    ):
+        self.thresholds = thresholds or QualityThresholds()
+        self.fps = float(fps)
+        self.analysis_width = analysis_width
+        limits = self.thresholds
+        self._trackers = {
+            "black": _RunTracker("black", limits.black_min_duration),
+            "freeze": _RunTracker("freeze", limits.freeze_min_duration),
+            "blur": _RunTracker("blur", limits.blur_min_duration),
+            "quiet": _RunTracker("quiet", limits.quiet_min_duration),
+            "clipping": _RunTracker("clipping", limits.clip_min_duration),
+        }
+        self._previous: Optional[np.ndarray] = None
+        self._last_t = -1.0
+        self._frames = 0
+        self.video_size: Tuple[int, int] = (0, 0)
+        self._luma: List[float] = []
+        self._motion: List[float] = []
+        self._sharpness: List[float] = []
+        self._audio_buffer: Optional[np.ndarray] = None
+        self._audio_samples = 0
+        self._audio_rate = 0
+        self._window_power: List[float] = []
+        self._peak = 0.0
+        # Relatório de uma análise feita fora do monitor (ex.: render em trechos paralelos)
+        self._absorbed: Optional[QualityReport] = None
+
+    # Vídeo
+
+    def observe_frame(self, t: float, frame: np.ndarray) -> None:
+        """Analisa um quadro RGB (ou cinza) em qualquer resolução."""
+        if self._frames == 0:
+            self.video_size = (int(frame.shape[1]), int(frame.shape[0]))
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(np.ascontiguousarray(frame), cv2.COLOR_RGB2GRAY)
+        size = analysis_size((gray.shape[1], gray.shape[0]), self.analysis_width)
+        if (gray.shape[1], gray.shape[0]) != size:
+            gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        self.observe_gray(t, gray)
+
+    def observe_gray(self, t: float, gray: np.ndarray) -> None:
+        """Analisa um quadro já reduzido para a resolução de análise (uint8)."""
+        t = float(t)
+        if t <= self._last_t:
+            # O MoviePy pode pedir o mesmo instante mais de uma vez
+            return
+        self._last_t = t
+        self._frames += 1
+        step = 1.0 / self.fps
+        limits = self.thresholds
+
+        luma = float(gray.mean())
+        black_ratio = float(np.count_nonzero(gray < limits.black_pixel_luma)) / gray.size
+        sharpness = frame_sharpness(gray)
+        motion = (
+            float(cv2.absdiff(gray, self._previous).mean())
+            if self._previous is not None and self._previous.shape == gray.shape else None
+        )
+        self._previous = gray
+
+        self._luma.append(luma)
+        self._sharpness.append(sharpness)
+        black = black_ratio >= limits.black_ratio
+        self._trackers["black"].update(t, step, black, black_ratio)
+        # Quadro preto também é "borrado" e "congelado"; conta só como preto
+        visible = not black
+        self._trackers["blur"].update(t, step, visible and sharpness < limits.blur_sharpness, sharpness)
+        if motion is not None:
+            self._motion.append(motion)
+            self._trackers["freeze"].update(t, step, visible and motion < limits.freeze_motion, motion)
+
+    # Áudio
+
+    def observe_audio(self, samples: np.ndarray, sample_rate: int) -> None:
+        """Analisa amostras float (-1..1) consecutivas, mono ou (n, canais)."""
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim == 1:
+            samples = samples[:, None]
+        if not len(samples):
+            return
+        self._audio_rate = int(sample_rate)
+        if self._audio_buffer is not None and self._audio_buffer.shape[1] == samples.shape[1]:
+            samples = np.concatenate([self._audio_buffer, samples])
+        window = max(int(self._audio_rate * self.thresholds.audio_window), 1)
+        complete = len(samples) // window * window
+        for offset in range(0, complete, window):
+            self._audio_window(samples[offset:offset + window])
+        self._audio_buffer = samples[complete:]
+
+    def _audio_window(self, window: np.ndarray) -> None:
+        limits = self.thresholds
+        t = self._audio_samples / self._audio_rate
+        step = len(window) / self._audio_rate
+        self._audio_samples += len(window)
+
+        magnitude = np.abs(window)
+        power = float(np.mean(np.square(window, dtype=np.float64)))
+        rms_db = 10 * np.log10(power) if power > 0 else -120.0
+        clipped = float(np.mean(magnitude >= limits.clip_level))
+        self._peak = max(self._peak, float(magnitude.max()))
+        self._window_power.append(power)
+
+        self._trackers["quiet"].update(t, step, rms_db < limits.quiet_db, rms_db)
+        self._trackers["clipping"].update(t, step, clipped > limits.clip_ratio, clipped)
+
+    # Resultado
+
+    def sibling(self) -> "QualityMonitor":
+        """Monitor novo com os mesmos limites, FPS e resolução de análise."""
+        return QualityMonitor(self.thresholds, self.fps, self.analysis_width)
+
+    def absorb(self, report: QualityReport) -> None:
+        """Adota `report` (ex.: junção dos relatórios dos trechos) como resultado do monitor."""
+        self._absorbed = report
+
+    def report(self) -> QualityReport:
+        """Fecha os intervalos abertos e retorna o relatório."""
+        if self._absorbed is not None:
+            return self._absorbed
+        if self._audio_buffer is not None and len(self._audio_buffer):
+            self._audio_window(self._audio_buffer)
+            self._audio_buffer = None
+        issues = sorted(
+            (issue for tracker in self._trackers.values() for issue in tracker.finish()),
+            key=lambda issue: (issue.start, issue.kind),
+        )
+        audible = [power for power in self._window_power
+                   if power > 0 and 10 * np.log10(power) >= self.thresholds.quiet_db]
+        return QualityReport(
+            duration=round(self._frames / self.fps, 3),
+            frames=self._frames,
+            audio_duration=round(self._audio_samples / self._audio_rate, 3) if self._audio_rate else 0.0,
+            video_size=self.video_size,
+            issues=issues,
+            luma=float(np.mean(self._luma)) if self._luma else 0.0,
+            motion=float(np.mean(self._motion)) if self._motion else 0.0,
+            sharpness=float(np.median(self._sharpness)) if self._sharpness else 0.0,
+            loudness_db=float(10 * np.log10(np.mean(audible))) if audible else None,
+            peak_db=float(20 * np.log10(self._peak)) if self._peak > 0 else None,
+        )
+
+
+def attach_to_clip(clip, monitor: QualityMonitor):
+    """
+    Envolve um clip MoviePy para que cada quadro e bloco de áudio escrito pelo
+    encode passe pelo monitor.
+    """
+    def inspect_frame(get_frame, t):
+        frame = get_frame(t)
+        monitor.observe_frame(t, frame)
+        return frame
+
+    monitored = clip.fl(inspect_frame)
+    if clip.audio is None:
+        return monitored
+
+    def inspect_audio(get_frame, t):
+        samples = get_frame(t)
+        # Blocos do encode chegam como vetores de tempo; instantes isolados são ignorados
+        if np.ndim(t) == 1 and len(t) > 1:
+            monitor.observe_audio(samples, int(round(1.0 / (t[1] - t[0]))))
+        return samples
+
+    return monitored.set_audio(clip.audio.fl(inspect_audio))
+
+
+def localize_issues(
+    issues: Sequence[QualityIssue],
+    bounds: Sequence[Tuple[float, float]],
+    skip: Sequence[int] = (),
+    min_overlap: float = 0.6,
+) -> Dict[int, List[QualityIssue]]:
+    """
+    Associa os problemas visuais aos segmentos da linha do tempo.
+
+    Args:
+        issues: Problemas detectados
+        bounds: (início, fim) de cada segmento
+        skip: Índices ignorados (ex.: quadros de cor sólida da intro/outro)
+        min_overlap: Sobreposição mínima (s); problemas que só invadem a
+            transição (fade de 0,5s) de um vizinho não são atribuídos a ele
+    """
+    located: Dict[int, List[QualityIssue]] = {}
+    for issue in issues:
+        if not issue.is_visual:
+            continue
+        for index, (start, end) in enumerate(bounds):
+            if index in skip or not issue.overlaps(start, end):
+                continue
+            if min(issue.end, end) - max(issue.start, start) < min(min_overlap, end - start):
+                continue
+            located.setdefault(index, []).append(issue)
+    return located
+
+
+def ignore_ranges(
+    report: QualityReport,
+    ranges: Sequence[Tuple[float, float]],
+    thresholds: Optional[QualityThresholds] = None,
+) -> QualityReport:
+    """
+    Remove os problemas visuais esperados em trechos de cor sólida (intro/outro).
+
+    Um quadro liso é sempre "borrado", "congelado" e, se escuro, "preto"; o
+    problema só é mantido se a parte fora de `ranges` ainda tem a duração
+    mínima do seu tipo (o fade do último clip para o outro não conta).
+    """
+    limits = thresholds or QualityThresholds()
+    min_duration = {
+        "black": limits.black_min_duration,
+        "freeze": limits.freeze_min_duration,
+        "blur": limits.blur_min_duration,
+    }
+    kept: List[QualityIssue] = []
+    for issue in report.issues:
+        if issue.is_visual:
+            covered = sum(max(0.0, min(issue.end, end) - max(issue.start, start)) for start, end in ranges)
+            if issue.duration - covered < min_duration[issue.kind]:
+                continue
+        kept.append(issue)
+    return replace(report, issues=kept)
+
+
+def merge_reports(
+    chunks: Sequence[Tuple[float, QualityReport]],
+    audio: Optional[QualityReport] = None,
+    fps: float = 30.0,
+) -> QualityReport:
+    """
+    Junta os relatórios de trechos renderizados em paralelo.
+
+    Args:
+        chunks: (início na linha do tempo, relatório) de cada trecho de vídeo
+        audio: Relatório da trilha de áudio renderizada à parte
+        fps: Quadros por segundo (intervalos separados por até um quadro na
+            borda entre trechos são unidos)
+
+    As médias de luminância e movimento são ponderadas pelos quadros; a
+    nitidez é a média ponderada das medianas de cada trecho (aproximação).
+    Um problema dividido pela borda cujas metades ficaram abaixo da duração
+    mínima não é recuperado.
+    """
+    issues: List[QualityIssue] = []
+    for offset, report in sorted(chunks, key=lambda item: item[0]):
+        for issue in sorted(report.visual_issues, key=lambda item: item.start):
+            issue = issue.shifted(offset)
+            previous = next((item for item in reversed(issues) if item.kind == issue.kind), None)
+            if previous is not None and issue.start - previous.end <= 1.0 / fps + 1e-6:
+                merged = QualityIssue(
+                    issue.kind, previous.start, issue.end,
+                    (previous.value * previous.duration + issue.value * issue.duration)
+                    / max(previous.duration + issue.duration, 1e-9),
+                )
+                issues[issues.index(previous)] = merged
+            else:
+                issues.append(issue)
+
+    frames = sum(report.frames for _, report in chunks)
+
+    def weighted(attribute: str) -> float:
+        if not frames:
+            return 0.0
+        return float(sum(getattr(report, attribute) * report.frames for _, report in chunks) / frames)
+
+    merged_report = QualityReport(
+        duration=round(frames / fps, 3),
+        frames=frames,
+        video_size=next((report.video_size for _, report in chunks if report.frames), (0, 0)),
+        issues=issues,
+        luma=weighted("luma"),
+        motion=weighted("motion"),
+        sharpness=weighted("sharpness"),
+    )
+    if audio is not None:
+        merged_report.audio_duration = audio.audio_duration
+        merged_report.loudness_db = audio.loudness_db
+        merged_report.peak_db = audio.peak_db
+        merged_report.issues += audio.audio_issues
+    merged_report.issues.sort(key=lambda issue: (issue.start, issue.kind))
+    return merged_report
+
+
+class QualityTap:
+    """
+    Saídas extras do FFmpeg lidas pelo monitor durante o encode.
+
+    O filter graph entrega uma cópia reduzida e em cinza do vídeo final e o
+    áudio em PCM float; as duas saídas são FIFOs consumidas por threads, então
+    a análise acompanha o encode. Sem `os.mkfifo` (Windows) são usados
+    arquivos temporários, analisados ao fim do processo.
+    """
+
+    AUDIO_RATE = 44100
+    AUDIO_CHANNELS = 2
+
+    def __init__(
+        self,
+        monitor: QualityMonitor,
+        video_size: Tuple[int, int],
+        with_audio: bool = True,
+        work_dir: Optional[str] = None,
+        with_video: bool = True,
+    ):
+        self.monitor = monitor
+        self.monitor.video_size = (int(video_size[0]), int(video_size[1]))
+        self.analysis_size = analysis_size(video_size, monitor.analysis_width)
+        self.with_audio = with_audio
+        self._dir = Path(tempfile.mkdtemp(prefix="quality_tap_", dir=work_dir))
+        self.video_path = str(self._dir / "frames.gray") if with_video else None
+        self.audio_path = str(self._dir / "audio.f32") if with_audio else None
+        self._use_fifo = hasattr(os, "mkfifo")
+        self._threads: List[threading.Thread] = []
+        self.logger = logging.getLogger(__name__)
+
+    def output_args(self, video_label: str = "qv", audio_label: str = "qa",
+                    frames: Optional[int] = None) -> List[str]:
+        """Argumentos das saídas de análise (depois da saída principal)."""
+        args = []
+        if self.video_path:
+            args += ["-map", f"[{video_label}]"]
+            if frames is not None:
+                args += ["-frames:v", str(frames)]
+            args += ["-f", "rawvideo", self.video_path]
+        if self.audio_path:
+            args += ["-map", f"[{audio_label}]", "-f", "f32le", self.audio_path]
+        return args
+
+    def video_filter(self) -> str:
+        width, height = self.analysis_size
+        return f"scale={width}:{height}:flags=area,format=gray"
+
+    def audio_filter(self) -> str:
+        return (
+            f"aresample={self.AUDIO_RATE},"
+            f"aformat=sample_fmts=flt:channel_layouts={'stereo' if self.AUDIO_CHANNELS == 2 else 'mono'}"
+        )
+
+    def __enter__(self) -> "QualityTap":
+        if self._use_fifo:
+            for path, reader in self._streams():
+                os.mkfifo(path)
+                thread = threading.Thread(target=self._consume, args=(path, reader), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if self._use_fifo:
+                self._release_readers()
+            else:
+                for path, reader in self._streams():
+                    if Path(path).exists():
+                        self._consume(path, reader)
+        finally:
+            for path, _ in self._streams():
+                Path(path).unlink(missing_ok=True)
+            try:
+                self._dir.rmdir()
+            except OSError:
+                pass
+
+    def _streams(self):
+        streams = [(self.video_path, self._read_video)] if self.video_path else []
+        if self.audio_path:
+            streams.append((self.audio_path, self._read_audio))
+        return streams
+
+    def _consume(self, path: str, reader) -> None:
+        try:
+            with open(path, "rb") as stream:
+                reader(stream)
+        except Exception as error:
+            self.logger.warning(f"Falha ao ler saída de análise {Path(path).name}: {error}")
+
+    def _read_video(self, stream) -> None:
+        width, height = self.analysis_size
+        frame_bytes = width * height
+        index = 0
+        while True:
+            data = stream.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            gray = np.frombuffer(data, dtype=np.uint8).reshape(height, width)
+            self.monitor.observe_gray(index / self.monitor.fps, gray)
+            index += 1
+
+    def _read_audio(self, stream) -> None:
+        block = self.AUDIO_RATE // 10 * self.AUDIO_CHANNELS * 4
+        while True:
+            data = stream.read(block)
+            if not data:
+                break
+            usable = len(data) // (self.AUDIO_CHANNELS * 4) * self.AUDIO_CHANNELS * 4
+            samples = np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, self.AUDIO_CHANNELS)
+            self.monitor.observe_audio(samples, self.AUDIO_RATE)
+
+    def _release_readers(self, timeout: float = 10.0) -> None:
+        """
+        Encerra as threads de leitura. Se o FFmpeg falhou antes de abrir uma
+        FIFO, a thread ainda está bloqueada no `open`; abrir e fechar o lado de
+        escrita a libera com EOF.
+        """
+        deadline = time.monotonic() + timeout
+        for thread, (path, _) in zip(self._threads, self._streams()):
+            while thread.is_alive() and time.monotonic() < deadline:
+                try:
+                    os.close(os.open(path, os.O_WRONLY | os.O_NONBLOCK))
+                except OSError:
+                    pass
+                thread.join(0.05)
+            if thread.is_alive():
+                self.logger.warning(f"Leitura de análise não terminou: {Path(path).name}")
@@ -0,0 +1,221 @@
+"""
+Abertura sob demanda das fontes da composição final (modo streaming).
+
+No caminho MoviePy cada segmento abre um `VideoFileClip` (mais o fundo
+desfocado e seus quadros em cache) quando a estrutura do vídeo é montada, e
+tudo fica vivo até o fim do render: memória e descritores de arquivo crescem
+com o número de segmentos. Aqui cada segmento é registrado com uma função
+que o abre; a fonte só é aberta quando o encode chega ao seu intervalo e é
+fechada assim que o intervalo passa, com um limite de fontes abertas ao
+mesmo tempo. O pico de memória residente do processo é medido durante o
+render.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil é opcional
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+def release_clip(clip: Any, _seen: Optional[set] = None) -> int:
+    """
+    Fecha os leitores (vídeo e áudio) de um clip MoviePy e de todas as suas
+    camadas (`clips` de composições, máscara e áudio).
+
+    Returns:
+        Quantidade de leitores fechados
+    """
+    seen = _seen if _seen is not None else set()
+    if clip is None or id(clip) in seen:
+        return 0
+    seen.add(id(clip))
+    closed = 0
+    reader = getattr(clip, "reader", None)
+    if reader is not None and id(reader) not in seen:
+        seen.add(id(reader))
+        close = getattr(reader, "close", None) or getattr(reader, "close_proc", None)
+        if close is not None:
+            try:
+                close()
+                closed += 1
+            except Exception:
+                pass
+    for child in getattr(clip, "clips", None) or []:
+        closed += release_clip(child, seen)
+    for attribute in ("mask", "audio", "bg"):
+        closed += release_clip(getattr(clip, attribute, None), seen)
+    return closed
+
+
+def _current_rss() -> Optional[int]:
+    if psutil is None:
+        return None
+    try:
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class PeakMemoryMonitor:
+    """
+    Mede o pico de memória residente (RSS) do processo enquanto ativo.
+
+    Com psutil, uma thread amostra o RSS a cada `interval` segundos; sem
+    psutil, usa `ru_maxrss` (pico desde o início do processo).
+    """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.start_rss: Optional[int] = None
+        self.peak_rss: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def peak_rss_mb(self) -> Optional[float]:
+        return round(self.peak_rss / (1024 * 1024), 1) if self.peak_rss else None
+
+    @property
+    def growth_mb(self) -> Optional[float]:
+        """Crescimento do RSS em relação ao início da medição."""
+        if not self.peak_rss or not self.start_rss:
+            return None
+        return round((self.peak_rss - self.start_rss) / (1024 * 1024), 1)
+
+    def sample(self) -> None:
+        rss = _current_rss()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def start(self) -> "PeakMemoryMonitor":
+        self.start_rss = _current_rss()
+        self.peak_rss = self.start_rss
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.sample()
+        elif resource is not None:
+            # ru_maxrss em KB no Linux
+            self.peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def __enter__(self) -> "PeakMemoryMonitor":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+@dataclass
+class StreamingStats:
+    """Contadores do modo streaming."""
+
+    sources: int = 0
+    opened: int = 0
+    closed: int = 0
+    max_open: int = 0
+    readers_closed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class StreamingSources:
+    """
+    Fontes da linha do tempo abertas só durante o próprio intervalo.
+
+    Cada fonte é registrada com seu intervalo (início, fim) na linha do
+    tempo e uma função que a abre (retorna um clip com `get_frame`). Ao
+    pedir um quadro, a fonte é aberta se preciso e as fontes cujo intervalo
+    já terminou são fechadas; no máximo `max_open` ficam abertas (as menos
+    usadas recentemente são fechadas primeiro).
+    """
+
+    def __init__(
+        self,
+        max_open: int = 2,
+        closer: Callable[[Any], int] = release_clip,
+    ):
+        self.max_open = max(1, int(max_open))
+        self.closer = closer
+        self.stats = StreamingStats()
+        self._ranges: List[Tuple[float, float]] = []
+        self._openers: List[Callable[[], Any]] = []
+        self._open: "OrderedDict[int, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    def register(self, start: float, end: float, opener: Callable[[], Any]) -> int:
+        """Registra uma fonte para o intervalo [start, end); retorna sua chave."""
+        with self._lock:
+            self._ranges.append((float(start), float(end)))
+            self._openers.append(opener)
+            self.stats.sources += 1
+            return len(self._openers) - 1
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def get_frame(self, key: int, t: float) -> np.ndarray:
+        """Quadro da fonte `key` no instante `t` (relativo ao início da fonte)."""
+        with self._lock:
+            # Fecha primeiro o que já passou: a fonte nova não se soma às antigas
+            self._retire(self._ranges[key][0] + float(t), keep=key)
+            return self._acquire(key).get_frame(t)
+
+    def close(self, key: int) -> None:
+        with self._lock:
+            clip = self._open.pop(key, None)
+            if clip is not None:
+                self.stats.closed += 1
+                self.stats.readers_closed += self.closer(clip)
+
+    def close_all(self) -> None:
+        with self._lock:
+            for key in list(self._open):
+                self.close(key)
+
+    def _acquire(self, key: int) -> Any:
+        clip = self._open.get(key)
+        if clip is not None:
+            self._open.move_to_end(key)
+            return clip
+        started = time.time()
+        clip = self._openers[key]()
+        self._open[key] = clip
+        self.stats.opened += 1
+        while len(self._open) > self.max_open:
+            self.close(next(iter(self._open)))
+        self.stats.max_open = max(self.stats.max_open, len(self._open))
+        self.logger.debug(f"Fonte {key} aberta em {time.time() - started:.2f}s ({len(self._open)} abertas)")
+        return clip
+
+    def _retire(self, position: float, keep: int) -> None:
+        """Fecha as fontes cujo intervalo terminou antes de `position`."""
+        for key in [key for key in self._open if key != keep and self._ranges[key][1] <= position]:
+            self.close(key)
@@ -15,6 +15,20 @@ from pathlib import Path
 import tempfile
 from PIL import Image
 import logging
+import shutil
+import time
+
+from src.utils.exceptions import VideoProcessingError
+from src.utils.ffmpeg_runner import FFmpegRunner, get_ffmpeg_runner
+from src.utils.media_probe import MediaProbe, get_media_probe
+from src.video.processing.concat import (
+    ConcatPlan,
+    build_concat_command,
+    build_conform_command,
+    plan_concat,
+    write_concat_list,
+)
+
 # Configurações inline para evitar dependências externas
 VIDEO_PROCESSING = {
     'output_resolution': (1920, 1080),
@@ -51,15 +65,21 @@ class VideoProcessor:
     - Ajuste de qualidade
     """
     
-    def __init__(self, config: Optional[Dict] = None):
+    def __init__(self, config: Optional[Dict] = None, media_probe: Optional[MediaProbe] = None,
+                 runner: Optional[FFmpegRunner] = None):
         """
         Inicializa o processador de vídeo.
         
         Args:
             config: Configurações customizadas (opcional)
+            media_probe: Sonda de mídia (padrão: sonda compartilhada do processo)
+            runner: Executor de FFmpeg (padrão: executor compartilhado do processo)
         """
         self.config = config or get_config()['video_processing']
         self.logger = logging.getLogger(__name__)
+        self.media_probe = media_probe or get_media_probe()
+        self.runner = runner or get_ffmpeg_runner()
+        self.last_concat_plan: Optional[ConcatPlan] = None
         
         # Configurações padrão
         self.output_resolution = self.config.get('output_resolution', (1920, 1080))
@@ -260,6 +280,12 @@ class VideoProcessor:
         """
         Concatena múltiplos vídeos.
         
+        Usa o concat demuxer do FFmpeg com cópia de streams quando os
+        parâmetros das entradas coincidem; entradas divergentes são
+        re-encodadas para a especificação comum antes da cópia. Se o plano
+        não for possível (parâmetros desconhecidos) ou a cópia falhar,
+        recorre à concatenação via MoviePy.
+        
         Args:
             video_paths: Lista de caminhos dos vídeos
             output_path: Caminho do vídeo de saída
@@ -267,19 +293,107 @@ class VideoProcessor:
         Returns:
             True se concatenado com sucesso
         """
+        existing = []
+        for video_path in video_paths:
+            if os.path.exists(video_path):
+                existing.append(video_path)
+            else:
+                self.logger.warning(f"Vídeo não encontrado: {video_path}")
+        
+        if not existing:
+            self.logger.error("Erro ao concatenar vídeos: nenhum vídeo válido encontrado para concatenação")
+            return False
+        
         try:
-            clips = []
-            
-            # Carregar todos os clips
-            for video_path in video_paths:
-                if os.path.exists(video_path):
-                    clip = VideoFileClip(video_path)
-                    clips.append(clip)
-                else:
-                    self.logger.warning(f"Vídeo não encontrado: {video_path}")
+            plan = self.plan_concat(existing)
+        except VideoProcessingError as e:
+            self.logger.warning(f"Falha ao sondar entradas da concatenação: {e}")
+            plan = None
+        
+        if plan is not None and plan.strategy != "fallback":
+            if self._concatenate_with_demuxer(plan, output_path):
+                return True
+        elif plan is not None:
+            self.logger.info(f"Concatenação por cópia indisponível: {plan.reason}")
+        
+        return self._concatenate_with_moviepy(existing, output_path)
+    
+    def plan_concat(self, video_paths: List[str]) -> ConcatPlan:
+        """
+        Monta o plano de concatenação a partir da sonda de mídia.
+        
+        Args:
+            video_paths: Caminhos das entradas, na ordem final
             
-            if not clips:
-                raise ValueError("Nenhum vídeo válido encontrado para concatenação")
+        Returns:
+            ConcatPlan com a especificação comum e as entradas a re-encodar
+        """
+        plan = plan_concat([self.media_probe.probe(path) for path in video_paths])
+        self.last_concat_plan = plan
+        return plan
+    
+    def _concatenate_with_demuxer(self, plan: ConcatPlan, output_path: str) -> bool:
+        """Executa o plano: conforma as entradas divergentes e une por cópia."""
+        start_time = time.time()
+        work_dir = Path(tempfile.mkdtemp(prefix="concat_", dir=self.temp_dir))
+        try:
+            prepared = []
+            for index, item in enumerate(plan.inputs):
+                if item.action != "reencode":
+                    prepared.append(item.path)
+                    continue
+                conformed = work_dir / f"conform_{index:03d}.mp4"
+                info = self.media_probe.probe(item.path)
+                self.logger.info(f"Re-encodando entrada divergente ({item.reason}): {item.path}")
+                command = build_conform_command(item.path, str(conformed), info.has_audio, plan.target)
+                result = self.runner.run(
+                    command, duration=item.duration, timeout=600, check=False,
+                    label="concat_conform", video_path=item.path,
+                )
+                if result.returncode != 0:
+                    self.logger.warning(f"Falha ao re-encodar {item.path}: {result.stderr[-300:]}")
+                    return False
+                prepared.append(str(conformed))
+            plan.prepared_paths = prepared
+            
+            list_path = work_dir / "inputs.txt"
+            write_concat_list(prepared, list_path)
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            result = self.runner.run(
+                build_concat_command(str(list_path), output_path),
+                duration=plan.expected_duration, timeout=300, check=False,
+                label="concat_copy", video_path=output_path,
+            )
+            if result.returncode != 0 or not self._concat_output_ok(output_path, plan.expected_duration):
+                self.logger.warning(f"Concatenação por cópia falhou: {result.stderr[-300:]}")
+                Path(output_path).unlink(missing_ok=True)
+                return False
+            
+            plan.elapsed = time.time() - start_time
+            self.logger.info(
+                f"Vídeos concatenados por cópia ({plan.strategy}, {len(plan.reencoded)} re-encodados): "
+                f"{len(plan.inputs)} clips -> {output_path} em {plan.elapsed:.2f}s"
+            )
+            return True
+        except VideoProcessingError as e:
+            self.logger.warning(f"Concatenação por cópia falhou: {e}")
+            return False
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _concat_output_ok(self, output_path: str, expected_duration: float) -> bool:
+        """Confere se a saída existe e tem a duração somada das entradas."""
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return False
+        duration = self.media_probe.get_duration(output_path, default=0.0)
+        if duration <= 0 or expected_duration <= 0:
+            return True
+        return abs(duration - expected_duration) <= max(0.5, expected_duration * 0.02)
+    
+    def _concatenate_with_moviepy(self, video_paths: List[str], output_path: str) -> bool:
+        """Concatenação com re-encode completo via MoviePy."""
+        try:
+            clips = [VideoFileClip(video_path) for video_path in video_paths]
             
             # Concatenar
             final_clip = concatenate_videoclips(clips)
@@ -315,23 +429,20 @@ class VideoProcessor:
             Dicionário com informações do vídeo
         """
         try:
-            cap = cv2.VideoCapture(video_path)
-            
-            if not cap.isOpened():
+            media = self.media_probe.probe(video_path)
+            if not media.has_video:
                 return None
             
-            info = {
-                'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-                'fps': cap.get(cv2.CAP_PROP_FPS),
-                'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
-                'duration': cap.get(cv2.CAP_PROP_FRAME_COUNT) / cap.get(cv2.CAP_PROP_FPS),
-                'codec': int(cap.get(cv2.CAP_PROP_FOURCC)),
+            return {
+                'width': media.width,
+                'height': media.height,
+                'fps': media.fps,
+                'frame_count': media.frame_count,
+                'duration': media.duration,
+                'codec': media.video_codec,
+                'has_audio': media.has_audio,
             }
             
-            cap.release()
-            return info
-            
         except Exception as e:
             self.logger.error(f"Erro ao obter informações do vídeo: {e}")
             return None
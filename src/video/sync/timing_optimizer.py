@@ -11,7 +11,8 @@ from pathlib import Path
 from dataclasses import dataclass
 import librosa
 from scipy.signal import find_peaks
-import moviepy as mp
+
+from src.utils.media_probe import get_media_probe
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -476,15 +477,9 @@ class TimingOptimizer:
     
     def _get_video_duration(self, video_path: str) -> float:
         """Obtém duração de um vídeo"""
-        try:
-            if os.path.exists(video_path):
-                clip = mp.VideoFileClip(video_path)
-                duration = clip.duration
-                clip.close()
-                return duration
+        if not os.path.exists(video_path):
             return 5.0  # Duração padrão
-        except:
-            return 5.0
+        return get_media_probe().get_duration(video_path, default=5.0)
     
     def _detect_content_type(self, text: str) -> str:
         """Detecta tipo de conteúdo do texto"""
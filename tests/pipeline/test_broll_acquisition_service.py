@@ -0,0 +1,200 @@
+import threading
+import time
+from pathlib import Path
+
+from src.pipeline.services.broll_acquisition_service import BrollAcquisitionService
+
+
+class FakeExtractor:
+    def __init__(self, results, output_dir: Path, slow_ids=(), failing_ids=(), late_ids=()):
+        self.results = results
+        self.output_dir = output_dir
+        self.slow_ids = set(slow_ids)
+        self.late_ids = set(late_ids)
+        self.failing_ids = set(failing_ids)
+        self.search_calls = []
+        self.download_calls = []
+        self.cancelled = []
+        self._lock = threading.Lock()
+        self.active_downloads = 0
+        self.max_active_downloads = 0
+
+    def search_videos(self, query, max_results=10):
+        self.search_calls.append(query)
+        return [dict(video) for video in self.results.get(query, [])][:max_results]
+
+    def download_video(self, video_url, output_dir=None, *, rate_limit=None, cancel_event=None,
+                       priority=None, owner=None):
+        video_id = video_url.rsplit("=", 1)[-1]
+        with self._lock:
+            self.download_calls.append((video_id, rate_limit))
+            self.active_downloads += 1
+            self.max_active_downloads = max(self.max_active_downloads, self.active_downloads)
+        try:
+            if video_id in self.slow_ids:
+                if cancel_event is not None and cancel_event.wait(2.0):
+                    self.cancelled.append(video_id)
+                    raise RuntimeError("cancelled")
+            elif video_id in self.late_ids:
+                # Ignora o cancelamento e termina depois da meta
+                time.sleep(0.2)
+            else:
+                time.sleep(0.01)
+            if video_id in self.failing_ids:
+                raise RuntimeError("boom")
+            path = self.output_dir / f"{video_id}.mp4"
+            path.write_bytes(b"video")
+            return str(path)
+        finally:
+            with self._lock:
+                self.active_downloads -= 1
+
+
+def _video(video_id, duration=30, views=1000):
+    return {
+        "id": video_id,
+        "title": f"Video {video_id}",
+        "duration": duration,
+        "view_count": views,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+    }
+
+
+def test_acquire_ranks_globally_and_keeps_attribution(tmp_path):
+    results = {
+        "cats": [_video("a"), _video("b"), _video("long", duration=600)],
+        "kittens": [_video("b"), _video("c")],
+    }
+    extractor = FakeExtractor(results, tmp_path)
+    service = BrollAcquisitionService(extractor, max_download_workers=1)
+
+    result = service.acquire(["cats", "kittens", "empty"], str(tmp_path), target_count=2)
+
+    assert sorted(extractor.search_calls) == ["cats", "empty", "kittens"]
+    assert result.used_queries == ["cats", "kittens"]
+    # "b" foi encontrado pelas duas queries e sobe para o topo.
+    assert [clip.video_id for clip in result.clips] == ["b", "a"]
+    assert result.clips[0].queries == ["cats", "kittens"]
+    assert "long" not in [call[0] for call in extractor.download_calls]
+
+    report = result.to_report()
+    assert report["attribution"][0]["queries"] == ["cats", "kittens"]
+
+
+def test_acquire_stops_at_target_and_cancels_in_flight(tmp_path):
+    results = {"ocean": [_video("fast1"), _video("slow"), _video("fast2"), _video("fast3")]}
+    extractor = FakeExtractor(results, tmp_path, slow_ids={"slow"})
+    service = BrollAcquisitionService(extractor, max_download_workers=2)
+
+    result = service.acquire(["ocean"], str(tmp_path), target_count=2)
+
+    assert [clip.video_id for clip in result.clips] == ["fast1", "fast2"]
+    assert "slow" in result.cancelled
+    assert "fast3" not in [call[0] for call in extractor.download_calls]
+    assert extractor.max_active_downloads <= 2
+
+
+def test_acquire_removes_extra_downloads_that_finish_late(tmp_path):
+    results = {"ocean": [_video("fast1"), _video("late"), _video("fast2")]}
+    extractor = FakeExtractor(results, tmp_path, late_ids={"late"})
+    service = BrollAcquisitionService(extractor, max_download_workers=2)
+
+    result = service.acquire(["ocean"], str(tmp_path), target_count=2)
+
+    assert [clip.video_id for clip in result.clips] == ["fast1", "fast2"]
+    assert "late" in result.cancelled
+    deadline = time.time() + 2.0
+    while extractor.active_downloads and time.time() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.05)
+    assert not (tmp_path / "late.mp4").exists()
+    assert all(Path(clip.path).exists() for clip in result.clips)
+
+
+def test_acquire_replaces_failed_downloads(tmp_path):
+    results = {"space": [_video("bad"), _video("ok1"), _video("ok2")]}
+    extractor = FakeExtractor(results, tmp_path, failing_ids={"bad"})
+    service = BrollAcquisitionService(extractor, max_download_workers=2)
+
+    result = service.acquire(["space"], str(tmp_path), target_count=2)
+
+    assert sorted(clip.video_id for clip in result.clips) == ["ok1", "ok2"]
+    assert result.failed[0]["video_id"] == "bad"
+    # A banda fica a cargo do agendador do extrator, sem limite por download
+    assert {rate for _, rate in extractor.download_calls} == {None}
+
+
+def test_acquire_without_results_returns_empty(tmp_path):
+    extractor = FakeExtractor({}, tmp_path)
+    service = BrollAcquisitionService(extractor)
+
+    result = service.acquire(["nothing"], str(tmp_path))
+
+    assert result.clips == []
+    assert result.used_queries == []
+
+
+def test_acquire_uses_asset_library_before_network(tmp_path):
+    from src.video.library.asset_library import BrollAssetLibrary
+
+    library = BrollAssetLibrary(str(tmp_path / "library"), max_size_bytes=None)
+    results = {"cats": [_video("a"), _video("b"), _video("c")]}
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+
+    first = FakeExtractor(results, downloads)
+    service = BrollAcquisitionService(first, asset_library=library, max_download_workers=1)
+    first_result = service.acquire(["cats"], str(downloads), target_count=2)
+
+    assert all(clip.source == "download" for clip in first_result.clips)
+    assert all(clip.path.startswith(str(library.root_dir)) for clip in first_result.clips)
+
+    second = FakeExtractor(results, downloads)
+    service = BrollAcquisitionService(second, asset_library=library)
+    second_result = service.acquire(["cats"], str(downloads), target_count=2)
+
+    assert second.search_calls == []
+    assert second.download_calls == []
+    assert second_result.library_hits == 2
+    assert sorted(second_result.videos) == sorted(first_result.videos)
+
+    # Meta maior que o estoque local: usa a biblioteca e completa pela rede
+    third = FakeExtractor(results, downloads)
+    service = BrollAcquisitionService(third, asset_library=library)
+    third_result = service.acquire(["cats"], str(downloads), target_count=3)
+
+    assert third_result.library_hits == 2
+    assert [call[0] for call in third.download_calls] == ["c"]
+
+
+def test_acquire_skips_candidates_rejected_by_thumbnail(tmp_path):
+    from src.video.matching.thumbnail_prescreener import ThumbnailAssessment
+
+    class FakePrescreener:
+        def __init__(self):
+            self.calls = []
+
+        def screen(self, videos, text=""):
+            self.calls.append(videos)
+            return [
+                ThumbnailAssessment(
+                    video_id=video["id"],
+                    accepted=video["id"] != "a",
+                    relevance=1.0 if video["id"] == "c" else 0.0,
+                    reasons=[] if video["id"] != "a" else ["letterbox"],
+                )
+                for video in videos
+            ]
+
+    results = {"cats": [_video("a"), _video("b"), _video("c")]}
+    extractor = FakeExtractor(results, tmp_path)
+    prescreener = FakePrescreener()
+    service = BrollAcquisitionService(
+        extractor, max_download_workers=1, thumbnail_prescreener=prescreener, relevance_weight=1.0
+    )
+
+    result = service.acquire(["cats"], str(tmp_path), target_count=2)
+
+    assert prescreener.calls[0][0]["text"] == "cats"
+    assert [call[0] for call in extractor.download_calls] == ["c", "b"]
+    assert result.to_report()["prescreen_rejected"][0]["video_id"] == "a"
@@ -0,0 +1,219 @@
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.pipeline.services.broll_acquisition_service import BrollAcquisitionService
+from src.pipeline.services.broll_prefetch_service import (
+    BrollPrefetchService,
+    BrollQueryHistory,
+    CATEGORY_SEED_QUERIES,
+)
+from src.video.library.asset_library import BrollAssetLibrary
+
+
+class FakeExtractor:
+    def __init__(self, results, output_dir: Path, size=5):
+        self.results = results
+        self.output_dir = output_dir
+        self.size = size
+        self.search_calls = []
+        self.download_calls = []
+
+    def search_videos(self, query, max_results=10):
+        self.search_calls.append(query)
+        return [dict(video) for video in self.results.get(query, [])][:max_results]
+
+    def download_video(self, video_url, output_dir=None, *, rate_limit=None, cancel_event=None,
+                       priority=None, owner=None):
+        video_id = video_url.rsplit("=", 1)[-1]
+        self.download_calls.append((video_id, owner))
+        path = self.output_dir / f"{video_id}.mp4"
+        path.write_bytes(b"v" * self.size)
+        return str(path)
+
+
+def _video(video_id):
+    return {
+        "id": video_id,
+        "title": f"Video {video_id}",
+        "duration": 30,
+        "view_count": 1000,
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+    }
+
+
+def _service(tmp_path, results, **kwargs):
+    library = BrollAssetLibrary(str(tmp_path / "library"), max_size_bytes=None, eviction_grace_seconds=0)
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    extractor = FakeExtractor(results, staging)
+    acquisition = BrollAcquisitionService(extractor, asset_library=library, max_download_workers=1)
+    history = BrollQueryHistory(str(tmp_path / "history.json"))
+    kwargs.setdefault("categories", ["animals"])
+    kwargs.setdefault("off_peak_hours", None)
+    prefetch = BrollPrefetchService(
+        acquisition, library, history, staging_dir=str(staging), **kwargs
+    )
+    return prefetch, library, extractor, history
+
+
+def test_query_history_ranks_by_frequency_and_persists(tmp_path):
+    path = tmp_path / "history.json"
+    history = BrollQueryHistory(str(path), max_per_category=3)
+
+    history.record("animals", ["cats playing", "dogs running"])
+    history.record("animals", ["cats playing", "birds flying"])
+    history.record("space", ["galaxy"])
+
+    reloaded = BrollQueryHistory(str(path), max_per_category=3)
+    assert reloaded.recent("animals", limit=1) == ["cats playing"]
+    assert set(reloaded.recent("animals")) == {"cats playing", "dogs running", "birds flying"}
+
+    reloaded.record("animals", ["whales"])
+    assert "dogs running" not in reloaded.recent("animals")
+
+
+def test_refill_fills_category_pool_from_history(tmp_path):
+    results = {
+        "cats playing": [_video("a"), _video("b")],
+        "dogs running": [_video("c")],
+    }
+    prefetch, library, extractor, history = _service(tmp_path, results, pool_size=3, queries_per_refill=2)
+    history.record("animals", ["cats playing", "dogs running"])
+
+    [report] = prefetch.refill()
+
+    assert report.pool_before == 0
+    assert report.pool_after == 3
+    assert report.queries == ["cats playing", "dogs running"] or report.queries == ["dogs running", "cats playing"]
+    assert all(owner == "prefetch" for _, owner in extractor.download_calls)
+    assert len(library.find_by_category("animals")) == 3
+
+    # Estoque completo: nenhuma busca nova
+    extractor.search_calls.clear()
+    [report] = prefetch.refill()
+    assert report.skipped_reason == "estoque completo"
+    assert extractor.search_calls == []
+
+
+def test_refill_uses_seed_queries_without_history(tmp_path):
+    seeds = CATEGORY_SEED_QUERIES["animals"]
+    prefetch, library, extractor, _ = _service(
+        tmp_path, {seeds[0]: [_video("x")]}, pool_size=1, queries_per_refill=2
+    )
+
+    [report] = prefetch.refill()
+
+    assert report.queries == seeds[:2]
+    assert report.downloaded == ["x"]
+
+
+def test_category_pool_serves_later_jobs(tmp_path):
+    results = {"cute cats playing": [_video("a"), _video("b")]}
+    prefetch, library, _, history = _service(tmp_path, results, pool_size=2)
+    history.record("animals", ["cute cats playing"])
+    prefetch.refill()
+
+    staging = tmp_path / "job"
+    staging.mkdir()
+    offline = FakeExtractor({}, staging)
+    service = BrollAcquisitionService(offline, asset_library=library)
+    result = service.acquire(["funny cats compilation"], str(staging), target_count=2, category="animals")
+
+    assert result.library_hits == 2
+    assert offline.download_calls == []
+
+
+def test_quota_evicts_least_recently_used_pool_entries(tmp_path):
+    results = {"q": [_video("a"), _video("b"), _video("c")]}
+    prefetch, library, _, history = _service(tmp_path, results, pool_size=3, disk_quota_bytes=12)
+    history.record("animals", ["q"])
+
+    prefetch.refill()
+
+    entries = library.find_by_category("animals")
+    assert sum(entry.size_bytes for entry in entries) <= 12
+    assert len(entries) == 2
+
+
+def test_job_assets_stay_out_of_pool_quota_and_eviction(tmp_path):
+    results = {"q": [_video("a"), _video("b")]}
+    prefetch, library, _, history = _service(tmp_path, results, pool_size=2, disk_quota_bytes=5)
+    history.record("animals", ["q"])
+    prefetch.refill()
+    [kept] = library.find_by_category("animals")
+
+    job_dir = tmp_path / "job"
+    job_dir.mkdir()
+    job = BrollAcquisitionService(
+        FakeExtractor({"cats": [_video("j1")]}, job_dir), asset_library=library, max_download_workers=1
+    )
+    result = job.acquire(["cats", "q"], str(job_dir), target_count=2, owner="run-1",
+                         category="animals", add_to_pool=False, pin=True)
+
+    # O download do job não entra no estoque nem conta na cota
+    assert {clip.video_id for clip in result.clips} == {"j1", kept.video_id}
+    assert library.lookup("j1").categories == []
+    assert prefetch.pool_bytes() == kept.size_bytes
+
+    # O clip do estoque em uso pelo job não é removido pela cota
+    history.record("animals", ["q2"])
+    prefetch._acquisition._extractor.results["q2"] = [_video("c"), _video("d")]
+    prefetch.refill()
+    assert library.lookup(kept.video_id) is not None
+    assert list(library.lookup(kept.video_id).pinned_by) == ["run-1"]
+
+    job.release("run-1")
+    assert library.lookup(kept.video_id).pinned_by == {}
+    assert library.lookup("j1").pinned_by == {}
+
+
+def test_should_not_run_during_a_pipeline_run(tmp_path):
+    busy = [True]
+    prefetch, *_ = _service(tmp_path, {}, off_peak_hours=(0, 24), idle_check=lambda: True,
+                            busy_check=lambda: busy[0])
+
+    assert not prefetch.should_run()
+    busy[0] = False
+    assert prefetch.should_run()
+
+
+def test_should_run_when_idle_or_off_peak(tmp_path):
+    now = [datetime(2024, 1, 1, 14, 0)]
+    idle = [False]
+    prefetch, *_ = _service(
+        tmp_path, {}, off_peak_hours=(23, 6), idle_check=lambda: idle[0], now_func=lambda: now[0]
+    )
+
+    assert not prefetch.should_run()
+    idle[0] = True
+    assert prefetch.should_run()
+    idle[0] = False
+    now[0] = datetime(2024, 1, 1, 2, 0)
+    assert prefetch.should_run()
+
+
+def test_run_starting_mid_download_cancels_the_round(tmp_path):
+    busy, finished = threading.Event(), threading.Event()
+    cancelled = []
+    prefetch, library, extractor, _ = _service(
+        tmp_path, {}, pool_size=2, busy_check=busy.is_set, busy_poll_interval=0.05,
+    )
+    prefetch._history.record("animals", ["cats playing"])
+    extractor.results = {"cats playing": [_video("a"), _video("b")]}
+
+    def slow_download(video_url, output_dir=None, *, cancel_event=None, **kwargs):
+        busy.set()  # um run do pipeline começa durante o download
+        cancelled.append(cancel_event.wait(5))
+        finished.set()
+        raise RuntimeError("download cancelado")
+
+    extractor.download_video = slow_download
+    start = time.time()
+    reports = prefetch.refill()
+
+    assert finished.wait(5) and cancelled == [True]
+    assert time.time() - start < 3
+    assert reports[0].downloaded == []
+    assert library.list_entries() == []
@@ -47,3 +47,21 @@ def test_generate_queries_handles_errors():
     queries = service.generate_queries("content")
 
     assert queries == []
+
+
+def test_generate_queries_records_category_history():
+    class FakeHistory:
+        def __init__(self):
+            self.records = []
+
+        def record(self, category, queries):
+            self.records.append((category, list(queries)))
+
+    history = FakeHistory()
+    client = FakeLLMClient(['["octopus hunting", "reef stealth"]', '["lion pride"]'])
+    service = BrollQueryService(client, query_history=history)
+
+    service.generate_queries("Octopus story", category="animals")
+    service.generate_queries("Lion story")
+
+    assert history.records == [("animals", ["octopus hunting", "reef stealth"])]
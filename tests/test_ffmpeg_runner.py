@@ -0,0 +1,117 @@
+"""
+Testes do executor compartilhado de FFmpeg (progresso, timeouts e cancelamento).
+"""
+
+import asyncio
+import shutil
+import stat
+import time
+
+import pytest
+
+from src.utils.exceptions import FFmpegError
+from src.utils.ffmpeg_runner import FFmpegRunner, classify_ffmpeg_error
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+
+@pytest.fixture
+def hanging_ffmpeg(tmp_path):
+    """Falso `ffmpeg` que não reporta progresso e deixa um processo filho rodando."""
+    pid_file = tmp_path / "child.pid"
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!/bin/sh\nsleep 30 &\necho $! > {pid_file}\nwait\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return script, pid_file
+
+
+def _alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] != "Z"  # zumbi já foi encerrado
+    except (FileNotFoundError, ProcessLookupError):
+        return False
+
+
+def test_classify_ffmpeg_error():
+    assert classify_ffmpeg_error("in.mp4: No such file or directory", 1) == "input_not_found"
+    assert classify_ffmpeg_error("[mov] moov atom not found\nInvalid data found when processing input") == "invalid_data"
+    assert classify_ffmpeg_error("Unknown encoder 'libfoo'", 1) == "unsupported_codec"
+    assert classify_ffmpeg_error("", -9) == "killed"
+    assert classify_ffmpeg_error("", -11) == "crashed"
+    assert classify_ffmpeg_error("something else", 1) == "unknown"
+
+
+@requires_ffmpeg
+def test_progress_is_parsed(tmp_path):
+    updates = []
+    runner = FFmpegRunner()
+
+    result = runner.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=160x90:rate=25",
+         "-t", "2", "-c:v", "libx264", str(tmp_path / "out.mp4")],
+        duration=2.0,
+        on_progress=lambda progress: updates.append(progress.to_dict()),
+    )
+
+    assert result.ok
+    assert result.command[1:3] == ["-progress", "pipe:1"]
+    assert updates and updates[-1]["done"]
+    assert result.progress.frame == 50
+    assert result.progress.percent == pytest.approx(100, abs=5)
+    assert runner.get_stats()["runs"] == 1
+
+
+@requires_ffmpeg
+def test_failure_is_classified(tmp_path):
+    with pytest.raises(FFmpegError) as exc_info:
+        FFmpegRunner().run(["ffmpeg", "-i", str(tmp_path / "missing.mp4"), str(tmp_path / "out.mp4")])
+
+    assert exc_info.value.kind == "input_not_found"
+    result = FFmpegRunner().run(["ffmpeg", "-i", str(tmp_path / "missing.mp4"), "out.mp4"], check=False)
+    assert result.returncode != 0 and result.error_kind == "input_not_found"
+
+
+def test_stall_kills_whole_process_group(hanging_ffmpeg):
+    script, pid_file = hanging_ffmpeg
+    runner = FFmpegRunner(stall_timeout=0.5, kill_grace=1.0, poll_interval=0.05)
+
+    started = time.monotonic()
+    with pytest.raises(FFmpegError) as exc_info:
+        runner.run([str(script), "-i", "in.mp4", "out.mp4"])
+
+    assert exc_info.value.kind == "stalled"
+    assert time.monotonic() - started < 5
+    child = int(pid_file.read_text())
+    deadline = time.monotonic() + 2
+    while _alive(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(child)
+    assert runner.get_stats()["stalls"] == 1
+
+
+def test_wall_clock_timeout():
+    runner = FFmpegRunner(poll_interval=0.05)
+
+    with pytest.raises(FFmpegError) as exc_info:
+        runner.run(["sleep", "30"], timeout=0.3)
+
+    assert exc_info.value.kind == "timeout"
+
+
+def test_async_cancellation_terminates_process(hanging_ffmpeg):
+    script, _ = hanging_ffmpeg
+    runner = FFmpegRunner(stall_timeout=0, kill_grace=1.0, poll_interval=0.05)
+
+    async def scenario():
+        task = asyncio.create_task(runner.run_async([str(script), "out.mp4"], label="lento"))
+        await asyncio.sleep(0.3)
+        assert [job["label"] for job in runner.active_jobs()] == ["lento"]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert runner.get_stats()["cancelled"] == 1
+    assert runner.active_jobs() == []
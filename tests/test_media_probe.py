@@ -0,0 +1,142 @@
+"""
+Testes da sonda de mídia unificada (ffprobe simulado e cache em memória/disco).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.utils.exceptions import VideoProcessingError
+from src.utils.media_probe import MediaInfo, MediaProbe
+
+
+PROBE_OUTPUT = {
+    "format": {"duration": "12.5", "bit_rate": "900000", "format_name": "mov,mp4,m4a,3gp,3g2,mj2"},
+    "streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "h264", "pix_fmt": "yuv420p",
+         "width": 1280, "height": 720, "avg_frame_rate": "30000/1001", "nb_frames": "375"},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac", "sample_rate": "48000", "channels": 2},
+    ],
+    "packets": [
+        {"stream_index": 0, "pts_time": "4.0", "flags": "K__"},
+        {"stream_index": 1, "pts_time": "0.0", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "0.0", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "0.033", "flags": "___"},
+    ],
+}
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"fake video")
+    return path
+
+
+def _ffprobe(data=PROBE_OUTPUT):
+    return Mock(returncode=0, stdout=json.dumps(data), stderr="")
+
+
+def test_media_info_parses_streams_audio_and_keyframes():
+    info = MediaInfo.from_ffprobe("clip.mp4", 10, 1, PROBE_OUTPUT)
+
+    assert info.duration == 12.5
+    assert (info.width, info.height, info.video_codec) == (1280, 720, "h264")
+    assert info.fps == pytest.approx(29.97, abs=0.01)
+    assert info.frame_count == 375
+    assert (info.audio_codec, info.sample_rate, info.channels) == ("aac", 48000, 2)
+    assert info.keyframes == [0.0, 4.0]
+    assert info.packet_count == 3
+    assert MediaInfo.from_dict(info.to_dict()) == info
+
+
+@patch("src.utils.ffmpeg_runner.FFmpegRunner.run")
+def test_single_call_cached_in_memory_and_on_disk(mock_run, tmp_path, media_file):
+    mock_run.return_value = _ffprobe()
+    probe = MediaProbe(cache_dir=str(tmp_path / "cache"))
+
+    first = probe.probe(str(media_file), keyframes=True)
+    # Sondagem simples é atendida pela entrada com keyframes
+    assert probe.probe(str(media_file)) is first
+    assert mock_run.call_count == 1
+    command = mock_run.call_args[0][0]
+    assert "-show_streams" in command and "packet=stream_index,pts_time,flags" in command
+
+    # Nova instância (outro processo) lê do disco sem chamar o ffprobe
+    reloaded = MediaProbe(cache_dir=str(tmp_path / "cache"))
+    assert reloaded.get_keyframes(str(media_file)) == [0.0, 4.0]
+    assert mock_run.call_count == 1
+    assert reloaded.get_stats()["disk_hits"] == 1
+
+
+@patch("src.utils.ffmpeg_runner.FFmpegRunner.run")
+def test_cache_invalidated_when_file_changes(mock_run, tmp_path, media_file):
+    mock_run.return_value = _ffprobe()
+    probe = MediaProbe(cache_dir=str(tmp_path / "cache"))
+
+    probe.probe(str(media_file))
+    media_file.write_bytes(b"re-encoded video")
+    os.utime(media_file, ns=(0, 10**9))
+    probe.probe(str(media_file))
+
+    assert mock_run.call_count == 2
+
+
+@patch("src.utils.ffmpeg_runner.FFmpegRunner.run")
+def test_keyframes_request_upgrades_cached_entry(mock_run, media_file):
+    data = {key: value for key, value in PROBE_OUTPUT.items() if key != "packets"}
+    mock_run.side_effect = [_ffprobe(data), _ffprobe()]
+    probe = MediaProbe(cache_dir=None)
+
+    assert probe.probe(str(media_file)).keyframes is None
+    assert probe.check_integrity(str(media_file))
+    assert mock_run.call_count == 2
+
+
+@patch("src.utils.ffmpeg_runner.FFmpegRunner.run")
+def test_errors_are_raised_and_not_cached(mock_run, media_file):
+    mock_run.return_value = Mock(returncode=1, stdout="", stderr="moov atom not found")
+    probe = MediaProbe(cache_dir=None)
+
+    with pytest.raises(VideoProcessingError):
+        probe.probe(str(media_file))
+    assert probe.get_duration(str(media_file), default=5.0) == 5.0
+    assert not probe.check_integrity(str(media_file))
+    assert probe.get_stats()["memory_entries"] == 0
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+def test_real_file_with_or_without_ffprobe(tmp_path):
+    path = tmp_path / "real.mp4"
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=160x90:rate=25",
+        "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(path),
+    ], check=True)
+
+    info = MediaProbe(cache_dir=str(tmp_path / "cache")).probe(str(path))
+
+    assert (info.width, info.height) == (160, 90)
+    assert info.duration == pytest.approx(2.0, abs=0.1)
+
+
+def test_wav_duration_without_ffprobe(tmp_path):
+    import wave
+
+    path = tmp_path / "narration.wav"
+    with wave.open(str(path), "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(22050)
+        writer.writeframes(b"\x00\x00" * 22050 * 3)
+    probe = MediaProbe(cache_dir=None)
+    probe._ffprobe_available = False
+
+    info = probe.probe(str(path))
+
+    assert info.duration == pytest.approx(3.0)
+    assert (info.sample_rate, info.channels, info.source) == (22050, 1, "wave")
+    assert info.has_audio and not info.has_video
@@ -4,6 +4,7 @@ Testes para ScriptValidator - AiShorts v2.0
 Testes abrangentes para o sistema de validação de roteiros.
 """
 
+import copy
 import pytest
 from datetime import datetime
 from unittest.mock import Mock, patch, mock_open
@@ -17,10 +18,11 @@ from src.validators.script_validator import (
     PlatformRequirements,
     PlatformType,
     ValidationSeverity,
-    QualityLevel
+    QualityLevel,
+    ScriptFeatures
 )
 from src.generators.script_generator import GeneratedScript, ScriptSection
-from src.generators.theme_generator import GeneratedTheme
+from src.generators.theme_generator import GeneratedTheme, ThemeCategory
 
 
 class TestScriptValidator:
@@ -347,6 +349,80 @@ class TestScriptValidator:
             assert platform in reports
             assert isinstance(reports[platform], ValidationReport)
 
+    def test_validate_multiple_platforms_extracts_features_once(self, validator, sample_script):
+        """Testa que a extração de features ocorre uma única vez por roteiro."""
+        with patch.object(validator, '_analyze_quality_metrics',
+                          wraps=validator._analyze_quality_metrics) as analyze, \
+             patch.object(validator, '_validate_structure',
+                          wraps=validator._validate_structure) as structure:
+            reports = validator.validate_multiple_platforms(sample_script)
+            validator.validate_script(sample_script, PlatformType.TIKTOK)
+        
+        assert len(reports) == 3
+        assert analyze.call_count == 1
+        assert structure.call_count == 1
+        
+        # Resultados idênticos aos da validação individual
+        validator.clear_feature_cache()
+        for platform, report in reports.items():
+            single = validator.validate_script(sample_script, platform)
+            assert single.overall_score == report.overall_score
+            assert [i.code for i in single.all_issues] == [i.code for i in report.all_issues]
+
+    def test_extract_features(self, validator, sample_script):
+        """Testa extração e cache de features."""
+        features = validator.extract_features(sample_script)
+        
+        assert isinstance(features, ScriptFeatures)
+        assert features.total_chars == len(sample_script.get_script_text())
+        assert [name for name, _ in features.section_percents] == ["hook", "development", "conclusion"]
+        
+        # A cópia devolvida pode ser alterada sem afetar o cache
+        features.structure_validation.issues.clear()
+        cached = validator.extract_features(sample_script)
+        assert cached is not features and cached.fingerprint == features.fingerprint
+        assert cached.total_chars == features.total_chars
+        
+        # Alterar o conteúdo invalida o cache
+        sample_script.sections[0].content += " Incrível!"
+        assert validator.extract_features(sample_script).fingerprint != features.fingerprint
+
+    def test_reports_do_not_share_cached_results(self, validator, sample_script):
+        """Testa que alterar um relatório não altera o cache nem os relatórios seguintes."""
+        reports = validator.validate_multiple_platforms(sample_script)
+        first = reports[PlatformType.TIKTOK]
+        codes = [issue.code for issue in first.structure_validation.issues]
+        
+        first.structure_validation.issues.append(
+            ValidationIssue(code="EXTRA", message="extra", severity=ValidationSeverity.INFO)
+        )
+        first.quality_metrics.engagement_score = -1
+        
+        again = validator.validate_script(sample_script, PlatformType.TIKTOK)
+        assert [issue.code for issue in again.structure_validation.issues] == codes
+        assert [issue.code for issue in reports[PlatformType.SHORTS].structure_validation.issues] == codes
+        assert again.quality_metrics.engagement_score != -1
+
+    def test_repeated_section_names_are_all_checked(self, validator, sample_script):
+        """Testa que seções com o mesmo nome são avaliadas separadamente."""
+        sample_script.sections.append(copy.deepcopy(sample_script.sections[0]))
+        features = validator.extract_features(sample_script)
+        
+        hooks = [percent for name, percent in features.section_percents if name == "hook"]
+        assert len(hooks) == 2
+
+    def test_validate_batch(self, validator, sample_script, invalid_script):
+        """Testa validação em lote."""
+        results = validator.validate_batch(
+            [sample_script, invalid_script],
+            platforms=[PlatformType.TIKTOK, PlatformType.SHORTS]
+        )
+        
+        assert len(results) == 2
+        for reports in results:
+            assert set(reports) == {PlatformType.TIKTOK, PlatformType.SHORTS}
+        assert results[1][PlatformType.TIKTOK].is_approved is False
+
     def test_generate_suggestions(self, validator):
         """Testa geração de sugestões."""
         # Cria alguns issues com sugestões
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para as legendas em ASS renderizadas pela libass.
+"""
+
+import re
+import shutil
+import subprocess
+from unittest.mock import Mock
+
+import cv2
+import pytest
+
+from src.video.processing.ass_captions import (
+    ass_time,
+    escape_filter_value,
+    layout_caption,
+    libass_available,
+    load_font,
+    resolve_font_path,
+    subtitles_filter,
+    write_ass_subtitles,
+)
+from src.video.processing.filtergraph_composer import (
+    CompositionJob,
+    CompositionSegment,
+    FilterGraphRenderer,
+    build_composition_graph,
+    colorx_filter,
+)
+
+
+requires_libass = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or not libass_available(),
+    reason="FFmpeg com libass não disponível",
+)
+
+STYLE = {
+    "font_size": 40,
+    "font_color": "#FFFFFF",
+    "background_color": "#101010",
+    "background_opacity": 0.9,
+    "position": "center",
+}
+
+
+def _captions(**style):
+    return [
+        {"text": "Primeira legenda {teste}", "start_time": 0.0, "end_time": 1.5, "style": {**STYLE, **style}},
+        {"text": "Segunda legenda com várias palavras para quebrar em mais de uma linha",
+         "start_time": 1.5, "end_time": 3.0, "style": {**STYLE, **style}},
+        {"text": "   ", "start_time": 3.0, "end_time": 4.0, "style": STYLE},
+    ]
+
+
+class TestAssCaptions:
+    """Testes para o documento ASS e o filtro `subtitles`."""
+
+    def test_document_has_styles_and_one_event_per_line(self, tmp_path):
+        """Testa cabeçalho, estilos deduplicados, eventos (painel + linhas) e escape de chaves."""
+        subtitles = write_ass_subtitles(_captions(), (720, 1280), str(tmp_path / "captions.ass"))
+        document = (tmp_path / "captions.ass").read_text(encoding="utf-8")
+        font_path = resolve_font_path(None)
+        expected_lines = sum(
+            len(layout_caption(caption["text"], (720, 1280), STYLE, font_path).lines)
+            for caption in _captions()[:2]
+        )
+
+        assert subtitles.captions == 2
+        assert subtitles.events == 2 + expected_lines
+        assert "PlayResX: 720" in document and "PlayResY: 1280" in document
+        assert len(re.findall(r"^Style: Caption\d+", document, re.M)) == 1
+        assert "Dialogue: 0,0:00:00.00,0:00:01.50,Box" in document
+        assert "\\{teste\\}" in document
+        assert ass_time(3725.456) == "1:02:05.46"
+
+    def test_karaoke_timing_covers_caption(self, tmp_path):
+        """Testa que o tempo de karaokê das palavras soma a duração da legenda."""
+        write_ass_subtitles(_captions(karaoke=True), (720, 1280), str(tmp_path / "k.ass"))
+        document = (tmp_path / "k.ass").read_text(encoding="utf-8")
+        second = [line for line in document.splitlines() if line.startswith("Dialogue: 1,0:00:01.50")]
+
+        total = sum(int(value) for line in second for value in re.findall(r"\\kf(\d+)", line))
+        assert len(second) > 1
+        assert abs(total - 150) <= len(second) * 4
+        assert "\\k" in second[1]
+
+    def test_font_loaded_once_and_paths_escaped(self):
+        """Testa o cache de fontes e o escape de caminhos com ':' no filter graph."""
+        load_font.cache_clear()
+        font_path = resolve_font_path(None)
+        load_font(font_path, 48)
+        load_font(font_path, 48)
+
+        assert load_font.cache_info().hits == 1
+        assert escape_filter_value("C:/a b/x.ass") == "C\\\\:/a b/x.ass"
+        assert write_ass_subtitles(_captions()[2:], (720, 1280), "/tmp/unused.ass") is None
+
+    @requires_libass
+    def test_filtergraph_burns_subtitles(self, tmp_path):
+        """Testa a legenda queimada pela libass na composição por filter_complex."""
+        subtitles = write_ass_subtitles(_captions(), (180, 320), str(tmp_path / "captions.ass"))
+        job = CompositionJob(
+            width=180, height=320, fps=25,
+            segments=[CompositionSegment(duration=1.0, color="#00FF00")],
+            subtitles=subtitles, final_colorx=1.0, bitrate=None, preset="ultrafast",
+        )
+        _, graph = build_composition_graph(job)
+        output = tmp_path / "out.mp4"
+
+        FilterGraphRenderer().render(job, str(output))
+        capture = cv2.VideoCapture(str(output))
+        ok, frame = capture.read()
+        capture.release()
+
+        assert "[cat]subtitles=filename=" in graph
+        assert ok
+        layout = layout_caption(_captions()[0]["text"], (180, 320), STYLE, resolve_font_path(None))
+        corner = frame[layout.panel_y + 3, layout.panel_x + layout.panel_width // 2]
+        assert corner[1] < 80
+        assert frame[5, 5][1] > 200
+
+    @requires_libass
+    def test_subtitles_filter_renders_text(self, tmp_path):
+        """Testa o filtro usado no encode do MoviePy (-vf) com texto visível sobre o painel."""
+        subtitles = write_ass_subtitles(_captions(), (360, 640), str(tmp_path / "c.ass"))
+        output = tmp_path / "frame.png"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "color=c=black:s=360x640:d=1",
+            "-vf", subtitles_filter(subtitles), "-frames:v", "1", str(output),
+        ], check=True)
+
+        frame = cv2.imread(str(output))
+        layout = layout_caption(_captions()[0]["text"], (360, 640), STYLE, resolve_font_path(None))
+        panel = frame[layout.panel_y:layout.panel_y + layout.panel_height,
+                      layout.panel_x:layout.panel_x + layout.panel_width]
+        assert panel.max() > 200
+
+    def test_moviepy_path_boosts_color_after_captions(self, tmp_path):
+        """Testa que o MoviePy queima as legendas antes do realce de cor, como o backend ffmpeg."""
+        from src.video.generators.final_video_composer import FinalVideoComposer
+
+        composer = FinalVideoComposer(config={"final_composition": {
+            "temp_dir": str(tmp_path / "tmp"), "output_dir": str(tmp_path / "out"),
+        }})
+        subtitles = write_ass_subtitles(_captions(), (180, 320), str(tmp_path / "captions.ass"))
+        clip = Mock(fps=composer.default_fps)
+
+        assert composer._apply_final_video_settings(clip, None, apply_color=False) is clip
+        clip.fx.assert_not_called()
+        composer._render_final_video(clip, str(tmp_path / "final.mp4"), None, subtitles=subtitles)
+
+        params = clip.write_videofile.call_args.kwargs["ffmpeg_params"]
+        video_filter = params[params.index("-vf") + 1]
+        assert video_filter == f"{subtitles_filter(subtitles)},{colorx_filter(composer.FINAL_COLORX)}"
+        job = CompositionJob(
+            width=180, height=320, fps=25, segments=[CompositionSegment(duration=1.0, color="#00FF00")],
+            subtitles=subtitles, final_colorx=composer.FINAL_COLORX,
+        )
+        _, graph = build_composition_graph(job)
+        assert graph.index("subtitles=") < graph.index(colorx_filter(composer.FINAL_COLORX))
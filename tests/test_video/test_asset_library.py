@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para a biblioteca local de assets de B-roll.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.video.library.asset_library import BrollAssetLibrary, AssetEntry
+
+
+class TestBrollAssetLibrary:
+    """Testes para BrollAssetLibrary."""
+
+    @pytest.fixture
+    def library(self, tmp_path):
+        """Biblioteca em diretório temporário."""
+        return BrollAssetLibrary(
+            str(tmp_path / "library"),
+            max_size_bytes=None,
+            probe_func=lambda path: {"duration": 12.5},
+        )
+
+    @pytest.fixture
+    def make_video(self, tmp_path):
+        """Cria arquivos de vídeo falsos."""
+        def _make(name, size=1000):
+            path = tmp_path / name
+            path.write_bytes(os.urandom(size))
+            return str(path)
+        return _make
+
+    def test_put_and_lookup(self, library, make_video):
+        """Testa armazenamento e consulta por ID e formato."""
+        source = make_video("abc.mp4")
+        entry = library.put("abc", source, format_key="720p", queries=["cute cat"], source_url="https://y/abc")
+
+        assert isinstance(entry, AssetEntry)
+        assert entry.probe == {"duration": 12.5}
+        assert os.path.exists(entry.path)
+        assert os.path.exists(source)  # copia por padrão
+
+        found = library.lookup("abc", "720p")
+        assert found is not None
+        assert found.sha256 == entry.sha256
+        assert found.queries == ["cute cat"]
+        assert library.lookup("abc", "1080p") is None
+        assert library.lookup("missing", "720p") is None
+
+        stats = library.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["entries"] == 1
+
+    def test_put_move_and_merge_queries(self, library, make_video):
+        """Testa movimentação do arquivo e acumulação de queries."""
+        first = make_video("a1.mp4")
+        library.put("vid", first, queries=["ocean waves"], move=True)
+        assert not os.path.exists(first)
+
+        library.put("vid", make_video("a2.mp4"), queries=["sea"])
+        library.add_queries("vid", ["beach"])
+
+        entry = library.lookup("vid")
+        assert entry.queries == ["ocean waves", "sea", "beach"]
+        assert [e.video_id for e in library.find_by_query("  Ocean   WAVES ")] == ["vid"]
+        assert library.find_by_query("mountain") == []
+
+    def test_lookup_detects_truncated_file(self, library, make_video):
+        """Testa que arquivos corrompidos não são retornados."""
+        entry = library.put("vid", make_video("v.mp4", size=500))
+        with open(entry.path, "wb") as f:
+            f.write(b"short")
+
+        assert library.lookup("vid") is None
+
+    def test_size_budget_evicts_least_recently_used(self, tmp_path, make_video):
+        """Testa remoção LRU ao exceder orçamento de disco."""
+        library = BrollAssetLibrary(str(tmp_path / "lib"), max_size_bytes=2500, eviction_grace_seconds=0)
+
+        library.put("old", make_video("o.mp4"))
+        library.put("mid", make_video("m.mp4"))
+        time.sleep(0.01)
+        library.lookup("old")  # "old" passa a ser o mais recente
+        library.put("new", make_video("n.mp4"))
+
+        ids = {entry.video_id for entry in library.list_entries()}
+        assert ids == {"old", "new"}
+
+    def test_budget_keeps_pinned_and_recently_used(self, tmp_path, make_video):
+        """Testa que assets em uso (fixados ou acessados há pouco) não são removidos."""
+        library = BrollAssetLibrary(str(tmp_path / "lib"), max_size_bytes=1500, eviction_grace_seconds=60)
+
+        library.put("recent", make_video("r.mp4"))
+        library.put("new", make_video("n.mp4"))
+        assert {entry.video_id for entry in library.list_entries()} == {"recent", "new"}
+
+        library.eviction_grace_seconds = 0
+        assert library.pin("recent", "run-1")
+        library.put("newer", make_video("w.mp4"))
+        assert {entry.video_id for entry in library.list_entries()} == {"recent", "newer"}
+
+        library.unpin("recent", "run-1")
+        library.put("last", make_video("l.mp4"))
+        assert [entry.video_id for entry in library.list_entries()] == ["last"]
+
+    def test_budget_evicts_stale_pins(self, tmp_path, make_video):
+        """Testa que o pin de um dono que morreu sem liberar vence e o asset volta ao orçamento."""
+        library = BrollAssetLibrary(str(tmp_path / "lib"), max_size_bytes=1500, eviction_grace_seconds=0)
+        stale = library.put("stale", make_video("s.mp4"))
+        assert library.pin("stale", "run-crashed", ttl_seconds=60)
+        library.put("new", make_video("n.mp4"))
+        assert {entry.video_id for entry in library.list_entries()} == {"stale", "new"}
+
+        entry_dir = library._entry_dir("stale", stale.format_key)
+        entry = library._read_meta(entry_dir)
+        entry.pinned_by = {"run-crashed": time.time() - 1}
+        library._write_meta(entry_dir, entry)
+        assert library.is_evictable(entry)
+
+        library.put("newer", make_video("w.mp4"))
+        assert [entry.video_id for entry in library.list_entries()] == ["newer"]
+
+    def test_touch_keeps_concurrent_updates(self, library, make_video):
+        """Testa que atualizar o último acesso não desfaz uma escrita concorrente."""
+        entry = library.put("vid", make_video("v.mp4"), queries=["cat"])
+        stale = library._read_meta(library._entry_dir("vid", entry.format_key))
+
+        library.add_queries("vid", ["kitten"])
+        touched = library._touch(library._entry_dir("vid", entry.format_key), stale)
+
+        assert touched.queries == ["cat", "kitten"]
+        assert library.lookup("vid").queries == ["cat", "kitten"]
+        assert touched.last_access >= entry.last_access
+
+    def test_mezzanine_generated_on_entry(self, tmp_path, make_video):
+        """Testa geração do mezzanine na entrada, uso preferencial e orçamento."""
+        calls = []
+
+        def build(source, output):
+            calls.append(source)
+            with open(output, "wb") as f:
+                f.write(b"m" * 3000)
+
+        library = BrollAssetLibrary(str(tmp_path / "lib"), max_size_bytes=None, mezzanine_func=build)
+        entry = library.put("vid", make_video("v.mp4"))
+
+        assert len(calls) == 1
+        assert entry.media_path == entry.mezzanine_path != entry.path
+        assert entry.total_bytes == 4000
+        assert library.lookup("vid").media_path == entry.mezzanine_path
+        assert library.get_stats()["mezzanine_bytes"] == 3000
+
+        # Falha na geração: o asset fica só com o original
+        library.mezzanine_func = lambda source, output: (_ for _ in ()).throw(RuntimeError("ffmpeg"))
+        replaced = library.put("vid", make_video("v2.mp4"))
+        assert replaced.mezzanine_path is None
+        assert replaced.media_path == replaced.path
+        assert not os.path.exists(entry.mezzanine_path)
+
+    def test_age_budget(self, library, make_video):
+        """Testa remoção por idade."""
+        entry = library.put("stale", make_video("s.mp4"))
+        meta_path = os.path.join(os.path.dirname(entry.path), BrollAssetLibrary.META_FILE)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["last_access"] = time.time() - 10 * 86400
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        library.max_age_days = 7
+        evicted = library.enforce_budget()
+
+        assert [e.video_id for e in evicted] == ["stale"]
+        assert library.lookup("stale") is None
+
+    def test_concurrent_puts(self, library, make_video):
+        """Testa escritas concorrentes na mesma biblioteca."""
+        sources = [make_video(f"c{i}.mp4") for i in range(8)]
+        errors = []
+
+        def _put(index):
+            try:
+                library.put(f"vid{index % 4}", sources[index], queries=[f"q{index}"])
+            except Exception as e:  # pragma: no cover - falha do teste
+                errors.append(e)
+
+        threads = [threading.Thread(target=_put, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        entries = library.list_entries()
+        assert len(entries) == 4
+        for entry in entries:
+            assert os.path.getsize(entry.path) == entry.size_bytes
+        assert list((library.tmp_dir).glob("*")) == []
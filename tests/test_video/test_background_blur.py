@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o fundo desfocado em baixa resolução do layout sandwich.
+"""
+
+import shutil
+import subprocess
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from src.video.processing.background_blur import (
+    BackgroundSpec,
+    BlurredBackgroundCache,
+    LowResBlur,
+    build_background_command,
+)
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+
+def _source_frame():
+    """Quadro 1280x720 com detalhe fino e variações amplas de cor."""
+    y, x = np.mgrid[0:720, 0:1280]
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[..., 0] = (x * 255 // 1279).astype(np.uint8)
+    frame[..., 1] = (y * 255 // 719).astype(np.uint8)
+    frame[..., 2] = (((x // 8 + y // 8) % 2) * 255).astype(np.uint8)
+    return frame
+
+
+class TestBackgroundBlur:
+    """Testes para BackgroundSpec, LowResBlur e BlurredBackgroundCache."""
+
+    def test_spec_scales_size_and_sigma(self):
+        """Testa a resolução reduzida (lados pares) e o sigma proporcional."""
+        spec = BackgroundSpec(width=1080, height=1920, blur_sigma=35, downscale=8)
+
+        assert spec.small_size == (134, 240)
+        assert spec.small_sigma == pytest.approx(4.375)
+        assert BackgroundSpec(downscale=1).small_size == (1080, 1920)
+        assert spec.cache_token() != BackgroundSpec(fps=10).cache_token()
+
+    def test_lowres_blur_matches_full_resolution_at_fraction_of_cost(self):
+        """Testa que o fundo é visualmente igual ao desfoque em resolução cheia e muito mais barato."""
+        spec = BackgroundSpec(width=1080, height=1920)
+        frame = _source_frame()
+
+        started = time.perf_counter()
+        reference = cv2.GaussianBlur(cv2.resize(frame, (1080, 1920)), (0, 0), 35)
+        full_cost = time.perf_counter() - started
+
+        blur = LowResBlur(spec)
+        started = time.perf_counter()
+        background = blur(lambda t: frame, 0.0)
+        lowres_cost = time.perf_counter() - started
+
+        assert background.shape == reference.shape
+        assert cv2.PSNR(reference, background) > 30
+        assert full_cost / lowres_cost > 10
+
+    def test_frame_hold_and_memory_reuse(self):
+        """Testa a taxa reduzida (mesmo fundo entre atualizações) e a reutilização em loops."""
+        calls = []
+
+        def get_frame(t):
+            calls.append(t)
+            return np.full((72, 128, 3), int(t * 100), dtype=np.uint8)
+
+        blur = LowResBlur(BackgroundSpec(width=90, height=160, fps=10))
+        frames = [blur(get_frame, index / 30) for index in range(6)]
+
+        assert calls == [0.0, 0.1]
+        assert np.array_equal(frames[0], frames[2]) and not np.array_equal(frames[0], frames[3])
+        blur(get_frame, 0.05)
+        assert (blur.hits, blur.misses) == (5, 2)
+
+    def test_background_command_downscales_and_holds_rate(self):
+        """Testa o comando de geração do fundo: taxa reduzida, escala e desfoque pequenos."""
+        command = build_background_command("in.mp4", "bg.mp4", BackgroundSpec(fps=12))
+
+        assert command[command.index("-vf") + 1] == (
+            "fps=12,scale=134:240:flags=area,gblur=sigma=4.38,setsar=1,format=yuv420p"
+        )
+        assert "-an" in command
+
+    @requires_ffmpeg
+    def test_cache_generates_once_per_source(self, tmp_path):
+        """Testa o fundo gerado em baixa resolução e reaproveitado do cache."""
+        source = tmp_path / "clip.mp4"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=320x180:rate=25",
+            "-t", "1", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(source),
+        ], check=True)
+        cache = BlurredBackgroundCache(str(tmp_path / "cache"))
+        spec = BackgroundSpec(width=180, height=320, downscale=4)
+
+        first = cache.get(str(source), spec)
+        again = cache.get(str(source), spec)
+
+        capture = cv2.VideoCapture(first)
+        size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        capture.release()
+        assert first == again
+        assert size == (44, 80)
+        assert cache.stats == {"hits": 1, "misses": 1}
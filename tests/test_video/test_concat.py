@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o planejamento de concatenação por cópia de streams.
+"""
+
+import shutil
+import subprocess
+from unittest.mock import patch
+
+import cv2
+import pytest
+
+from src.utils.ffmpeg_runner import FFmpegRunner
+from src.utils.media_probe import MediaInfo, MediaProbe
+from src.video.processing.concat import StreamSignature, build_conform_command, plan_concat
+from src.video.processing.video_processor import VideoProcessor
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+
+def _probe_data(width=160, height=90, rate="25/1", time_base="1/12800", audio=True, duration=2.0):
+    streams = [{
+        "index": 0, "codec_type": "video", "codec_name": "h264", "profile": "High",
+        "width": width, "height": height, "pix_fmt": "yuv420p", "r_frame_rate": rate,
+        "avg_frame_rate": rate, "time_base": time_base, "sample_aspect_ratio": "1:1",
+    }]
+    if audio:
+        streams.append({"index": 1, "codec_type": "audio", "codec_name": "aac",
+                        "sample_rate": "48000", "channels": 2})
+    return {"format": {"duration": str(duration)}, "streams": streams}
+
+
+class StubProbe(MediaProbe):
+    """Devolve a sondagem do ffprobe registrada por caminho; demais via OpenCV."""
+
+    def __init__(self, data_by_path):
+        super().__init__(cache_dir=None)
+        self.data_by_path = data_by_path
+
+    def probe(self, path, *, keyframes=False):
+        if path in self.data_by_path:
+            return MediaInfo.from_ffprobe(path, 0, 0, self.data_by_path[path])
+        return super().probe(path, keyframes=keyframes)
+
+
+def _make_clip(path, size="160x90", rate=25, audio=True):
+    command = ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={rate}"]
+    if audio:
+        command += ["-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000"]
+    command += ["-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p"]
+    command += ["-c:a", "aac", "-ac", "2"] if audio else ["-an"]
+    subprocess.run(command + [str(path)], check=True)
+    return str(path)
+
+
+class TestConcatPlan:
+    """Testes para plan_concat, o comando de conformação e VideoProcessor.concatenate_videos."""
+
+    def test_plan_picks_majority_spec_and_flags_only_mismatches(self):
+        """Testa a especificação comum pela maior duração e o re-encode só das divergentes."""
+        infos = [
+            MediaInfo.from_ffprobe("a.mp4", 0, 0, _probe_data()),
+            MediaInfo.from_ffprobe("b.mp4", 0, 0, _probe_data(width=320, height=180, audio=False)),
+            MediaInfo.from_ffprobe("c.mp4", 0, 0, _probe_data()),
+        ]
+
+        plan = plan_concat(infos)
+
+        assert plan.strategy == "conform"
+        assert [item.path for item in plan.reencoded] == ["b.mp4"]
+        assert "width" in plan.reencoded[0].reason and "audio_codec" in plan.reencoded[0].reason
+        assert plan.expected_duration == pytest.approx(6.0)
+        assert plan_concat(infos[::2]).strategy == "copy"
+
+        # Sem descrição dos streams (fallback OpenCV) não há como garantir a cópia
+        unknown = MediaInfo(path="d.mp4", size=0, mtime_ns=0, duration=2.0, source="opencv")
+        assert plan_concat(infos + [unknown]).strategy == "fallback"
+
+    def test_conform_command_matches_target_and_adds_silence(self):
+        """Testa escala com pad, timescale, perfil e áudio silencioso para entrada sem áudio."""
+        target = StreamSignature.from_media_info(MediaInfo.from_ffprobe("a.mp4", 0, 0, _probe_data()))
+
+        command = build_conform_command("in.mp4", "out.mp4", False, target)
+
+        assert "anullsrc=r=48000:cl=stereo" in command
+        assert command[command.index("-vf") + 1].startswith("scale=160:90:force_original_aspect_ratio=decrease")
+        assert command[command.index("-video_track_timescale") + 1] == "12800"
+        assert command[command.index("-profile:v") + 1] == "high"
+        assert "1:a:0" in command and "-shortest" in command
+
+    @requires_ffmpeg
+    def test_concatenate_copies_matching_inputs_and_reencodes_only_the_odd_one(self, tmp_path):
+        """Testa a concatenação real: só a entrada divergente passa pelo encoder."""
+        a = _make_clip(tmp_path / "a.mp4")
+        b = _make_clip(tmp_path / "b.mp4", size="320x180", rate=30, audio=False)
+        c = _make_clip(tmp_path / "c.mp4")
+        probe = StubProbe({
+            a: _probe_data(),
+            b: _probe_data(width=320, height=180, rate="30/1", time_base="1/15360", audio=False),
+            c: _probe_data(),
+        })
+        processor = VideoProcessor(config={"temp_dir": str(tmp_path / "tmp")}, media_probe=probe)
+        output = tmp_path / "joined.mp4"
+
+        with patch.object(FFmpegRunner, "run", autospec=True, side_effect=FFmpegRunner.run) as run:
+            assert processor.concatenate_videos([a, b, c], str(output))
+
+        calls = [call for call in run.call_args_list if call.kwargs["label"].startswith("concat_")]
+        assert [call.kwargs["label"] for call in calls] == ["concat_conform", "concat_copy"]
+        assert calls[0].kwargs["video_path"] == b
+        assert processor.last_concat_plan.strategy == "conform"
+
+        capture = cv2.VideoCapture(str(output))
+        size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        capture.release()
+        assert size == (160, 90)
+        assert frames == pytest.approx(150, abs=3)
+        assert not list((tmp_path / "tmp").glob("concat_*"))
+
+    def test_unknown_streams_fall_back_to_moviepy(self, tmp_path):
+        """Testa o caminho antigo quando a sonda não descreve os streams."""
+        clip = tmp_path / "a.mp4"
+        clip.write_bytes(b"video")
+        probe = StubProbe({})
+        probe.probe = lambda path, keyframes=False: MediaInfo(
+            path=path, size=0, mtime_ns=0, duration=2.0, source="opencv"
+        )
+        processor = VideoProcessor(config={"temp_dir": str(tmp_path / "tmp")}, media_probe=probe)
+
+        with patch.object(VideoProcessor, "_concatenate_with_moviepy", return_value=True) as moviepy:
+            assert processor.concatenate_videos([str(clip), str(tmp_path / "missing.mp4")], "out.mp4")
+
+        moviepy.assert_called_once_with([str(clip)], "out.mp4")
+        assert processor.last_concat_plan.strategy == "fallback"
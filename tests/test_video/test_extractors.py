@@ -3,6 +3,13 @@
 Testes para extractors de vídeo.
 """
 
+import json
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
 import pytest
 import tempfile
 from pathlib import Path
@@ -10,7 +17,9 @@ from unittest.mock import Mock, patch, MagicMock
 
 # Importar módulos a serem testados
 from src.video.extractors.youtube_extractor import YouTubeExtractor
-from src.video.extractors.segment_processor import SegmentProcessor
+from src.video.extractors.segment_processor import SegmentProcessor, KeyframeIndex, SegmentJob
+from src.video.extractors.format_selector import FormatSelectionPolicy
+from src.utils.media_probe import MediaInfo, MediaProbe
 from src.utils.exceptions import (
     YouTubeExtractionError,
     VideoUnavailableError,
@@ -192,7 +201,69 @@ class TestYouTubeExtractor:
         
         assert "privado" in str(exc_info.value).lower()
         assert exc_info.value.details['unavailable_reason'] == 'private'
-    
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_search_videos_cached(self, mock_ydl, extractor, mock_ydl_search_result):
+        """Testa que buscas repetidas (query normalizada) usam o cache."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = mock_ydl_search_result
+
+        first = extractor.search_videos("Gatos  Engraçados", max_results=5)
+        first[0]['title'] = 'alterado pelo chamador'
+        second = extractor.search_videos("  gatos engraçados ", max_results=5)
+
+        assert mock_ydl_instance.extract_info.call_count == 1
+        assert second[0]['title'] == 'Vídeo de Teste 1'
+
+        # Quantidade diferente de resultados é outra chave
+        extractor.search_videos("gatos engraçados", max_results=3)
+        assert mock_ydl_instance.extract_info.call_count == 2
+
+        stats = extractor.get_cache_stats()['search']
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_extract_video_info_cached_by_id(self, mock_ydl, extractor, mock_ydl_info_result):
+        """Testa cache de metadados por ID, independente do formato da URL."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = mock_ydl_info_result
+
+        extractor.extract_video_info("https://www.youtube.com/watch?v=test_video_123")
+        info = extractor.extract_video_info("https://youtu.be/test_video_123")
+
+        assert info['title'] == 'Vídeo de Teste Completo'
+        mock_ydl_instance.extract_info.assert_called_once()
+        assert extractor.get_cache_stats()['info']['hits'] == 1
+
+    @patch('src.utils.exceptions.ErrorHandler.retry_with_backoff', side_effect=lambda func, **kwargs: func())
+    @patch('yt_dlp.YoutubeDL')
+    def test_extract_video_info_negative_cache(self, mock_ydl, mock_retry, extractor):
+        """Testa que vídeos indisponíveis (ex.: restrição de idade) não são consultados de novo."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.side_effect = Exception(
+            "Sign in to confirm your age. This video may be inappropriate for some users."
+        )
+
+        for _ in range(2):
+            with pytest.raises(VideoUnavailableError) as exc_info:
+                extractor.extract_video_info("https://www.youtube.com/watch?v=age_gated01")
+            assert exc_info.value.details['unavailable_reason'] == 'age_restricted'
+
+        mock_ydl_instance.extract_info.assert_called_once()
+        assert extractor.get_cache_stats()['info']['negative_hits'] == 1
+
+    def test_extract_video_id(self):
+        """Testa extração do ID a partir de diferentes formatos de URL."""
+        assert YouTubeExtractor.extract_video_id("https://www.youtube.com/watch?v=abc123&t=10") == "abc123"
+        assert YouTubeExtractor.extract_video_id("https://youtu.be/abc123?si=x") == "abc123"
+        assert YouTubeExtractor.extract_video_id("https://www.youtube.com/shorts/abc123") == "abc123"
+        assert YouTubeExtractor.extract_video_id("dQw4w9WgXcQ") == "dQw4w9WgXcQ"
+        assert YouTubeExtractor.extract_video_id("https://example.com/video") is None
+
     @patch('yt_dlp.YoutubeDL')
     def test_download_segment_success(self, mock_ydl, extractor):
         """Testa download de segmento com sucesso."""
@@ -205,17 +276,235 @@ class TestYouTubeExtractor:
             'duration': 60
         }
         
-        # Mock do glob para simular arquivo criado
-        with patch('glob.glob', return_value=['/tmp/segment_file.mp4']):
-            with patch('pathlib.Path.exists', return_value=True):
-                segment_path = extractor.download_segment(
-                    "https://www.youtube.com/watch?v=test_video_123", 
-                    10, 
-                    5
-                )
-                
-                assert segment_path.endswith('.mp4')
-                mock_ydl_instance.extract_info.assert_called_once()
+        # Arquivo criado pelo yt-dlp
+        (extractor.output_dir / 'test_video_123_segment_10000.mp4').write_bytes(b'video')
+        with patch('pathlib.Path.exists', return_value=True):
+            segment_path = extractor.download_segment(
+                "https://www.youtube.com/watch?v=test_video_123", 
+                10, 
+                5
+            )
+            
+            assert segment_path.endswith('.mp4')
+            mock_ydl_instance.extract_info.assert_called_once()
+    
+    @patch('yt_dlp.downloader.external.FFmpegFD.available', return_value=True)
+    @patch('yt_dlp.YoutubeDL')
+    def test_download_segment_range_reuses_info(self, mock_ydl, mock_ffmpeg, extractor):
+        """Testa download apenas do intervalo reutilizando info dict existente."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        info = {
+            'id': 'test_video_123',
+            'duration': 180,
+            'url': 'https://cdn.example.com/video.mp4',
+            'protocol': 'https',
+        }
+        
+        (extractor.output_dir / 'test_video_123_segment_10000.mp4').write_bytes(b'video')
+        segment_path = extractor.download_segment(
+            "https://www.youtube.com/watch?v=test_video_123", 10, 5, info=info
+        )
+        
+        assert segment_path.endswith('.mp4')
+        mock_ydl_instance.extract_info.assert_not_called()
+        mock_ydl_instance.process_ie_result.assert_called_once()
+        
+        opts = mock_ydl.call_args[0][0]
+        assert 'download_ranges' in opts
+        assert opts['force_keyframes_at_cuts'] is True
+        assert 'postprocessor_args' not in opts
+        ranges = list(opts['download_ranges'](info, None))
+        assert ranges[0]['start_time'] == 10
+        assert ranges[0]['end_time'] == 15
+    
+    @patch('yt_dlp.YoutubeDL')
+    def test_download_segment_falls_back_to_full_download(self, mock_ydl, extractor):
+        """Testa fallback para download completo quando o formato não aceita intervalos."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        info = {
+            'id': 'test_video_123',
+            'duration': 180,
+            'url': 'rtmp://example.com/live',
+            'protocol': 'rtmp',
+        }
+        
+        (extractor.output_dir / 'test_video_123_segment_10000.mp4').write_bytes(b'video')
+        extractor.download_segment(
+            "https://www.youtube.com/watch?v=test_video_123", 10, 5, info=info
+        )
+        
+        opts = mock_ydl.call_args[0][0]
+        assert 'download_ranges' not in opts
+        assert opts['postprocessor_args'] == ['-ss', '10', '-t', '5']
+    
+    @patch('yt_dlp.YoutubeDL')
+    def test_download_video_remuxes_selected_format(self, mock_ydl, extractor):
+        """Testa que o download completo usa a política de formato e evita transcodificação."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {
+            'id': 'test_video_123',
+            'duration': 60,
+            'formats': [
+                {'format_id': '18', 'ext': 'mp4', 'vcodec': 'avc1.42001E', 'acodec': 'mp4a.40.2',
+                 'width': 640, 'height': 360, 'tbr': 500, 'protocol': 'https'},
+                {'format_id': '137', 'ext': 'mp4', 'vcodec': 'avc1.640028', 'acodec': 'none',
+                 'width': 1920, 'height': 1080, 'tbr': 4000, 'protocol': 'https'},
+                {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2',
+                 'abr': 128, 'protocol': 'https'},
+            ],
+        }
+        
+        (extractor.output_dir / 'test_video_123.mp4').write_bytes(b'video')
+        path = extractor.download_video("https://www.youtube.com/watch?v=test_video_123")
+        
+        assert path.endswith('.mp4')
+        mock_ydl_instance.process_ie_result.assert_called_once()
+        opts = mock_ydl.call_args[0][0]
+        assert opts['format'] == '137+140'
+        assert opts['merge_output_format'] == 'mp4'
+        assert all(pp['key'] != 'FFmpegVideoConvertor' for pp in opts.get('postprocessors', []))
+        assert extractor.get_format_stats()['remux'] == 1
+    
+    @patch('yt_dlp.YoutubeDL')
+    def test_download_video_fragment_parallelism_and_resume(self, mock_ydl, extractor):
+        """Testa opções de fragmentos em paralelo, retomada e divisão do limite de banda."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {
+            'id': 'dash_video01',
+            'duration': 60,
+            'formats': [
+                {'format_id': '137', 'ext': 'mp4', 'vcodec': 'avc1.640028', 'acodec': 'none',
+                 'width': 1920, 'height': 1080, 'tbr': 4000, 'protocol': 'http_dash_segments',
+                 'filesize': 1000},
+                {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2',
+                 'abr': 128, 'protocol': 'http_dash_segments', 'filesize': 100},
+            ],
+        }
+        output_dir = extractor.output_dir
+        # Parcial consistente (retomável) e parcial maior que o stream (descartado)
+        (output_dir / 'dash_video01.f137.mp4.part').write_bytes(b'v' * 500)
+        (output_dir / 'dash_video01.f140.m4a.part').write_bytes(b'a' * 150)
+        (output_dir / 'dash_video01.f140.m4a.ytdl').write_text('{}')
+        
+        def _process(info, download):
+            assert (output_dir / 'dash_video01.f137.mp4.part').exists()
+            assert not (output_dir / 'dash_video01.f140.m4a.part').exists()
+            assert not (output_dir / 'dash_video01.f140.m4a.ytdl').exists()
+            (output_dir / 'dash_video01.f137.mp4.part').unlink()
+            (output_dir / 'dash_video01.mp4').write_bytes(b'x' * 1050)
+        mock_ydl_instance.process_ie_result.side_effect = _process
+        
+        path = extractor.download_video(
+            "https://www.youtube.com/watch?v=dash_video01", rate_limit=400_000
+        )
+        
+        assert path == str(output_dir / 'dash_video01.mp4')
+        opts = mock_ydl.call_args[0][0]
+        assert opts['concurrent_fragment_downloads'] == 4
+        assert opts['continuedl'] is True
+        assert opts['fragment_retries'] == 10
+        assert opts['skip_unavailable_fragments'] is False
+        assert opts['ratelimit'] == 100_000
+    
+    @patch('src.utils.exceptions.ErrorHandler.retry_with_backoff', side_effect=lambda func, **kwargs: func())
+    @patch('yt_dlp.YoutubeDL')
+    def test_download_video_rejects_truncated_file(self, mock_ydl, mock_retry, extractor):
+        """Testa que arquivo final menor que os streams declarados é descartado."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {
+            'id': 'short_file1',
+            'duration': 60,
+            'formats': [
+                {'format_id': '22', 'ext': 'mp4', 'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2',
+                 'width': 1280, 'height': 720, 'tbr': 2000, 'protocol': 'https', 'filesize': 10_000},
+            ],
+        }
+        truncated = extractor.output_dir / 'short_file1.mp4'
+        mock_ydl_instance.process_ie_result.side_effect = lambda info, download: truncated.write_bytes(b'x' * 10)
+        
+        with pytest.raises(YouTubeExtractionError) as exc_info:
+            extractor.download_video("https://www.youtube.com/watch?v=short_file1")
+        
+        assert 'incompleto' in str(exc_info.value)
+        assert not truncated.exists()
+    
+    @patch('src.utils.exceptions.ErrorHandler.retry_with_backoff', side_effect=lambda func, **kwargs: func())
+    @patch('yt_dlp.YoutubeDL')
+    def test_download_video_ignores_approximate_size(self, mock_ydl, mock_retry, extractor):
+        """Testa que a estimativa `filesize_approx` não rejeita um download completo."""
+        mock_ydl_instance = Mock()
+        mock_ydl.return_value.__enter__.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = {
+            'id': 'approx_size1',
+            'duration': 60,
+            'formats': [
+                {'format_id': '22', 'ext': 'mp4', 'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2',
+                 'width': 1280, 'height': 720, 'tbr': 2000, 'protocol': 'https', 'filesize_approx': 10_000},
+            ],
+        }
+        downloaded = extractor.output_dir / 'approx_size1.mp4'
+        mock_ydl_instance.process_ie_result.side_effect = lambda info, download: downloaded.write_bytes(b'x' * 7_000)
+        
+        path = extractor.download_video("https://www.youtube.com/watch?v=approx_size1")
+        
+        assert path == str(downloaded) and downloaded.exists()
+    
+    def test_scheduler_hook_accounts_each_file(self):
+        """Testa que o hook repassa ao agendador os bytes de vídeo e áudio (DASH)."""
+        from src.utils.download_scheduler import DownloadScheduler
+        
+        scheduler = DownloadScheduler()
+        with scheduler.slot("https://www.youtube.com/watch?v=x") as ticket:
+            hook = YouTubeExtractor._scheduler_hook(ticket)
+            hook({'filename': 'v.mp4', 'downloaded_bytes': 100, 'total_bytes': 1000})
+            hook({'filename': 'v.mp4', 'downloaded_bytes': 400, 'total_bytes': 1000})
+            hook({'filename': 'a.m4a', 'downloaded_bytes': 50, 'total_bytes': 200})
+            
+            assert ticket.bytes_done == 450
+            assert ticket.total_bytes == 1200
+    
+    def test_scheduler_hook_does_not_charge_retried_bytes(self):
+        """Testa que bytes baixados de novo após uma retentativa não são cobrados duas vezes."""
+        from src.utils.download_scheduler import DownloadScheduler
+        
+        scheduler = DownloadScheduler()
+        with scheduler.slot("https://www.youtube.com/watch?v=x") as ticket:
+            hook = YouTubeExtractor._scheduler_hook(ticket)
+            hook({'filename': 'v.mp4', 'downloaded_bytes': 600})
+            # Retentativa: o contador volta e sobe de novo
+            hook({'filename': 'v.mp4', 'downloaded_bytes': 200})
+            hook({'filename': 'v.mp4', 'downloaded_bytes': 500})
+            assert ticket.bytes_done == 600
+            hook({'filename': 'v.mp4', 'downloaded_bytes': 900})
+            assert ticket.bytes_done == 900
+    
+    def test_download_segments_downloads_once_and_cuts_in_batch(self, extractor):
+        """Testa que vários cortes do mesmo vídeo usam um download e o lote do SegmentProcessor."""
+        processor = Mock()
+        processor.cut_segments.return_value = Mock(failed=[], wall_time=0.1)
+        extractor._segment_processor = processor
+        source = str(extractor.temp_dir / 'abc123def45.mp4')
+        
+        with patch.object(extractor, 'download_video', return_value=source) as download:
+            report = extractor.download_segments(
+                "https://www.youtube.com/watch?v=abc123def45", [(0, 2), (5.5, 3)],
+                target_size=(1080, 1920), owner="run-1",
+            )
+        
+        assert report is processor.cut_segments.return_value
+        download.assert_called_once()
+        assert download.call_args.kwargs['owner'] == "run-1"
+        jobs = processor.cut_segments.call_args[0][0]
+        assert [(job.video_path, job.start, job.duration) for job in jobs] == [(source, 0.0, 2.0), (source, 5.5, 3.0)]
+        assert jobs[1].output_path.endswith('abc123def45_segment_5500.mp4')
+        assert all(job.target_size == (1080, 1920) for job in jobs)
+        with pytest.raises(ValueError):
+            extractor.download_segments("https://www.youtube.com/watch?v=abc123def45", [(-1, 2)])
     
     def test_download_segment_invalid_params(self, extractor):
         """Testa download com parâmetros inválidos."""
@@ -248,6 +537,103 @@ class TestYouTubeExtractor:
         assert all(fmt['height'] <= 1080 for fmt in filtered)
 
 
+class TestFormatSelectionPolicy:
+    """Testes para FormatSelectionPolicy."""
+    
+    def _info(self, formats, duration=60):
+        return {'id': 'vid', 'duration': duration, 'formats': formats}
+    
+    def test_prefers_remux_over_transcode(self):
+        """Testa que formato copiável vence formato melhor que exigiria transcodificação."""
+        policy = FormatSelectionPolicy()
+        info = self._info([
+            {'format_id': 'vp8', 'ext': 'webm', 'vcodec': 'vp8', 'acodec': 'vorbis',
+             'width': 1920, 'height': 1080, 'tbr': 5000},
+            {'format_id': '22', 'ext': 'mp4', 'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2',
+             'width': 1280, 'height': 720, 'tbr': 2000},
+        ])
+        
+        selection = policy.select(info)
+        
+        assert selection.format_spec == '22'
+        assert selection.action == 'copy'
+        assert not selection.requires_transcode
+    
+    def test_scores_resolution_towards_target(self):
+        """Testa preferência pela resolução próxima de 1080 no lado menor."""
+        policy = FormatSelectionPolicy(include_audio=False)
+        info = self._info([
+            {'format_id': '360', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'none',
+             'width': 640, 'height': 360, 'tbr': 600},
+            {'format_id': '1080', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'none',
+             'width': 1920, 'height': 1080, 'tbr': 4000},
+            {'format_id': '2160', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'none',
+             'width': 3840, 'height': 2160, 'tbr': 16000},
+        ])
+        
+        assert policy.select(info).format_spec == '1080'
+    
+    def test_reports_unavoidable_transcode(self):
+        """Testa relato de transcodificação quando nenhum formato é copiável."""
+        policy = FormatSelectionPolicy()
+        info = self._info([
+            {'format_id': '43', 'ext': 'webm', 'vcodec': 'vp8.0', 'acodec': 'vorbis',
+             'width': 640, 'height': 360, 'tbr': 800},
+        ])
+        
+        selection = policy.select(info)
+        
+        assert selection.requires_transcode
+        assert any('vp8' in reason for reason in selection.reasons)
+    
+    def test_dash_pair_is_remuxed_and_size_limit(self):
+        """Testa remux de H.264/AAC para MP4 e descarte por tamanho máximo."""
+        policy = FormatSelectionPolicy(max_filesize=50_000_000)
+        info = self._info([
+            {'format_id': '137', 'ext': 'mp4', 'vcodec': 'avc1.640028', 'acodec': 'none',
+             'width': 1920, 'height': 1080, 'filesize': 40_000_000},
+            {'format_id': '399', 'ext': 'mp4', 'vcodec': 'av01.0.08M.08', 'acodec': 'none',
+             'width': 1920, 'height': 1080, 'filesize': 90_000_000},
+            {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128},
+            {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 160},
+            {'format_id': 'sb0', 'ext': 'mhtml', 'vcodec': 'none', 'acodec': 'none'},
+        ])
+        
+        selection = policy.select(info)
+        
+        assert selection.format_spec == '137+140'
+        assert selection.action == 'remux'
+        assert [c.video_format_id for c in policy.rank(info)] == ['137']
+    
+    def test_vp9_and_av1_are_transcoded_for_mp4(self):
+        """Testa que VP9/AV1/Opus não contam como remux para MP4 (os cortes também não os copiam)."""
+        policy = FormatSelectionPolicy()
+        info = self._info([
+            {'format_id': '248', 'ext': 'webm', 'vcodec': 'vp9', 'acodec': 'none',
+             'width': 1920, 'height': 1080, 'tbr': 4000},
+            {'format_id': '399', 'ext': 'mp4', 'vcodec': 'av01.0.08M.08', 'acodec': 'none',
+             'width': 1920, 'height': 1080, 'tbr': 4000},
+            {'format_id': '136', 'ext': 'mp4', 'vcodec': 'avc1.4d401f', 'acodec': 'none',
+             'width': 1280, 'height': 720, 'tbr': 2000},
+            {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 160},
+            {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 128},
+        ])
+        
+        ranked = policy.rank(info)
+        
+        assert ranked[0].format_spec == '136+140' and ranked[0].action == 'remux'
+        assert {c.video_format_id: c.action for c in ranked[1:]} == {'248': 'transcode', '399': 'transcode'}
+        assert SegmentProcessor.MP4_COPY_CODECS == {'h264', 'hevc'}
+        only_vp9 = policy.select(self._info([info['formats'][0], info['formats'][3]]))
+        assert only_vp9.requires_transcode and any('vp9' in reason for reason in only_vp9.reasons)
+        webm = FormatSelectionPolicy(container='webm', include_audio=False)
+        assert webm.select(self._info([info['formats'][0]])).action == 'remux'
+    
+    def test_no_formats_returns_none(self):
+        """Testa ausência de formatos avaliáveis."""
+        assert FormatSelectionPolicy().select({'id': 'vid', 'formats': []}) is None
+
+
 class TestSegmentProcessor:
     """Testes para SegmentProcessor."""
     
@@ -255,7 +641,7 @@ class TestSegmentProcessor:
     def processor(self):
         """Fixture para criar instância do processador."""
         with tempfile.TemporaryDirectory() as temp_dir:
-            yield SegmentProcessor(temp_dir=temp_dir)
+            yield SegmentProcessor(temp_dir=temp_dir, media_probe=MediaProbe(cache_dir=None))
     
     @pytest.fixture
     def mock_video_path(self):
@@ -318,21 +704,221 @@ class TestSegmentProcessor:
         
         assert "FFmpeg não está instalado" in str(exc_info.value)
     
-    @patch('subprocess.run')
+    @patch('src.utils.ffmpeg_runner.FFmpegRunner.run')
     @patch('pathlib.Path.exists')
     def test_extract_segment_success(self, mock_exists, mock_run, processor, mock_video_path):
-        """Testa extração de segmento com sucesso."""
+        """Testa extração de segmento alinhada a keyframe (cópia de streams)."""
         mock_exists.return_value = True
-        mock_run.return_value = Mock(returncode=0, stderr="")
-        
-        # Criar arquivo de saída mock
-        mock_output_path = Path(processor.temp_dir) / "segment_10_5s.mp4"
-        mock_exists.side_effect = lambda: True  # Para o arquivo de saída também
+        probe = {
+            "format": {"duration": "20.0"},
+            "streams": [
+                {"index": 0, "codec_type": "video", "codec_name": "h264", "pix_fmt": "yuv420p"},
+                {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+            ],
+            "packets": [
+                {"stream_index": 0, "pts_time": "0.000000", "flags": "K__"},
+                {"stream_index": 1, "pts_time": "0.010000", "flags": "K__"},
+                {"stream_index": 0, "pts_time": "0.033333", "flags": "___"},
+                {"stream_index": 0, "pts_time": "9.800000", "flags": "K__"},
+            ],
+        }
+        mock_run.side_effect = [
+            Mock(returncode=0, stdout=json.dumps(probe), stderr=""),
+            Mock(returncode=0, stderr=""),
+        ]
         
         result = processor.extract_segment(mock_video_path, 10, 5)
         
         assert result.endswith('.mp4')
-        mock_run.assert_called_once()
+        assert mock_run.call_args_list[0][0][0][0] == 'ffprobe'
+        ffmpeg_cmd = mock_run.call_args_list[1][0][0]
+        assert ffmpeg_cmd.index('-ss') < ffmpeg_cmd.index('-i')
+        assert ffmpeg_cmd[ffmpeg_cmd.index('-ss') + 1] == '9.800000'
+        assert ffmpeg_cmd[ffmpeg_cmd.index('-c') + 1] == 'copy'
+        assert processor.last_cut.mode == 'copy'
+        assert processor.get_cut_stats()['copy'] == 1
+    
+    def test_plan_cut_paths(self, processor):
+        """Testa escolha entre cópia, re-encode do GOP inicial e re-encode completo."""
+        index = KeyframeIndex(keyframes=[0.0, 2.0, 4.0, 6.0], codec='h264', pix_fmt='yuv420p',
+                              profile='High', level=31)
+        
+        copy = processor.plan_cut(index, 2.3, 3.0, tolerance=0.5)
+        assert (copy.mode, copy.start, copy.seek) == ('copy', 2.0, 2.0)
+        
+        smart = processor.plan_cut(index, 3.0, 4.0, tolerance=0.5)
+        assert (smart.mode, smart.start, smart.split) == ('smart', 3.0, 4.0)
+        
+        # Intervalo dentro de um único GOP e codec sem suporte: re-encode
+        assert processor.plan_cut(index, 2.8, 1.0, tolerance=0.5).mode == 'reencode'
+        vp9 = KeyframeIndex(keyframes=index.keyframes, codec='vp9')
+        assert processor.plan_cut(vp9, 3.0, 4.0, tolerance=0.5).mode == 'reencode'
+        assert processor.plan_cut(KeyframeIndex(), 3.0, 4.0).mode == 'reencode'
+        # Perfil desconhecido: o trecho re-encodado poderia não casar com o copiado
+        unknown = KeyframeIndex(keyframes=index.keyframes, codec='h264', pix_fmt='yuv420p')
+        assert processor.plan_cut(unknown, 3.0, 4.0, tolerance=0.5).mode == 'reencode'
+    
+    def test_plan_cut_copies_only_mp4_compatible_codecs(self, processor):
+        """Testa que VP9 não é copiado para MP4 (só H.264/HEVC), mas pode ir para outros contêineres."""
+        keyframes = [0.0, 2.0, 4.0]
+        
+        vp9 = processor.plan_cut(KeyframeIndex(keyframes=keyframes, codec='vp9'), 2.1, 1.0, tolerance=0.5)
+        assert vp9.mode == 'reencode' and 'vp9' in vp9.reason
+        assert processor.plan_cut(KeyframeIndex(keyframes=keyframes, codec='vp9'), 2.1, 1.0,
+                                  tolerance=0.5, container='.mkv').mode == 'copy'
+        assert processor.plan_cut(KeyframeIndex(keyframes=keyframes, codec='hevc'), 2.1, 1.0,
+                                  tolerance=0.5).mode == 'copy'
+        assert processor.plan_cut(KeyframeIndex(keyframes=keyframes), 2.1, 1.0, mode='copy').mode == 'reencode'
+    
+    @patch('src.utils.ffmpeg_runner.FFmpegRunner.run')
+    @patch('pathlib.Path.exists', return_value=True)
+    def test_smart_cut_copies_after_first_keyframe(self, mock_exists, mock_run, processor):
+        """Testa que o corte parcial re-encoda só o trecho até o keyframe seguinte."""
+        mock_run.return_value = Mock(returncode=0, stderr="")
+        index = KeyframeIndex(keyframes=[0.0, 2.0, 4.0], codec='h264', profile='Main', level=40)
+        
+        with patch.object(processor, '_check_smart_cut_params') as check:
+            cut = processor.cut_segment("/test/video.mp4", 1.0, 2.5, keyframes=index, mode="smart")
+        
+        head_cmd, tail_cmd, concat_cmd = [c[0][0] for c in mock_run.call_args_list]
+        assert check.call_count == 1
+        assert head_cmd[head_cmd.index('-c:v') + 1] == 'libx264'
+        assert head_cmd[head_cmd.index('-profile:v') + 1] == 'main'
+        assert head_cmd[head_cmd.index('-level') + 1] == '4.0'
+        assert head_cmd[head_cmd.index('-t') + 1] == '1.000000'
+        assert tail_cmd[tail_cmd.index('-ss') + 1] == '2.000000'
+        assert tail_cmd[tail_cmd.index('-c:v') + 1] == 'copy'
+        assert concat_cmd[concat_cmd.index('-f') + 1] == 'concat'
+        assert cut.mode == 'smart'
+    
+    @patch('pathlib.Path.exists', return_value=True)
+    def test_smart_cut_falls_back_when_codec_params_differ(self, mock_exists, processor):
+        """Testa que partes com perfil/nível diferentes não são unidas: o intervalo é re-encodado."""
+        index = KeyframeIndex(keyframes=[0.0, 2.0, 4.0], codec='h264', pix_fmt='yuv420p', profile='High', level=31)
+        stream = {"codec_type": "video", "codec_name": "h264", "profile": "High", "level": 31,
+                  "width": 320, "height": 240, "pix_fmt": "yuv420p"}
+        
+        def probe(path, keyframes=False):
+            level = 31 if path == "/test/video.mp4" else 40
+            return MediaInfo(path=path, size=1, mtime_ns=1, streams=[{**stream, "level": level}])
+        
+        commands = []
+        with patch.object(processor.media_probe, 'probe', side_effect=probe), \
+                patch.object(processor, '_run_ffmpeg', side_effect=lambda cmd, *args: commands.append(cmd)):
+            cut = processor.cut_segment("/test/video.mp4", 1.0, 2.5, keyframes=index)
+        
+        assert cut.mode == 'reencode'
+        assert not any('concat' in cmd for cmd in commands)
+        assert commands[-1][commands[-1].index('-ss') + 1] == '1.000000'
+    
+    @pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="FFmpeg não disponível")
+    def test_cut_segment_with_real_ffmpeg(self, processor):
+        """Testa cópia (sem decodificar) e fallback de re-encode num vídeo real."""
+        source = processor.temp_dir / "source.mp4"
+        subprocess.run([
+            'ffmpeg', '-v', 'error', '-y',
+            '-f', 'lavfi', '-i', 'testsrc2=size=320x240:rate=30',
+            '-t', '6', '-c:v', 'libx264', '-g', '60', '-keyint_min', '60',
+            '-sc_threshold', '0', '-pix_fmt', 'yuv420p', str(source)
+        ], check=True)
+        keyframes = [0.0, 2.0, 4.0]
+        
+        copy = processor.cut_segment(str(source), 2.2, 2.0, str(processor.temp_dir / "copy.mp4"),
+                                     keyframes=keyframes)
+        reencode = processor.cut_segment(str(source), 3.0, 0.5, str(processor.temp_dir / "re.mp4"),
+                                         keyframes=keyframes)
+        
+        assert copy.mode == 'copy' and copy.start == 2.0
+        assert reencode.mode == 'reencode'
+        assert Path(copy.path).stat().st_size > 0
+        assert Path(reencode.path).stat().st_size > 0
+    
+    def test_cut_segments_budgets_threads_and_probes_once_per_source(self, processor):
+        """Testa o lote: orçamento de núcleos, -threads nos encodes e uma sondagem por origem."""
+        sources = []
+        for name in ("a.mp4", "b.mp4"):
+            path = processor.temp_dir / name
+            path.write_bytes(b"video")
+            sources.append(str(path))
+        index = KeyframeIndex(keyframes=[0.0, 2.0, 4.0, 6.0], codec='h264')
+        state = {"running": 0, "peak": 0}
+        lock = threading.Lock()
+        commands = []
+        
+        def fake_ffmpeg(cmd, video_path, output_path):
+            cost = int(cmd[cmd.index('-threads') + 1]) if '-threads' in cmd else 1
+            with lock:
+                commands.append(cmd)
+                state["running"] += cost
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.05)
+            with lock:
+                state["running"] -= cost
+        
+        jobs = [
+            SegmentJob(sources[0], 2.1, 1.0),                          # cópia
+            SegmentJob(sources[0], 3.0, 2.0),                          # re-encode (perfil desconhecido)
+            {"video_path": sources[1], "start": 0.0, "duration": 1.0, "target_size": (320, 180)},
+            SegmentJob(sources[1], 4.0, 1.0),
+            SegmentJob(str(processor.temp_dir / "missing.mp4"), 0.0, 1.0),
+        ]
+        with patch.object(processor, 'probe_keyframes', return_value=index) as probe, \
+                patch.object(processor, '_run_ffmpeg', side_effect=fake_ffmpeg):
+            report = processor.cut_segments(jobs, max_workers=4, cpu_budget=4, threads_per_encode=2)
+        
+        assert probe.call_count == 2
+        assert [r.ok for r in report.results] == [True, True, True, True, False]
+        assert "não encontrado" in report.results[4].error
+        assert [r.cut.mode for r in report.results[:4]] == ['copy', 'reencode', 'reencode', 'copy']
+        assert state["peak"] <= 4
+        encode_cmds = [c for c in commands if 'libx264' in c]
+        assert len(encode_cmds) == 2 and all(c[c.index('-threads') + 1] == '2' for c in encode_cmds)
+        assert any('scale=320:180' in part for c in encode_cmds for part in c)
+        assert len(set(report.paths[:4])) == 4
+        assert report.to_dict()["failed"] == 1
+    
+    def test_cut_segments_fallback_reencode_keeps_reserved_threads(self, processor):
+        """Testa que o re-encode após uma cópia que falhou usa só os núcleos reservados para ela."""
+        source = processor.temp_dir / "a.mp4"
+        source.write_bytes(b"video")
+        index = KeyframeIndex(keyframes=[0.0, 2.0, 4.0], codec='h264')
+        commands = []
+        
+        def fake_ffmpeg(cmd, video_path, output_path):
+            commands.append(cmd)
+            if 'copy' in cmd:
+                raise VideoProcessingError("copy falhou")
+        
+        with patch.object(processor, 'probe_keyframes', return_value=index), \
+                patch.object(processor, '_run_ffmpeg', side_effect=fake_ffmpeg):
+            report = processor.cut_segments([SegmentJob(str(source), 2.1, 1.0)], cpu_budget=8)
+        
+        assert report.results[0].cut.mode == 'reencode'
+        assert report.results[0].threads == 1
+        assert commands[-1][commands[-1].index('-threads') + 1] == '1'
+    
+    @pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="FFmpeg não disponível")
+    def test_cut_segments_with_real_ffmpeg(self, processor):
+        """Testa lote real com formato de saída normalizado no mesmo encode."""
+        source = processor.temp_dir / "batch_source.mp4"
+        subprocess.run([
+            'ffmpeg', '-v', 'error', '-y', '-f', 'lavfi', '-i', 'testsrc2=size=320x240:rate=25',
+            '-t', '4', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', str(source)
+        ], check=True)
+        
+        report = processor.cut_segments([
+            SegmentJob(str(source), start, 1.0, target_size=(160, 90), target_fps=30)
+            for start in (0.0, 1.0, 2.5)
+        ])
+        
+        assert not report.failed
+        for path in report.paths:
+            capture = cv2.VideoCapture(path)
+            size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            capture.release()
+            assert size == (160, 90)
+            assert fps == pytest.approx(30, abs=0.1)
     
     @patch('pathlib.Path.exists')
     def test_extract_segment_file_not_found(self, mock_exists, processor):
@@ -352,7 +938,7 @@ class TestSegmentProcessor:
         with pytest.raises(ValueError):
             processor.extract_segment("/test/video.mp4", 0, 0)  # Duração zero
     
-    @patch('subprocess.run')
+    @patch('src.utils.ffmpeg_runner.FFmpegRunner.run')
     @patch('pathlib.Path.exists')
     def test_normalize_video_success(self, mock_exists, mock_run, processor):
         """Testa normalização de vídeo com sucesso."""
@@ -375,7 +961,7 @@ class TestSegmentProcessor:
         
         assert "Resolução não suportada" in str(exc_info.value)
     
-    @patch('subprocess.run')
+    @patch('src.utils.ffmpeg_runner.FFmpegRunner.run')
     @patch('pathlib.Path.exists')
     def test_get_video_info_success(self, mock_exists, mock_run, processor, mock_ffprobe_output):
         """Testa obtenção de informações com sucesso."""
@@ -397,7 +983,7 @@ class TestSegmentProcessor:
         assert info['video_stream']['width'] == 1280
         assert info['video_stream']['height'] == 720
     
-    @patch('subprocess.run')
+    @patch('src.utils.ffmpeg_runner.FFmpegRunner.run')
     def test_get_video_info_ffprobe_error(self, mock_run, processor):
         """Testa obtenção de informações com erro do ffprobe."""
         mock_run.return_value = Mock(returncode=1, stderr="Error message")
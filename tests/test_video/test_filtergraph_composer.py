@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o backend de renderização final por filter_complex.
+"""
+
+import importlib.util
+import shutil
+import subprocess
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.video.processing.filtergraph_composer import (
+    CaptionOverlay,
+    CompositionJob,
+    CompositionSegment,
+    FilterGraphRenderer,
+    build_composition_command,
+    build_composition_graph,
+)
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+
+def _make_clip(path, size, rate=25, duration=2):
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={rate}",
+        "-t", str(duration), "-c:v", "libx264", "-pix_fmt", "yuv420p", str(path),
+    ], check=True)
+    return str(path)
+
+
+def _make_audio(path, duration=3):
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=300:sample_rate=44100",
+        "-t", str(duration), str(path),
+    ], check=True)
+    return str(path)
+
+
+def _frame_at(path, seconds):
+    capture = cv2.VideoCapture(str(path))
+    capture.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000)
+    ok, frame = capture.read()
+    capture.release()
+    assert ok
+    return frame
+
+
+def _job(segments, **overrides):
+    params = dict(width=90, height=160, fps=30, segments=segments, bitrate="1M", preset="veryfast")
+    params.update(overrides)
+    return CompositionJob(**params)
+
+
+class TestFilterGraphComposer:
+    """Testes para a compilação da composição e o FilterGraphRenderer."""
+
+    def test_graph_compiles_timeline_fades_captions_and_audio(self):
+        """Testa entradas, rótulos por segmento, fades entre clips, legenda e trilha repetida."""
+        job = _job(
+            [
+                CompositionSegment(0.5, color="#203040"),
+                CompositionSegment(2.0, path="a.mp4", source_size=(320, 180), effects=["brightness_up"]),
+                CompositionSegment(3.0, path="b.mp4", source_size=(180, 320), loop=True),
+            ],
+            audio_path="voice.wav", audio_duration=4.0,
+            captions=[CaptionOverlay("cap.png", 10, 120, 1.0, 2.5)],
+            template_effects=["vibrance", "unknown"],
+        )
+
+        inputs, graph = build_composition_graph(job)
+
+        assert inputs == [
+            "-t", "2.000", "-i", "a.mp4",
+            "-stream_loop", "-1", "-t", "3.000", "-i", "b.mp4",
+            "-i", "cap.png",
+            "-stream_loop", "-1", "-i", "voice.wav",
+        ]
+        assert "color=c=0x203040:s=90x160:r=30:d=0.500" in graph
+        assert "[seg1_bg_src]" in graph and "[seg2_bg_src]" in graph
+        assert "[seg0][seg1][seg2]concat=n=3:v=1:a=0[cat]" in graph
+        assert "fade=t=out:st=0:d=0.5" in graph and "fade=t=in:st=0:d=0.5" in graph
+        assert graph.count("colorchannelmixer=rr=1.2") == 3
+        assert "[cat][2:v]overlay=x=10:y=120:enable='between(t,1.000,2.500)'[cap0]" in graph
+        assert "[cap0]colorchannelmixer=rr=1.1:gg=1.1:bb=1.1,format=yuv420p[vout]" in graph
+        assert "[3:a]atrim=duration=5.500" in graph
+
+        command = build_composition_command(job, "out.mp4")
+        assert command[command.index("-t", len(inputs)) + 1] == "5.500"
+        assert command[-1] == "out.mp4"
+
+    def test_single_clip_has_no_transitions_or_template_effects(self):
+        """Testa a regra do caminho MoviePy: fades e efeitos de template só com mais de um clip."""
+        job = _job([CompositionSegment(1.0, path="a.mp4", source_size=(90, 160))], template_effects=["vibrance"])
+
+        _, graph = build_composition_graph(job)
+
+        assert "fade=" not in graph and "rr=1.2" not in graph
+        assert "-an" in build_composition_command(job, "out.mp4")
+
+    @requires_ffmpeg
+    def test_render_produces_expected_timeline(self, tmp_path):
+        """Testa a renderização real: duração, quadro, áudio, intro, fade e legenda."""
+        clip_a = _make_clip(tmp_path / "a.mp4", "320x180")
+        clip_b = _make_clip(tmp_path / "b.mp4", "180x320", rate=30, duration=1)
+        caption = tmp_path / "cap.png"
+        Image.new("RGBA", (60, 20), (255, 0, 0, 255)).save(caption)
+        job = _job(
+            [
+                CompositionSegment(0.5, color="#4060A0"),
+                CompositionSegment(2.0, path=clip_a, source_size=(320, 180)),
+                CompositionSegment(2.0, path=clip_b, source_size=(180, 320), loop=True),
+            ],
+            audio_path=_make_audio(tmp_path / "voice.wav"), audio_duration=3.0,
+            captions=[CaptionOverlay(str(caption), 15, 120, 1.5, 3.0)],
+            final_colorx=1.0,
+        )
+        output = tmp_path / "final.mp4"
+
+        result = FilterGraphRenderer().render(job, str(output))
+
+        capture = cv2.VideoCapture(str(output))
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        capture.release()
+        assert result.path == str(output) and result.speed > 0
+        assert size == (90, 160)
+        assert frames == pytest.approx(135, abs=2)
+        assert not list(tmp_path.glob("*.partial.mp4"))
+
+        # Intro na cor do template (BGR) antes do fade
+        intro = _frame_at(output, 0.0)[80, 45].astype(int)
+        assert np.abs(intro - [160, 96, 64]).max() < 12
+        # Início do segundo clip ainda no fade de entrada (quase preto)
+        assert _frame_at(output, 0.52).mean() < 40
+        # Legenda visível só na janela pedida
+        assert _frame_at(output, 2.0)[130, 45].tolist()[2] > 200
+        assert _frame_at(output, 1.0)[130, 45].tolist() != _frame_at(output, 2.0)[130, 45].tolist()
+
+        audio = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-i", str(output)], capture_output=True, text=True
+        ).stderr
+        assert "Audio: aac" in audio
+
+    @requires_ffmpeg
+    def test_parity_with_moviepy_backend(self, tmp_path):
+        """Testa que os dois backends geram a mesma composição (duração, quadro e conteúdo)."""
+        from src.video.generators import final_video_composer as composer_module
+        config = {"final_composition": {
+            "default_resolution": (180, 320), "default_fps": 30, "target_bitrate": "2M",
+            "temp_dir": str(tmp_path / "tmp"), "output_dir": str(tmp_path / "out"),
+            "mezzanine": {"cache_dir": str(tmp_path / "mezzanine")},
+        }}
+        composer = composer_module.FinalVideoComposer(config=config)
+        template = composer_module.TemplateConfig(
+            name="parity", resolution=(180, 320), duration=4.0, intro_duration=0.5, outro_duration=0.5,
+            transition_type="fade", background_color="#102030", text_style={"size": 40},
+            effects_config=["color_enhance"],
+        )
+        clip_a = _make_clip(tmp_path / "a.mp4", "320x180")
+        clip_b = _make_clip(tmp_path / "b.mp4", "320x180", duration=1)
+        audio = _make_audio(tmp_path / "voice.wav", duration=3)
+        captions = [{"text": "Legenda de teste", "start_time": 1.0, "end_time": 2.0,
+                     "style": {"font_size": 20, "padding_horizontal": 8, "padding_vertical": 6}}]
+
+        # A metade MoviePy precisa da API 1.x (`moviepy.editor`); o backend ffmpeg roda sempre
+        backends = ["ffmpeg"]
+        if importlib.util.find_spec("moviepy.editor") is not None:
+            backends.insert(0, "moviepy")
+
+        outputs = {}
+        for backend in backends:
+            segments = [composer_module.VideoSegment(path=clip_a, duration=2.0),
+                        composer_module.VideoSegment(path=clip_b, duration=2.0)]
+            outputs[backend] = composer.compose_final_video(
+                audio, segments, template, captions=captions,
+                output_path=str(tmp_path / f"{backend}.mp4"),
+                metadata={"retry_on_quality_fail": False}, render_backend=backend,
+            )
+
+        captures = {backend: cv2.VideoCapture(path) for backend, path in outputs.items()}
+        frames = {backend: cap.get(cv2.CAP_PROP_FRAME_COUNT) for backend, cap in captures.items()}
+        for cap in captures.values():
+            cap.release()
+        # Intro + clips ajustados à narração (3s) + outro, nas dimensões e fps da configuração
+        assert frames["ffmpeg"] == pytest.approx(4.0 * 30, abs=2)
+        assert _frame_at(outputs["ffmpeg"], 1.2).shape == (320, 180, 3)
+        intro, clip, outro = (_frame_at(outputs["ffmpeg"], t) for t in (0.2, 1.2, 3.9))
+        assert intro.std() < clip.std() / 4 and outro.mean() < intro.mean()
+        if "moviepy" not in outputs:
+            return
+        assert frames["ffmpeg"] == pytest.approx(frames["moviepy"], abs=2)
+
+        for seconds in (0.2, 1.2, 1.6, 3.0, 3.8):
+            psnr = cv2.PSNR(_frame_at(outputs["moviepy"], seconds), _frame_at(outputs["ffmpeg"], seconds))
+            assert psnr > 22, f"PSNR {psnr:.1f} dB em {seconds}s"
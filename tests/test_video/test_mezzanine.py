@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para a preparação de clips em uma passada do FFmpeg.
+"""
+
+import shutil
+import subprocess
+
+import cv2
+import pytest
+
+from src.utils.exceptions import VideoProcessingError
+from src.video.processing.mezzanine import (
+    IntermediateSpec,
+    MezzanineRenderer,
+    MezzanineSpec,
+    build_intermediate_command,
+    build_mezzanine_command,
+    build_sandwich_filtergraph,
+    fitted_size,
+)
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+
+@pytest.fixture
+def source_video(tmp_path):
+    path = tmp_path / "wide.mp4"
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", "testsrc2=size=320x180:rate=25",
+        "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(path),
+    ], check=True)
+    return path
+
+
+class TestMezzanine:
+    """Testes para MezzanineSpec, filter graph e MezzanineRenderer."""
+
+    def test_fitted_size_matches_sandwich_layout(self):
+        """Testa encaixe pela largura (horizontal) e pela altura (mais estreito que 9:16)."""
+        assert fitted_size((1920, 1080), (1080, 1920)) == (1080, 608)
+        assert fitted_size((400, 1000), (1080, 1920)) == (768, 1920)
+        assert fitted_size((0, 0), (1080, 1920)) == (1080, 1920)
+
+    def test_filtergraph_has_background_bars_and_overlay(self):
+        """Testa o grafo: fundo desfocado reduzido, barras, vídeo centralizado e normalização."""
+        spec = MezzanineSpec(background_color="#102030", fps=24)
+        graph = build_sandwich_filtergraph(spec, (1920, 1080))
+
+        assert graph.startswith("[0:v]fps=24,split=2")
+        assert "gblur" in graph and "scale=134:240" in graph
+        assert "drawbox=x=0:y=0:w=1080:h=656:color=0x102030@0.92" in graph
+        assert "[fg_src]scale=1080:608" in graph
+        assert graph.endswith("format=yuv420p[v]")
+
+        # Vídeo já no formato do quadro: sem barras
+        assert "drawbox" not in build_sandwich_filtergraph(spec, (1080, 1920))
+
+    def test_command_is_single_pass_with_input_seek(self):
+        """Testa que corte, layout e encode acontecem no mesmo comando."""
+        command = build_mezzanine_command(
+            "in.mp4", "out.mp4", MezzanineSpec(), (1280, 720), start=3.5, duration=4.0, loop=True
+        )
+
+        assert command.count("-i") == 1 and command.count("-filter_complex") == 1
+        assert command.index("-stream_loop") < command.index("-ss") < command.index("-i")
+        assert command[command.index("-t") + 1] == "4.000"
+        assert "-an" in command
+        assert command[command.index("-g") + 1] == "30"
+
+    def test_intermediate_command_short_gop_without_layout(self):
+        """Testa o intermediário: só redimensiona, GOP fixo sem B-frames ou só intra."""
+        command = build_intermediate_command("in.mp4", "out.mp4", IntermediateSpec(gop_frames=12), (1920, 1080))
+
+        assert "-filter_complex" not in command
+        assert command[command.index("-vf") + 1] == "fps=30,scale=1080:608:flags=lanczos,setsar=1,format=yuv420p"
+        assert command[command.index("-g") + 1] == "12"
+        assert command[command.index("-keyint_min") + 1] == "12"
+        assert command[command.index("-bf") + 1] == "0"
+
+        intra = build_intermediate_command("in.mp4", "out.mp4", IntermediateSpec(all_intra=True), (1920, 1080))
+        assert intra[intra.index("-g") + 1] == "1"
+
+    @requires_ffmpeg
+    def test_render_intermediate_normalizes_fps_and_size(self, tmp_path, source_video):
+        """Testa o intermediário gerado a partir de um vídeo real."""
+        renderer = MezzanineRenderer(str(tmp_path / "cache"))
+        output = tmp_path / "intermediate.mp4"
+
+        clip = renderer.render_intermediate(
+            str(source_video), IntermediateSpec(width=180, height=320, fps=30), output_path=str(output)
+        )
+
+        capture = cv2.VideoCapture(clip.path)
+        size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        capture.release()
+
+        assert clip.path == str(output)
+        assert size == (180, 100)
+        assert fps == pytest.approx(30, abs=0.1)
+
+    @requires_ffmpeg
+    def test_render_produces_ready_clip_and_caches(self, tmp_path, source_video):
+        """Testa o clip gerado (resolução, FPS, duração com loop) e o cache."""
+        renderer = MezzanineRenderer(str(tmp_path / "cache"))
+        spec = MezzanineSpec(width=180, height=320, fps=30)
+
+        clip = renderer.render(str(source_video), spec, start=0.5, duration=3.0)
+        again = renderer.render(str(source_video), spec, start=0.5, duration=3.0)
+
+        capture = cv2.VideoCapture(clip.path)
+        size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        capture.release()
+
+        assert size == (180, 320)
+        assert fps == pytest.approx(30, abs=0.1)
+        assert frames == pytest.approx(90, abs=2)
+        assert clip.looped and not clip.cached
+        assert again.cached and again.path == clip.path
+
+    @requires_ffmpeg
+    def test_render_many_reports_failures_as_none(self, tmp_path, source_video):
+        """Testa preparação em paralelo com um job inválido."""
+        renderer = MezzanineRenderer(str(tmp_path / "cache"), max_workers=2)
+        spec = MezzanineSpec(width=90, height=160)
+
+        ok, missing = renderer.render_many(
+            [{"video_path": str(source_video), "duration": 1.0}, {"video_path": str(tmp_path / "nope.mp4")}],
+            spec,
+        )
+
+        assert ok is not None and missing is None
+        with pytest.raises(VideoProcessingError):
+            renderer.render(str(tmp_path / "nope.mp4"), spec)
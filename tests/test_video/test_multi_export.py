@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o export em lote com uma única decodificação do master.
+"""
+
+import shutil
+import subprocess
+
+import cv2
+import pytest
+
+from src.video.processing.multi_export import (
+    ExportTarget,
+    MultiPlatformExporter,
+    build_multi_export_command,
+)
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+
+def _make_master(path, duration=3):
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", "testsrc2=size=180x320:rate=25",
+        "-f", "lavfi", "-i", "sine=frequency=300:sample_rate=44100",
+        "-t", str(duration), "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", str(path),
+    ], check=True)
+    return str(path)
+
+
+def _video_info(path):
+    capture = cv2.VideoCapture(str(path))
+    info = (
+        int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        int(capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+        capture.get(cv2.CAP_PROP_FPS),
+    )
+    capture.release()
+    return info
+
+
+class TestMultiPlatformExporter:
+    """Testes para o comando conjunto e o isolamento de falhas por plataforma."""
+
+    def test_command_decodes_once_and_fans_out(self):
+        """Testa um único `-i`, split/asplit e as opções de cada saída."""
+        targets = [
+            ExportTarget(name="tiktok", output_path="/out/tiktok.mp4", bitrate="4M", max_duration=60),
+            ExportTarget(name="reels", output_path="/out/reels.mp4", width=720, height=1280,
+                         bitrate="6M", loudness=None, max_duration=None),
+        ]
+        command = build_multi_export_command("master.mp4", targets)
+        graph = command[command.index("-filter_complex") + 1]
+
+        assert command.count("-i") == 1
+        assert "[0:v]split=2[v0][v1]" in graph and "[0:a]asplit=2[a0][a1]" in graph
+        assert "[v1]fps=30,scale=720:1280:force_original_aspect_ratio=decrease" in graph
+        assert "[a0]loudnorm=I=-14:TP=-1.5:LRA=11,aresample=48000[aout0]" in graph
+        assert "[a1]aresample=48000[aout1]" in graph
+        assert command.count("-t") == 1 and command[command.index("-t") + 1] == "60.000"
+        assert command[-1] == "/out/reels.partial.mp4"
+
+        silent = build_multi_export_command("master.mp4", targets[:1], has_audio=False)
+        assert "[0:v]fps=30" in silent[silent.index("-filter_complex") + 1] and "-an" in silent
+
+    @requires_ffmpeg
+    def test_export_writes_every_platform_in_one_pass(self, tmp_path):
+        """Testa resolução, corte de duração e loudness de cada saída com uma decodificação."""
+        master = _make_master(tmp_path / "master.mp4")
+        targets = [
+            ExportTarget(name="a", output_path=str(tmp_path / "a.mp4"), width=90, height=160,
+                         fps=25, bitrate="300k", preset="ultrafast", max_duration=2),
+            ExportTarget(name="b", output_path=str(tmp_path / "b.mp4"), width=120, height=120,
+                         fps=15, bitrate=None, preset="ultrafast", loudness=-20),
+        ]
+
+        report = MultiPlatformExporter().export(master, targets, has_audio=True, duration=3.0)
+
+        assert report.decodes == 1
+        assert all(result.ok and result.mode == "shared" for result in report.results.values())
+        assert _video_info(tmp_path / "a.mp4")[:3] == (90, 160, 50)
+        width, height, frames, fps = _video_info(tmp_path / "b.mp4")
+        assert (width, height, round(fps)) == (120, 120, 15) and frames == 45
+        probe = subprocess.run(["ffmpeg", "-i", str(tmp_path / "b.mp4")], capture_output=True, text=True)
+        assert "Audio: aac" in probe.stderr and "48000 Hz" in probe.stderr
+        assert not list(tmp_path.glob("*.partial.mp4"))
+
+    @requires_ffmpeg
+    def test_failing_platform_does_not_sink_the_others(self, tmp_path):
+        """Testa o refazer isolado quando uma saída quebra a passada conjunta."""
+        master = _make_master(tmp_path / "master.mp4", duration=1)
+        targets = [
+            ExportTarget(name="ok", output_path=str(tmp_path / "ok.mp4"), width=90, height=160,
+                         fps=25, preset="ultrafast"),
+            ExportTarget(name="bad", output_path=str(tmp_path / "bad.mp4"), width=90, height=160,
+                         fps=25, preset="ultrafast", video_codec="codec_inexistente"),
+        ]
+
+        report = MultiPlatformExporter().export(master, targets, has_audio=True, duration=1.0)
+
+        assert report.decodes == 3
+        assert report.results["ok"].ok and report.results["ok"].mode == "isolated"
+        assert not report.results["bad"].ok and report.results["bad"].error
+        assert report.paths == {"ok": str(tmp_path / "ok.mp4"), "bad": None}
+        assert _video_info(tmp_path / "ok.mp4")[:3] == (90, 160, 25)
+        assert not (tmp_path / "bad.mp4").exists()
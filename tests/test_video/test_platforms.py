@@ -160,8 +160,8 @@ class TestPlatformOptimizer:
             assert "platform_specs" in result
             assert mock_ffmpeg.called
     
-    @patch('src.video.processing.platform_optimizer.subprocess')
-    def test_optimize_for_platform_error_handling(self, mock_subprocess):
+    @patch('src.utils.ffmpeg_runner.FFmpegRunner.run')
+    def test_optimize_for_platform_error_handling(self, mock_run):
         """Testa tratamento de erros na otimização."""
         optimizer = PlatformOptimizer()
         
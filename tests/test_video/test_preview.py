@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para o modo rascunho (prévia) da composição final.
+"""
+
+import shutil
+import subprocess
+from unittest.mock import patch
+
+import cv2
+import pytest
+
+from src.video.processing.ass_captions import layout_caption, resolve_font_path
+from src.video.processing.preview import (
+    DraftProfile,
+    build_contact_sheet,
+    draft_resolution,
+    scale_caption_style,
+    scale_captions,
+)
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+STYLE = {
+    "font_size": 54,
+    "line_spacing": 12,
+    "padding_horizontal": 48,
+    "padding_vertical": 32,
+    "stroke_width": 2,
+    "max_width_ratio": 0.9,
+    "vertical_margin_ratio": 0.075,
+    "font_color": "#FFFFFF",
+}
+
+
+class TestDraftPreview:
+    """Testes para a resolução do rascunho, o estilo escalado e a folha de contatos."""
+
+    def test_profile_resolution_and_settings(self):
+        """Testa a redução proporcional (sem ampliar) e a leitura da configuração."""
+        profile = DraftProfile.from_settings({"max_height": 640, "fps": 12, "unknown": 1})
+
+        assert draft_resolution((1080, 1920)) == (540, 960)
+        assert draft_resolution((720, 1280), 960) == (540, 960)
+        assert draft_resolution((360, 640), 960) == (360, 640)
+        assert profile.resolution((1080, 1920)) == (360, 640)
+        assert profile.fps == 12 and profile.preset == "ultrafast"
+        assert profile.scale((1080, 1920)) == pytest.approx(1 / 3)
+
+    def test_scaled_captions_keep_the_layout(self):
+        """Testa que a legenda no rascunho ocupa a mesma região relativa do quadro."""
+        captions = [
+            {"text": "Uma legenda longa o bastante para quebrar em duas linhas no quadro",
+             "start_time": 0.0, "end_time": 2.0, "style": STYLE},
+            {"text": "Sem estilo", "start_time": 2.0, "end_time": 3.0},
+        ]
+        scaled = scale_captions(captions, 0.5)
+        font_path = resolve_font_path(None)
+        full = layout_caption(captions[0]["text"], (1080, 1920), STYLE, font_path)
+        draft = layout_caption(captions[0]["text"], (540, 960), scaled[0]["style"], font_path)
+
+        assert scaled[0]["style"]["font_size"] == 27 and scaled[0]["style"]["max_width_ratio"] == 0.9
+        assert captions[0]["style"]["font_size"] == 54
+        # Sem estilo: os padrões do renderizador também são escalados
+        assert scaled[1]["style"]["font_size"] == 27 and scaled[1]["style"]["padding_horizontal"] == 24
+        assert "style" not in captions[1]
+        no_style = layout_caption(captions[1]["text"], (540, 960), scaled[1]["style"], font_path)
+        assert no_style.panel_height == pytest.approx(
+            layout_caption(captions[1]["text"], (1080, 1920), {}, font_path).panel_height / 2, abs=3
+        )
+        assert scale_caption_style({"stroke_width": 0}, 0.5)["stroke_width"] == 0
+        assert draft.lines == full.lines
+        # Posição relativa ao quadro; sobra só o arredondamento dos glifos
+        for name, size in (("panel_x", 0), ("panel_y", 1), ("panel_width", 0), ("panel_height", 1)):
+            relative = getattr(draft, name) / (540, 960)[size]
+            assert relative == pytest.approx(getattr(full, name) / (1080, 1920)[size], abs=0.015)
+
+    @requires_ffmpeg
+    def test_contact_sheet_grid(self, tmp_path):
+        """Testa a grade de quadros distribuídos pelo vídeo."""
+        video = tmp_path / "preview.mp4"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=180x320:rate=15",
+            "-t", "4", "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", str(video),
+        ], check=True)
+
+        sheet_path = build_contact_sheet(str(video), str(tmp_path / "sheet.jpg"), columns=3, rows=2, width=600)
+        sheet = cv2.imread(sheet_path)
+
+        assert sheet.shape == (2 * 356, 600, 3)
+        # Quadros diferentes em cada célula (o testsrc2 muda ao longo do tempo)
+        assert (sheet[:356, :200] != sheet[356:, 400:]).any()
+        assert build_contact_sheet(str(tmp_path / "missing.mp4"), str(tmp_path / "x.jpg")) is None
+
+    @requires_ffmpeg
+    def test_compose_preview_skips_quality_validation(self, tmp_path):
+        """Testa que a prévia sai reduzida e sem validação de qualidade nem retries."""
+        from src.video.generators import final_video_composer as composer_module
+        config = {"final_composition": {
+            "default_resolution": (360, 640), "default_fps": 30, "target_bitrate": "2M",
+            "temp_dir": str(tmp_path / "tmp"), "output_dir": str(tmp_path / "out"),
+            "mezzanine": {"cache_dir": str(tmp_path / "mezzanine")},
+            "draft": {"max_height": 320, "contact_sheet": False},
+        }}
+        composer = composer_module.FinalVideoComposer(config=config)
+        template = composer_module.TemplateConfig(
+            name="draft", resolution=(360, 640), duration=2.0, intro_duration=0.0, outro_duration=0.0,
+            transition_type="fade", background_color="#000000", text_style={}, effects_config=[],
+        )
+        clip = tmp_path / "clip.mp4"
+        audio = tmp_path / "voice.wav"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc2=size=360x640:rate=30",
+            "-t", "2", "-c:v", "libx264", "-pix_fmt", "yuv420p", str(clip),
+        ], check=True)
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=300:sample_rate=44100",
+            "-t", "2", str(audio),
+        ], check=True)
+
+        with patch.object(composer, "_validate_final_quality") as validate:
+            result = composer.compose_preview(
+                str(audio), [composer_module.VideoSegment(path=str(clip), duration=2.0)], template,
+                output_path=str(tmp_path / "preview.mp4"), render_backend="ffmpeg",
+            )
+
+        validate.assert_not_called()
+        assert result.resolution == (180, 320) and result.contact_sheet_path is None
+        capture = cv2.VideoCapture(result.video_path)
+        assert int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) == 180
+        capture.release()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para as métricas de qualidade calculadas durante o encode e o reparo por segmento.
+"""
+
+import shutil
+import subprocess
+from dataclasses import replace
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+import pytest
+
+from src.video.processing.filtergraph_composer import (
+    CompositionJob,
+    CompositionSegment,
+    FilterGraphRenderer,
+    build_composition_command,
+)
+from src.video.processing.quality_monitor import (
+    QualityIssue,
+    QualityMonitor,
+    QualityReport,
+    QualityTap,
+    attach_to_clip,
+    ignore_ranges,
+    localize_issues,
+)
+
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="FFmpeg não disponível")
+
+
+def _textured(seed, size=(160, 90)):
+    rng = np.random.default_rng(seed)
+    return rng.integers(40, 255, (size[0], size[1], 3), dtype=np.uint8)
+
+
+def _make_clip(path, source, duration):
+    separator = ":" if "=" in source else "="
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"{source}{separator}size=320x180:rate=25",
+        "-t", str(duration), "-c:v", "libx264", "-pix_fmt", "yuv420p", str(path),
+    ], check=True)
+    return str(path)
+
+
+def _decode(path):
+    capture = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+class _FakeClip:
+    """Clip mínimo com a interface `fl`/`set_audio` usada pelo monitor."""
+
+    def __init__(self, make_frame, audio=None):
+        self.make_frame = make_frame
+        self.audio = audio
+
+    def get_frame(self, t):
+        return self.make_frame(t)
+
+    def fl(self, fun):
+        return _FakeClip(lambda t: fun(self.get_frame, t), self.audio)
+
+    def set_audio(self, audio):
+        return _FakeClip(self.make_frame, audio)
+
+
+class TestQualityMonitor:
+    """Testes para QualityMonitor, localização de problemas e reparo localizado."""
+
+    def test_frame_issues_are_localized_in_time(self):
+        """Testa intervalos de quadros pretos, congelados e borrados."""
+        monitor = QualityMonitor(fps=10)
+        frozen = _textured(99)
+        for index in range(90):
+            t = index / 10
+            if t < 2:
+                frame = _textured(index)
+            elif t < 4:
+                frame = np.zeros((160, 90, 3), dtype=np.uint8)
+            elif t < 6.5:
+                frame = frozen
+            else:
+                frame = cv2.GaussianBlur(_textured(index), (0, 0), 6)
+            monitor.observe_frame(t, frame)
+
+        report = monitor.report()
+        kinds = {issue.kind: (issue.start, issue.end) for issue in report.issues}
+
+        assert report.frames == 90 and report.video_size == (90, 160)
+        assert kinds["black"] == (2.0, 4.0)
+        assert kinds["freeze"] == (4.1, 6.5)
+        assert kinds["blur"] == (6.5, 9.0)
+        assert not report.passed
+
+    def test_audio_quiet_and_clipping(self):
+        """Testa janelas silenciosas e saturadas no áudio observado em blocos."""
+        rate = 8000
+        t = np.arange(rate * 6) / rate
+        signal = 0.3 * np.sin(2 * np.pi * 220 * t)
+        signal[rate * 2:rate * 5] *= 0.001
+        signal[int(rate * 5.5):int(rate * 5.7)] = 1.0
+        stereo = np.stack([signal, signal], axis=1)
+        monitor = QualityMonitor()
+        for offset in range(0, len(stereo), 1234):
+            monitor.observe_audio(stereo[offset:offset + 1234], rate)
+
+        report = monitor.report()
+        quiet = [issue for issue in report.audio_issues if issue.kind == "quiet"]
+        clipping = [issue for issue in report.audio_issues if issue.kind == "clipping"]
+
+        assert report.audio_duration == pytest.approx(6.0)
+        assert [(issue.start, issue.end) for issue in quiet] == [(2.0, 5.0)]
+        assert clipping[0].start == pytest.approx(5.5) and clipping[0].end == pytest.approx(5.7)
+        assert report.peak_db == pytest.approx(0.0)
+
+    def test_localize_and_attach_to_clip(self):
+        """Testa a atribuição aos clips (sem intro/outro e sem vizinhos na transição) e o filtro do MoviePy."""
+        bounds = [(0.0, 1.0), (1.0, 4.0), (4.0, 7.0), (7.0, 8.0)]
+        issues = [QualityIssue("black", 3.7, 6.5), QualityIssue("freeze", 0.0, 8.0), QualityIssue("quiet", 1, 3)]
+
+        located = localize_issues(issues, bounds, skip=[0, 3])
+        assert sorted(located) == [1, 2]
+        assert [issue.kind for issue in located[1]] == ["freeze"]
+        assert [issue.kind for issue in located[2]] == ["black", "freeze"]
+
+        monitor = QualityMonitor(fps=10)
+        clip = attach_to_clip(_FakeClip(lambda t: np.zeros((16, 9, 3), dtype=np.uint8)), monitor)
+        for index in range(20):
+            clip.get_frame(index / 10)
+        clip.get_frame(1.9)
+        assert monitor.report().frames == 20
+
+    def test_issues_inside_color_ranges_are_ignored(self):
+        """Testa que intro/outro de cor sólida (e o fade até elas) não reprovam o relatório."""
+        report = QualityReport(frames=240, duration=8.0, issues=[
+            QualityIssue("blur", 0.0, 1.6), QualityIssue("black", 5.967, 8.0),
+            QualityIssue("freeze", 1.0, 5.0), QualityIssue("quiet", 0.0, 3.0),
+        ])
+
+        filtered = ignore_ranges(report, [(0.0, 2.0), (6.0, 8.0)])
+
+        assert [(issue.kind, issue.start) for issue in filtered.issues] == [("freeze", 1.0), ("quiet", 0.0)]
+        assert len(report.issues) == 4
+        assert ignore_ranges(QualityReport(frames=240, issues=report.issues[:2]), [(0.0, 2.0), (6.0, 8.0)]).passed
+
+    def test_tap_outputs_and_keyframes_in_command(self, tmp_path):
+        """Testa as saídas de análise no comando e os quadros-chave nas bordas dos clips."""
+        job = CompositionJob(
+            width=180, height=320, fps=25, audio_path="a.m4a",
+            segments=[CompositionSegment(duration=1.0), CompositionSegment(duration=2.02, path="x.mp4")],
+        )
+        tap = QualityTap(QualityMonitor(fps=25), (180, 320), work_dir=str(tmp_path))
+        command = build_composition_command(job, "out.mp4", tap)
+        graph = command[command.index("-filter_complex") + 1]
+
+        assert "split=2[vout][qv_src]" in graph and "[qv_src]scale=180:320:flags=area,format=gray[qv]" in graph
+        assert "asplit=2[aout][qa_src]" in graph
+        assert command[command.index("-force_key_frames") + 1] == "1.000000"
+        assert command[-10:] == tap.output_args() and tap.audio_path in command
+        assert job.segment_frames() == [(0, 25), (25, 76)]
+
+    @requires_ffmpeg
+    def test_render_monitors_and_repairs_only_the_bad_segment(self, tmp_path):
+        """Testa o monitor no encode, o reparo do clip preto e a junção sem reencodar o resto."""
+        good = _make_clip(tmp_path / "good.mp4", "testsrc2", 4)
+        bad = _make_clip(tmp_path / "bad.mp4", "color=c=black", 4)
+        audio = tmp_path / "tone.m4a"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=300:sample_rate=44100",
+            "-t", "6", str(audio),
+        ], check=True)
+        job = CompositionJob(
+            width=180, height=320, fps=25, audio_path=str(audio), audio_duration=6.0,
+            bitrate=None, preset="ultrafast",
+            segments=[
+                CompositionSegment(duration=2.0, path=good, source_size=(320, 180)),
+                CompositionSegment(duration=2.0, path=bad, source_size=(320, 180)),
+                CompositionSegment(duration=2.0, path=good, source_size=(320, 180), start=2.0),
+            ],
+        )
+        renderer = FilterGraphRenderer()
+        output = tmp_path / "out.mp4"
+
+        report = renderer.render(job, str(output), monitor=QualityMonitor(fps=25)).quality
+        located = localize_issues(report.issues, job.segment_bounds())
+        assert report.frames == 150 and report.audio_duration == pytest.approx(6.0, abs=0.1)
+        assert sorted(located) == [1] and located[1][0].kind == "black"
+
+        fixed = replace(job, segments=[job.segments[0], replace(job.segments[1], path=good), job.segments[2]])
+        piece = renderer.render_segment(fixed, 1, str(tmp_path / "piece.mp4"), monitor=QualityMonitor(fps=25))
+        assert piece.quality.frames == 50 and not piece.quality.issues
+        renderer.splice(str(output), job, {1: piece.path}, str(tmp_path / "spliced.mp4"))
+
+        original, spliced = _decode(output), _decode(tmp_path / "spliced.mp4")
+        assert len(spliced) == 150
+        assert original[75].mean() < 25 < spliced[75].mean()
+        # Trechos fora do clip reparado são copiados, sem reencode
+        assert np.array_equal(original[20], spliced[20]) and np.array_equal(original[120], spliced[120])
+        probe = subprocess.run(["ffmpeg", "-i", str(tmp_path / "spliced.mp4")], capture_output=True, text=True)
+        assert "Audio: aac" in probe.stderr
+
+    @requires_ffmpeg
+    def test_composer_passes_timeline_with_intro_and_outro(self, tmp_path):
+        """Testa que uma composição com intro/outro de cor sólida e um clip bom é aprovada."""
+        from src.video.generators.final_video_composer import FinalVideoComposer, TemplateConfig, VideoSegment
+
+        clip = _make_clip(tmp_path / "clip.mp4", "testsrc2", 4)
+        audio = tmp_path / "voice.wav"
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "sine=frequency=300:sample_rate=44100",
+            "-t", "4", str(audio),
+        ], check=True)
+        composer = FinalVideoComposer(config={"final_composition": {
+            "default_resolution": (180, 320), "default_fps": 30, "target_bitrate": "2M",
+            "temp_dir": str(tmp_path / "tmp"), "output_dir": str(tmp_path / "out"),
+            "mezzanine": {"cache_dir": str(tmp_path / "mezzanine")},
+        }})
+        template = TemplateConfig(
+            name="intro_outro", resolution=(180, 320), duration=8.0, intro_duration=2.0, outro_duration=2.0,
+            transition_type="fade", background_color="#1a1a2e", text_style={},
+        )
+
+        with patch.object(composer, "_create_quality_monitor", wraps=composer._create_quality_monitor) as create:
+            composer.compose_final_video(
+                str(audio), [VideoSegment(path=clip, duration=4.0)], template,
+                output_path=str(tmp_path / "final.mp4"), metadata={"retry_on_quality_fail": False},
+                render_backend="ffmpeg",
+            )
+
+        report = composer.last_quality_report
+        assert report.duration == pytest.approx(8.0, abs=0.1)
+        assert report.passed, report.issues
+        # Um monitor por encode: nenhum é criado e descartado fora do backend usado
+        assert create.call_count == 1
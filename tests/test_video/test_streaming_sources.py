@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para a abertura sob demanda das fontes da composição (modo streaming).
+"""
+
+import numpy as np
+import pytest
+
+from src.video.processing.streaming_sources import PeakMemoryMonitor, StreamingSources, release_clip
+
+
+class _Reader:
+    def __init__(self, log, name):
+        self.log = log
+        self.name = name
+
+    def close(self):
+        self.log.append(("close", self.name))
+
+
+class _Clip:
+    """Clip mínimo com leitor, camadas e `get_frame`."""
+
+    def __init__(self, log, name, clips=()):
+        self.reader = _Reader(log, name)
+        self.clips = list(clips)
+        self.mask = None
+        self.audio = None
+
+    def get_frame(self, t):
+        return np.full((4, 4, 3), int(t * 10), dtype=np.uint8)
+
+
+class TestStreamingSources:
+    """Testes para o limite de fontes abertas, o fechamento e a medição de memória."""
+
+    def test_sources_open_just_in_time_and_close_after_their_range(self):
+        """Testa abertura sob demanda, fechamento ao passar do intervalo e frames corretos."""
+        log = []
+        sources = StreamingSources(max_open=2)
+        keys = []
+        for index in range(6):
+            def opener(index=index):
+                log.append(("open", index))
+                return _Clip(log, index, clips=[_Clip(log, f"bg{index}")])
+            keys.append(sources.register(index * 2.0, index * 2.0 + 2.0, opener))
+
+        assert log == []
+        for frame in range(120):
+            t = frame / 10
+            key = keys[int(t // 2)]
+            image = sources.get_frame(key, t - key * 2.0)
+            assert image[0, 0, 0] == int((t - key * 2.0) * 10)
+            assert sources.open_count == 1
+
+        assert [entry for entry in log if entry[0] == "open"] == [("open", index) for index in range(6)]
+        assert sources.stats.opened == 6 and sources.stats.closed == 5 and sources.stats.max_open == 1
+        # Leitores do segmento e do fundo desfocado são fechados juntos
+        assert ("close", 0) in log and ("close", "bg0") in log
+        sources.close_all()
+        assert sources.open_count == 0 and sources.stats.readers_closed == 12
+
+    def test_max_open_evicts_least_recently_used(self):
+        """Testa o limite de fontes abertas quando o acesso não é sequencial."""
+        log = []
+        sources = StreamingSources(max_open=2)
+        keys = [sources.register(0.0, 10.0, lambda index=index: _Clip(log, index)) for index in range(3)]
+
+        for key in (0, 1, 0, 2, 1):
+            sources.get_frame(keys[key], 0.5)
+
+        assert sources.stats.max_open == 2 and sources.open_count == 2
+        assert [name for action, name in log if action == "close"] == [1, 0]
+        assert sources.stats.opened == 4
+
+    def test_release_clip_walks_layers_once(self):
+        """Testa o fechamento de leitores compartilhados entre cópias e camadas."""
+        log = []
+        base = _Clip(log, "src")
+        copy = _Clip(log, "ignored")
+        copy.reader = base.reader
+        composite = _Clip(log, "composite", clips=[base, copy])
+        composite.reader = None
+        composite.audio = _Clip(log, "audio")
+
+        assert release_clip(composite) == 2
+        assert sorted(name for _, name in log) == ["audio", "src"]
+
+    def test_peak_memory_monitor_sees_allocations(self):
+        """Testa que o pico de RSS registra uma alocação liberada antes do fim."""
+        pytest.importorskip("psutil")
+        with PeakMemoryMonitor(interval=0.01) as memory:
+            block = np.ones(64 * 1024 * 1024, dtype=np.uint8)
+            memory.sample()
+            del block
+
+        assert memory.peak_rss_mb is not None and memory.growth_mb >= 50
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Testes para a triagem de candidatos por thumbnail.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from src.video.matching.thumbnail_prescreener import (
+    ThumbnailAssessment,
+    ThumbnailCache,
+    ThumbnailPrescreener,
+)
+
+
+def _scene(seed=0, size=(360, 480)):
+    """Imagem sintética sem texto (gradiente + formas)."""
+    rng = np.random.default_rng(seed)
+    height, width = size
+    image = np.zeros((height, width, 3), np.uint8)
+    for y in range(height):
+        image[y, :] = (80 + y // 3, 120, 200 - y // 3)
+    for _ in range(6):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.circle(image, center, int(rng.integers(20, 80)), color, -1)
+    return cv2.GaussianBlur(image, (5, 5), 0)
+
+
+class TestThumbnailPrescreener:
+    """Testes para ThumbnailPrescreener e ThumbnailCache."""
+
+    @pytest.fixture
+    def cache_dir(self, tmp_path):
+        return tmp_path / "thumbs"
+
+    @pytest.fixture
+    def write_thumb(self, cache_dir):
+        """Popula o cache local (triagem offline)."""
+        cache = ThumbnailCache(str(cache_dir), fetcher=lambda url: None)
+
+        def _write(video_id, image):
+            cv2.imwrite(str(cache.path_for(video_id)), image)
+        return _write
+
+    @pytest.fixture
+    def prescreener(self, cache_dir):
+        return ThumbnailPrescreener(ThumbnailCache(str(cache_dir), fetcher=lambda url: None))
+
+    def test_cache_fetches_once(self, tmp_path):
+        """Testa que a thumbnail é baixada uma única vez."""
+        calls = []
+        payload = cv2.imencode(".jpg", _scene())[1].tobytes()
+
+        def _fetch(url):
+            calls.append(url)
+            return payload
+
+        cache = ThumbnailCache(str(tmp_path), fetcher=_fetch)
+        first = cache.get("abc123")
+        second = cache.get("abc123")
+
+        assert first == second
+        assert calls == ["https://i.ytimg.com/vi/abc123/hqdefault.jpg"]
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_accepts_clean_thumbnail(self, prescreener, write_thumb):
+        """Testa aceitação de thumbnail limpa em moldura 16:9 dentro de 4:3."""
+        image = np.zeros((360, 480, 3), np.uint8)
+        image[45:315] = _scene()[45:315]
+        write_thumb("clean", image)
+
+        [assessment] = prescreener.screen([{"id": "clean", "title": "Cute cats playing"}], "cute cats")
+
+        assert isinstance(assessment, ThumbnailAssessment)
+        assert assessment.accepted
+        assert assessment.content_aspect == pytest.approx(480 / 270, rel=0.01)
+        assert assessment.relevance == 1.0
+
+    def test_rejects_letterbox_and_text(self, prescreener, write_thumb):
+        """Testa rejeição de letterbox de cinema e de thumbnails com muito texto."""
+        letterbox = np.zeros((360, 480, 3), np.uint8)
+        letterbox[90:270] = _scene(1)[90:270]
+        write_thumb("cinema", letterbox)
+
+        text_heavy = _scene(2)
+        for y in range(60, 330, 50):
+            cv2.putText(text_heavy, "TOP 10 AMAZING FACTS", (10, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.1, (255, 255, 255), 3)
+        write_thumb("clickbait", text_heavy)
+
+        cinema, clickbait = prescreener.screen(
+            [{"id": "cinema", "title": "a"}, {"id": "clickbait", "title": "b"}], "ocean"
+        )
+
+        assert not cinema.accepted
+        assert "letterbox" in cinema.reasons[0]
+        assert not clickbait.accepted
+        assert clickbait.text_ratio > prescreener.max_text_ratio
+
+    def test_rejects_duplicates_of_better_ranked(self, prescreener, write_thumb):
+        """Testa que reuploads (mesma imagem redimensionada) são descartados."""
+        scene = _scene(3)
+        write_thumb("original", scene)
+        write_thumb("reupload", cv2.resize(scene, (320, 240)))
+        write_thumb("other", _scene(4))
+
+        original, reupload, other = prescreener.screen(
+            [{"id": "original"}, {"id": "reupload"}, {"id": "other"}], "scene"
+        )
+
+        assert original.accepted and other.accepted
+        assert not reupload.accepted
+        assert reupload.duplicate_of == "original"
+
+    def test_missing_thumbnail_does_not_reject(self, prescreener):
+        """Testa que a falta de thumbnail não bloqueia o candidato."""
+        [assessment] = prescreener.screen([{"id": "offline", "title": "dog"}], "dog")
+
+        assert assessment.accepted
+        assert assessment.thumbnail_path is None
+
+    def test_clip_relevance_threshold(self, cache_dir, write_thumb):
+        """Testa uso do scorer CLIP quando disponível."""
+        class FakeClip:
+            def score_text_image_relevance(self, text, image_path):
+                return 0.05 if "bad" in image_path else 0.3
+
+        write_thumb("good", _scene(5))
+        write_thumb("bad", _scene(6))
+        prescreener = ThumbnailPrescreener(
+            ThumbnailCache(str(cache_dir), fetcher=lambda url: None), clip_scorer=FakeClip()
+        )
+
+        good, bad = prescreener.screen([{"id": "good"}, {"id": "bad"}], "forest")
+
+        assert good.accepted and good.relevance == 0.3
+        assert not bad.accepted